@@ -7,17 +7,27 @@ and optional MAE/MFE calculation from OHLC bars.
 from __future__ import annotations
 
 import argparse
+import bisect
 import csv
 import json
 import math
-import re
+import sys
 from collections import defaultdict, deque
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
 
+try:
+    from scripts.analyzers.perf import PerfRecorder, add_perf_args
+    from scripts.analyzers.trade_closes import iter_trade_closes
+except ImportError:  # run as path_issues/reconstruct_fifo.py without the repo root on sys.path
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from scripts.analyzers.perf import PerfRecorder, add_perf_args
+    from scripts.analyzers.trade_closes import iter_trade_closes
+
 EPSILON = Decimal("1e-12")
 
 
@@ -77,6 +87,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--out", required=True, help="Output CSV path")
     parser.add_argument("--bars-dir", required=False, help="Directory containing OHLC bars for MAE/MFE")
     parser.add_argument("--fill-phase", default="FILL", help="Phase value marking fill rows")
+    add_perf_args(parser)
     return parser.parse_args()
 
 
@@ -99,6 +110,26 @@ def load_metadata(path: Optional[str]) -> RunMetadata:
         return RunMetadata()
 
 
+@lru_cache(maxsize=64)
+def _read_bar_file(bars_path: str, mtime_ns: int) -> Tuple[List[int], List[Tuple[Decimal, Decimal, Decimal, Decimal]]]:
+    """Parse a bars CSV once; sorted open times and their OHLC. ``mtime_ns`` keys the cache to the file version."""
+    rows: List[Tuple[int, Tuple[Decimal, Decimal, Decimal, Decimal]]] = []
+    try:
+        with open(bars_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                rows.append((int(row.get('timestamp_ms', 0)), (
+                    Decimal(str(row.get('open', '0'))),
+                    Decimal(str(row.get('high', '0'))),
+                    Decimal(str(row.get('low', '0'))),
+                    Decimal(str(row.get('close', '0'))),
+                )))
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    rows.sort(key=lambda item: item[0])
+    return [ts for ts, _ in rows], [ohlc for _, ohlc in rows]
+
+
 def load_bars(bars_dir: Optional[str], symbol: str, start_ms: int, end_ms: int) -> List[BarData]:
     if not bars_dir:
         return []
@@ -107,25 +138,11 @@ def load_bars(bars_dir: Optional[str], symbol: str, start_ms: int, end_ms: int)
     if not bars_path.exists():
         return []
 
-    bars = []
-    try:
-        with open(bars_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                timestamp = int(row.get('timestamp_ms', 0))
-                if start_ms <= timestamp <= end_ms:
-                    bars.append(BarData(
-                        symbol=symbol,
-                        timestamp=timestamp,
-                        open_price=Decimal(str(row.get('open', '0'))),
-                        high=Decimal(str(row.get('high', '0'))),
-                        low=Decimal(str(row.get('low', '0'))),
-                        close_price=Decimal(str(row.get('close', '0')))
-                    ))
-    except (FileNotFoundError, ValueError, KeyError):
-        pass
-
-    return bars
+    # One parse per file, then a binary search per trade window
+    timestamps, ohlc = _read_bar_file(str(bars_path), bars_path.stat().st_mtime_ns)
+    lo = bisect.bisect_left(timestamps, start_ms)
+    hi = bisect.bisect_right(timestamps, end_ms)
+    return [BarData(symbol, timestamps[i], *ohlc[i]) for i in range(lo, hi)]
 
 
 def calculate_mae_mfe(bars: List[BarData], open_price: Decimal, side: str) -> Tuple[Decimal, Decimal]:
@@ -162,24 +179,18 @@ def read_closes_log(path: Optional[str]) -> Dict[str, CloseLogEntry]:
     if not log_path.exists():
         return {}
 
-    pattern = re.compile(
-        r"^(?P<ts>[^\s]+)\s+CLOSED\s+(?P<order>[A-Z0-9\-]+)\s+[^=]+size=(?P<size>[-0-9.]+)\s+pnl=(?P<pnl>[-0-9.eE]+)"
-    )
+    # Shared reader handles both the JSON {timestamp_iso, payload} lines and legacy CLOSED text
     results: Dict[str, CloseLogEntry] = {}
-    with log_path.open("r", encoding="utf-8", errors="replace") as handle:
-        for line in handle:
-            match = pattern.search(line)
-            if not match:
-                continue
-            ts_iso = match.group("ts")
-            order_raw = match.group("order")
-            pnl_raw = match.group("pnl")
-            try:
-                pnl_val = Decimal(pnl_raw)
-            except (InvalidOperation, ValueError):
-                continue
-            normalized = normalize_order_id(order_raw)
-            results[normalized] = CloseLogEntry(ts_iso, pnl_val)
+    for rec in iter_trade_closes(log_path):
+        try:
+            pnl_val = Decimal(rec.pnl_text)
+        except (InvalidOperation, ValueError):
+            continue
+        entry = CloseLogEntry(rec.timestamp_iso, pnl_val)
+        for raw_id in (rec.order_id, rec.trade_id):
+            normalized = normalize_order_id(raw_id)
+            if normalized:
+                results[normalized] = entry
     return results
 
 
@@ -248,107 +259,111 @@ def read_fills(orders_path: Path, fill_phase: str) -> List[Fill]:
     if not orders_path.exists():
         raise FileNotFoundError(f"orders.csv not found: {orders_path}")
 
-    fills: List[Fill] = []
     with orders_path.open("r", newline="", encoding="utf-8-sig") as fh:
         reader = csv.DictReader(fh)
-        fieldnames = reader.fieldnames or []
-
-        phase_col = pick_column(fieldnames, ["phase", "event", "status", "type"])
-        symbol_col = pick_column(fieldnames, ["symbol", "instrument", "ticker"])
-        side_col = pick_column(fieldnames, ["side", "direction"])
-        order_col = pick_column(fieldnames, ["orderId", "order_id", "client_order_id", "broker_order_id"])
-        price_col = pick_column(
-            fieldnames,
-            [
-                "execPrice", "price_filled", "price", "fill_price", "executionPrice", "fillPrice", "executed_price"
-            ],
-        )
-        volume_col = pick_column(
-            fieldnames,
-            [
-                "filledSize", "size_filled", "size", "volume", "requestedVolume",
-                "quantity", "theoretical_units", "theoretical_lots", "requested_lots"
-            ],
-        )
-        epoch_col = pick_column(
-            fieldnames,
-            [
-                "epoch_ms", "timestamp_ms", "fill_epoch_ms", "event_epoch_ms", "time_ms", "epoch"
-            ],
-        )
-        iso_col = pick_column(
-            fieldnames,
-            [
-                "timestamp_iso", "fill_time", "fill_timestamp", "event_time", "timestamp"
-            ],
-        )
-        commission_col = pick_column(fieldnames, ["commission", "fee", "brokerage_fee"])
-        spread_col = pick_column(fieldnames, ["spread_cost", "spread", "bid_ask_spread_cost"])
-        slippage_col = pick_column(fieldnames, ["slippage_pips", "slippage", "price_slippage_pips"])
-        for row in reader:
-            if phase_col:
-                phase = str(row.get(phase_col, "")).strip().upper()
-                if phase != str(fill_phase).strip().upper():
-                    continue
+        return fills_from_rows(reader.fieldnames or [], reader, fill_phase)
 
-            symbol = str(row.get(symbol_col, "")).strip() if symbol_col else "UNKNOWN"
-            if not symbol or symbol == "":
-                symbol = "UNKNOWN"
-
-            side_raw = str(row.get(side_col, "")).strip().upper() if side_col else ""
-            if side_raw in ("LONG", "OPEN_LONG"):
-                side = "BUY"
-            elif side_raw in ("SHORT", "OPEN_SHORT"):
-                side = "SELL"
-            elif side_raw in ("BUY", "SELL"):
-                side = side_raw
-            else:
-                continue
 
-            order_id_raw = str(row.get(order_col, "")).strip() if order_col else ""
-            order_id = order_id_raw or f"fill_{len(fills)+1}"
+def fills_from_rows(fieldnames: List[str], rows: Iterable[Dict[str, str]], fill_phase: str) -> List[Fill]:
+    """Fill rows from already-parsed orders.csv rows (lets a caller share one parse)."""
+    fills: List[Fill] = []
 
-            try:
-                volume = Decimal(str(row.get(volume_col, "")).strip()) if volume_col else None
-            except (InvalidOperation, TypeError):
-                volume = None
-            if not volume or volume <= 0:
+    phase_col = pick_column(fieldnames, ["phase", "event", "status", "type"])
+    symbol_col = pick_column(fieldnames, ["symbol", "instrument", "ticker"])
+    side_col = pick_column(fieldnames, ["side", "direction"])
+    order_col = pick_column(fieldnames, ["orderId", "order_id", "client_order_id", "broker_order_id"])
+    price_col = pick_column(
+        fieldnames,
+        [
+            "execPrice", "price_filled", "price", "fill_price", "executionPrice", "fillPrice", "executed_price"
+        ],
+    )
+    volume_col = pick_column(
+        fieldnames,
+        [
+            "filledSize", "size_filled", "size", "volume", "requestedVolume",
+            "quantity", "theoretical_units", "theoretical_lots", "requested_lots"
+        ],
+    )
+    epoch_col = pick_column(
+        fieldnames,
+        [
+            "epoch_ms", "timestamp_ms", "fill_epoch_ms", "event_epoch_ms", "time_ms", "epoch"
+        ],
+    )
+    iso_col = pick_column(
+        fieldnames,
+        [
+            "timestamp_iso", "fill_time", "fill_timestamp", "event_time", "timestamp"
+        ],
+    )
+    commission_col = pick_column(fieldnames, ["commission", "fee", "brokerage_fee"])
+    spread_col = pick_column(fieldnames, ["spread_cost", "spread", "bid_ask_spread_cost"])
+    slippage_col = pick_column(fieldnames, ["slippage_pips", "slippage", "price_slippage_pips"])
+    for row in rows:
+        if phase_col:
+            phase = str(row.get(phase_col, "")).strip().upper()
+            if phase != str(fill_phase).strip().upper():
                 continue
 
-            price = None
-            for candidate in (
-                price_col, "execPrice", "price_filled", "fill_price", "price", "intendedPrice"
-            ):
-                if candidate and candidate in row and row[candidate] not in (None, ""):
-                    try:
-                        price = Decimal(str(row[candidate]).strip())
+        symbol = str(row.get(symbol_col, "")).strip() if symbol_col else "UNKNOWN"
+        if not symbol or symbol == "":
+            symbol = "UNKNOWN"
+
+        side_raw = str(row.get(side_col, "")).strip().upper() if side_col else ""
+        if side_raw in ("LONG", "OPEN_LONG"):
+            side = "BUY"
+        elif side_raw in ("SHORT", "OPEN_SHORT"):
+            side = "SELL"
+        elif side_raw in ("BUY", "SELL"):
+            side = side_raw
+        else:
+            continue
+
+        order_id_raw = str(row.get(order_col, "")).strip() if order_col else ""
+        order_id = order_id_raw or f"fill_{len(fills)+1}"
+
+        try:
+            volume = Decimal(str(row.get(volume_col, "")).strip()) if volume_col else None
+        except (InvalidOperation, TypeError):
+            volume = None
+        if not volume or volume <= 0:
+            continue
+
+        price = None
+        for candidate in (
+            price_col, "execPrice", "price_filled", "fill_price", "price", "intendedPrice"
+        ):
+            if candidate and candidate in row and row[candidate] not in (None, ""):
+                try:
+                    price = Decimal(str(row[candidate]).strip())
+                    break
+                except (InvalidOperation, TypeError):
+                    continue
+        if price is None:
+            continue
+
+        epoch_ms = None
+        if epoch_col and row.get(epoch_col):
+            epoch_ms = parse_epoch_ms(row.get(epoch_col))
+        if epoch_ms is None and iso_col and row.get(iso_col):
+            epoch_ms = parse_epoch_ms(row.get(iso_col))
+        if epoch_ms is None:
+            for candidate in ("timestamp_iso", "fill_time", "timestamp"):
+                if candidate in row and row[candidate]:
+                    epoch_ms = parse_epoch_ms(row[candidate])
+                    if epoch_ms is not None:
                         break
-                    except (InvalidOperation, TypeError):
-                        continue
-            if price is None:
-                continue
-
-            epoch_ms = None
-            if epoch_col and row.get(epoch_col):
-                epoch_ms = parse_epoch_ms(row.get(epoch_col))
-            if epoch_ms is None and iso_col and row.get(iso_col):
-                epoch_ms = parse_epoch_ms(row.get(iso_col))
-            if epoch_ms is None:
-                for candidate in ("timestamp_iso", "fill_time", "timestamp"):
-                    if candidate in row and row[candidate]:
-                        epoch_ms = parse_epoch_ms(row[candidate])
-                        if epoch_ms is not None:
-                            break
-            if epoch_ms is None:
-                continue
+        if epoch_ms is None:
+            continue
 
-            iso = epoch_to_iso(epoch_ms)
+        iso = epoch_to_iso(epoch_ms)
 
-            commission = safe_decimal(row.get(commission_col, ""))
-            spread_cost = safe_decimal(row.get(spread_col, ""))
-            slippage_pips = safe_decimal(row.get(slippage_col, ""))
+        commission = safe_decimal(row.get(commission_col, ""))
+        spread_cost = safe_decimal(row.get(spread_col, ""))
+        slippage_pips = safe_decimal(row.get(slippage_col, ""))
 
-            fills.append(Fill(symbol, side, volume, price, epoch_ms, iso, order_id, commission, spread_cost, slippage_pips))
+        fills.append(Fill(symbol, side, volume, price, epoch_ms, iso, order_id, commission, spread_cost, slippage_pips))
     fills.sort(key=lambda f: f.epoch_ms)
     return fills
 
@@ -486,18 +501,32 @@ def main() -> int:
     orders_path = Path(args.orders)
     output_path = Path(args.out)
 
+    perf = PerfRecorder("reconstruct_fifo", args.profile)
+    perf_dir = Path(args.perf_dir) if args.perf_dir else output_path.parent
+    perf.start()
     metadata = load_metadata(args.meta)
-    fills = read_fills(orders_path, args.fill_phase)
+    with perf.stage("parse") as span:
+        fills = read_fills(orders_path, args.fill_phase)
+        span.rows = len(fills)
 
     if not fills:
         write_output(output_path, [])
+        perf.stop()
+        perf.write(perf_dir)
         print("WARNING: No fills found in orders.csv; wrote empty reconstruction file")
         return 0
 
-    matches = reconstruct(fills)
-    closes_lookup = read_closes_log(args.closes)
-    rows = build_rows(matches, closes_lookup, metadata, args.bars_dir)
-    write_output(output_path, rows)
+    with perf.stage("match", rows=len(fills)):
+        matches = reconstruct(fills)
+    with perf.stage("load_closes") as span:
+        closes_lookup = read_closes_log(args.closes)
+        span.rows = len(closes_lookup)
+    with perf.stage("aggregate", rows=len(matches)):
+        rows = build_rows(matches, closes_lookup, metadata, args.bars_dir)
+    with perf.stage("write", rows=len(rows)):
+        write_output(output_path, rows)
+    perf.stop()
+    perf.write(perf_dir)
 
     total_pnl = sum(Decimal(row["pnl_currency"]) for row in rows)
     print(f"SUCCESS: Reconstructed {len(rows)} closed trades -> {output_path}")
@@ -26,19 +26,27 @@ import os
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 
-import pandas as pd
-
 try:
-    import numpy as np
-except Exception:  # pragma: no cover
-    np = None  # type: ignore
-
-try:  # plots optional
-    import matplotlib
-    matplotlib.use("Agg")
-    import matplotlib.pyplot as plt
-except Exception:  # pragma: no cover
-    plt = None  # type: ignore
+    from analyzers.lazy_imports import lazy_import, use_agg_backend
+    from analyzers.perf import PerfRecorder, add_perf_args
+    from analyzers.result_cache import (
+        ResultCache, add_cache_args, changed_files, code_version, import_closure, snapshot_dir,
+    )
+    from analyzers.run_catalog import resolve_latest_run
+except ImportError:  # imported as scripts.analyze_postrun
+    from scripts.analyzers.lazy_imports import lazy_import, use_agg_backend
+    from scripts.analyzers.perf import PerfRecorder, add_perf_args
+    from scripts.analyzers.result_cache import (
+        ResultCache, add_cache_args, changed_files, code_version, import_closure, snapshot_dir,
+    )
+    from scripts.analyzers.run_catalog import resolve_latest_run
+
+# Imported on first use so --help skips them
+pd = lazy_import("pandas")
+np = lazy_import("numpy", optional=True)
+plt = lazy_import("matplotlib.pyplot", optional=True, before_load=use_agg_backend)  # plots optional
+
+QUANTILES = (0.5, 0.75, 0.9, 0.95, 0.99)
 
 
 def find_col(cols, candidates):
@@ -54,6 +62,10 @@ def latest_run_dir(logdir: Path) -> Optional[Path]:
     art = logdir / "artifacts"
     if not art.exists():
         return None
+    # Catalog lookup avoids stat-ing every run dir on large archives
+    latest = resolve_latest_run(art)
+    if latest is not None and latest.is_dir():
+        return latest
     runs = [p for p in art.iterdir() if p.is_dir() and p.name.startswith("telemetry_run_")]
     if not runs:
         return None
@@ -87,7 +99,7 @@ def derive_from_orders(orders_csv: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
 
     # Per-hour counts
     hdf = odf.copy()
-    hdf["hour"] = hdf["_ts"].dt.floor("H")
+    hdf["hour"] = hdf["_ts"].dt.floor("h")
     if ev_col and ev_col in hdf.columns:
         rq = hdf[hdf[ev_col].astype(str).str.upper().eq("REQUEST")].groupby("hour").size().rename("requests")
         fl = hdf[hdf[ev_col].astype(str).str.upper().eq("FILL")].groupby("hour").size().rename("fills")
@@ -160,7 +172,7 @@ def derive_from_orders(orders_csv: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
     return fdf, hourly
 
 
-def percentiles(series: pd.Series, qs=(0.5, 0.75, 0.9, 0.95, 0.99)) -> Dict[str, float]:
+def percentiles(series: pd.Series, qs=QUANTILES) -> Dict[str, float]:
     s = pd.to_numeric(series, errors="coerce").dropna()
     if s.empty:
         return {f"p{int(q*100)}": math.nan for q in qs}
@@ -171,13 +183,16 @@ def percentiles(series: pd.Series, qs=(0.5, 0.75, 0.9, 0.95, 0.99)) -> Dict[str,
     return {f"p{int(q*100)}": float(v) for q, v in zip(qs, vals)}
 
 
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--fills", help="Path to closed_trades_fifo_reconstructed.csv")
     ap.add_argument("--orders", help="Path to orders.csv")
     ap.add_argument("--logdir", help="Log root to auto-discover latest run")
     ap.add_argument("--outdir", default="path_issues", help="Output directory")
-    args = ap.parse_args()
+    ap.add_argument("--no-plots", action="store_true", help="Skip the PNG plots")
+    add_perf_args(ap)
+    add_cache_args(ap)
+    args = ap.parse_args(argv)
 
     out = Path(args.outdir)
     out.mkdir(parents=True, exist_ok=True)
@@ -198,13 +213,34 @@ def main():
     fills_df: Optional[pd.DataFrame] = None
     hourly: Optional[pd.DataFrame] = None
 
+    perf = PerfRecorder("analyze_postrun", args.profile)
+    perf.start()
+    perf_dir = Path(args.perf_dir) if args.perf_dir else out
+    cache = ResultCache.from_args(args)
+    if cache is not None:
+        with perf.stage("cache_lookup"):
+            inputs = [p for p in (fills_path, orders_path) if p]
+            key = cache.key("analyze_postrun", code_version(*import_closure(Path(__file__))),
+                            dict(vars(args), inputs=[p.resolve() for p in inputs], outdir=out.resolve()), inputs)
+            hit = cache.restore(key, out)
+        if hit is not None:
+            perf.stop()
+            perf.write(perf_dir)
+            print(f"Cached results restored to {out}")
+            return
+        before = snapshot_dir(out)
+
+    draw_plots = plt is not None and not args.no_plots
+    span = perf.begin("load")
     if fills_path and fills_path.exists():
         fills_df = load_fills(fills_path)
     elif orders_path and orders_path.exists():
         fills_df, hourly = derive_from_orders(orders_path)
     else:
         raise SystemExit("No input found: provide --fills or --orders or --logdir with artifacts.")
+    perf.end(span, rows=len(fills_df))
 
+    span = perf.begin("aggregate", rows=len(fills_df))
     # Column inference for fills
     cols = list(fills_df.columns)
     ts_col = find_col(cols, ["timestamp", "time", "close_time", "closed_time", "fill_ts", "_ts"]) or cols[0]
@@ -229,7 +265,7 @@ def main():
     # Build hourly if not from orders
     if hourly is None:
         # Without explicit requests count, report fills and unknown requests
-        h = f.copy(); h["timestamp"] = h["_ts"].dt.floor("H")
+        h = f.copy(); h["timestamp"] = h["_ts"].dt.floor("h")
         hourly = h.groupby("timestamp").size().reset_index(name="fills")
         hourly["requests"] = math.nan
         hourly["fill_rate"] = math.nan
@@ -245,18 +281,21 @@ def main():
     else:
         out_json["latency_ms"] = {k: math.nan for k in ["p50", "p75", "p90", "p95", "p99"]}
 
+    perf.end(span)
+
+    span = perf.begin("write")
     with open(out / "slip_latency_percentiles.json", "w", encoding="utf-8") as fp:
         json.dump(out_json, fp, ensure_ascii=False, indent=2)
 
     # Hourly fill rate & medians
     if lat_col and lat_col in f.columns:
-        med_lat = f.assign(hour=f["_ts"].dt.floor("H")).groupby("hour")[lat_col].median().rename("median_latency_ms")
+        med_lat = f.assign(hour=f["_ts"].dt.floor("h")).groupby("hour")[lat_col].median().rename("median_latency_ms")
     else:
-        med_lat = pd.Series(dtype=float)
+        med_lat = pd.Series(dtype=float, name="median_latency_ms")
     if slip_col and slip_col in f.columns:
-        med_slp = f.assign(hour=f["_ts"].dt.floor("H")).groupby("hour")[slip_col].median().rename("median_slippage")
+        med_slp = f.assign(hour=f["_ts"].dt.floor("h")).groupby("hour")[slip_col].median().rename("median_slippage")
     else:
-        med_slp = pd.Series(dtype=float)
+        med_slp = pd.Series(dtype=float, name="median_slippage")
     hourly = hourly.set_index("timestamp").join(med_lat, how="left").join(med_slp, how="left").reset_index()
     hourly.to_csv(out / "fillrate_hourly.csv", index=False)
 
@@ -269,8 +308,11 @@ def main():
         top = top.sort_values("abs_slip", ascending=False).head(20)
     top.to_csv(out / "top_slippage.csv", index=False)
 
+    perf.end(span)
+
     # Plots
-    if plt is not None:
+    span = perf.begin("plots")
+    if draw_plots:
         try:
             if slip_col and slip_col in f.columns:
                 plt.figure(figsize=(6, 4))
@@ -311,6 +353,11 @@ def main():
     # Minimal human summary
     with open(out / "postrun_summary.txt", "w", encoding="utf-8") as fp:
         fp.write("Slippage/Latency percentiles (see slip_latency_percentiles.json) and hourly fill-rate saved.\n")
+    perf.end(span)
+    if cache is not None:
+        cache.store(key, "analyze_postrun", out, changed_files(out, before))
+    perf.stop()
+    perf.write(perf_dir)
 
 
 if __name__ == "__main__":
@@ -2,10 +2,18 @@
 import os, sys, json, csv, math
 from datetime import datetime
 
+try:
+    from analyzers.run_catalog import resolve_latest_run
+except ImportError:  # imported as scripts.analyze_smoke
+    from scripts.analyzers.run_catalog import resolve_latest_run
+
 def find_latest_run(log_path: str) -> str | None:
     art = os.path.join(log_path, 'artifacts')
     if not os.path.isdir(art):
         return None
+    latest = resolve_latest_run(art)
+    if latest is not None and latest.is_dir():
+        return str(latest)
     runs = [os.path.join(art, d) for d in os.listdir(art) if d.startswith('telemetry_run_')]
     runs = [d for d in runs if os.path.isdir(d)]
     if not runs:
@@ -329,6 +337,9 @@ def autodetect_latest_smoke(base_ws: str) -> Optional[str]:
     arts = os.path.join(base_ws, "artifacts")
     if not os.path.isdir(arts):
         return None
+    latest = resolve_latest_run(arts, kind="smoke")
+    if latest is not None and latest.is_dir():
+        return str(latest)
     # Only consider directories for telemetry_run_*
     trun_dirs = [os.path.join(arts, d) for d in os.listdir(arts)
                  if d.startswith("telemetry_run_") and os.path.isdir(os.path.join(arts, d))]
@@ -1,5 +1,11 @@
-import argparse, csv, json, os, glob
+import argparse, csv, json, os
 from datetime import datetime
+from pathlib import Path
+
+try:
+    from analyzers.run_catalog import discover_point_values, lookup_point_values
+except ImportError:  # imported as scripts.analyzer
+    from scripts.analyzers.run_catalog import discover_point_values, lookup_point_values
 
 def read_closed(path):
     rows = []
@@ -82,76 +88,12 @@ def max_drawdown(series):
             mdd = dd
     return mdd
 
-def try_read_json(path):
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception:
-        return None
-
 def discover_pvu(run_dir):
-    """Attempt to read point value per unit/lot from run metadata or side files."""
-    # 1) run_metadata.json common locations/keys
-    md = try_read_json(os.path.join(run_dir, 'run_metadata.json'))
-    pvl = None
-    pvu = None
-    if isinstance(md, dict):
-        try:
-            if 'pointValuePerLot' in md and md['pointValuePerLot']:
-                pvl = float(md['pointValuePerLot'])
-        except Exception:
-            pass
-        try:
-            extra = md.get('extra') or {}
-            if isinstance(extra, dict) and extra.get('pointValuePerLot'):
-                pvl = float(extra['pointValuePerLot'])
-        except Exception:
-            pass
-        try:
-            cfg = ((md.get('config_snapshot') or {}).get('execution') or {})
-            if cfg.get('pointValuePerLot'):
-                pvl = float(cfg['pointValuePerLot'])
-            if cfg.get('pointValuePerUnit'):
-                pvu = float(cfg['pointValuePerUnit'])
-        except Exception:
-            pass
-        try:
-            if md.get('pvu_used'):
-                pvu = float(md['pvu_used'])
-        except Exception:
-            pass
-    # 2) risk snapshot files (scan shallow)
-    if pvu is None and pvl is None:
-        try:
-            for p in glob.glob(os.path.join(run_dir, '*risk*.*')):
-                x = try_read_json(p)
-                if not isinstance(x, dict):
-                    continue
-                for k, v in x.items():
-                    try:
-                        if 'point' in k.lower() and 'lot' in k.lower() and pvl is None:
-                            pvl = float(v)
-                        if 'pvu' in k.lower() and pvu is None:
-                            pvu = float(v)
-                    except Exception:
-                        continue
-        except Exception:
-            pass
-    # 3) Convert per-lot to per-unit if lot size available in metadata
-    if pvu is None and pvl is not None:
-        # Try to read lot size default from metadata snapshot
-        lot_size = None
-        try:
-            rs = (((md or {}).get('config_snapshot') or {}).get('risk') or {})
-            if isinstance(rs, dict):
-                ls = rs.get('LotSizeDefault') or rs.get('lot_size_default')
-                if ls:
-                    lot_size = float(ls)
-        except Exception:
-            pass
-        if lot_size and lot_size > 0:
-            pvu = pvl / lot_size
-    return pvu, pvl
+    """Attempt to read point value per unit/lot from the run catalog, run metadata or side files."""
+    cached = lookup_point_values(Path(run_dir))
+    if cached is not None and any(v is not None for v in cached):
+        return cached
+    return discover_point_values(Path(run_dir))
 
 def main():
     ap = argparse.ArgumentParser()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""Cross-run KPI aggregation over the artifact archive.
+
+Computes per-run KPIs (fill rate, latency quantiles, slippage, PnL, max
+drawdown, validator verdict) for a set of ``telemetry_run_*`` directories in a
+process pool, then writes one consolidated table and fleet-wide percentiles
+from merged quantile sketches.
+
+Runs are given explicitly (``--runs``, globs allowed) or selected from the run
+catalog (``--catalog <artifacts> [--since ...] [--until ...]``).
+
+Usage:
+  python -m scripts.analyzers.batch_kpis --runs D:/botg/logs/artifacts/telemetry_run_2025110* --out reports/fleet
+  python -m scripts.analyzers.batch_kpis --catalog D:/botg/logs/artifacts --since 2025-11-01 --out reports/fleet
+
+Outputs (written to --out):
+  - fleet_kpis.csv       one row per run
+  - fleet_summary.json   totals, merged latency/slippage percentiles and sketches
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .run_catalog import RunCatalog
+from .sketches import QuantileSketch, merge_all
+
+CLOSED_TRADES_CANDIDATES: Sequence[tuple] = (
+    ("closed_trades_fifo_reconstructed.csv", ("pnl_currency", "net_realized_usd", "pnl"), ("close_time", "exit_time", "timestamp")),
+    ("closed_trades_fifo.csv", ("net_realized_usd", "pnl_in_account_currency", "realized_usd"), ("exit_time", "close_time_iso", "close_time")),
+)
+TABLE_COLUMNS: Sequence[str] = (
+    "run", "path", "requests", "fills", "filled_orders", "rejects", "fill_rate_percent",
+    "latency_ms_p50", "latency_ms_p95", "latency_ms_p99",
+    "slippage_abs_p50", "slippage_abs_p95", "slippage_mean",
+    "trades", "pnl", "max_drawdown", "pnl_source",
+    "validator_pass", "validator_reasons", "error",
+)
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    text = value.strip()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    text = value.strip()
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def _first_present(header: Sequence[str], candidates: Iterable[str]) -> Optional[str]:
+    lookup = {h.strip().lower(): h for h in header if h}
+    for cand in candidates:
+        if cand.lower() in lookup:
+            return lookup[cand.lower()]
+    return None
+
+
+def scan_orders(path: Path) -> Dict[str, object]:
+    """Stream orders.csv once: phase counts plus latency and slippage sketches.
+
+    Partial fills log several FILL rows per order, so ``filled_orders`` counts
+    distinct order ids with a FILL (FILL rows when there is no id column).
+    """
+    latency = QuantileSketch()
+    slippage = QuantileSketch()
+    counts = {"REQUEST": 0, "ACK": 0, "FILL": 0, "REJECT": 0}
+    filled_ids = set()
+    anonymous_fills = 0
+    with path.open("r", encoding="utf-8-sig", newline="") as handle:
+        reader = csv.DictReader(handle)
+        header = reader.fieldnames or []
+        phase_col = _first_present(header, ("phase", "status"))
+        id_col = _first_present(header, ("orderId", "order_id"))
+        latency_col = _first_present(header, ("latency_ms",))
+        slip_col = _first_present(header, ("slippage_pips", "slippage"))
+        for row in reader:
+            phase = (row.get(phase_col) or "").strip().upper() if phase_col else ""
+            if phase == "FILLED":
+                phase = "FILL"
+            if phase in counts:
+                counts[phase] += 1
+            if phase != "FILL":
+                continue
+            order_id = (row.get(id_col) or "").strip() if id_col else ""
+            if order_id:
+                filled_ids.add(order_id)
+            else:
+                anonymous_fills += 1
+            lat = _to_float(row.get(latency_col)) if latency_col else None
+            if lat is not None:
+                latency.add(lat)
+            slip = _to_float(row.get(slip_col)) if slip_col else None
+            if slip is not None:
+                slippage.add(abs(slip))
+    return {"counts": counts, "filled_orders": len(filled_ids) + anonymous_fills,
+            "latency": latency, "slippage": slippage}
+
+
+def closed_trade_pnl(run_dir: Path) -> Optional[Dict[str, object]]:
+    """Total PnL and max drawdown from the closed-trades CSV ordered by close time."""
+    for name, pnl_cols, time_cols in CLOSED_TRADES_CANDIDATES:
+        path = run_dir / name
+        if not path.exists():
+            continue
+        with path.open("r", encoding="utf-8-sig", newline="") as handle:
+            reader = csv.DictReader(handle)
+            header = reader.fieldnames or []
+            pnl_col = _first_present(header, pnl_cols)
+            time_col = _first_present(header, time_cols)
+            if pnl_col is None:
+                continue
+            trades = []
+            for idx, row in enumerate(reader):
+                pnl = _to_float(row.get(pnl_col))
+                if pnl is None:
+                    continue
+                ts = _parse_ts(row.get(time_col)) if time_col else None
+                trades.append((ts.timestamp() if ts else float("inf"), idx, pnl))
+        trades.sort()
+        equity = peak = max_dd = 0.0
+        for _, _, pnl in trades:
+            equity += pnl
+            peak = max(peak, equity)
+            max_dd = max(max_dd, peak - equity)
+        return {"trades": len(trades), "pnl": equity, "max_drawdown": max_dd, "pnl_source": name}
+    return None
+
+
+def risk_equity_pnl(path: Path) -> Optional[Dict[str, object]]:
+    """Fallback PnL/drawdown from the risk_snapshots.csv equity column."""
+    first = last = None
+    peak = None
+    max_dd = 0.0
+    with path.open("r", encoding="utf-8-sig", newline="") as handle:
+        reader = csv.DictReader(handle)
+        col = _first_present(reader.fieldnames or [], ("equity",))
+        if col is None:
+            return None
+        for row in reader:
+            eq = _to_float(row.get(col))
+            if eq is None:
+                continue
+            if first is None:
+                first = eq
+            last = eq
+            peak = eq if peak is None else max(peak, eq)
+            max_dd = max(max_dd, peak - eq)
+    if first is None:
+        return None
+    return {"trades": None, "pnl": last - first, "max_drawdown": max_dd, "pnl_source": "risk_snapshots.csv"}
+
+
+def _validator_verdict(run_dir: Path) -> Dict[str, object]:
+    try:
+        from scripts.validate_artifacts import validate_artifacts
+    except ImportError:  # scripts/ itself on sys.path
+        from validate_artifacts import validate_artifacts  # type: ignore[no-redef]
+    result = validate_artifacts(run_dir)
+    return {"validator_pass": bool(result.get("pass")), "validator_reasons": ";".join(result.get("reasons", []))}
+
+
+def compute_run_kpis(run_dir: str) -> Dict[str, object]:
+    """Worker: KPIs for one run; sketches are returned serialized for merging."""
+    path = Path(run_dir)
+    row: Dict[str, object] = {"run": path.name, "path": str(path), "error": ""}
+    sketches: Dict[str, object] = {}
+    try:
+        orders = path / "orders.csv"
+        if orders.exists():
+            scanned = scan_orders(orders)
+            counts = scanned["counts"]  # type: ignore[assignment]
+            latency: QuantileSketch = scanned["latency"]  # type: ignore[assignment]
+            slippage: QuantileSketch = scanned["slippage"]  # type: ignore[assignment]
+            requests = counts["REQUEST"]
+            filled = scanned["filled_orders"]
+            row.update({
+                "requests": requests,
+                "fills": counts["FILL"],
+                "filled_orders": filled,
+                "rejects": counts["REJECT"],
+                "fill_rate_percent": round(100.0 * filled / requests, 2) if requests else None,
+                "latency_ms_p50": latency.quantile(0.5),
+                "latency_ms_p95": latency.quantile(0.95),
+                "latency_ms_p99": latency.quantile(0.99),
+                "slippage_abs_p50": slippage.quantile(0.5),
+                "slippage_abs_p95": slippage.quantile(0.95),
+                "slippage_mean": slippage.mean,
+            })
+            sketches = {"latency_ms": latency.to_dict(), "slippage_abs": slippage.to_dict()}
+        pnl = closed_trade_pnl(path)
+        if pnl is None and (path / "risk_snapshots.csv").exists():
+            pnl = risk_equity_pnl(path / "risk_snapshots.csv")
+        if pnl:
+            row.update(pnl)
+        row.update(_validator_verdict(path))
+    except Exception as exc:  # keep the batch going; the row records the failure
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    return {"row": row, "sketches": sketches}
+
+
+def expand_runs(patterns: Sequence[str]) -> List[str]:
+    runs: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        runs.extend(m for m in matches if os.path.isdir(m))
+    return list(dict.fromkeys(runs))
+
+
+def runs_from_catalog(root: Path, since: Optional[str], until: Optional[str]) -> List[str]:
+    with RunCatalog(root) as catalog:
+        catalog.refresh()
+        return [r.path for r in catalog.query(kind="telemetry_run", since=since, until=until)]
+
+
+def aggregate(run_dirs: Sequence[str], workers: Optional[int] = None) -> Dict[str, object]:
+    """Run ``compute_run_kpis`` over ``run_dirs`` and merge the results."""
+    rows: List[Dict[str, object]] = []
+    latency: List[QuantileSketch] = []
+    slippage: List[QuantileSketch] = []
+    if workers == 1 or len(run_dirs) <= 1:
+        results = [compute_run_kpis(run_dir) for run_dir in run_dirs]
+    else:
+        chunksize = max(1, len(run_dirs) // (4 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(compute_run_kpis, run_dirs, chunksize=chunksize))
+    for res in results:
+        rows.append(res["row"])
+        sk = res["sketches"]
+        if sk:
+            latency.append(QuantileSketch.from_dict(sk["latency_ms"]))
+            slippage.append(QuantileSketch.from_dict(sk["slippage_abs"]))
+
+    fleet_latency = merge_all(latency)
+    fleet_slippage = merge_all(slippage)
+    requests = sum(int(r.get("requests") or 0) for r in rows)
+    fills = sum(int(r.get("fills") or 0) for r in rows)
+    filled = sum(int(r.get("filled_orders") or 0) for r in rows)
+    summary = {
+        "runs": len(rows),
+        "runs_failed": sum(1 for r in rows if r.get("error")),
+        "validator_passed": sum(1 for r in rows if r.get("validator_pass")),
+        "requests": requests,
+        "fills": fills,
+        "filled_orders": filled,
+        "fill_rate_percent": round(100.0 * filled / requests, 2) if requests else None,
+        "pnl_total": sum(float(r.get("pnl") or 0.0) for r in rows),
+        "max_drawdown_worst": max((float(r.get("max_drawdown") or 0.0) for r in rows), default=0.0),
+        "latency_ms": fleet_latency.quantiles((0.5, 0.9, 0.95, 0.99)),
+        "slippage_abs": fleet_slippage.quantiles((0.5, 0.9, 0.95, 0.99)),
+        "sketches": {"latency_ms": fleet_latency.to_dict(), "slippage_abs": fleet_slippage.to_dict()},
+    }
+    return {"rows": rows, "summary": summary}
+
+
+def write_outputs(result: Dict[str, object], out_dir: Path) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with (out_dir / "fleet_kpis.csv").open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(TABLE_COLUMNS), extrasaction="ignore")
+        writer.writeheader()
+        for row in result["rows"]:  # type: ignore[union-attr]
+            writer.writerow(row)
+    with (out_dir / "fleet_summary.json").open("w", encoding="utf-8") as handle:
+        json.dump(result["summary"], handle, indent=2)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Aggregate KPIs across many run directories")
+    parser.add_argument("--runs", nargs="*", default=[], help="Run directories or glob patterns")
+    parser.add_argument("--catalog", default=None, help="Artifacts root; select runs from its run catalog")
+    parser.add_argument("--since", default=None, help="Catalog start-time lower bound (ISO)")
+    parser.add_argument("--until", default=None, help="Catalog start-time upper bound (ISO, exclusive)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--out", required=True, help="Output directory")
+    args = parser.parse_args(argv)
+
+    run_dirs = expand_runs(args.runs)
+    if args.catalog:
+        run_dirs.extend(r for r in runs_from_catalog(Path(args.catalog), args.since, args.until) if r not in run_dirs)
+    if not run_dirs:
+        print("No run directories selected")
+        return 2
+
+    result = aggregate(run_dirs, workers=args.workers)
+    write_outputs(result, Path(args.out))
+    summary = dict(result["summary"])  # type: ignore[arg-type]
+    summary.pop("sketches", None)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Block-bootstrap Monte Carlo of max drawdown and terminal P&L over closed trades.
+
+The equity tools report the one drawdown the run happened to realize. This
+resamples the closed-trade P&L sequence to show how deep the drawdown could
+plausibly have been with the same trades in a different order.
+
+Each path is a circular moving-block bootstrap: blocks of ``block`` consecutive
+trades (wrapping at the end) are drawn uniformly until the path has as many
+trades as the run. Blocks keep short-range dependence such as losing streaks,
+which an i.i.d. shuffle would break up. A chunk of paths is one 2-D array:
+gather whole blocks at once from a sliding-window view of the P&L,
+``cumsum`` along the trade axis, then take ``maximum.accumulate`` against a
+zero starting balance. The drawdown is the row minimum of
+``equity - peak``. Everything is done in place, so a chunk needs about two
+``paths x trades`` arrays; ``--memory-mb`` sizes the chunks. Chunks run in
+a process pool. Every group of 256 paths draws from its own SeedSequence
+child, so a seed gives the same paths whatever the chunking or worker
+count.
+
+Usage:
+  python -m scripts.analyzers.drawdown_mc --trades run/closed_trades_fifo_reconstructed.csv --paths 100000
+  python -m scripts.analyzers.drawdown_mc --trades pnl_fifo.csv --column net_realized_usd --dd-threshold 500 1000
+
+Outputs (written to --out):
+  - drawdown_mc.json       drawdown/terminal quantiles, P(drawdown worse than thresholds), realized rank
+  - drawdown_mc_paths.npz  per-path max drawdown and terminal P&L (--save-paths)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .lazy_imports import lazy_import
+    from .perf import PerfRecorder, add_perf_args
+except ImportError:  # run as scripts/analyzers/drawdown_mc.py
+    from lazy_imports import lazy_import
+    from perf import PerfRecorder, add_perf_args
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+PNL_COLUMNS: Sequence[str] = ("pnl_currency", "net_realized_usd", "pnl", "realized_pnl_usd")
+ORDER_COLUMNS: Sequence[str] = ("close_time", "exit_time", "timestamp", "close_time_iso")
+QUANTILES: Sequence[float] = (0.01, 0.05, 0.10, 0.25, 0.50, 0.75, 0.90, 0.95, 0.99)
+DEFAULT_MEMORY_MB = 32
+# Paths per SeedSequence child; chunks are whole units, so chunking never changes the draws
+UNIT_PATHS = 256
+
+
+def load_pnl(path: Path, column: Optional[str] = None) -> Tuple[np.ndarray, str]:
+    """Per-trade P&L in close order and the column it came from."""
+    header = list(pd.read_csv(path, nrows=0).columns)
+    column = column or next((c for c in PNL_COLUMNS if c in header), None)
+    if column is None or column not in header:
+        raise ValueError(f"{path}: no P&L column (looked for {', '.join(PNL_COLUMNS)})")
+    order = next((c for c in ORDER_COLUMNS if c in header), None)
+    frame = pd.read_csv(path, usecols=[column] + ([order] if order else []))
+    if order:
+        stamps = pd.to_datetime(frame[order], utc=True, format="ISO8601", errors="coerce")
+        frame = frame.assign(_order=stamps).sort_values("_order", kind="stable", na_position="last")
+    pnl = pd.to_numeric(frame[column], errors="coerce").dropna().to_numpy(dtype="float64")
+    return pnl, column
+
+
+def default_block(trades: int) -> int:
+    """n^(1/3), the usual rate for block-bootstrap variance estimates."""
+    return max(1, int(round(trades ** (1.0 / 3.0))))
+
+
+def max_drawdown(pnl: np.ndarray) -> float:
+    """Max drawdown (<= 0) of the cumulative P&L from a zero starting balance."""
+    equity = np.cumsum(pnl)
+    return float(np.min(equity - np.maximum(np.maximum.accumulate(equity), 0.0), initial=0.0))
+
+
+def simulate_chunk(pnl: np.ndarray, block: int, units: Sequence[Tuple[int, np.random.SeedSequence]]
+                   ) -> Tuple[np.ndarray, np.ndarray]:
+    """(max drawdown, terminal P&L) for block-bootstrap resamples of ``pnl``; one row per path of ``units``."""
+    n = len(pnl)
+    blocks = -(-n // block)
+    starts = np.concatenate([np.random.default_rng(seed).integers(0, n, size=(count, blocks))
+                             for count, seed in units])
+    # Row i of the window view is pnl[i:i + block], wrapped; one fancy index gathers whole blocks
+    windows = np.lib.stride_tricks.sliding_window_view(np.concatenate([pnl, pnl[:block - 1]]), block)
+    equity = windows[starts].reshape(len(starts), blocks * block)
+    del starts
+    # Columns past n (the tail of the last block) are computed but never read
+    np.cumsum(equity, axis=1, out=equity)
+    terminal = equity[:, n - 1].copy()
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, 0.0, out=peak)
+    np.subtract(equity, peak, out=equity)
+    drawdown = np.minimum(equity[:, :n].min(axis=1), 0.0)
+    return drawdown, terminal
+
+
+def _chunk_task(args: Tuple[np.ndarray, int, Sequence[Tuple[int, np.random.SeedSequence]]]) -> Tuple[np.ndarray, np.ndarray]:
+    return simulate_chunk(*args)
+
+
+def _units(paths: int, seed: int) -> List[Tuple[int, np.random.SeedSequence]]:
+    """Paths in fixed groups of UNIT_PATHS, each with its own SeedSequence child."""
+    counts = [UNIT_PATHS] * (paths // UNIT_PATHS) + ([paths % UNIT_PATHS] if paths % UNIT_PATHS else [])
+    return list(zip(counts, np.random.SeedSequence(seed).spawn(len(counts))))
+
+
+def units_per_chunk(trades: int, block: int, memory_mb: float) -> int:
+    """Seed units per chunk so the working arrays (~2 x 8 bytes per cell) fit ``memory_mb``."""
+    per_path = (-(-max(1, trades) // block) * block) * 8 * 2
+    return max(1, int(memory_mb * 1024 * 1024 // (per_path * UNIT_PATHS)))
+
+
+def simulate(pnl: np.ndarray, paths: int, block: Optional[int] = None, seed: int = 0, workers: int = 1,
+             memory_mb: float = DEFAULT_MEMORY_MB) -> Tuple[np.ndarray, np.ndarray]:
+    """Max drawdown and terminal P&L per path; a seed gives the same paths for any workers/memory_mb."""
+    pnl = np.ascontiguousarray(pnl, dtype="float64")
+    if len(pnl) == 0 or paths <= 0:
+        return np.zeros(0), np.zeros(0)
+    block = min(block or default_block(len(pnl)), len(pnl))
+    units = _units(paths, seed)
+    step = units_per_chunk(len(pnl), block, memory_mb)
+    tasks = [(pnl, block, units[i:i + step]) for i in range(0, len(units), step)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            parts = list(pool.map(_chunk_task, tasks))
+    else:
+        parts = [_chunk_task(task) for task in tasks]
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+
+def summarize(pnl: np.ndarray, drawdowns: np.ndarray, terminals: np.ndarray, block: int,
+              thresholds: Sequence[float] = ()) -> Dict[str, object]:
+    realized = max_drawdown(pnl)
+    summary: Dict[str, object] = {
+        "trades": int(len(pnl)),
+        "paths": int(len(drawdowns)),
+        "block": block,
+        "realized_max_drawdown": realized,
+        "realized_terminal_pnl": float(pnl.sum()),
+    }
+    if len(drawdowns):
+        summary.update({
+            # Share of paths with a drawdown at least as deep as the one realized
+            "realized_drawdown_percentile": float(np.mean(drawdowns <= realized) * 100.0),
+            "max_drawdown_quantiles": {f"p{q * 100:g}": float(v) for q, v in zip(QUANTILES, np.quantile(drawdowns, QUANTILES))},
+            "terminal_pnl_quantiles": {f"p{q * 100:g}": float(v) for q, v in zip(QUANTILES, np.quantile(terminals, QUANTILES))},
+            "max_drawdown_mean": float(drawdowns.mean()),
+            "prob_terminal_loss": float(np.mean(terminals < 0.0)),
+            "prob_drawdown_worse_than": {f"{t:g}": float(np.mean(drawdowns < -abs(t))) for t in thresholds},
+        })
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Block-bootstrap Monte Carlo of max drawdown over closed trades")
+    ap.add_argument("--trades", required=True, help="closed_trades_fifo_reconstructed.csv (or any per-trade P&L CSV)")
+    ap.add_argument("--column", default=None, help=f"P&L column (default: first of {', '.join(PNL_COLUMNS)})")
+    ap.add_argument("--paths", type=int, default=20000)
+    ap.add_argument("--block", type=int, default=None, help="Block length in trades (default: n^(1/3))")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    ap.add_argument("--memory-mb", type=float, default=DEFAULT_MEMORY_MB, help="Working memory per chunk")
+    ap.add_argument("--dd-threshold", type=float, nargs="*", default=(), help="Report P(drawdown worse than X)")
+    ap.add_argument("--out", default=None, help="Output directory (default: alongside --trades)")
+    ap.add_argument("--save-paths", action="store_true", help="Also write per-path results (npz)")
+    add_perf_args(ap)
+    args = ap.parse_args(argv)
+
+    trades = Path(args.trades)
+    out_dir = Path(args.out) if args.out else trades.parent
+    perf = PerfRecorder("drawdown_mc", args.profile)
+    with perf:
+        with perf.stage("load") as span:
+            pnl, column = load_pnl(trades, args.column)
+            span.rows = len(pnl)
+        block = min(args.block or default_block(len(pnl)), max(1, len(pnl)))
+        with perf.stage("simulate", rows=args.paths * len(pnl)):
+            drawdowns, terminals = simulate(pnl, args.paths, block, args.seed, args.workers or os.cpu_count() or 1,
+                                            args.memory_mb)
+        summary = summarize(pnl, drawdowns, terminals, block, args.dd_threshold)
+        summary.update({"source": str(trades), "column": column, "seed": args.seed})
+        out_dir.mkdir(parents=True, exist_ok=True)
+        (out_dir / "drawdown_mc.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        if args.save_paths:
+            np.savez_compressed(out_dir / "drawdown_mc_paths.npz", max_drawdown=drawdowns, terminal_pnl=terminals)
+    perf.write(Path(args.perf_dir) if args.perf_dir else out_dir)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Exact position and exposure timeline from FILL rows (sweep line).
+
+risk_snapshots.csv reports ``long_exposure``/``short_exposure``/``net_exposure``
+and ``total_positions`` once per snapshot. Whatever happened between two
+snapshots is invisible. Positions only change at fills, so the fills alone
+define them exactly. One pass over the time-sorted fills keeps a running
+signed position per symbol. The result is a step function: the value at
+each change point holds until the next one.
+
+A ``StepSeries`` stores the change times, the values and a prefix integral of
+the values. Queries cost a binary search:
+  value_at(t)          position/exposure in force at t
+  integral(t0, t1)     area under the step function, hence
+  time_weighted(t0,t1) time-weighted average exposure over a window
+  max_in(t0, t1)       bisect to the window, then max over the steps inside it
+
+The account timeline sweeps the per-symbol change points in time order
+(a k-way heap merge). Per symbol it keeps the current long and short
+contribution and updates the totals in O(1) per event. Exposure is notional
+at the symbol's last fill price, like PortfolioMetrics (|volume| x price), or
+raw units with ``--basis units``.
+
+The snapshot cross-check compares each snapshot with the reconstruction at
+the same instant. It also flags intervals between two snapshots where the
+reconstructed gross exposure peaked above what either snapshot reported,
+i.e. peaks the snapshot cadence missed.
+
+Usage:
+  python -m scripts.analyzers.exposure_timeline --orders run/orders.csv --risk run/risk_snapshots.csv --out run/exposure
+  python -m scripts.analyzers.exposure_timeline --orders run/orders.csv --window 2025-01-06T10:00:00Z 2025-01-06T11:00:00Z
+
+Outputs (written to --out):
+  - exposure_timeline.csv     account change points: long, short, net, gross exposure, open symbols
+  - positions_by_symbol.csv   per-symbol change points: signed position, exposure
+  - snapshot_mismatches.csv   snapshots that disagree with the reconstruction beyond --tolerance
+  - snapshot_missed_peaks.csv intervals whose reconstructed peak exceeded both bounding snapshots
+  - exposure_summary.json     per-symbol and account max/time-weighted exposure, check totals
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+import heapq
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from path_issues.reconstruct_fifo import Fill, parse_epoch_ms, read_fills
+except ImportError:  # repo root not on sys.path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from path_issues.reconstruct_fifo import Fill, parse_epoch_ms, read_fills
+
+BASES: Sequence[str] = ("notional", "units")
+SNAPSHOT_FIELDS: Sequence[str] = ("long_exposure", "short_exposure", "net_exposure")
+DEFAULT_TOLERANCE = 0.01
+
+
+@dataclass
+class StepSeries:
+    """Right-continuous step function: ``values[i]`` holds on [times[i], times[i+1]); 0 before times[0]."""
+
+    times: List[int] = field(default_factory=list)
+    values: List[float] = field(default_factory=list)
+    _area: List[float] = field(default_factory=list, repr=False)
+
+    def append(self, t: int, value: float) -> None:
+        """Add a change point; ``t`` must not go backwards. A repeated ``t`` replaces the last value."""
+        if self.times and t == self.times[-1]:
+            self.values[-1] = value
+            return
+        if self.times:
+            self._area.append(self._area[-1] + self.values[-1] * (t - self.times[-1]))
+        else:
+            self._area.append(0.0)
+        self.times.append(t)
+        self.values.append(value)
+
+    def _index(self, t: int) -> int:
+        return bisect.bisect_right(self.times, t) - 1
+
+    def value_at(self, t: int) -> float:
+        i = self._index(t)
+        return self.values[i] if i >= 0 else 0.0
+
+    def _cumulative(self, t: int) -> float:
+        i = self._index(t)
+        return self._area[i] + self.values[i] * (t - self.times[i]) if i >= 0 else 0.0
+
+    def integral(self, t0: int, t1: int) -> float:
+        """Area under the function over [t0, t1] (value x milliseconds)."""
+        return self._cumulative(t1) - self._cumulative(t0)
+
+    def time_weighted(self, t0: int, t1: int) -> float:
+        return self.integral(t0, t1) / (t1 - t0) if t1 > t0 else self.value_at(t0)
+
+    def argmax_in(self, t0: int, t1: int, key=abs) -> Tuple[int, float]:
+        """(time, value) of the largest ``key(value)`` in force anywhere in [t0, t1]; earliest on ties."""
+        i0 = self._index(t0)
+        i1 = bisect.bisect_right(self.times, t1)
+        best_t, best_v = t0, self.value_at(t0)
+        for i in range(max(i0 + 1, 0), i1):
+            if key(self.values[i]) > key(best_v):
+                best_t, best_v = self.times[i], self.values[i]
+        return best_t, best_v
+
+    def max_in(self, t0: int, t1: int, key=abs) -> float:
+        return self.argmax_in(t0, t1, key)[1]
+
+
+@dataclass
+class ExposureTimeline:
+    positions: Dict[str, StepSeries]
+    exposure: Dict[str, StepSeries]
+    long: StepSeries
+    short: StepSeries
+    net: StepSeries
+    gross: StepSeries
+    open_symbols: StepSeries
+    basis: str
+
+    @property
+    def first_ts(self) -> Optional[int]:
+        return self.gross.times[0] if self.gross.times else None
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        return self.gross.times[-1] if self.gross.times else None
+
+
+def symbol_positions(fills: Iterable[Fill], basis: str = "notional") -> Tuple[Dict[str, StepSeries], Dict[str, StepSeries]]:
+    """Per-symbol signed position and signed exposure, one running sum over time-sorted fills."""
+    if basis not in BASES:
+        raise ValueError(f"basis must be one of {', '.join(BASES)}")
+    positions: Dict[str, StepSeries] = {}
+    exposure: Dict[str, StepSeries] = {}
+    running: Dict[str, float] = {}
+    for fill in fills:  # read_fills returns them sorted by epoch_ms
+        symbol = fill.symbol.strip().upper()
+        qty = float(fill.volume) if fill.side == "BUY" else -float(fill.volume)
+        position = running.get(symbol, 0.0) + qty
+        if abs(position) < 1e-9:
+            position = 0.0
+        running[symbol] = position
+        positions.setdefault(symbol, StepSeries()).append(fill.epoch_ms, position)
+        scale = float(fill.price) if basis == "notional" else 1.0
+        exposure.setdefault(symbol, StepSeries()).append(fill.epoch_ms, position * scale)
+    return positions, exposure
+
+
+def _changes(symbol: str, series: StepSeries) -> Iterator[Tuple[int, str, float]]:
+    for t, value in zip(series.times, series.values):
+        yield t, symbol, value
+
+
+def build_timeline(fills: Sequence[Fill], basis: str = "notional") -> ExposureTimeline:
+    """Per-symbol step functions plus the account sweep (long, short, net, gross, open symbols)."""
+    positions, exposure = symbol_positions(fills, basis)
+    timeline = ExposureTimeline(positions, exposure, StepSeries(), StepSeries(), StepSeries(), StepSeries(),
+                                StepSeries(), basis)
+    current: Dict[str, float] = {}
+    long_total = short_total = 0.0
+    open_count = 0
+    streams = [_changes(symbol, series) for symbol, series in exposure.items()]
+    for t, symbol, value in heapq.merge(*streams):
+        old = current.get(symbol, 0.0)
+        long_total += max(value, 0.0) - max(old, 0.0)
+        short_total += max(-value, 0.0) - max(-old, 0.0)
+        open_count += (value != 0.0) - (old != 0.0)
+        current[symbol] = value
+        # Clamp float drift back to exact zero when the book is flat
+        if open_count == 0:
+            long_total = short_total = 0.0
+        timeline.long.append(t, long_total)
+        timeline.short.append(t, short_total)
+        timeline.net.append(t, long_total - short_total)
+        timeline.gross.append(t, long_total + short_total)
+        timeline.open_symbols.append(t, float(open_count))
+    return timeline
+
+
+def _iso(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000.0, tz=timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _float(text: Optional[str]) -> Optional[float]:
+    try:
+        return float(text) if text not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def read_snapshots(path: Path) -> List[Dict[str, object]]:
+    """risk_snapshots.csv rows with ts_ms and the exposure columns as floats, in time order."""
+    rows = []
+    with path.open(newline="", encoding="utf-8-sig") as fh:
+        for row in csv.DictReader(fh):
+            ts = parse_epoch_ms(row.get("timestamp_utc") or row.get("timestamp") or "")
+            if ts is None:
+                continue
+            values = {name: _float(row.get(name)) for name in SNAPSHOT_FIELDS}
+            if values["long_exposure"] is None or values["short_exposure"] is None:
+                continue
+            values["short_exposure"] = abs(values["short_exposure"])
+            rows.append({"ts_ms": ts, **values})
+    rows.sort(key=lambda r: r["ts_ms"])
+    return rows
+
+
+def _differs(observed: float, expected: float, tolerance: float) -> bool:
+    return abs(observed - expected) > tolerance * max(abs(observed), abs(expected), 1.0)
+
+
+def cross_check(timeline: ExposureTimeline, snapshots: Sequence[Dict[str, object]],
+                tolerance: float = DEFAULT_TOLERANCE) -> Tuple[List[Dict[str, object]], List[Dict[str, object]]]:
+    """(mismatches at snapshot instants, missed peaks between consecutive snapshots)."""
+    mismatches: List[Dict[str, object]] = []
+    missed: List[Dict[str, object]] = []
+    for snap in snapshots:
+        t = int(snap["ts_ms"])
+        recon = {"long_exposure": timeline.long.value_at(t), "short_exposure": timeline.short.value_at(t)}
+        recon["net_exposure"] = recon["long_exposure"] - recon["short_exposure"]
+        bad = [name for name in SNAPSHOT_FIELDS if snap.get(name) is not None
+               and _differs(float(snap[name]), recon[name], tolerance)]
+        if bad:
+            mismatches.append({"ts_ms": t, "ts_iso": _iso(t), "fields": ";".join(bad),
+                               **{f"snapshot_{n}": snap.get(n) for n in SNAPSHOT_FIELDS},
+                               **{f"recon_{n}": round(recon[n], 6) for n in SNAPSHOT_FIELDS}})
+    for prev, snap in zip(snapshots, snapshots[1:]):
+        t0, t1 = int(prev["ts_ms"]), int(snap["ts_ms"])
+        seen = max(float(prev["long_exposure"]) + float(prev["short_exposure"]),
+                   float(snap["long_exposure"]) + float(snap["short_exposure"]))
+        peak_t, peak = timeline.gross.argmax_in(t0, t1)
+        if peak > 0 and _differs(peak, seen, tolerance) and peak > seen:
+            missed.append({"from_ts_iso": _iso(t0), "to_ts_iso": _iso(t1), "peak_ts_iso": _iso(peak_t),
+                           "peak_gross": round(peak, 6), "snapshot_gross_max": round(seen, 6),
+                           "time_weighted_gross": round(timeline.gross.time_weighted(t0, t1), 6)})
+    return mismatches, missed
+
+
+def summarize(timeline: ExposureTimeline, t0: Optional[int] = None, t1: Optional[int] = None) -> Dict[str, object]:
+    """Max and time-weighted exposure per symbol and for the account over [t0, t1] (default: the whole run)."""
+    t0 = timeline.first_ts if t0 is None else t0
+    t1 = timeline.last_ts if t1 is None else t1
+    if t0 is None or t1 is None:
+        return {"symbols": {}, "account": {}}
+    symbols = {}
+    for symbol in sorted(timeline.positions):
+        pos, exp = timeline.positions[symbol], timeline.exposure[symbol]
+        peak_t, peak = exp.argmax_in(t0, t1)
+        symbols[symbol] = {
+            "changes": len(pos.times),
+            "max_abs_position": abs(pos.max_in(t0, t1)),
+            "max_abs_exposure": abs(peak),
+            "max_exposure_ts": _iso(peak_t),
+            "time_weighted_exposure": exp.time_weighted(t0, t1),
+            "time_in_market_pct": 100.0 * _open_indicator(pos).time_weighted(t0, t1),
+        }
+    peak_t, peak = timeline.gross.argmax_in(t0, t1)
+    account = {
+        "from_ts": _iso(t0), "to_ts": _iso(t1), "basis": timeline.basis,
+        "max_gross": peak, "max_gross_ts": _iso(peak_t),
+        "max_long": timeline.long.max_in(t0, t1), "max_short": timeline.short.max_in(t0, t1),
+        "max_abs_net": abs(timeline.net.max_in(t0, t1)),
+        "time_weighted_gross": timeline.gross.time_weighted(t0, t1),
+        "time_weighted_net": timeline.net.time_weighted(t0, t1),
+        "max_open_symbols": int(timeline.open_symbols.max_in(t0, t1)),
+    }
+    return {"symbols": symbols, "account": account}
+
+
+def _open_indicator(series: StepSeries) -> StepSeries:
+    """1 while the position is open, 0 while flat."""
+    out = StepSeries()
+    for t, value in zip(series.times, series.values):
+        out.append(t, float(value != 0))
+    return out
+
+
+def write_outputs(timeline: ExposureTimeline, out_dir: Path, mismatches: Sequence[Dict[str, object]],
+                  missed: Sequence[Dict[str, object]], summary: Dict[str, object]) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with (out_dir / "exposure_timeline.csv").open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["ts_ms", "ts_iso", "long_exposure", "short_exposure", "net_exposure", "gross_exposure",
+                         "open_symbols"])
+        for i, t in enumerate(timeline.gross.times):
+            writer.writerow([t, _iso(t), round(timeline.long.values[i], 6), round(timeline.short.values[i], 6),
+                             round(timeline.net.values[i], 6), round(timeline.gross.values[i], 6),
+                             int(timeline.open_symbols.values[i])])
+    with (out_dir / "positions_by_symbol.csv").open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["symbol", "ts_ms", "ts_iso", "position", "exposure"])
+        for symbol in sorted(timeline.positions):
+            pos, exp = timeline.positions[symbol], timeline.exposure[symbol]
+            for t, p, e in zip(pos.times, pos.values, exp.values):
+                writer.writerow([symbol, t, _iso(t), round(p, 8), round(e, 6)])
+    for name, rows in (("snapshot_mismatches.csv", mismatches), ("snapshot_missed_peaks.csv", missed)):
+        with (out_dir / name).open("w", newline="", encoding="utf-8") as fh:
+            if rows:
+                writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+    (out_dir / "exposure_summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Exact position/exposure timeline from fills, checked against risk snapshots")
+    ap.add_argument("--orders", required=True, help="orders.csv")
+    ap.add_argument("--risk", default=None, help="risk_snapshots.csv (default: next to orders.csv, if present)")
+    ap.add_argument("--out", default=None, help="Output directory (default: <orders dir>/exposure)")
+    ap.add_argument("--basis", choices=BASES, default="notional", help="Exposure as notional at last fill price or units")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Relative tolerance for the snapshot check")
+    ap.add_argument("--window", nargs=2, metavar=("START", "END"), default=None,
+                    help="Summarize only [START, END] (ISO timestamps or epoch ms)")
+    args = ap.parse_args(argv)
+
+    orders = Path(args.orders)
+    timeline = build_timeline(read_fills(orders, "FILL"), args.basis)
+    window = [parse_epoch_ms(v) for v in args.window] if args.window else [None, None]
+    if args.window and None in window:
+        ap.error("--window needs two ISO timestamps or epoch milliseconds")
+    summary = summarize(timeline, *window)
+
+    risk = Path(args.risk) if args.risk else orders.parent / "risk_snapshots.csv"
+    mismatches: List[Dict[str, object]] = []
+    missed: List[Dict[str, object]] = []
+    if risk.exists():
+        snapshots = read_snapshots(risk)
+        mismatches, missed = cross_check(timeline, snapshots, args.tolerance)
+        summary["snapshots"] = {"path": str(risk), "count": len(snapshots), "mismatches": len(mismatches),
+                                "missed_peaks": len(missed), "tolerance": args.tolerance}
+    write_outputs(timeline, Path(args.out) if args.out else orders.parent / "exposure", mismatches, missed, summary)
+    print(json.dumps({"account": summary["account"], "snapshots": summary.get("snapshots")}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
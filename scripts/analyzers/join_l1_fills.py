@@ -1,10 +1,18 @@
+from __future__ import annotations
+
 import argparse
 import json
 import os
 from typing import Optional, Tuple
 
-import pandas as pd
-import numpy as np
+try:
+    from .lazy_imports import lazy_import
+except ImportError:  # run as scripts/analyzers/join_l1_fills.py
+    from lazy_imports import lazy_import
+
+# Loaded on first use so importing this module (CLI dispatch, --help) stays cheap
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
 
 # === L1 SCALE HELPERS (PR#283, enhanced PR#285) ===
 def _load_symbol_specs():
@@ -113,10 +121,13 @@ def main(
     if missing_order_cols:
         raise ValueError(f"orders.csv missing columns: {sorted(missing_order_cols)}")
 
-    l1 = pd.read_csv(l1_csv, parse_dates=["timestamp"])
+    l1 = pd.read_csv(l1_csv)
+    if "timestamp" not in l1.columns and "timestamp_utc" in l1.columns:  # Level1SnapshotLogger layout
+        l1 = l1.rename(columns={"timestamp_utc": "timestamp"})
     missing_l1_cols = REQUIRED_L1_COLUMNS.difference(l1.columns)
     if missing_l1_cols:
-        raise ValueError(f"l1_stream.csv missing columns: {sorted(missing_l1_cols)}")
+        raise ValueError(f"L1 file missing columns: {sorted(missing_l1_cols)}")
+    l1["timestamp"] = pd.to_datetime(l1["timestamp"])
     l1 = l1.sort_values("timestamp").reset_index(drop=True)
 
     l1_ts = l1["timestamp"]
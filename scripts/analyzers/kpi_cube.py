@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""One-pass KPI rollup cube over orders.csv and closed trades.
+
+postrun_report, analyze_postrun, compute_fill_breakdown_stream and
+analyze_smoke each read orders.csv again for their own slice: by side, by
+hour, by order type, by reason. The cube reads it once and stores the
+measures at the finest grain:
+
+  symbol x side x hour x reason x session
+
+``hour`` is the UTC clock hour (``2025-01-06T13``). The other dimensions
+are taken from the row's own column, as logged; blank values are filled
+from the order's REQUEST row when the order id has been seen. Closed trades
+land in the same cells by symbol, by opening side (LONG -> BUY,
+SHORT -> SELL) and by close hour, with the session of their closing order.
+Their reason is blank.
+
+Each cell holds additive measures: row counts per phase, first FILL per
+order (``filled_orders``), size and slippage/latency/P&L sums, and
+QuantileSketches for latency_ms, slippage (``slippage_pips``, else the
+price-unit ``slippage`` value, per row) and per-trade P&L. Every measure
+merges by addition, so any slice or roll-up (``--by side``,
+``--by symbol hour --where session=London``) is a merge over the matching
+cells. It never touches the CSV again, and cubes from several runs merge
+the same way.
+
+``KpiCube(dimensions=...)`` can swap in ``type`` (order type, as
+analyze_smoke slices it) or drop a dimension; the default is the five above.
+
+The cube is stored as gzipped JSON. Dimension values are dictionary-encoded
+and cells hold only their non-zero measures. A day of orders is a few
+hundred cells and on the order of 100 KB.
+
+Usage:
+  python -m scripts.analyzers.kpi_cube build --run-dir D:/botg/logs/artifacts/telemetry_run_X
+  python -m scripts.analyzers.kpi_cube query run/kpi_cube.json.gz --by side
+  python -m scripts.analyzers.kpi_cube query run/kpi_cube.json.gz --by symbol hour --where side=BUY --csv out.csv
+
+Outputs:
+  build: kpi_cube.json.gz (--out, default <run-dir>/kpi_cube.json.gz)
+  query: one row per group (dimensions + fill rate, slippage/latency quantiles, trades, win rate, P&L)
+         as JSON on stdout, or CSV with --csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import json
+import math
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .perf import PerfRecorder, add_perf_args
+from .sketches import DEFAULT_RELATIVE_ACCURACY, QuantileSketch
+
+CUBE_FORMAT = 1
+CUBE_FILE = "kpi_cube.json.gz"
+DIMENSIONS: Sequence[str] = ("symbol", "side", "hour", "reason", "session")
+PHASES: Sequence[str] = ("REQUEST", "ACK", "FILL", "REJECT")
+QUANTILES: Sequence[float] = (0.5, 0.95, 0.99)
+ORDER_ID_COLUMNS: Sequence[str] = ("orderId", "order_id", "client_order_id")
+PNL_COLUMNS: Sequence[str] = ("pnl_currency", "net_realized_usd", "pnl", "realized_pnl_usd")
+POSITION_SIDES = {"LONG": "BUY", "SHORT": "SELL", "BUY": "BUY", "SELL": "SELL"}
+
+CellKey = Tuple[str, ...]
+
+
+def _float(text: Optional[str]) -> Optional[float]:
+    try:
+        value = float(text) if text not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+    return value if value is not None and math.isfinite(value) else None
+
+
+def hour_of(row: Mapping[str, str], columns: Sequence[str] = ("timestamp_iso", "timestamp", "epoch_ms")) -> str:
+    """UTC clock hour ``YYYY-MM-DDTHH`` of a row: an ISO prefix when there is one, else from epoch ms."""
+    for column in columns:
+        text = (row.get(column) or "").strip()
+        if not text:
+            continue
+        if text.isdigit():
+            num = int(text)
+            ms = num if num > 10_000_000_000 else num * 1000
+            return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc).strftime("%Y-%m-%dT%H")
+        if len(text) >= 13 and text[4] == "-" and text[10] in "T ":
+            # Logger timestamps are UTC ("...Z" or naive); only an explicit offset needs parsing
+            offset = text[19:]
+            if text.endswith("Z") or ("+" not in offset and "-" not in offset):
+                return text[:10] + "T" + text[11:13]
+            try:
+                dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+            except ValueError:
+                continue
+            return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H")
+    return ""
+
+
+class Cell:
+    """Additive measures of one group of rows; ``merge`` is addition."""
+
+    __slots__ = ("counts", "sums", "sketches")
+
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+        self.sums: Dict[str, float] = {}
+        self.sketches: Dict[str, QuantileSketch] = {}
+
+    def add_sum(self, name: str, value: float) -> None:
+        self.sums[name] = self.sums.get(name, 0.0) + value
+
+    def sketch(self, name: str, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> QuantileSketch:
+        found = self.sketches.get(name)
+        if found is None:
+            found = self.sketches[name] = QuantileSketch(relative_accuracy)
+        return found
+
+    def merge(self, other: "Cell") -> "Cell":
+        self.counts.update(other.counts)
+        for name, value in other.sums.items():
+            self.add_sum(name, value)
+        for name, sketch in other.sketches.items():
+            self.sketch(name, sketch.relative_accuracy).merge(sketch)
+        return self
+
+    def metrics(self) -> Dict[str, object]:
+        counts, sums = self.counts, self.sums
+        requests, filled = counts["REQUEST"], counts["filled_orders"]
+        out: Dict[str, object] = {
+            "requests": requests, "acks": counts["ACK"], "fills": counts["FILL"], "rejects": counts["REJECT"],
+            "filled_orders": filled, "fill_rate_pct": 100.0 * filled / requests if requests else None,
+            "size_requested": sums.get("size_requested", 0.0), "size_filled": sums.get("size_filled", 0.0),
+        }
+        for name in ("slippage", "latency_ms"):
+            sketch = self.sketches.get(name)
+            n = sketch.count if sketch else 0
+            out[f"{name}_mean"] = sums.get(name, 0.0) / n if n else None
+            if name == "slippage":
+                out["abs_slippage_mean"] = sums.get("abs_slippage", 0.0) / n if n else None
+            for key, value in (sketch.quantiles(QUANTILES) if sketch else {f"p{round(q * 100, 1):g}": None for q in QUANTILES}).items():
+                out[f"{name}_{key}"] = value
+        trades = counts["trades"]
+        pnl = self.sketches.get("pnl")
+        out.update({
+            "trades": trades, "win_rate": counts["wins"] / trades if trades else None,
+            "pnl": sums.get("pnl", 0.0), "expectancy": sums.get("pnl", 0.0) / trades if trades else None,
+            "pnl_p50": pnl.quantile(0.5) if pnl else None,
+        })
+        return out
+
+    def to_dict(self) -> Dict[str, object]:
+        data: Dict[str, object] = {}
+        counts = {k: v for k, v in self.counts.items() if v}
+        if counts:
+            data["n"] = counts
+        if self.sums:
+            data["s"] = self.sums
+        if self.sketches:
+            data["q"] = {name: {k: v for k, v in sketch.to_dict().items() if k != "relative_accuracy"}
+                         for name, sketch in self.sketches.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, object], relative_accuracy: float) -> "Cell":
+        cell = cls()
+        cell.counts.update(data.get("n") or {})  # type: ignore[arg-type]
+        cell.sums.update(data.get("s") or {})  # type: ignore[arg-type]
+        for name, sketch in dict(data.get("q") or {}).items():  # type: ignore[arg-type]
+            cell.sketches[name] = QuantileSketch.from_dict(dict(sketch, relative_accuracy=relative_accuracy))
+        return cell
+
+
+class KpiCube:
+    """Cells keyed by (symbol, side, hour, reason, session); built in one pass, queried by merging cells."""
+
+    def __init__(self, dimensions: Sequence[str] = DIMENSIONS,
+                 relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.dimensions = tuple(dimensions)
+        self.relative_accuracy = relative_accuracy
+        self.cells: Dict[CellKey, Cell] = {}
+        self._orders: Dict[str, Dict[str, str]] = {}  # order id -> dimension values from its REQUEST row
+        self._filled: set = set()
+
+    def _cell(self, key: CellKey) -> Cell:
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = Cell()
+        return cell
+
+    def _key(self, values: Mapping[str, str]) -> CellKey:
+        return tuple(values.get(d, "") for d in self.dimensions)
+
+    def add_orders(self, rows: Iterable[Mapping[str, str]]) -> int:
+        """Fold orders.csv rows (csv.DictReader dicts) into the cube; returns the rows counted."""
+        counted = 0
+        acc = self.relative_accuracy
+        for row in rows:
+            phase = (row.get("phase") or row.get("status") or "").strip().upper()
+            if phase not in PHASES:
+                continue
+            oid = next((row[c] for c in ORDER_ID_COLUMNS if row.get(c)), "")
+            values = {
+                "symbol": (row.get("symbol") or "").strip(),
+                "side": (row.get("side") or "").strip().upper(),
+                "reason": (row.get("reason") or "").strip(),
+                "session": (row.get("session") or "").strip(),
+                "type": (row.get("type") or "").strip(),
+            }
+            known = self._orders.get(oid) if oid else None
+            if known is None and oid and phase == "REQUEST":
+                self._orders[oid] = {k: values[k] for k in ("symbol", "side", "session", "type")}
+            elif known is not None:
+                for name, value in known.items():
+                    if not values[name]:
+                        values[name] = value
+            values["hour"] = hour_of(row)
+            cell = self._cell(self._key(values))
+            cell.counts[phase] += 1
+            counted += 1
+            if phase == "REQUEST":
+                size = _float(row.get("size_requested")) or _float(row.get("requestedVolume"))
+                if size is not None:
+                    cell.add_sum("size_requested", size)
+            elif phase == "FILL":
+                if not oid or oid not in self._filled:
+                    cell.counts["filled_orders"] += 1
+                    if oid:
+                        self._filled.add(oid)
+                size = _float(row.get("size_filled")) or _float(row.get("filledSize"))
+                if size is not None:
+                    cell.add_sum("size_filled", size)
+                # Pips are comparable across symbols; price-unit slippage only where the pips cell is blank
+                slip = _float(row.get("slippage_pips"))
+                if slip is None:
+                    slip = _float(row.get("slippage"))
+                if slip is not None:
+                    cell.add_sum("slippage", slip)
+                    cell.add_sum("abs_slippage", abs(slip))
+                    cell.sketch("slippage", acc).add(slip)
+                latency = _float(row.get("latency_ms"))
+                if latency is not None:
+                    cell.add_sum("latency_ms", latency)
+                    cell.sketch("latency_ms", acc).add(latency)
+        return counted
+
+    def add_trades(self, rows: Iterable[Mapping[str, str]]) -> int:
+        """Fold closed-trade rows (closed_trades_fifo_reconstructed.csv) into the cube."""
+        counted = 0
+        for row in rows:
+            pnl = next((v for v in (_float(row.get(c)) for c in PNL_COLUMNS) if v is not None), None)
+            if pnl is None:
+                continue
+            order = self._orders.get(row.get("close_order_id") or "") or self._orders.get(row.get("open_order_id") or "") or {}
+            values = {
+                "symbol": (row.get("symbol") or order.get("symbol") or "").strip(),
+                "side": POSITION_SIDES.get((row.get("position_side") or row.get("side") or "").strip().upper(), ""),
+                "session": (row.get("session") or order.get("session") or "").strip(),
+                "type": order.get("type", ""),
+                "reason": "",
+                "hour": hour_of(row, ("close_time", "exit_time", "timestamp")),
+            }
+            cell = self._cell(self._key(values))
+            cell.counts["trades"] += 1
+            if pnl > 0:
+                cell.counts["wins"] += 1
+            cell.add_sum("pnl", pnl)
+            cell.sketch("pnl", self.relative_accuracy).add(pnl)
+            counted += 1
+        return counted
+
+    def merge(self, other: "KpiCube") -> "KpiCube":
+        if other.dimensions != self.dimensions:
+            raise ValueError("cannot merge cubes with different dimensions")
+        for key, cell in other.cells.items():
+            self._cell(key).merge(cell)
+        return self
+
+    def rollup(self, by: Sequence[str] = (), where: Optional[Mapping[str, Iterable[str]]] = None) -> Dict[CellKey, Cell]:
+        """Merge the cells matching ``where`` ({dimension: allowed values}) into one cell per ``by`` group."""
+        unknown = (set(by) | set(where or {})) - set(self.dimensions)
+        if unknown:
+            raise ValueError(f"unknown dimension(s): {', '.join(sorted(unknown))}")
+        group_idx = [self.dimensions.index(d) for d in by]
+        filters = [(self.dimensions.index(d), set(v)) for d, v in (where or {}).items()]
+        out: Dict[CellKey, Cell] = {}
+        for key, cell in self.cells.items():
+            if any(key[i] not in allowed for i, allowed in filters):
+                continue
+            group = tuple(key[i] for i in group_idx)
+            target = out.get(group)
+            if target is None:
+                target = out[group] = Cell()
+            target.merge(cell)
+        return out
+
+    def table(self, by: Sequence[str] = (), where: Optional[Mapping[str, Iterable[str]]] = None) -> List[Dict[str, object]]:
+        """One row per group, sorted by group: the ``by`` dimensions plus Cell.metrics()."""
+        rows = []
+        for group, cell in sorted(self.rollup(by, where).items()):
+            row: Dict[str, object] = dict(zip(by, group))
+            row.update(cell.metrics())
+            rows.append(row)
+        return rows
+
+    def to_dict(self) -> Dict[str, object]:
+        values: Dict[str, Dict[str, int]] = {d: {} for d in self.dimensions}
+        cells = []
+        for key, cell in self.cells.items():
+            codes = [values[d].setdefault(v, len(values[d])) for d, v in zip(self.dimensions, key)]
+            cells.append(dict(cell.to_dict(), k=codes))
+        return {
+            "format": CUBE_FORMAT, "dimensions": list(self.dimensions), "relative_accuracy": self.relative_accuracy,
+            "values": {d: list(v) for d, v in values.items()}, "cells": cells,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, object]) -> "KpiCube":
+        if data.get("format") != CUBE_FORMAT:
+            raise ValueError(f"unsupported cube format {data.get('format')!r}")
+        cube = cls(list(data["dimensions"]), float(data["relative_accuracy"]))  # type: ignore[arg-type]
+        values: Mapping[str, List[str]] = data["values"]  # type: ignore[assignment]
+        for cell in data["cells"]:  # type: ignore[union-attr]
+            key = tuple(values[d][i] for d, i in zip(cube.dimensions, cell["k"]))
+            cube.cells[key] = Cell.from_dict(cell, cube.relative_accuracy)
+        return cube
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, separators=(",", ":"))
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "KpiCube":
+        with gzip.open(Path(path), "rt", encoding="utf-8") as fh:
+            return cls.from_dict(json.load(fh))
+
+
+def _read_rows(path: Path) -> Iterable[Dict[str, str]]:
+    with Path(path).open("r", encoding="utf-8-sig", newline="") as fh:
+        yield from csv.DictReader(fh)
+
+
+def build(orders: Optional[Path], trades: Optional[Path] = None, dimensions: Sequence[str] = DIMENSIONS,
+          perf: Optional[PerfRecorder] = None) -> KpiCube:
+    """Cube from orders.csv and (optionally) closed trades; orders first so trades can borrow their session."""
+    perf = perf or PerfRecorder("kpi_cube")
+    cube = KpiCube(dimensions)
+    if orders is not None:
+        with perf.stage("orders") as span:
+            span.rows = cube.add_orders(_read_rows(orders))
+    if trades is not None:
+        with perf.stage("trades") as span:
+            span.rows = cube.add_trades(_read_rows(trades))
+    return cube
+
+
+def _parse_where(items: Sequence[str]) -> Dict[str, List[str]]:
+    where: Dict[str, List[str]] = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"--where expects dimension=value[,value], got {item!r}")
+        where.setdefault(name.strip(), []).extend(v.strip() for v in value.split(","))
+    return where
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Build or query the one-pass KPI rollup cube")
+    ap.add_argument("command", choices=("build", "query"))
+    ap.add_argument("cube", nargs="?", default=None, help="query: cube file")
+    ap.add_argument("--run-dir", default=None, help="build: run directory (orders.csv, closed trades)")
+    ap.add_argument("--orders", default=None, help="build: orders.csv")
+    ap.add_argument("--trades", default=None, help="build: closed_trades_fifo_reconstructed.csv")
+    ap.add_argument("--out", default=None, help=f"build: cube file (default: <run-dir>/{CUBE_FILE})")
+    ap.add_argument("--by", nargs="*", default=(), help=f"query: group by any of {', '.join(DIMENSIONS)}")
+    ap.add_argument("--where", nargs="*", default=(), help="query: dimension=value[,value] filters")
+    ap.add_argument("--csv", default=None, help="query: write the rows as CSV here")
+    add_perf_args(ap)
+    args = ap.parse_args(argv)
+
+    if args.command == "query":
+        if not args.cube:
+            ap.error("query needs the cube file")
+        try:
+            rows = KpiCube.load(Path(args.cube)).table(args.by, _parse_where(args.where))
+        except ValueError as exc:
+            ap.error(str(exc))
+        if args.csv:
+            with Path(args.csv).open("w", encoding="utf-8", newline="") as fh:
+                writer = csv.DictWriter(fh, fieldnames=list(rows[0].keys()) if rows else list(args.by))
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            print(json.dumps(rows, indent=2))
+        return 0
+
+    run_dir = Path(args.run_dir) if args.run_dir else None
+    orders = Path(args.orders) if args.orders else (run_dir / "orders.csv" if run_dir else None)
+    trades = Path(args.trades) if args.trades else None
+    if trades is None and run_dir is not None and (run_dir / "closed_trades_fifo_reconstructed.csv").exists():
+        trades = run_dir / "closed_trades_fifo_reconstructed.csv"
+    if orders is None or not orders.exists():
+        ap.error("build needs --run-dir or --orders pointing at an orders.csv")
+    out = Path(args.out) if args.out else (run_dir or orders.parent) / CUBE_FILE
+
+    perf = PerfRecorder("kpi_cube", args.profile)
+    with perf:
+        cube = build(orders, trades, perf=perf)
+        with perf.stage("save"):
+            cube.save(out)
+    perf.write(Path(args.perf_dir) if args.perf_dir else out.parent)
+    print(json.dumps({"cube": str(out), "cells": len(cube.cells), "bytes": out.stat().st_size,
+                      "total": cube.table()[0] if cube.cells else {}}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
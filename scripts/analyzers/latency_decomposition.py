@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Break order latency into request -> ack -> fill stages, local vs server clock.
+
+OrderLifecycleLogger keeps per-order state. By the time the FILL row is
+written it carries ``timestamp_request``, ``timestamp_ack`` and
+``timestamp_fill`` (local clock), and ``request_server_time`` /
+``fill_server_time`` (broker clock). orders.csv is streamed once. REQUEST/ACK
+rows only fill in timestamps that later rows lack. An order is finalized and
+dropped from memory as soon as its first FILL row is seen, so memory scales with
+in-flight orders only. The last ``max_finished`` finalized ids are remembered
+so later partial FILL rows of the same order are skipped rather than counted
+again.
+
+Stages (milliseconds):
+  request_to_ack_ms          local request -> local ack       (network + broker accept)
+  ack_to_fill_ms             local ack -> local fill          (broker execution)
+  request_to_fill_ms         local request -> local fill      (end to end)
+  server_request_to_fill_ms  server request -> server fill    (broker-side only)
+  request_clock_offset_ms    server request - local request   (clock skew + uplink)
+  fill_report_delay_ms       local fill - server fill         (downlink + clock skew)
+  logged_latency_ms          the bot's own latency_ms column
+
+Each stage gets a mergeable ``QuantileSketch`` per (symbol, side, UTC hour of
+day), plus a fleet total.
+
+Usage:
+  python -m scripts.analyzers.latency_decomposition --orders orders.csv --out reports/latency
+
+Outputs (written to --out):
+  - latency_budget.csv            p50/p95/p99 per stage for ALL and each symbol/side/hour
+  - latency_stage_histograms.csv  fixed-bucket counts per stage
+  - latency_sketches.json         serialized sketches for cross-run merging
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+import json
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .reconcile_trades import parse_timestamp
+from .sketches import QuantileSketch
+
+STAGES: Sequence[str] = (
+    "request_to_ack_ms", "ack_to_fill_ms", "request_to_fill_ms", "server_request_to_fill_ms",
+    "request_clock_offset_ms", "fill_report_delay_ms", "logged_latency_ms",
+)
+QUANTILES: Sequence[float] = (0.5, 0.95, 0.99)
+HISTOGRAM_EDGES_MS: Sequence[float] = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+ALL = "ALL"
+
+# Timestamps an order may carry: name -> candidate columns (first non-empty wins)
+_TIME_FIELDS: Dict[str, Sequence[str]] = {
+    "request": ("timestamp_request",),
+    "ack": ("timestamp_ack",),
+    "fill": ("timestamp_fill",),
+    "server_request": ("request_server_time",),
+    "server_fill": ("fill_server_time",),
+}
+# Row timestamp used when the phase's own column is blank
+_PHASE_FALLBACK = {"REQUEST": "request", "ACK": "ack", "FILL": "fill"}
+
+GroupKey = Tuple[str, str, str]
+
+
+def _order_id(row: Dict[str, str]) -> str:
+    return (row.get("order_id") or row.get("orderId") or row.get("client_order_id") or "").strip()
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value) if value.strip() else None
+    except ValueError:
+        return None
+
+
+class _Order:
+    __slots__ = ("times", "symbol", "side", "latency_ms")
+
+    def __init__(self) -> None:
+        self.times: Dict[str, float] = {}
+        self.symbol = ""
+        self.side = ""
+        self.latency_ms: Optional[float] = None
+
+    def update(self, row: Dict[str, str], phase: str) -> None:
+        for name, cols in _TIME_FIELDS.items():
+            if name in self.times:
+                continue
+            for col in cols:
+                ts = parse_timestamp(row.get(col))
+                if ts is not None:
+                    self.times[name] = ts
+                    break
+        fallback = _PHASE_FALLBACK.get(phase)
+        if fallback and fallback not in self.times:
+            ts = parse_timestamp(row.get("timestamp_iso"))
+            if ts is not None:
+                self.times[fallback] = ts
+        self.symbol = self.symbol or (row.get("symbol") or "").strip().upper()
+        self.side = self.side or (row.get("side") or "").strip().upper()
+        if phase == "FILL":
+            self.latency_ms = _to_float(row.get("latency_ms"))
+
+    def stages(self) -> Dict[str, float]:
+        t = self.times
+        out: Dict[str, float] = {}
+
+        def span(name: str, a: str, b: str) -> None:
+            if a in t and b in t:
+                out[name] = (t[b] - t[a]) * 1000.0
+
+        span("request_to_ack_ms", "request", "ack")
+        span("ack_to_fill_ms", "ack", "fill")
+        span("request_to_fill_ms", "request", "fill")
+        span("server_request_to_fill_ms", "server_request", "server_fill")
+        span("request_clock_offset_ms", "request", "server_request")
+        span("fill_report_delay_ms", "server_fill", "fill")
+        if self.latency_ms is not None:
+            out["logged_latency_ms"] = self.latency_ms
+        return out
+
+    def hour(self) -> str:
+        ts = self.times.get("request", self.times.get("fill"))
+        if ts is None:
+            return ""
+        return f"{datetime.fromtimestamp(ts, tz=timezone.utc).hour:02d}"
+
+
+class LatencyDecomposer:
+    """Streaming per-order stage extraction with per-group quantile sketches."""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_finished: int = 100_000):
+        self.relative_accuracy = relative_accuracy
+        self.max_finished = max_finished
+        self.in_flight: Dict[str, _Order] = {}
+        self.finished: "OrderedDict[str, None]" = OrderedDict()
+        self.sketches: Dict[GroupKey, Dict[str, QuantileSketch]] = {}
+        self.histograms: Dict[str, List[int]] = {s: [0] * (len(HISTOGRAM_EDGES_MS) + 1) for s in STAGES}
+        self.orders_completed = 0
+        self.rows_after_fill = 0
+        self.peak_in_flight = 0
+
+    def _record(self, order: _Order) -> None:
+        stages = order.stages()
+        if not stages:
+            return
+        self.orders_completed += 1
+        keys = [(ALL, ALL, ALL), (order.symbol or "?", order.side or "?", order.hour() or "?")]
+        for key in keys:
+            group = self.sketches.setdefault(key, {})
+            for stage, value in stages.items():
+                sketch = group.get(stage)
+                if sketch is None:
+                    sketch = group[stage] = QuantileSketch(self.relative_accuracy)
+                sketch.add(value)
+        for stage, value in stages.items():
+            self.histograms[stage][bisect.bisect_right(HISTOGRAM_EDGES_MS, value)] += 1
+
+    def feed(self, row: Dict[str, str]) -> None:
+        oid = _order_id(row)
+        if not oid:
+            return
+        if oid in self.finished:
+            self.rows_after_fill += 1  # later partial fill of an order already measured
+            return
+        phase = (row.get("phase") or "").strip().upper()
+        order = self.in_flight.get(oid)
+        if order is None:
+            order = self.in_flight[oid] = _Order()
+            if len(self.in_flight) > self.peak_in_flight:
+                self.peak_in_flight = len(self.in_flight)
+        order.update(row, phase)
+        if phase == "FILL":
+            self._record(self.in_flight.pop(oid))
+            self.finished[oid] = None
+            if len(self.finished) > self.max_finished:
+                self.finished.popitem(last=False)
+        elif phase in ("REJECT", "CANCEL", "CANCELED", "CANCELLED"):
+            self.in_flight.pop(oid, None)
+
+    def finish(self) -> None:
+        """Orders still in flight at EOF contribute whatever request/ack stages they have."""
+        for order in self.in_flight.values():
+            self._record(order)
+        self.in_flight.clear()
+
+    def budget_rows(self) -> List[Dict[str, object]]:
+        rows: List[Dict[str, object]] = []
+        for (symbol, side, hour), group in sorted(self.sketches.items(), key=lambda kv: (kv[0] != (ALL, ALL, ALL), kv[0])):
+            for stage in STAGES:
+                sketch = group.get(stage)
+                if sketch is None:
+                    continue
+                row: Dict[str, object] = {"symbol": symbol, "side": side, "hour_utc": hour, "stage": stage,
+                                          "count": sketch.count, "mean": sketch.mean}
+                row.update(sketch.quantiles(QUANTILES))
+                rows.append(row)
+        return rows
+
+
+def decompose(orders_csv: Path, relative_accuracy: float = 0.01) -> LatencyDecomposer:
+    decomposer = LatencyDecomposer(relative_accuracy)
+    with Path(orders_csv).open("r", encoding="utf-8-sig", newline="") as fh:
+        for row in csv.DictReader(fh):
+            decomposer.feed(row)
+    decomposer.finish()
+    return decomposer
+
+
+def write_outputs(decomposer: LatencyDecomposer, out_dir: Path) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rows = decomposer.budget_rows()
+    cols = ["symbol", "side", "hour_utc", "stage", "count", "mean"] + [f"p{round(q * 100, 1):g}" for q in QUANTILES]
+    with (out_dir / "latency_budget.csv").open("w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=cols)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    labels = [f"<{HISTOGRAM_EDGES_MS[0]:g}"]
+    labels += [f"{lo:g}-{hi:g}" for lo, hi in zip(HISTOGRAM_EDGES_MS, HISTOGRAM_EDGES_MS[1:])]
+    labels += [f">={HISTOGRAM_EDGES_MS[-1]:g}"]
+    with (out_dir / "latency_stage_histograms.csv").open("w", encoding="utf-8", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["stage"] + labels)
+        for stage in STAGES:
+            writer.writerow([stage] + decomposer.histograms[stage])
+
+    sketches = {
+        "|".join(key): {stage: sketch.to_dict() for stage, sketch in group.items()}
+        for key, group in decomposer.sketches.items()
+    }
+    (out_dir / "latency_sketches.json").write_text(json.dumps({
+        "orders_completed": decomposer.orders_completed,
+        "rows_after_fill": decomposer.rows_after_fill,
+        "peak_in_flight": decomposer.peak_in_flight,
+        "group_key": "symbol|side|hour_utc",
+        "sketches": sketches,
+    }), encoding="utf-8")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Order latency decomposition (request/ack/fill, local vs server clock)")
+    ap.add_argument("--orders", required=True, help="orders.csv")
+    ap.add_argument("--out", default=None, help="Output directory (default: alongside orders.csv)")
+    ap.add_argument("--accuracy", type=float, default=0.01, help="Sketch relative accuracy")
+    args = ap.parse_args(argv)
+
+    orders = Path(args.orders)
+    decomposer = decompose(orders, args.accuracy)
+    write_outputs(decomposer, Path(args.out) if args.out else orders.parent)
+    overall = decomposer.sketches.get((ALL, ALL, ALL), {})
+    print(json.dumps({
+        "orders_completed": decomposer.orders_completed,
+        "stages": {stage: overall[stage].quantiles(QUANTILES) for stage in STAGES if stage in overall},
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
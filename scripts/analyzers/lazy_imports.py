@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Deferred imports for the heavy analysis libraries (pandas, numpy, matplotlib).
+
+Importing pandas costs about 0.3 s and matplotlib more. Before this module,
+every analysis script paid that at module import, even for ``--help`` or a
+tiny smoke artifact, and the wrappers launch these scripts many times per
+run. Scripts now bind the usual names to proxies::
+
+    pd = lazy_import("pandas")
+    np = lazy_import("numpy", optional=True)   # None when not installed
+    plt = lazy_import("matplotlib.pyplot", optional=True, before_load=use_agg_backend)
+
+The real import happens on the first attribute access (``pd.read_csv``).
+After that the proxy holds the module's namespace, so lookups cost the same
+as on the module itself. Loading takes the import lock, so the proxies are
+safe to touch from the postrun pipeline's worker threads. Python 3.11's
+``importlib.util.LazyLoader`` is not thread-safe, which is why it is not
+used here.
+
+Scripts that call ``pd.Timestamp`` etc. in annotations need
+``from __future__ import annotations``. Otherwise the annotation forces the
+import at definition time.
+
+Usage (show which heavy modules a script pulls in at import):
+  python -m scripts.analyzers.lazy_imports scripts.audit_gate2_risks
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+import types
+from typing import Callable, List, Optional
+
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "scipy")
+
+_load_lock = threading.RLock()
+
+
+def is_available(name: str) -> bool:
+    """True when the top-level package of ``name`` can be imported (nothing is imported)."""
+    top = name.partition(".")[0]
+    if top in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(top) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def missing_modules(*names: str) -> List[str]:
+    return [name for name in names if not is_available(name)]
+
+
+def use_agg_backend() -> None:
+    """Select the non-interactive backend before pyplot is first imported."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name: str, before_load: Optional[Callable[[], None]] = None):
+        super().__init__(name)
+        self._lazy_before_load = before_load
+        self._lazy_loaded = False
+
+    def _lazy_load(self) -> types.ModuleType:
+        with _load_lock:
+            module = sys.modules.get(self.__name__)
+            if module is None or not self._lazy_loaded:
+                if self._lazy_before_load is not None:
+                    self._lazy_before_load()
+                module = importlib.import_module(self.__name__)
+                self.__dict__.update({k: v for k, v in module.__dict__.items() if k != "__name__"})
+                self._lazy_loaded = True
+            return module
+
+    def __getattr__(self, attr: str):
+        # Only reached for names not copied in yet (i.e. before loading)
+        if attr.startswith("_lazy_"):
+            raise AttributeError(attr)
+        return getattr(self._lazy_load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._lazy_load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_loaded else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str, optional: bool = False,
+                before_load: Optional[Callable[[], None]] = None) -> Optional[types.ModuleType]:
+    """Proxy for ``name`` that imports on first use.
+
+    A module that is already imported is returned as is. One still being
+    imported by another thread is not, because it would be half initialized;
+    the proxy then waits on the import lock at first use. With ``optional``,
+    a missing package gives None, mirroring ``try: import x / except: x = None``.
+    A missing required package raises ImportError only on first use. That way
+    ``--help`` still works without it.
+    """
+    module = sys.modules.get(name)
+    if module is not None and before_load is None \
+            and not getattr(getattr(module, "__spec__", None), "_initializing", False):
+        return module
+    if optional and not is_available(name):
+        return None
+    return LazyModule(name, before_load)
+
+
+def heavy_imports_of(module: str) -> List[str]:
+    """Heavy packages that ``import module`` pulls in (run in a fresh interpreter for a clean answer)."""
+    importlib.import_module(module)
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Report import time and heavy dependencies of a module")
+    ap.add_argument("module", help="Dotted module name, e.g. scripts.analyze_postrun")
+    args = ap.parse_args(argv)
+
+    start = time.perf_counter()
+    heavy = heavy_imports_of(args.module)
+    print(f"{args.module}: import {time.perf_counter() - start:.3f}s, heavy modules loaded: {', '.join(heavy) or 'none'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
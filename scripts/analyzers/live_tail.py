@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Live tail of a running bot's artifacts with incremental KPIs.
+
+Follows orders.csv, risk_snapshots.csv and telemetry.csv by byte offset while
+the bot appends to them. Each poll reads only the new complete lines, so
+steady-state cost is proportional to what the bot wrote since the last poll.
+A partial last line is left for the next poll.
+
+A header rewrite (``OrderLifecycleLogger.EnsureHeader`` rewrites the first
+line in place) is detected by re-reading the first line. The offset is then
+shifted by the header length delta. A file that shrank below the offset was
+truncated or recreated, so it is re-read from the top.
+
+Running KPIs:
+  - orders: fill rate and stuck/duplicate counts from ``OrderLifecycleTracker``,
+    latency quantiles from a ``QuantileSketch``
+  - risk_snapshots: last equity, peak equity, max drawdown, exposure (last/max)
+  - telemetry: last row (ticksPerSec, memoryMB, gen2...)
+
+A snapshot is published every ``--interval`` seconds to a JSON file (atomic
+replace), to ``http://127.0.0.1:<port>/`` or to both.
+
+Usage:
+  python -m scripts.analyzers.live_tail --run-dir D:/botg/logs/artifacts/telemetry_run_X --json live_kpis.json
+  python -m scripts.analyzers.live_tail --latest D:/botg/logs/artifacts --port 8765 --interval 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .order_lifecycle import OrderLifecycleTracker
+from .run_catalog import resolve_latest_run
+from .sketches import QuantileSketch
+
+READ_CHUNK_BYTES = 4 * 1024 * 1024
+HEADER_PROBE_BYTES = 64 * 1024
+TAILED_FILES = ("orders.csv", "risk_snapshots.csv", "telemetry.csv")
+
+
+class FileTail:
+    """Follow one CSV by byte offset, yielding parsed rows for newly appended lines."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.header = b""
+        self.fields: List[str] = []
+        self.offset = 0
+        self.rows = 0
+        self.rewinds = 0
+        self.last_growth = time.monotonic()
+
+    def _read_header(self, fh) -> bytes:
+        fh.seek(0)
+        first = fh.readline(HEADER_PROBE_BYTES)
+        return first if first.endswith(b"\n") else b""
+
+    def _set_header(self, header: bytes) -> None:
+        self.header = header
+        text = header.decode("utf-8-sig", errors="replace").strip()
+        self.fields = next(csv.reader([text])) if text else []
+
+    def poll(self, max_bytes: int = READ_CHUNK_BYTES) -> Tuple[List[Dict[str, str]], bool]:
+        """Return (new rows, more_pending). Safe to call when the file does not exist yet."""
+        try:
+            fh = self.path.open("rb")
+        except OSError:
+            return [], False
+        with fh:
+            size = os.fstat(fh.fileno()).st_size
+            header = self._read_header(fh)
+            if not header:
+                return [], False
+            if not self.header:
+                self._set_header(header)
+                self.offset = len(header)
+            elif header != self.header:
+                # Header rewritten in place: body unchanged, shift by the length delta
+                self.offset = max(len(header), self.offset + len(header) - len(self.header))
+                self._set_header(header)
+            if size < self.offset:
+                self.offset = len(header)
+                self.rewinds += 1
+            if size == self.offset:
+                return [], False
+            fh.seek(self.offset)
+            chunk = fh.read(min(max_bytes, size - self.offset))
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return [], False
+        chunk = chunk[:end + 1]
+        self.offset += len(chunk)
+        self.last_growth = time.monotonic()
+        lines = chunk.decode("utf-8", errors="replace").splitlines()
+        rows = [dict(zip(self.fields, values)) for values in csv.reader(lines) if values]
+        self.rows += len(rows)
+        return rows, self.offset < size
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "offset": self.offset,
+            "rows": self.rows,
+            "rewinds": self.rewinds,
+            "idle_s": round(time.monotonic() - self.last_growth, 1),
+        }
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value) if value.strip() else None
+    except ValueError:
+        return None
+
+
+class LiveKpis:
+    """Incrementally updated KPIs fed row by row from the tailed files."""
+
+    def __init__(self, timeout_s: float = 300.0):
+        self.lifecycle = OrderLifecycleTracker(timeout_s)
+        self.latency = QuantileSketch()
+        self.equity_last: Optional[float] = None
+        self.equity_peak: Optional[float] = None
+        self.max_drawdown = 0.0
+        self.exposure_last: Optional[float] = None
+        self.exposure_max: Optional[float] = None
+        self.risk_ts = ""
+        self.telemetry_last: Dict[str, str] = {}
+
+    def feed_order(self, row: Dict[str, str]) -> None:
+        self.lifecycle.feed(row)
+        if (row.get("phase") or "").strip().upper() == "FILL":
+            latency = _to_float(row.get("latency_ms"))
+            if latency is not None:
+                self.latency.add(latency)
+
+    def feed_risk(self, row: Dict[str, str]) -> None:
+        equity = _to_float(row.get("equity"))
+        if equity is not None:
+            self.equity_last = equity
+            if self.equity_peak is None or equity > self.equity_peak:
+                self.equity_peak = equity
+            self.max_drawdown = max(self.max_drawdown, self.equity_peak - equity)
+        exposure = _to_float(row.get("exposure"))
+        if exposure is not None:
+            self.exposure_last = exposure
+            if self.exposure_max is None or abs(exposure) > abs(self.exposure_max):
+                self.exposure_max = exposure
+        self.risk_ts = row.get("timestamp_utc") or row.get("timestamp_iso") or self.risk_ts
+
+    def feed_telemetry(self, row: Dict[str, str]) -> None:
+        self.telemetry_last = row
+
+    def snapshot(self) -> Dict[str, object]:
+        lifecycle = self.lifecycle.summary()
+        return {
+            "orders": {
+                "requests": lifecycle["requests"],
+                "filled_orders": lifecycle["filled_orders"],
+                "fill_rate_percent": lifecycle["fill_rate_percent"],
+                "in_flight": lifecycle["in_flight"],
+                "stuck": lifecycle["stuck"],
+                "duplicate_fill": lifecycle["duplicate_fill"],
+                "rejects": lifecycle["rejects"],
+                "latency_ms": self.latency.quantiles((0.5, 0.95, 0.99)),
+            },
+            "risk": {
+                "timestamp": self.risk_ts,
+                "equity": self.equity_last,
+                "equity_peak": self.equity_peak,
+                "max_drawdown": self.max_drawdown,
+                "exposure": self.exposure_last,
+                "exposure_max": self.exposure_max,
+            },
+            "telemetry": self.telemetry_last,
+        }
+
+
+class LiveTailService:
+    """Poll the run directory and publish KPI snapshots on a fixed cadence."""
+
+    def __init__(self, run_dir: Path, interval_s: float = 5.0, json_path: Optional[Path] = None,
+                 port: Optional[int] = None, timeout_s: float = 300.0):
+        self.run_dir = Path(run_dir)
+        self.interval_s = interval_s
+        self.json_path = json_path
+        self.port = port
+        self.kpis = LiveKpis(timeout_s)
+        self.tails = {name: FileTail(self.run_dir / name) for name in TAILED_FILES}
+        self._feeders = {
+            "orders.csv": self.kpis.feed_order,
+            "risk_snapshots.csv": self.kpis.feed_risk,
+            "telemetry.csv": self.kpis.feed_telemetry,
+        }
+        self._snapshot: Dict[str, object] = {}
+        self.polls = 0
+
+    def poll_once(self) -> int:
+        """Drain every tail once (blocking I/O); returns rows consumed."""
+        consumed = 0
+        for name, tail in self.tails.items():
+            more = True
+            while more:
+                rows, more = tail.poll()
+                feed = self._feeders[name]
+                for row in rows:
+                    feed(row)
+                consumed += len(rows)
+        self.polls += 1
+        return consumed
+
+    def snapshot(self) -> Dict[str, object]:
+        snap = self.kpis.snapshot()
+        snap["run_dir"] = str(self.run_dir)
+        snap["generated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        snap["files"] = {name: tail.status() for name, tail in self.tails.items()}
+        return snap
+
+    def publish(self) -> Dict[str, object]:
+        self._snapshot = self.snapshot()
+        if self.json_path is not None:
+            tmp = self.json_path.with_suffix(self.json_path.suffix + ".tmp")
+            tmp.write_text(json.dumps(self._snapshot, indent=2), encoding="utf-8")
+            os.replace(tmp, self.json_path)
+        return self._snapshot
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        body = json.dumps(self._snapshot).encode("utf-8")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n"
+                     + f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def run(self, duration_s: Optional[float] = None) -> Dict[str, object]:
+        server = None
+        if self.port is not None:
+            server = await asyncio.start_server(self._handle_http, "127.0.0.1", self.port)
+        deadline = None if duration_s is None else time.monotonic() + duration_s
+        try:
+            while True:
+                await asyncio.to_thread(self.poll_once)
+                self.publish()
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(self.interval_s)
+        finally:
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+        return self._snapshot
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Live tail of bot artifacts with incremental KPIs")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--run-dir", help="Run directory being written by the bot")
+    src.add_argument("--latest", help="Artifacts root; follow the latest telemetry_run_* from the run catalog")
+    ap.add_argument("--interval", type=float, default=5.0, help="Seconds between snapshots")
+    ap.add_argument("--json", default=None, help="Snapshot JSON path (default: <run-dir>/live_kpis.json)")
+    ap.add_argument("--port", type=int, default=None, help="Serve the latest snapshot on 127.0.0.1:<port>")
+    ap.add_argument("--timeout", type=float, default=300.0, help="Seconds before an in-flight order is stuck")
+    ap.add_argument("--duration", type=float, default=None, help="Stop after N seconds (default: run until Ctrl+C)")
+    args = ap.parse_args(argv)
+
+    run_dir = Path(args.run_dir) if args.run_dir else resolve_latest_run(Path(args.latest))
+    if run_dir is None:
+        print("No run directory found")
+        return 2
+    json_path = Path(args.json) if args.json else (None if args.port is not None else run_dir / "live_kpis.json")
+    service = LiveTailService(run_dir, args.interval, json_path, args.port, args.timeout)
+    try:
+        asyncio.run(service.run(args.duration))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Tick-resolution mark-to-market equity and intratrade drawdown.
+
+analyzer.py and analyze_smoke.py build equity from closed trades, and
+risk_snapshots.csv samples the account ``equity`` every few seconds. Neither
+shows how deep an open position went before it was closed. This marks every
+open lot to the L1 tick stream instead.
+
+Per symbol, the fills from orders.csv become two step functions of time:
+signed position ``q`` and cash ``c`` (``-sum(signed qty * fill price)``).
+Both are looked up at each tick with ``searchsorted``. Longs are marked to
+the bid and shorts to the ask, i.e. what closing would fetch:
+
+    pnl_symbol(t) = (q(t) * mark(t) + c(t)) * point_value
+
+At every fill time this equals realized plus unrealized P&L, so a flat book
+ends on the same number as the FIFO reconstruction's ``gross_pnl`` total.
+Point values come from run_metadata.json as in reconstruct_fifo.py (default
+1.0). Each symbol's series is turned into increments. The increments of all
+symbols are stably sorted by time once and cumulatively summed, which gives
+the account curve without an N x symbols matrix. Commissions are subtracted
+at their fill times for the net curve.
+
+An "episode" is one stretch of non-zero position in a symbol. For each
+episode the worst and best P&L relative to its start is its intratrade
+drawdown and run-up in account currency.
+
+Usage:
+  python -m scripts.analyzers.mtm_equity --orders run/orders.csv --l1 run/l1_snapshots.csv --out run/mtm
+
+Outputs (written to --out):
+  - equity_curve.npz       every event: ts_ms, equity_gross, equity_net, drawdown
+  - equity_curve.csv       per --bucket-ms: last/min/max net equity and worst drawdown
+  - intratrade_episodes.csv per symbol episode: open/close, max adverse/favorable, result
+  - mtm_summary.json       final equity, max drawdown with peak/trough/recovery times
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .lazy_imports import lazy_import
+    from .perf import PerfRecorder, add_perf_args
+    from .tick_bars import read_ticks
+except ImportError:  # run as scripts/analyzers/mtm_equity.py
+    from lazy_imports import lazy_import
+    from perf import PerfRecorder, add_perf_args
+    from tick_bars import read_ticks
+
+try:
+    from path_issues.reconstruct_fifo import Fill, load_metadata, read_fills
+except ImportError:  # repo root not on sys.path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from path_issues.reconstruct_fifo import Fill, load_metadata, read_fills
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+CURVE_COLUMNS: Sequence[str] = ("ts_ms", "equity_gross", "equity_net", "drawdown")
+EPISODE_COLUMNS: Sequence[str] = (
+    "symbol", "open_ts_ms", "close_ts_ms", "max_position", "max_adverse", "max_favorable", "result", "closed",
+)
+
+
+def fill_arrays(fills: Sequence[Fill]) -> Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """Per upper-cased symbol: (ts_ms, signed qty, price, commission) in time order."""
+    grouped: Dict[str, List[Fill]] = {}
+    for fill in fills:
+        grouped.setdefault(fill.symbol.strip().upper(), []).append(fill)
+    out = {}
+    for symbol, items in grouped.items():
+        items.sort(key=lambda f: f.epoch_ms)
+        out[symbol] = (
+            np.array([f.epoch_ms for f in items], dtype="int64"),
+            np.array([float(f.volume) if f.side == "BUY" else -float(f.volume) for f in items]),
+            np.array([float(f.price) for f in items]),
+            np.array([float(f.commission) for f in items]),
+        )
+    return out
+
+
+def symbol_pnl(fill_ts: np.ndarray, qty: np.ndarray, price: np.ndarray, tick_ts: np.ndarray, bid: np.ndarray,
+               ask: np.ndarray, point_value: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(event ts, position, pnl) at every fill and tick from the first fill on; one event per millisecond."""
+    position = np.cumsum(qty)
+    cash = np.cumsum(-qty * price)
+    ticks = tick_ts[tick_ts >= fill_ts[0]]
+    events = np.concatenate([fill_ts, ticks])
+    events.sort(kind="stable")
+    # Last event per millisecond: fills and ticks stamped ``t`` both count at ``t``
+    events = events[np.append(events[1:] != events[:-1], True)]
+
+    k = np.searchsorted(fill_ts, events, side="right") - 1
+    q, c = position[k], cash[k]
+    j = np.searchsorted(tick_ts, events, side="right") - 1
+    has_tick = j >= 0
+    jj = np.where(has_tick, j, 0)
+    # Before the symbol's first tick the best mark is the last fill price
+    mark_long = np.where(has_tick, bid[jj] if len(bid) else 0.0, price[k])
+    mark_short = np.where(has_tick, ask[jj] if len(ask) else 0.0, price[k])
+    mark = np.where(q > 0, mark_long, mark_short)
+    # Fully closed: pnl is the cash alone, avoids 0 * mark rounding noise
+    pnl = np.where(q == 0, c, q * mark + c) * point_value
+    return events, q, pnl
+
+
+def episodes(symbol: str, events: np.ndarray, q: np.ndarray, pnl: np.ndarray) -> pd.DataFrame:
+    """Stretches of non-zero position with worst/best P&L relative to the P&L just before opening."""
+    open_ = q != 0
+    starts = open_ & ~np.concatenate([[False], open_[:-1]])
+    if not starts.any():
+        return pd.DataFrame(columns=list(EPISODE_COLUMNS))
+    episode = np.cumsum(starts)
+    # The event that closes an episode belongs to it (its pnl is the realized result)
+    closing = ~open_ & np.concatenate([[False], open_[:-1]])
+    episode_id = np.where(open_, episode, np.where(closing, episode, 0))
+    base = np.concatenate([[0.0], pnl[:-1]])[starts]
+    frame = pd.DataFrame({"episode": episode_id, "ts": events, "pnl": pnl, "absq": np.abs(q), "closing": closing})
+    frame = frame[frame["episode"] > 0]
+    g = frame.groupby("episode", sort=True)
+    out = pd.DataFrame({
+        "open_ts_ms": g["ts"].first(),
+        "close_ts_ms": g["ts"].last(),
+        "max_position": g["absq"].max(),
+        "low": g["pnl"].min(),
+        "high": g["pnl"].max(),
+        "last": g["pnl"].last(),
+        "closed": g["closing"].any(),
+    })
+    out["max_adverse"] = np.minimum(out["low"].to_numpy() - base, 0.0)
+    out["max_favorable"] = np.maximum(out["high"].to_numpy() - base, 0.0)
+    out["result"] = out["last"].to_numpy() - base
+    out.insert(0, "symbol", symbol)
+    return out[list(EPISODE_COLUMNS)].reset_index(drop=True)
+
+
+def mtm_equity(fills: Sequence[Fill], ticks: pd.DataFrame, point_values: Optional[Dict[str, float]] = None,
+               default_point_value: float = 1.0) -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
+    """(curve, episodes, symbols traded without ticks) from fills and ``read_ticks`` output."""
+    point_values = {k.strip().upper(): float(v) for k, v in (point_values or {}).items()}
+    by_symbol = {symbol: group for symbol, group in ticks.groupby("symbol", sort=False, observed=True)}
+    empty = np.empty(0)
+    ts_parts, pnl_parts, fee_ts, fee_parts, episode_frames, no_ticks = [], [], [], [], [], []
+    for symbol, (fill_ts, qty, price, commission) in fill_arrays(fills).items():
+        group = by_symbol.get(symbol)
+        if group is None:
+            no_ticks.append(symbol)
+            tick_ts, bid, ask = np.empty(0, dtype="int64"), empty, empty
+        else:
+            tick_ts = group["ts_ms"].to_numpy()
+            bid, ask = group["bid"].to_numpy(), group["ask"].to_numpy()
+        events, q, pnl = symbol_pnl(fill_ts, qty, price, tick_ts, bid, ask,
+                                    point_values.get(symbol, default_point_value))
+        ts_parts.append(events)
+        pnl_parts.append(np.diff(pnl, prepend=0.0))
+        fee_ts.append(fill_ts)
+        fee_parts.append(commission)
+        episode_frames.append(episodes(symbol, events, q, pnl))
+
+    if not ts_parts:
+        return pd.DataFrame(columns=list(CURVE_COLUMNS)), pd.DataFrame(columns=list(EPISODE_COLUMNS)), no_ticks
+    # One stable sort of all increments; commissions ride along as a second increment column
+    ts = np.concatenate(ts_parts + fee_ts)
+    gross_delta = np.concatenate(pnl_parts + [np.zeros(len(t)) for t in fee_ts])
+    fee_delta = np.concatenate([np.zeros(len(t)) for t in ts_parts] + fee_parts)
+    order = np.argsort(ts, kind="stable")
+    ts = ts[order]
+    gross = np.cumsum(gross_delta[order])
+    net = gross - np.cumsum(fee_delta[order])
+    last = np.append(ts[1:] != ts[:-1], True)
+    ts, gross, net = ts[last], gross[last], net[last]
+    curve = pd.DataFrame({"ts_ms": ts, "equity_gross": gross, "equity_net": net,
+                          "drawdown": net - np.maximum.accumulate(np.maximum(net, 0.0))})
+    eps = pd.concat(episode_frames, ignore_index=True).sort_values(["open_ts_ms", "symbol"], ignore_index=True)
+    return curve, eps, no_ticks
+
+
+def drawdown_summary(curve: pd.DataFrame) -> Dict[str, object]:
+    """Max drawdown of the net curve (from a zero starting balance) with peak, trough and recovery times."""
+    if curve.empty:
+        return {"events": 0}
+    ts = curve["ts_ms"].to_numpy()
+    net = curve["equity_net"].to_numpy()
+    dd = curve["drawdown"].to_numpy()
+    trough = int(np.argmin(dd))
+    peak_value = net[trough] - dd[trough]
+    before = np.nonzero(net[:trough + 1] >= peak_value)[0]
+    after = np.nonzero(net[trough:] >= peak_value)[0]
+    return {
+        "events": int(len(curve)),
+        "first_ts_ms": int(ts[0]),
+        "last_ts_ms": int(ts[-1]),
+        "final_equity_gross": float(curve["equity_gross"].iloc[-1]),
+        "final_equity_net": float(net[-1]),
+        "max_equity": float(net.max()),
+        "min_equity": float(net.min()),
+        "max_drawdown": float(dd[trough]),
+        "peak_ts_ms": int(ts[before[-1]]) if len(before) else None,
+        "trough_ts_ms": int(ts[trough]),
+        "recovered_ts_ms": int(ts[trough + after[0]]) if len(after) and dd[trough] < 0 else None,
+    }
+
+
+def bucket_curve(curve: pd.DataFrame, bucket_ms: int) -> pd.DataFrame:
+    """Last/min/max net equity and worst drawdown per ``bucket_ms`` (so the CSV keeps every dip)."""
+    keyed = curve.assign(bucket_ms=curve["ts_ms"] // bucket_ms * bucket_ms)
+    g = keyed.groupby("bucket_ms", sort=True)
+    return pd.DataFrame({
+        "equity_gross": g["equity_gross"].last(),
+        "equity_net": g["equity_net"].last(),
+        "equity_net_min": g["equity_net"].min(),
+        "equity_net_max": g["equity_net"].max(),
+        "drawdown_min": g["drawdown"].min(),
+    }).reset_index().rename(columns={"bucket_ms": "ts_ms"})
+
+
+def run(orders: Path, l1: Path, out_dir: Path, metadata: Optional[Path] = None, bucket_ms: int = 1000,
+        perf: Optional[PerfRecorder] = None) -> Dict[str, object]:
+    perf = perf or PerfRecorder("mtm_equity")
+    with perf.stage("load_fills") as span:
+        fills = read_fills(orders, "FILL")
+        meta = load_metadata(str(metadata) if metadata else None)
+        span.rows = len(fills)
+    with perf.stage("load_ticks") as span:
+        ticks = read_ticks(l1)
+        span.rows = len(ticks)
+    with perf.stage("mark_to_market") as span:
+        curve, eps, no_ticks = mtm_equity(fills, ticks, meta.point_value_per_lot, float(meta.default_point_value))
+        span.rows = len(curve)
+    with perf.stage("write"):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(out_dir / "equity_curve.npz", **{col: curve[col].to_numpy() for col in CURVE_COLUMNS})
+        bucket_curve(curve, bucket_ms).to_csv(out_dir / "equity_curve.csv", index=False, float_format="%.6f")
+        eps.to_csv(out_dir / "intratrade_episodes.csv", index=False, float_format="%.6f")
+        summary = drawdown_summary(curve)
+        summary.update({
+            "fills": len(fills), "ticks": int(len(ticks)), "episodes": int(len(eps)),
+            "worst_intratrade": float(eps["max_adverse"].min()) if len(eps) else None,
+            "symbols_without_ticks": sorted(no_ticks), "bucket_ms": bucket_ms,
+        })
+        (out_dir / "mtm_summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Tick-resolution mark-to-market equity and drawdown")
+    ap.add_argument("--orders", required=True, help="orders.csv")
+    ap.add_argument("--l1", required=True, help="l1_snapshots.csv (or l1_stream.csv)")
+    ap.add_argument("--meta", default=None, help="run_metadata.json for point values (default: next to orders.csv)")
+    ap.add_argument("--out", default=None, help="Output directory (default: <orders dir>/mtm)")
+    ap.add_argument("--bucket-ms", type=int, default=1000, help="Bucket width of equity_curve.csv")
+    add_perf_args(ap)
+    args = ap.parse_args(argv)
+
+    orders = Path(args.orders)
+    meta = Path(args.meta) if args.meta else orders.parent / "run_metadata.json"
+    out_dir = Path(args.out) if args.out else orders.parent / "mtm"
+    perf = PerfRecorder("mtm_equity", args.profile)
+    with perf:
+        summary = run(orders, Path(args.l1), out_dir, meta if meta.exists() else None, max(1, args.bucket_ms), perf)
+    perf.write(Path(args.perf_dir) if args.perf_dir else out_dir)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
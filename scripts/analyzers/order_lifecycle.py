@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""Bounded-memory order lifecycle tracker over orders.csv rows.
+
+Each order id moves through REQUEST -> ACK -> FILL (or REJECT). Only orders
+still in flight are held in memory. An order leaves the in-flight map when it
+completes, or when no row has arrived for it within ``timeout_s`` of the
+stream clock (the newest row timestamp seen); the latter is reported as
+``stuck``. Completed ids (with their final state, FILLED or REJECTED) and
+evicted stuck orders are remembered for ``completed_ttl_s``. A later FILL
+of a filled order is a ``duplicate_fill`` when the requested size is known
+and the cumulative filled size would exceed it; otherwise it is another
+partial of the same order. A FILL after a REJECT is a
+``fill_after_reject``. A row for an evicted order puts it back in flight;
+when that row is a FILL it is a ``late_fill`` and the order still counts as
+filled once it completes.
+
+Every map is ordered by last activity, so eviction only ever looks at the
+oldest entries. Memory is proportional to in-flight plus recently completed
+or evicted orders, whatever the run length. ``feed`` takes one row at a time, so the
+tracker works the same over a finished file or a live tail.
+
+Events:
+  stuck                 no progress within timeout (state at eviction is reported)
+  duplicate_fill        FILL past the requested size of an order that already filled
+  fill_after_reject     FILL for an order that was rejected (counted as filled)
+  late_fill             FILL for an order already reported stuck
+  ack_without_request   ACK for an unknown order
+  fill_without_request  FILL for an unknown order
+  reject                order rejected
+  pending               still in flight at end of stream (``finish``)
+
+Usage:
+  python -m scripts.analyzers.order_lifecycle --orders orders.csv --timeout 120 --out reports/lifecycle
+
+Outputs (written to --out):
+  - lifecycle_events.csv     one row per event above
+  - lifecycle_summary.json   counts, fill rate, peak in-flight
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .reconcile_trades import parse_timestamp
+
+REQUESTED = "REQUESTED"
+ACKED = "ACKED"
+PARTIAL = "PARTIALLY_FILLED"
+FILLED = "FILLED"
+REJECTED = "REJECTED"
+
+_FILL_PHASES = {"FILL", "FILLED"}
+_REJECT_PHASES = {"REJECT", "REJECTED", "CANCEL", "CANCELED", "CANCELLED", "ERROR"}
+EVENT_COLUMNS = ("kind", "order_id", "timestamp_iso", "state", "age_s", "detail")
+
+
+class LifecycleEvent(NamedTuple):
+    kind: str
+    order_id: str
+    timestamp_iso: str
+    state: str
+    age_s: Optional[float]
+    detail: str
+
+
+class _Done(NamedTuple):
+    ts: float
+    state: str
+    requested: Optional[float]
+    filled: float
+
+
+class _InFlight:
+    __slots__ = ("state", "first_ts", "last_ts", "requested", "filled", "side", "symbol")
+
+    def __init__(self, state: str, ts: float):
+        self.state = state
+        self.first_ts = ts
+        self.last_ts = ts
+        self.requested: Optional[float] = None
+        self.filled = 0.0
+        self.side = ""
+        self.symbol = ""
+
+
+def _order_id(row: Dict[str, str]) -> str:
+    return (row.get("order_id") or row.get("orderId") or row.get("client_order_id") or "").strip()
+
+
+def _phase(row: Dict[str, str]) -> str:
+    return (row.get("phase") or row.get("status") or "").strip().upper()
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value) if value.strip() else None
+    except ValueError:
+        return None
+
+
+def _iso(ts: Optional[float]) -> str:
+    if ts is None:
+        return ""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class OrderLifecycleTracker:
+    """Streaming REQUEST/ACK/FILL/REJECT state machine keyed by order id."""
+
+    def __init__(self, timeout_s: float = 300.0, completed_ttl_s: Optional[float] = None,
+                 on_event: Optional[Callable[[LifecycleEvent], None]] = None):
+        self.timeout_s = timeout_s
+        self.completed_ttl_s = timeout_s if completed_ttl_s is None else completed_ttl_s
+        self.on_event = on_event
+        self.in_flight: "OrderedDict[str, _InFlight]" = OrderedDict()
+        self.completed: "OrderedDict[str, _Done]" = OrderedDict()
+        self.evicted: "OrderedDict[str, Tuple[float, _InFlight]]" = OrderedDict()
+        self.clock: Optional[float] = None
+        self.counts: Dict[str, int] = {
+            "rows": 0, "requests": 0, "acks": 0, "fills": 0, "rejects": 0, "filled_orders": 0,
+            "stuck": 0, "duplicate_fill": 0, "fill_after_reject": 0, "late_fill": 0,
+            "ack_without_request": 0, "fill_without_request": 0, "reject": 0, "pending": 0,
+        }
+        self.peak_in_flight = 0
+
+    def _emit(self, kind: str, oid: str, ts: Optional[float], state: str,
+              first_ts: Optional[float] = None, detail: str = "") -> None:
+        self.counts[kind] += 1
+        if self.on_event is not None:
+            age = round(ts - first_ts, 3) if ts is not None and first_ts is not None else None
+            self.on_event(LifecycleEvent(kind, oid, _iso(ts), state, age, detail))
+
+    def _complete(self, oid: str, ts: float, state: str, requested: Optional[float] = None,
+                  filled: float = 0.0) -> None:
+        self.in_flight.pop(oid, None)
+        self.completed[oid] = _Done(ts, state, requested, filled)
+        self.completed.move_to_end(oid)
+
+    def _touch(self, oid: str, entry: _InFlight, ts: float) -> None:
+        entry.last_ts = max(entry.last_ts, ts)
+        self.in_flight.move_to_end(oid)
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """Evict orders idle for longer than the timeout and forget old completions."""
+        now = self.clock if now is None else now
+        if now is None:
+            return
+        horizon = now - self.timeout_s
+        while self.in_flight:
+            oid, entry = next(iter(self.in_flight.items()))
+            if entry.last_ts >= horizon:
+                break
+            del self.in_flight[oid]
+            self.evicted[oid] = (now, entry)
+            self._emit("stuck", oid, now, entry.state, entry.first_ts,
+                       f"idle {now - entry.last_ts:.1f}s")
+        done_horizon = now - self.completed_ttl_s
+        for done in (self.completed, self.evicted):
+            while done:
+                oid, item = next(iter(done.items()))
+                if item[0] >= done_horizon:
+                    break
+                del done[oid]
+
+    def feed(self, row: Dict[str, str]) -> None:
+        oid = _order_id(row)
+        phase = _phase(row)
+        ts = parse_timestamp(row.get("timestamp_iso") or row.get("timestamp"))
+        if not oid or ts is None:
+            return
+        self.counts["rows"] += 1
+        if self.clock is None or ts > self.clock:
+            self.clock = ts
+        entry = self.in_flight.get(oid)
+        if entry is None and oid in self.evicted:
+            # Progress after the stuck report: resume from the state at eviction
+            entry = self.in_flight[oid] = self.evicted.pop(oid)[1]
+            self._touch(oid, entry, ts)
+            if phase in _FILL_PHASES:
+                self._emit("late_fill", oid, ts, entry.state, entry.first_ts)
+
+        if phase == "REQUEST":
+            self.counts["requests"] += 1
+            if entry is None:
+                entry = self.in_flight[oid] = _InFlight(REQUESTED, ts)
+                entry.requested = _to_float(row.get("size_requested") or row.get("requestedVolume"))
+                entry.side = (row.get("side") or "").strip().upper()
+                entry.symbol = (row.get("symbol") or "").strip().upper()
+            else:
+                self._touch(oid, entry, ts)
+        elif phase == "ACK":
+            self.counts["acks"] += 1
+            if entry is None:
+                if oid not in self.completed:
+                    self._emit("ack_without_request", oid, ts, "")
+                    entry = self.in_flight[oid] = _InFlight(ACKED, ts)
+            else:
+                if entry.state == REQUESTED:
+                    entry.state = ACKED
+                self._touch(oid, entry, ts)
+        elif phase in _FILL_PHASES:
+            self.counts["fills"] += 1
+            size = _to_float(row.get("size_filled") or row.get("filledSize"))
+            if entry is None:
+                done = self.completed.get(oid)
+                if done is not None and done.state == FILLED:
+                    filled = done.filled + (size or 0.0)
+                    # Only a known requested size tells a duplicate from a further partial
+                    if done.requested and (filled > done.requested + 1e-9 if size
+                                           else done.filled + 1e-9 >= done.requested):
+                        self._emit("duplicate_fill", oid, ts, FILLED, done.ts)
+                    else:
+                        self._complete(oid, ts, FILLED, done.requested, filled)
+                    return
+                if done is not None:
+                    # The broker filled it anyway; the position exists, so it counts as filled
+                    self._emit("fill_after_reject", oid, ts, REJECTED, done.ts)
+                    self.counts["filled_orders"] += 1
+                    self._complete(oid, ts, FILLED, done.requested, size or 0.0)
+                    return
+                self._emit("fill_without_request", oid, ts, "")
+                entry = self.in_flight[oid] = _InFlight(ACKED, ts)
+            entry.filled += size or 0.0
+            if size and entry.requested and entry.filled + 1e-9 < entry.requested:
+                entry.state = PARTIAL
+                self._touch(oid, entry, ts)
+            else:
+                entry.state = FILLED
+                self.counts["filled_orders"] += 1
+                self._complete(oid, ts, FILLED, entry.requested, entry.filled)
+        elif phase in _REJECT_PHASES:
+            self.counts["rejects"] += 1
+            self._emit("reject", oid, ts, entry.state if entry else "", entry.first_ts if entry else None,
+                       (row.get("reason") or row.get("brokerMsg") or "").strip())
+            self._complete(oid, ts, REJECTED, entry.requested if entry else None)
+
+        if len(self.in_flight) > self.peak_in_flight:
+            self.peak_in_flight = len(self.in_flight)
+        self.expire()
+
+    def finish(self) -> None:
+        """Report every order still in flight as ``pending`` and clear state."""
+        for oid, entry in list(self.in_flight.items()):
+            self._emit("pending", oid, self.clock, entry.state, entry.first_ts)
+        self.in_flight.clear()
+        self.completed.clear()
+        self.evicted.clear()
+
+    def summary(self) -> Dict[str, object]:
+        requests = self.counts["requests"]
+        return {
+            **self.counts,
+            "fill_rate_percent": (self.counts["filled_orders"] / requests * 100.0) if requests else None,
+            "in_flight": len(self.in_flight),
+            "peak_in_flight": self.peak_in_flight,
+            "timeout_s": self.timeout_s,
+        }
+
+
+def track_file(orders_csv: Path, out_dir: Optional[Path], timeout_s: float = 300.0) -> Dict[str, object]:
+    """Run the tracker over a finished orders.csv, streaming events to ``out_dir``."""
+    events_fh = None
+    writer = None
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        events_fh = (out_dir / "lifecycle_events.csv").open("w", encoding="utf-8", newline="")
+        writer = csv.writer(events_fh)
+        writer.writerow(EVENT_COLUMNS)
+    try:
+        tracker = OrderLifecycleTracker(timeout_s, on_event=writer.writerow if writer else None)
+        with Path(orders_csv).open("r", encoding="utf-8-sig", newline="") as fh:
+            for row in csv.DictReader(fh):
+                tracker.feed(row)
+        tracker.finish()
+    finally:
+        if events_fh is not None:
+            events_fh.close()
+    summary = tracker.summary()
+    if out_dir is not None:
+        (out_dir / "lifecycle_summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Streaming order lifecycle tracker with stuck-order detection")
+    ap.add_argument("--orders", required=True, help="orders.csv")
+    ap.add_argument("--timeout", type=float, default=300.0, help="Seconds without progress before an order is stuck")
+    ap.add_argument("--out", default=None, help="Output directory (default: alongside orders.csv)")
+    args = ap.parse_args(argv)
+
+    orders = Path(args.orders)
+    summary = track_file(orders, Path(args.out) if args.out else orders.parent, args.timeout)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Stage timing and optional profiling shared by the analysis entry points.
+
+Every entry point wraps its phases in named spans::
+
+    perf = PerfRecorder("validate_artifacts", profile=args.profile)
+    with perf:
+        with perf.stage("load") as span:
+            rows = load(...)
+            span.rows = len(rows)
+        ...
+    perf.write(out_dir)
+
+Legacy mains with long straight-line phases use ``span = perf.begin("parse")``
+/ ``perf.end(span, rows=n)`` instead of re-indenting the whole body.
+
+A span records wall seconds, CPU seconds (process time), rows processed and
+the process peak RSS seen when the span closed. ``write`` merges the tool's
+record into ``perf_summary.json`` in the artifact directory under
+``tools.<name>``. Several tools run over the same run therefore build one
+summary together; the read-modify-write holds ``perf_summary.json.lock``
+(threads and processes) so concurrent pipeline steps don't drop each
+other's records.
+
+``--profile cprofile`` dumps ``<tool>.pstats`` and a text report of the top
+cumulative entries. ``--profile sample`` runs a stdlib sampling profiler on
+the main thread and writes ``<tool>.folded``, collapsed stacks ready for
+flamegraph.pl or speedscope. Both files go next to ``perf_summary.json``.
+
+Usage (show a collected summary):
+  python -m scripts.analyzers.perf D:/botg/logs/artifacts/telemetry_run_X
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+SUMMARY_NAME = "perf_summary.json"
+PROFILE_MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL_S = 0.005
+# A lock file older than this is left over from a crashed writer
+LOCK_STALE_S = 30.0
+
+_summary_guard = threading.Lock()
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, when the platform reports it."""
+    if resource is not None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+    try:
+        import psutil  # type: ignore
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+
+
+def add_perf_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="Also profile the run: cProfile stats or a sampled flamegraph (.folded)")
+    parser.add_argument("--perf-dir", default=None, help="Where to write perf_summary.json (default: the tool's output dir)")
+
+
+class Span:
+    __slots__ = ("name", "rows", "wall_s", "cpu_s", "peak_rss_mb")
+
+    def __init__(self, name: str, rows: Optional[int] = None):
+        self.name = name
+        self.rows = rows
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.peak_rss_mb: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, object]:
+        out: Dict[str, object] = {"name": self.name, "wall_s": round(self.wall_s, 4), "cpu_s": round(self.cpu_s, 4),
+                                  "rows": self.rows, "peak_rss_mb": self.peak_rss_mb}
+        if self.rows and self.wall_s > 0:
+            out["rows_per_s"] = round(self.rows / self.wall_s, 1)
+        return out
+
+
+class _Sampler:
+    """Stack sampler for one thread; collects folded stacks ``a;b;c -> count``."""
+
+    def __init__(self, thread_id: int, interval_s: float = SAMPLE_INTERVAL_S):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="perf-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            names: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class PerfRecorder:
+    """Named stage spans for one tool invocation, plus optional whole-run profiling."""
+
+    def __init__(self, tool: str, profile: Optional[str] = None):
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"unknown profile mode: {profile}")
+        self.tool = tool
+        self.profile = profile
+        self.spans: List[Span] = []
+        self.started_at: Optional[str] = None
+        self._wall0 = 0.0
+        self._cpu0 = 0.0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_Sampler] = None
+
+    def __enter__(self) -> "PerfRecorder":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        if self.profile == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == "sample":
+            self._sampler = _Sampler(threading.get_ident())
+            self._sampler.start()
+
+    def stop(self) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        self.wall_s = time.perf_counter() - self._wall0
+        self.cpu_s = time.process_time() - self._cpu0
+
+    def begin(self, name: str, rows: Optional[int] = None) -> Span:
+        """Open a span without a ``with`` block; close it with ``end``."""
+        span = Span(name, rows)
+        span.wall_s = time.perf_counter()
+        span.cpu_s = time.process_time()
+        return span
+
+    def end(self, span: Span, rows: Optional[int] = None) -> Span:
+        span.wall_s = time.perf_counter() - span.wall_s
+        span.cpu_s = time.process_time() - span.cpu_s
+        span.peak_rss_mb = peak_rss_mb()
+        if rows is not None:
+            span.rows = rows
+        self.spans.append(span)
+        return span
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[Span]:
+        """Time a phase; set ``span.rows`` inside the block when the count is known late."""
+        span = self.begin(name, rows)
+        try:
+            yield span
+        finally:
+            self.end(span)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "started_at": self.started_at,
+            "wall_s": round(self.wall_s, 4),
+            "cpu_s": round(self.cpu_s, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "profile": self.profile,
+            "stages": [span.to_dict() for span in self.spans],
+        }
+
+    def _write_profile(self, out_dir: Path) -> Optional[str]:
+        if self._profiler is not None:
+            path = out_dir / f"{self.tool}.pstats"
+            self._profiler.dump_stats(str(path))
+            text = io.StringIO()
+            pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(40)
+            (out_dir / f"{self.tool}.pstats.txt").write_text(text.getvalue(), encoding="utf-8")
+            return path.name
+        if self._sampler is not None:
+            path = out_dir / f"{self.tool}.folded"
+            with path.open("w", encoding="utf-8") as fh:
+                for stack, count in self._sampler.stacks.most_common():
+                    fh.write(f"{stack} {count}\n")
+            return path.name
+        return None
+
+    def write(self, out_dir: Path) -> Path:
+        """Merge this tool's record into ``out_dir/perf_summary.json``; returns its path."""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        record = self.summary()
+        profile_file = self._write_profile(out_dir)
+        if profile_file:
+            record["profile_file"] = profile_file
+        path = out_dir / SUMMARY_NAME
+        with _locked(path):
+            try:
+                collected = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                collected = {}
+            collected.setdefault("tools", {})[self.tool] = record
+            fd, tmp = tempfile.mkstemp(prefix=f".{SUMMARY_NAME}.", suffix=".tmp", dir=out_dir)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    json.dump(collected, fh, indent=2)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        return path
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Hold ``<path>.lock`` (created with O_EXCL) against other threads and processes."""
+    lock = path.with_name(path.name + ".lock")
+    with _summary_guard:
+        while True:
+            try:
+                fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - lock.stat().st_mtime > LOCK_STALE_S:
+                        os.unlink(lock)
+                        continue
+                except OSError:
+                    continue  # released meanwhile
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            os.unlink(lock)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Print the stage timings collected in perf_summary.json")
+    ap.add_argument("run_dir", help="Artifact directory containing perf_summary.json")
+    args = ap.parse_args(argv)
+
+    path = Path(args.run_dir) / SUMMARY_NAME
+    if not path.exists():
+        print(f"No {SUMMARY_NAME} in {args.run_dir}")
+        return 2
+    tools = json.loads(path.read_text(encoding="utf-8")).get("tools", {})
+    for tool, record in sorted(tools.items(), key=lambda kv: -kv[1].get("wall_s", 0)):
+        print(f"{tool:28s} wall={record['wall_s']:>9.3f}s cpu={record['cpu_s']:>9.3f}s rss={record.get('peak_rss_mb')} MB")
+        for span in record.get("stages", []):
+            rows = f" rows={span['rows']}" if span.get("rows") is not None else ""
+            print(f"    {span['name']:24s} {span['wall_s']:>9.3f}s cpu={span['cpu_s']:>8.3f}s{rows}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
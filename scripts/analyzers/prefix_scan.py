@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Count orders.csv rows per phase (and per hour) from line prefixes, without parsing CSV.
+
+``phase`` is the first column of the OrderLifecycleLogger header, and
+``timestamp_iso`` the second. A line that starts ``FILL,2025-01-06T13`` is
+therefore a FILL in hour 13 of that day, whatever the other 40 columns hold.
+The scanner memory-maps the file and walks it with ``mmap.readline``. Each
+line costs a prefix slice and a dict update: no decoding, no field
+splitting, and nothing retained except the counters. On a warm page cache
+that is about 1 s per GB on one core.
+
+``workers > 1`` splits the file into byte ranges aligned to line starts and
+scans them in worker processes, each mapping the file itself. The loop holds
+the GIL, so threads would not overlap. Use it for multi-GB logs; below about
+100 MB the process start-up costs more than it saves.
+
+Lines that do not start with a known phase token (the header, continuation
+lines of a quoted multi-line field, other writers' rows) are counted under
+``other_lines`` and otherwise ignored.
+
+Usage:
+  python -m scripts.analyzers.prefix_scan D:/botg/logs/artifacts/telemetry_run_X/orders.csv --by-hour --workers 4
+
+Outputs:
+  JSON on stdout (or --out): lines, phases, other_lines, rows_per_hour, bytes, seconds
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PHASES: Sequence[str] = ("REQUEST", "ACK", "FILL", "REJECT")
+# Longest token looked at; a comma further in means the line is not a phase row
+MAX_TOKEN_BYTES = 16
+# "2025-01-06T13" / "2025-01-06 13"
+HOUR_BYTES = 13
+MIN_BYTES_PER_WORKER = 64 * 1024 * 1024
+
+
+@dataclass
+class PrefixCounts:
+    path: str
+    header: List[str] = field(default_factory=list)
+    lines: int = 0
+    phases: Dict[str, int] = field(default_factory=dict)
+    other_lines: int = 0
+    rows_per_hour: Optional[Dict[str, Dict[str, int]]] = None
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def phase_first(self) -> bool:
+        """True when the header has ``phase`` as its first column (the logger layout)."""
+        return bool(self.header) and self.header[0].strip().lower() == "phase"
+
+    def to_dict(self) -> Dict[str, object]:
+        out: Dict[str, object] = {
+            "path": self.path, "lines": self.lines, "phases": self.phases, "other_lines": self.other_lines,
+            "bytes": self.bytes, "seconds": round(self.seconds, 4),
+        }
+        if self.rows_per_hour is not None:
+            out["rows_per_hour"] = self.rows_per_hour
+        return out
+
+
+def _scan_range(path: str, start: int, end: int, by_hour: bool) -> Tuple[int, Counter, Counter]:
+    """Count lines whose first byte lies in [start, end); returns (lines, prefix counts, (prefix, hour) counts)."""
+    prefixes: Counter = Counter()
+    hours: Counter = Counter()
+    lines = 0
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if start > 0 and mm[start - 1:start] != b"\n":
+            mm.seek(start)
+            mm.readline()  # finish the line owned by the previous range
+        else:
+            mm.seek(start)
+        if end >= len(mm):
+            rows = iter(mm.readline, b"")
+        else:
+            rows = iter(lambda: mm.readline() if mm.tell() < end else b"", b"")
+        counts = prefixes  # local alias: this loop is the whole cost
+        if by_hour:
+            for line in rows:
+                lines += 1
+                comma = line.find(b",", 0, MAX_TOKEN_BYTES)
+                token = line[:comma] if comma > 0 else b""
+                counts[token] += 1
+                if comma > 0:
+                    hours[token, line[comma + 1:comma + 1 + HOUR_BYTES]] += 1
+        else:
+            for line in rows:
+                lines += 1
+                comma = line.find(b",", 0, MAX_TOKEN_BYTES)
+                counts[line[:comma] if comma > 0 else b""] += 1
+    return lines, prefixes, hours
+
+
+def _ranges(path: str, start: int, size: int, workers: int) -> List[Tuple[int, int]]:
+    parts = max(1, min(workers, (size - start) // MIN_BYTES_PER_WORKER or 1))
+    step = (size - start) // parts or 1
+    bounds = [start + i * step for i in range(parts)] + [size]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def scan(path: Path, tokens: Sequence[str] = PHASES, by_hour: bool = False, workers: int = 1) -> PrefixCounts:
+    """Phase (and optionally per-hour) row counts for ``path`` from line prefixes alone."""
+    started = time.perf_counter()
+    path = Path(path)
+    result = PrefixCounts(str(path), phases={t: 0 for t in tokens}, rows_per_hour={} if by_hour else None)
+    size = path.stat().st_size
+    result.bytes = size
+    if size == 0:
+        return result
+    with path.open("rb") as fh:
+        header = fh.readline()
+    result.header = header.decode("utf-8-sig", errors="replace").strip().split(",")
+
+    ranges = _ranges(str(path), len(header), size, workers)
+    if len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            parts = list(pool.map(_scan_range, [str(path)] * len(ranges), *zip(*ranges), [by_hour] * len(ranges)))
+    else:
+        parts = [_scan_range(str(path), ranges[0][0], ranges[0][1], by_hour)]
+
+    wanted = {t.encode("ascii"): t for t in tokens}
+    hours: Dict[str, Counter] = {}
+    for lines, prefixes, hour_counts in parts:
+        result.lines += lines
+        for prefix, count in prefixes.items():
+            token = wanted.get(prefix.strip(b'"'))
+            if token is None:
+                result.other_lines += count
+            else:
+                result.phases[token] += count
+        for (prefix, hour), count in hour_counts.items():
+            token = wanted.get(prefix.strip(b'"'))
+            if token is not None:
+                key = hour.decode("ascii", errors="replace").replace(" ", "T")
+                hours.setdefault(key, Counter())[token] += count
+    if by_hour:
+        result.rows_per_hour = {hour: dict(hours[hour]) for hour in sorted(hours)}
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def hours_without_rows(rows_per_hour: Dict[str, Dict[str, int]]) -> List[str]:
+    """Clock hours between the first and last populated hour that have no phase rows at all."""
+    stamps = []
+    for key in rows_per_hour:
+        try:
+            stamps.append(datetime.strptime(key, "%Y-%m-%dT%H"))
+        except ValueError:
+            continue
+    if not stamps:
+        return []
+    present = set(stamps)
+    gaps = []
+    cursor, last = min(stamps), max(stamps)
+    while cursor < last:
+        cursor += timedelta(hours=1)
+        if cursor not in present:
+            gaps.append(cursor.strftime("%Y-%m-%dT%H"))
+    return gaps
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Count orders.csv rows per phase (and hour) from line prefixes")
+    ap.add_argument("path", help="orders.csv (phase as first column)")
+    ap.add_argument("--tokens", default=",".join(PHASES), help="Comma-separated phase tokens to count")
+    ap.add_argument("--by-hour", action="store_true", help="Also count rows per phase per hour (second column)")
+    ap.add_argument("--workers", type=int, default=1, help="Worker processes for large files")
+    ap.add_argument("--out", default=None, help="Write the JSON here instead of stdout")
+    args = ap.parse_args(argv)
+
+    counts = scan(Path(args.path), [t.strip() for t in args.tokens.split(",") if t.strip()], args.by_hour,
+                  args.workers or os.cpu_count() or 1)
+    text = json.dumps(counts.to_dict(), indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""Spread and quote-quality analytics over the Level1 snapshot log, in bounded memory.
+
+join_l1_fills.py only looks ticks up around fills, and its
+``tick_stale_rate`` is just ``1 - coverage``. This reads the whole L1 file
+(``timestamp_utc,symbol,bid,ask,spread_pips,source_server``) and measures
+the quotes themselves, per symbol x UTC hour x source_server:
+
+  spread         ask - bid in pips: mean, max, p50/p90/p99 from a QuantileSketch
+  locked/crossed quotes with ask == bid / ask < bid (a crossed spread is negative
+                 and the sketch keeps the sign)
+  inter-tick gap time since the previous tick of the same symbol and server:
+                 p50/p99 (sketch), max, a fixed-edge histogram, and the count
+                 over --stale-ms
+  repeated       ticks whose bid and ask equal the previous tick's
+
+Per symbol and server, the tool also keeps the --top longest intervals of two kinds:
+  no_tick        the longest intervals with no tick at all
+  unchanged      the longest stretches during which bid/ask did not change
+Ticks can keep arriving while the quote is frozen; the second kind catches that.
+
+The file is read in chunks of --chunk-rows with bid/ask as float32,
+timestamps as int64 microseconds and symbol/server as categories. Memory is
+one chunk plus one small state per (symbol, hour, server) group, whatever
+the file size. Each chunk is sorted by (symbol, server, time) and handled
+with array operations: diffs, bincount on a group index, and one
+``add_many`` per group for the sketches. The last tick, quote and quote
+change of every stream carry over to the next chunk, so gaps and frozen
+intervals that span a chunk boundary come out the same as in a single pass.
+Rows within a stream are assumed to be in time order across chunks (the
+logger appends). A tick older than its stream's last counts as
+``out_of_order`` and contributes no gap.
+
+Pip size comes from symbol_specs.json; other symbols use 0.01 for JPY
+crosses and 0.0001 otherwise.
+
+Usage:
+  python -m scripts.analyzers.quote_quality run/l1_snapshots.csv --out run/quote_quality
+  python -m scripts.analyzers.quote_quality l1.csv --chunk-rows 2000000 --stale-ms 2000 --top 20
+
+Outputs (written to --out):
+  - quote_quality_by_hour.csv   one row per symbol/hour/source_server
+  - tick_gap_histogram.csv      gap counts per group and bucket (upper edge in ms)
+  - stale_intervals.csv         longest no-tick and unchanged-quote intervals per symbol/server
+  - quote_quality_summary.json  per symbol/server totals and serialized spread/gap sketches
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .lazy_imports import lazy_import
+    from .perf import PerfRecorder, add_perf_args
+    from .sketches import QuantileSketch
+except ImportError:  # run as scripts/analyzers/quote_quality.py
+    from lazy_imports import lazy_import
+    from perf import PerfRecorder, add_perf_args
+    from sketches import QuantileSketch
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+TIMESTAMP_COLUMNS: Sequence[str] = ("timestamp_utc", "timestamp")
+DEFAULT_CHUNK_ROWS = 1_000_000
+DEFAULT_STALE_MS = 5000.0
+DEFAULT_TOP = 10
+# Upper bucket edges (ms) of the inter-tick gap histogram; the last bucket is open
+GAP_EDGES_MS: Sequence[float] = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+SPREAD_QUANTILES: Sequence[float] = (0.5, 0.9, 0.99)
+HOUR_US = 3_600_000_000
+# Group key = stream * HOUR_SLOTS + hours since epoch (fits int64 for any realistic stream count)
+HOUR_SLOTS = 10_000_000
+# Stream id = symbol id * STREAM_SERVERS + server id
+STREAM_SERVERS = 65536
+NO_SERVER = ""
+
+
+def _load_pip_sizes() -> Dict[str, float]:
+    path = Path(__file__).with_name("symbol_specs.json")
+    try:
+        specs = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return {sym.upper(): float(spec["pip_size"]) for sym, spec in specs.items() if "pip_size" in spec}
+
+
+_PIP_SIZES = _load_pip_sizes()
+
+
+def pip_size(symbol: str) -> float:
+    symbol = (symbol or "").upper()
+    if symbol in _PIP_SIZES:
+        return _PIP_SIZES[symbol]
+    return 0.01 if "JPY" in symbol else 0.0001
+
+
+def _iso_us(ts_us: int) -> str:
+    return datetime.fromtimestamp(ts_us / 1e6, tz=timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+@dataclass
+class GroupStats:
+    """Additive measures for one symbol x hour x server group."""
+
+    ticks: int = 0
+    locked: int = 0
+    crossed: int = 0
+    repeated: int = 0
+    out_of_order: int = 0
+    stale_gaps: int = 0
+    spread_sum: float = 0.0
+    spread_max: float = -float("inf")
+    gap_max_ms: float = 0.0
+    gap_hist: List[int] = field(default_factory=lambda: [0] * (len(GAP_EDGES_MS) + 1))
+    spread: QuantileSketch = field(default_factory=QuantileSketch)
+    gaps: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def merge(self, other: "GroupStats") -> "GroupStats":
+        for name in ("ticks", "locked", "crossed", "repeated", "out_of_order", "stale_gaps", "spread_sum"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.spread_max = max(self.spread_max, other.spread_max)
+        self.gap_max_ms = max(self.gap_max_ms, other.gap_max_ms)
+        self.gap_hist = [a + b for a, b in zip(self.gap_hist, other.gap_hist)]
+        self.spread.merge(other.spread)
+        self.gaps.merge(other.gaps)
+        return self
+
+    def row(self) -> Dict[str, object]:
+        n = self.ticks
+        row: Dict[str, object] = {
+            "ticks": n,
+            "spread_mean_pips": self.spread_sum / n if n else None,
+            "spread_max_pips": self.spread_max if n else None,
+        }
+        for q in SPREAD_QUANTILES:
+            row[f"spread_p{round(q * 100, 1):g}_pips"] = self.spread.quantile(q)
+        row.update({
+            "locked": self.locked, "crossed": self.crossed,
+            "locked_rate": self.locked / n if n else None, "crossed_rate": self.crossed / n if n else None,
+            "repeated": self.repeated, "repeated_rate": self.repeated / n if n else None,
+            "gap_p50_ms": self.gaps.quantile(0.5), "gap_p99_ms": self.gaps.quantile(0.99),
+            "gap_max_ms": self.gap_max_ms if self.gaps.count else None,
+            "stale_gaps": self.stale_gaps, "out_of_order": self.out_of_order,
+        })
+        return row
+
+
+@dataclass
+class StreamState:
+    """What the next chunk needs to know about a symbol/server stream."""
+
+    last_ts: Optional[int] = None
+    bid: float = float("nan")
+    ask: float = float("nan")
+    last_change_ts: Optional[int] = None
+    no_tick: List[Tuple[float, int, int]] = field(default_factory=list)    # min-heap (duration_ms, start, end)
+    unchanged: List[Tuple[float, int, int]] = field(default_factory=list)
+
+
+class QuoteQuality:
+    """Chunk-at-a-time accumulator; ``add_chunk`` takes the raw columns of one read."""
+
+    def __init__(self, stale_ms: float = DEFAULT_STALE_MS, top: int = DEFAULT_TOP):
+        self.stale_ms = stale_ms
+        self.top = top
+        self.symbols: List[str] = []
+        self.servers: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self._server_ids: Dict[str, int] = {}
+        self.streams: Dict[int, StreamState] = {}
+        self.groups: Dict[int, GroupStats] = {}
+        self.rows = 0
+        self.dropped = 0
+
+    # -- ids ----------------------------------------------------------------
+
+    @staticmethod
+    def _intern(values: Sequence[str], table: List[str], ids: Dict[str, int]) -> np.ndarray:
+        out = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            found = ids.get(value)
+            if found is None:
+                found = ids[value] = len(table)
+                table.append(value)
+            out[i] = found
+        return out
+
+    def _codes(self, column: pd.Series, table: List[str], ids: Dict[str, int], normalize: bool) -> np.ndarray:
+        """Global ids for a categorical column: map the chunk's few categories, then take by code."""
+        cats = [str(c).strip() for c in column.cat.categories]
+        if normalize:
+            cats = [c.upper() for c in cats]
+        lookup = np.append(self._intern(cats, table, ids), self._intern([NO_SERVER], table, ids))
+        codes = column.cat.codes.to_numpy()
+        return lookup[np.where(codes < 0, len(cats), codes)]
+
+    def stream_names(self, stream: int) -> Tuple[str, str]:
+        """(symbol, source_server) of a packed stream id."""
+        return self.symbols[stream // STREAM_SERVERS], self.servers[stream % STREAM_SERVERS]
+
+    # -- chunk processing ----------------------------------------------------
+
+    def add_chunk(self, frame: pd.DataFrame, ts_col: str) -> None:
+        self.rows += len(frame)
+        ts = pd.to_datetime(frame[ts_col], utc=True, format="ISO8601", errors="coerce")
+        bid = frame["bid"].to_numpy(dtype=np.float32, na_value=np.nan)
+        ask = frame["ask"].to_numpy(dtype=np.float32, na_value=np.nan)
+        valid = ts.notna().to_numpy() & (bid > 0) & (ask > 0) & frame["symbol"].notna().to_numpy()
+        self.dropped += int(len(frame) - valid.sum())
+        if not valid.any():
+            return
+        ts_us = ts.dt.as_unit("us").to_numpy(dtype=np.int64, na_value=0)[valid]
+        symbol = self._codes(frame["symbol"], self.symbols, self._symbol_ids, True)[valid]
+        if "source_server" in frame:
+            server = self._codes(frame["source_server"], self.servers, self._server_ids, False)[valid]
+        else:
+            server = np.full(len(symbol), self._intern([NO_SERVER], self.servers, self._server_ids)[0])
+        bid, ask = bid[valid], ask[valid]
+
+        # Streams are (symbol, server); the id packs both so one sort orders by stream, then time
+        stream = symbol * STREAM_SERVERS + server
+        order = np.lexsort((ts_us, stream))
+        stream, ts_us, bid, ask = stream[order], ts_us[order], bid[order], ask[order]
+        symbol = symbol[order]
+        n = len(stream)
+
+        # Previous tick per row: the row before in the same stream, or the carried state at a stream start
+        starts = np.flatnonzero(np.r_[True, stream[1:] != stream[:-1]])
+        prev_ts = np.empty(n, dtype=np.int64)
+        prev_ts[1:] = ts_us[:-1]
+        prev_bid = np.empty(n, dtype=np.float32)
+        prev_bid[1:] = bid[:-1]
+        prev_ask = np.empty(n, dtype=np.float32)
+        prev_ask[1:] = ask[:-1]
+        has_prev = np.ones(n, dtype=bool)
+        for i in starts:
+            state = self.streams.get(int(stream[i]))
+            if state is None or state.last_ts is None:
+                has_prev[i] = False
+                prev_ts[i], prev_bid[i], prev_ask[i] = ts_us[i], np.nan, np.nan
+            else:
+                prev_ts[i], prev_bid[i], prev_ask[i] = state.last_ts, state.bid, state.ask
+
+        gap_us = ts_us - prev_ts
+        out_of_order = has_prev & (gap_us < 0)
+        has_gap = has_prev & ~out_of_order
+        gap_ms = gap_us.astype(np.float64) / 1000.0
+        unchanged = has_prev & (bid == prev_bid) & (ask == prev_ask)
+
+        # Spread in pips from the float32 quotes (difference taken in float64)
+        pips = np.array([pip_size(s) for s in self.symbols], dtype=np.float64)[symbol]
+        spread = (ask.astype(np.float64) - bid.astype(np.float64)) / pips
+        # float32 quotes are off by < 0.003 pip at FX, JPY and gold price levels; 0.01 pip restores the quoted value
+        spread = np.round(spread, 2)
+
+        self._intervals(stream, ts_us, bid, ask, gap_ms, has_gap, ~unchanged, starts)
+        self._groups(stream, ts_us, spread, gap_ms, has_gap, unchanged, out_of_order)
+
+    def _intervals(self, stream: np.ndarray, ts_us: np.ndarray, bid: np.ndarray, ask: np.ndarray,
+                   gap_ms: np.ndarray, has_gap: np.ndarray, changed: np.ndarray, starts: np.ndarray) -> None:
+        """Update each stream's top-K no-tick and unchanged-quote intervals, then its carried state."""
+        ends = np.r_[starts[1:], len(stream)]
+        for lo, hi in zip(starts.tolist(), ends.tolist()):
+            state = self.streams.setdefault(int(stream[lo]), StreamState())
+            seg_ts = ts_us[lo:hi]
+            seg_gap = np.where(has_gap[lo:hi], gap_ms[lo:hi], -1.0)
+            self._top(state.no_tick, seg_gap, seg_ts - np.round(seg_gap * 1000.0).astype(np.int64), seg_ts)
+
+            change_ts = seg_ts[changed[lo:hi]]
+            if len(change_ts):
+                if state.last_change_ts is not None:
+                    begin = np.concatenate([np.array([state.last_change_ts], dtype=np.int64), change_ts[:-1]])
+                    end = change_ts
+                else:
+                    begin, end = change_ts[:-1], change_ts[1:]
+                self._top(state.unchanged, (end - begin) / 1000.0, begin, end)
+                state.last_change_ts = int(change_ts[-1])
+            state.last_ts = int(seg_ts[-1])
+            state.bid, state.ask = float(bid[hi - 1]), float(ask[hi - 1])
+
+    def _top(self, heap: List[Tuple[float, int, int]], durations: np.ndarray, begin: np.ndarray,
+             end: np.ndarray) -> None:
+        if not len(durations) or self.top <= 0:
+            return
+        k = min(self.top, len(durations))
+        idx = np.argpartition(durations, len(durations) - k)[len(durations) - k:]
+        for i in idx.tolist():
+            item = (float(durations[i]), int(begin[i]), int(end[i]))
+            if item[0] < 0:
+                continue
+            if len(heap) < self.top:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def _groups(self, stream: np.ndarray, ts_us: np.ndarray, spread: np.ndarray, gap_ms: np.ndarray,
+                has_gap: np.ndarray, unchanged: np.ndarray, out_of_order: np.ndarray) -> None:
+        keys = stream * HOUR_SLOTS + ts_us // HOUR_US
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        m = len(uniq)
+        nb = len(GAP_EDGES_MS) + 1
+        ticks = np.bincount(inverse, minlength=m)
+        locked = np.bincount(inverse, weights=spread == 0, minlength=m)
+        crossed = np.bincount(inverse, weights=spread < 0, minlength=m)
+        repeated = np.bincount(inverse, weights=unchanged, minlength=m)
+        disorder = np.bincount(inverse, weights=out_of_order, minlength=m)
+        spread_sum = np.bincount(inverse, weights=spread, minlength=m)
+        spread_max = np.full(m, -np.inf)
+        np.maximum.at(spread_max, inverse, spread)
+        gi, gaps = inverse[has_gap], gap_ms[has_gap]
+        stale = np.bincount(gi, weights=gaps > self.stale_ms, minlength=m)
+        gap_max = np.zeros(m)
+        np.maximum.at(gap_max, gi, gaps)
+        bins = np.searchsorted(np.asarray(GAP_EDGES_MS, dtype=np.float64), gaps, side="left")
+        hist = np.bincount(gi * nb + bins, minlength=m * nb).reshape(m, nb)
+
+        by_group = np.argsort(inverse, kind="stable")
+        bounds = np.r_[0, np.cumsum(ticks)]
+        gap_sorted = np.where(has_gap, gap_ms, np.nan)[by_group]
+        spread_sorted = spread[by_group]
+        for j, key in enumerate(uniq.tolist()):
+            g = self.groups.get(key)
+            if g is None:
+                g = self.groups[key] = GroupStats()
+            g.ticks += int(ticks[j])
+            g.locked += int(locked[j])
+            g.crossed += int(crossed[j])
+            g.repeated += int(repeated[j])
+            g.out_of_order += int(disorder[j])
+            g.stale_gaps += int(stale[j])
+            g.spread_sum += float(spread_sum[j])
+            g.spread_max = max(g.spread_max, float(spread_max[j]))
+            g.gap_max_ms = max(g.gap_max_ms, float(gap_max[j]))
+            g.gap_hist = [a + int(b) for a, b in zip(g.gap_hist, hist[j])]
+            lo, hi = bounds[j], bounds[j + 1]
+            g.spread.add_many(spread_sorted[lo:hi])
+            g.gaps.add_many(gap_sorted[lo:hi])  # NaN (no previous tick) is skipped
+
+    def finish(self) -> None:
+        """Close every stream's open unchanged interval at its last tick (call once, after the last chunk)."""
+        for state in self.streams.values():
+            if state.last_change_ts is not None and state.last_ts is not None and state.last_ts > state.last_change_ts:
+                begin, end = state.last_change_ts, state.last_ts
+                self._top(state.unchanged, np.array([(end - begin) / 1000.0]), np.array([begin]), np.array([end]))
+                state.last_change_ts = state.last_ts
+
+    # -- results -------------------------------------------------------------
+
+    def _labelled_groups(self) -> List[Tuple[Dict[str, object], GroupStats]]:
+        """(symbol/hour/source_server labels, stats) per group, sorted by symbol, server, hour."""
+        out = []
+        for key in sorted(self.groups, key=lambda k: (self.stream_names(k // HOUR_SLOTS), k % HOUR_SLOTS)):
+            symbol, server = self.stream_names(key // HOUR_SLOTS)
+            hour = datetime.fromtimestamp((key % HOUR_SLOTS) * 3600, tz=timezone.utc).strftime("%Y-%m-%dT%H")
+            out.append(({"symbol": symbol, "hour": hour, "source_server": server}, self.groups[key]))
+        return out
+
+    def group_rows(self) -> List[Dict[str, object]]:
+        return [dict(labels, **group.row()) for labels, group in self._labelled_groups()]
+
+    def histogram_rows(self) -> List[Dict[str, object]]:
+        edges = [f"{edge:g}" for edge in GAP_EDGES_MS] + ["inf"]
+        return [dict(labels, le_ms=edge, count=count)
+                for labels, group in self._labelled_groups()
+                for edge, count in zip(edges, group.gap_hist) if count]
+
+    def interval_rows(self) -> List[Dict[str, object]]:
+        rows = []
+        for stream in sorted(self.streams, key=self.stream_names):
+            symbol, server = self.stream_names(stream)
+            state = self.streams[stream]
+            for kind, heap in (("no_tick", state.no_tick), ("unchanged", state.unchanged)):
+                for rank, (duration, begin, end) in enumerate(sorted(heap, reverse=True), 1):
+                    rows.append({"symbol": symbol, "source_server": server, "kind": kind, "rank": rank,
+                                 "start": _iso_us(begin), "end": _iso_us(end), "duration_ms": round(duration, 3)})
+        return rows
+
+    def summary(self) -> Dict[str, object]:
+        totals: Dict[int, GroupStats] = {}
+        for key, group in self.groups.items():
+            totals.setdefault(key // HOUR_SLOTS, GroupStats()).merge(group)
+        streams = {}
+        for stream in sorted(totals, key=self.stream_names):
+            symbol, server = self.stream_names(stream)
+            total = totals[stream]
+            state = self.streams.get(stream, StreamState())
+            streams[f"{symbol}|{server}"] = dict(
+                total.row(),
+                longest_no_tick_ms=max(state.no_tick)[0] if state.no_tick else None,
+                longest_unchanged_ms=max(state.unchanged)[0] if state.unchanged else None,
+                spread_sketch=total.spread.to_dict(), gap_sketch=total.gaps.to_dict(),
+            )
+        return {"rows": self.rows, "dropped": self.dropped, "stale_ms": self.stale_ms,
+                "gap_edges_ms": list(GAP_EDGES_MS), "streams": streams}
+
+
+def read_chunks(path: Path, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """(timestamp column, chunk iterator) with float32 quotes and categorical symbol/server."""
+    header = list(pd.read_csv(path, nrows=0).columns)
+    ts_col = next((c for c in TIMESTAMP_COLUMNS if c in header), None)
+    if ts_col is None or not {"symbol", "bid", "ask"} <= set(header):
+        raise ValueError(f"{path}: expected {'/'.join(TIMESTAMP_COLUMNS)}, symbol, bid, ask columns")
+    usecols = [ts_col, "symbol", "bid", "ask"] + (["source_server"] if "source_server" in header else [])
+    dtype = {"symbol": "category", "source_server": "category", "bid": "float32", "ask": "float32"}
+    chunks = pd.read_csv(path, usecols=usecols, dtype={k: v for k, v in dtype.items() if k in usecols},
+                         chunksize=chunk_rows, on_bad_lines="skip")
+    return ts_col, chunks
+
+
+def _write_csv(path: Path, rows: List[Dict[str, object]]) -> None:
+    pd.DataFrame(rows).to_csv(path, index=False, float_format="%.6g")
+
+
+def run(l1_path: Path, out_dir: Path, chunk_rows: int = DEFAULT_CHUNK_ROWS, stale_ms: float = DEFAULT_STALE_MS,
+        top: int = DEFAULT_TOP, perf: Optional[PerfRecorder] = None) -> Dict[str, object]:
+    perf = perf or PerfRecorder("quote_quality")
+    quality = QuoteQuality(stale_ms, top)
+    with perf.stage("scan") as span:
+        ts_col, chunks = read_chunks(l1_path, chunk_rows)
+        for chunk in chunks:
+            quality.add_chunk(chunk, ts_col)
+        quality.finish()
+        span.rows = quality.rows
+    with perf.stage("write"):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        _write_csv(out_dir / "quote_quality_by_hour.csv", quality.group_rows())
+        _write_csv(out_dir / "tick_gap_histogram.csv", quality.histogram_rows())
+        _write_csv(out_dir / "stale_intervals.csv", quality.interval_rows())
+        summary = dict(quality.summary(), source=str(l1_path))
+        (out_dir / "quote_quality_summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Spread, gap and stale-quote analytics over the L1 snapshot log")
+    ap.add_argument("l1", help="l1_snapshots.csv / l1_stream.csv (timestamp_utc, symbol, bid, ask[, source_server])")
+    ap.add_argument("--out", default=None, help="Output directory (default: <l1 dir>/quote_quality)")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per read; bounds memory")
+    ap.add_argument("--stale-ms", type=float, default=DEFAULT_STALE_MS, help="Gap counted as stale above this")
+    ap.add_argument("--top", type=int, default=DEFAULT_TOP, help="Longest intervals kept per symbol/server and kind")
+    add_perf_args(ap)
+    args = ap.parse_args(argv)
+
+    l1 = Path(args.l1)
+    out_dir = Path(args.out) if args.out else l1.parent / "quote_quality"
+    perf = PerfRecorder("quote_quality", args.profile)
+    with perf:
+        summary = run(l1, out_dir, args.chunk_rows, args.stale_ms, args.top, perf)
+    perf.write(Path(args.perf_dir) if args.perf_dir else out_dir)
+    brief = {key: {k: v for k, v in stream.items() if not k.endswith("_sketch")}
+             for key, stream in summary["streams"].items()}
+    print(json.dumps({"rows": summary["rows"], "dropped": summary["dropped"], "streams": brief}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
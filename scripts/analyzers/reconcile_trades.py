@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""Streaming trade-level reconciliation of closed trades vs trade_closes.log.
+
+Both sources are read exactly once. Closed-trade rows (closed_trades_fifo*.csv)
+and close records (trade_closes.log as JSONL / ``CLOSED ... pnl=`` text, or a
+closes CSV) are hash-joined on one id space, picked from the closed-trades
+header: the closing order id (``close_order_id``, ``exit_orderid``, ...) when
+the CSV has one, else the trade id. The log side is keyed by its ``order_id``
+or ``trade_id`` to match. FIFO reconstruction splits one closing order over
+several lots, so consecutive rows with the same id are summed into one record
+before the join. Each matched pair is checked for PnL and close-time
+agreement within a tolerance. Records without an id are counted (and summed)
+in their own ``*_without_id`` bucket; they cannot be joined.
+
+Memory stays bounded because both inputs are written in close-time order:
+the two streams are advanced in timestamp order, and a record still unmatched
+once the other stream has moved ``max_lag`` seconds past it is flushed as a
+missing close (closed trade without a log record) or an extra close (log
+record without a closed trade). Records without a timestamp are flushed once
+``max_untimed`` later records have arrived on their side. Only the records
+inside those windows are kept in memory.
+
+Usage:
+  python -m scripts.analyzers.reconcile_trades --closed closed_trades_fifo.csv --closes trade_closes.log --out reports/recon
+
+Outputs (written to --out):
+  - reconcile_mismatches.csv   one row per pnl/time mismatch, missing or extra close
+  - reconcile_drift.csv        cumulative closed vs closes PnL after each event
+  - reconcile_summary.json     counts and totals
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import re
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, TextIO
+
+from .trade_closes import iter_trade_closes, looks_like_trade_closes
+
+SNIFF_BYTES = 8192
+SNIFF_DELIMITERS = ",;\t|"
+
+# Join key columns per id space; the closed-trades header decides which space is used
+ID_FIELDS: Dict[str, Sequence[str]] = {
+    "order": ("close_order_id", "exit_order_id", "exit_orderid", "order_id", "orderid"),
+    "trade": ("trade_id", "tradeid"),
+}
+CLOSED_TIME_FIELDS: Sequence[str] = (
+    "close_time_iso", "close_time", "exit_time", "timestamp_iso", "timestamp",
+)
+# Same order as reconcile.py has always used; then any "*realized*" column, then PNL_FALLBACK_FIELDS
+CLOSED_PNL_FIELDS: Sequence[str] = ("net_realized_usd", "realized_usd", "pnl")
+CLOSES_TIME_FIELDS: Sequence[str] = (
+    "close_time_iso", "close_time", "closetime", "timestamp_iso", "timestamp",
+)
+CLOSES_PNL_FIELDS: Sequence[str] = (
+    "realized_pnl_usd", "net_realized_usd", "realized_usd", "pnl_in_account_currency", "pnl",
+)
+PNL_FALLBACK_FIELDS: Sequence[str] = ("pnl_in_account_currency", "pnl_currency")
+
+MISMATCH_COLUMNS: Sequence[str] = (
+    "kind", "trade_id", "closed_time", "closes_time", "closed_pnl", "closes_pnl", "pnl_diff", "time_diff_s",
+)
+DRIFT_COLUMNS: Sequence[str] = ("timestamp", "closed_cum", "closes_cum", "drift")
+
+_FRACTION_RE = re.compile(r"(\.\d{6})\d+")
+
+
+class TradeRecord(NamedTuple):
+    trade_id: str
+    ts: Optional[float]
+    pnl: float
+    ts_text: str
+
+
+def parse_timestamp(text: Optional[str]) -> Optional[float]:
+    """Parse an ISO timestamp (``Z`` suffix and 7-digit .NET fractions allowed) to epoch seconds."""
+    if not text:
+        return None
+    s = _FRACTION_RE.sub(r"\1", str(text).strip().replace("Z", "+00:00"))
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _to_float(value: object) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+
+
+def _pick(names: Mapping[str, str], candidates: Sequence[str]) -> Optional[str]:
+    for cand in candidates:
+        if cand in names:
+            return names[cand]
+    return None
+
+
+def _pick_pnl(names: Mapping[str, str], candidates: Sequence[str]) -> Optional[str]:
+    """Exact candidates first, then the first column named like ``*realized*``, then PNL_FALLBACK_FIELDS."""
+    col = _pick(names, candidates)
+    if col is None:
+        col = next((h for k, h in names.items() if "realized" in k or k == "pnl"), None)
+    return col or _pick(names, PNL_FALLBACK_FIELDS)
+
+
+def sniff_delimiter(fh: TextIO) -> str:
+    """Guess the delimiter from a small sample and rewind ``fh``."""
+    sample = fh.read(SNIFF_BYTES)
+    fh.seek(0)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def id_space(path: Path) -> str:
+    """``"order"`` when the CSV has a closing-order id column, else ``"trade"``."""
+    with path.open("r", encoding="utf-8-sig", newline="") as fh:
+        header = next(csv.reader(fh, delimiter=sniff_delimiter(fh)), [])
+    names = {h.strip().lower(): h for h in header}
+    return "order" if _pick(names, ID_FIELDS["order"]) else "trade"
+
+
+def iter_csv_trades(path: Path, space: Optional[str] = None,
+                    time_fields: Sequence[str] = CLOSED_TIME_FIELDS,
+                    pnl_fields: Sequence[str] = CLOSED_PNL_FIELDS) -> Iterator[TradeRecord]:
+    """Stream trades from a CSV whose delimiter and column names are detected once.
+
+    ``space`` picks the id columns (``ID_FIELDS``); by default the closing-order
+    id when present, else the trade id. Rows without an id get ``trade_id=""``.
+    """
+    with path.open("r", encoding="utf-8-sig", newline="") as fh:
+        reader = csv.DictReader(fh, delimiter=sniff_delimiter(fh))
+        names = {(h or "").strip().lower(): h for h in (reader.fieldnames or [])}
+        spaces = (space,) if space else ("order", "trade")
+        id_col = next((c for c in (_pick(names, ID_FIELDS[s]) for s in spaces) if c), None)
+        time_col = _pick(names, time_fields)
+        pnl_col = _pick_pnl(names, pnl_fields)
+        if pnl_col is None:
+            return
+        for row in reader:
+            pnl = _to_float(row.get(pnl_col))
+            if pnl is None:
+                continue
+            ts_text = (row.get(time_col) or "").strip() if time_col else ""
+            trade_id = (row.get(id_col) or "").strip() if id_col else ""
+            yield TradeRecord(trade_id, parse_timestamp(ts_text), pnl, ts_text)
+
+
+def iter_closes(path: Path, space: str = "trade") -> Iterator[TradeRecord]:
+    """Stream close records from trade_closes.log (JSONL or ``CLOSED`` text) or a closes CSV.
+
+    Records are keyed by their order id when ``space == "order"``, else by trade id.
+    """
+    if not looks_like_trade_closes(path):
+        yield from iter_csv_trades(path, space, CLOSES_TIME_FIELDS, CLOSES_PNL_FIELDS)
+        return
+    for rec in iter_trade_closes(path):
+        key = rec.order_id if space == "order" else rec.trade_id
+        yield TradeRecord(key.strip(), parse_timestamp(rec.timestamp_iso), rec.pnl, rec.timestamp_iso)  # type: ignore[arg-type]
+
+
+def merge_lots(records: Iterator[TradeRecord]) -> Iterator[TradeRecord]:
+    """Sum consecutive records with the same id: one close order split over several FIFO lots."""
+    current: Optional[TradeRecord] = None
+    for rec in records:
+        if current is not None and rec.trade_id and rec.trade_id == current.trade_id:
+            current = current._replace(pnl=current.pnl + rec.pnl)
+            continue
+        if current is not None:
+            yield current
+        current = rec
+    if current is not None:
+        yield current
+
+
+class _Pending:
+    """Unmatched records of one side: id -> FIFO of records, plus arrival order for eviction."""
+
+    def __init__(self, max_untimed: int) -> None:
+        self.max_untimed = max_untimed
+        self.by_id: Dict[str, Deque[TradeRecord]] = {}
+        self.order: "OrderedDict[int, TradeRecord]" = OrderedDict()
+        self._tokens: Dict[int, int] = {}
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def push(self, rec: TradeRecord) -> None:
+        self.by_id.setdefault(rec.trade_id, deque()).append(rec)
+        self.order[self._next] = rec
+        self._tokens[id(rec)] = self._next
+        self._next += 1
+
+    def pop_id(self, trade_id: str) -> Optional[TradeRecord]:
+        queue = self.by_id.get(trade_id)
+        if not queue:
+            return None
+        rec = queue.popleft()
+        if not queue:
+            del self.by_id[trade_id]
+        del self.order[self._tokens.pop(id(rec))]
+        return rec
+
+    def evict_before(self, horizon: Optional[float]) -> Iterator[TradeRecord]:
+        """Oldest records older than ``horizon``; untimestamped ones once ``max_untimed`` newer arrived."""
+        while self.order:
+            token, rec = next(iter(self.order.items()))
+            if rec.ts is None:
+                if self._next - token <= self.max_untimed:
+                    return
+            elif horizon is None or rec.ts >= horizon:
+                return
+            yield self.pop_id(rec.trade_id)  # type: ignore[misc]
+
+    def drain(self) -> Iterator[TradeRecord]:
+        while self.order:
+            _, rec = next(iter(self.order.items()))
+            yield self.pop_id(rec.trade_id)  # type: ignore[misc]
+
+
+class Reconciler:
+    """Stateful join of two close-ordered trade streams; feed with ``run``."""
+
+    def __init__(self, pnl_tolerance: float = 0.01, time_tolerance_s: float = 5.0,
+                 max_lag_s: float = 3600.0, mismatch_writer=None, drift_writer=None,
+                 max_untimed: int = 10000):
+        self.pnl_tolerance = pnl_tolerance
+        self.time_tolerance_s = time_tolerance_s
+        self.max_lag_s = max(max_lag_s, time_tolerance_s)
+        self.max_untimed = max_untimed
+        self.mismatch_writer = mismatch_writer
+        self.drift_writer = drift_writer
+        self.closed = _Pending(max_untimed)
+        self.closes = _Pending(max_untimed)
+        self.counts: Dict[str, int] = {
+            "closed_rows": 0, "closes_rows": 0, "matched": 0, "pnl_mismatch": 0,
+            "time_mismatch": 0, "missing_close": 0, "extra_close": 0,
+            "closed_without_id": 0, "closes_without_id": 0,
+        }
+        self.closed_without_id_sum = 0.0
+        self.closes_without_id_sum = 0.0
+        self.closed_sum = 0.0
+        self.closes_sum = 0.0
+        self.max_abs_drift = 0.0
+        self.peak_pending = 0
+
+    def _emit(self, kind: str, closed: Optional[TradeRecord], closes: Optional[TradeRecord]) -> None:
+        self.counts[kind] += 1
+        if self.mismatch_writer is None:
+            return
+        pnl_diff = (closed.pnl - closes.pnl) if closed and closes else None
+        time_diff = (closed.ts - closes.ts) if closed and closes and closed.ts is not None and closes.ts is not None else None
+        self.mismatch_writer.writerow([
+            kind, (closed or closes).trade_id,  # type: ignore[union-attr]
+            closed.ts_text if closed else "", closes.ts_text if closes else "",
+            closed.pnl if closed else "", closes.pnl if closes else "",
+            "" if pnl_diff is None else round(pnl_diff, 10),
+            "" if time_diff is None else round(time_diff, 6),
+        ])
+
+    def _drift(self, ts_text: str) -> None:
+        drift = self.closed_sum - self.closes_sum
+        if abs(drift) > self.max_abs_drift:
+            self.max_abs_drift = abs(drift)
+        if self.drift_writer is not None:
+            self.drift_writer.writerow([ts_text, round(self.closed_sum, 10), round(self.closes_sum, 10), round(drift, 10)])
+
+    def _match(self, closed: TradeRecord, closes: TradeRecord) -> None:
+        self.counts["matched"] += 1
+        if abs(closed.pnl - closes.pnl) > self.pnl_tolerance:
+            self._emit("pnl_mismatch", closed, closes)
+        if closed.ts is not None and closes.ts is not None and abs(closed.ts - closes.ts) > self.time_tolerance_s:
+            self._emit("time_mismatch", closed, closes)
+
+    def _flush(self, horizon: Optional[float], final: bool = False) -> None:
+        for side, kind in ((self.closed, "missing_close"), (self.closes, "extra_close")):
+            records = side.drain() if final else side.evict_before(horizon)
+            for rec in records:
+                if kind == "missing_close":
+                    self._emit(kind, rec, None)
+                else:
+                    self._emit(kind, None, rec)
+
+    def add_closed(self, rec: TradeRecord) -> None:
+        self.counts["closed_rows"] += 1
+        self.closed_sum += rec.pnl
+        if not rec.trade_id:
+            self.counts["closed_without_id"] += 1
+            self.closed_without_id_sum += rec.pnl
+            self._drift(rec.ts_text)
+            return
+        other = self.closes.pop_id(rec.trade_id)
+        if other is not None:
+            self._match(rec, other)
+        else:
+            self.closed.push(rec)
+        self._drift(rec.ts_text)
+
+    def add_closes(self, rec: TradeRecord) -> None:
+        self.counts["closes_rows"] += 1
+        self.closes_sum += rec.pnl
+        if not rec.trade_id:
+            self.counts["closes_without_id"] += 1
+            self.closes_without_id_sum += rec.pnl
+            self._drift(rec.ts_text)
+            return
+        other = self.closed.pop_id(rec.trade_id)
+        if other is not None:
+            self._match(other, rec)
+        else:
+            self.closes.push(rec)
+        self._drift(rec.ts_text)
+
+    def run(self, closed_iter: Iterator[TradeRecord], closes_iter: Iterator[TradeRecord]) -> Dict[str, object]:
+        """Advance both streams in timestamp order (merge-join style) and return the summary."""
+        a = next(closed_iter, None)
+        b = next(closes_iter, None)
+        while a is not None or b is not None:
+            take_closed = b is None or (a is not None and (a.ts if a.ts is not None else float("-inf"))
+                                        <= (b.ts if b.ts is not None else float("-inf")))
+            if take_closed:
+                self.add_closed(a)  # type: ignore[arg-type]
+                a = next(closed_iter, None)
+            else:
+                self.add_closes(b)
+                b = next(closes_iter, None)
+            # Both streams are past the watermark; older unmatched records can no longer pair.
+            heads = [r.ts for r in (a, b) if r is not None and r.ts is not None]
+            self._flush(min(heads) - self.max_lag_s if heads else None)
+            pending = len(self.closed) + len(self.closes)
+            if pending > self.peak_pending:
+                self.peak_pending = pending
+        self._flush(None, final=True)
+        return self.summary()
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            **self.counts,
+            "closed_sum": self.closed_sum,
+            "closes_sum": self.closes_sum,
+            "closed_without_id_sum": self.closed_without_id_sum,
+            "closes_without_id_sum": self.closes_without_id_sum,
+            "drift": self.closed_sum - self.closes_sum,
+            "max_abs_drift": self.max_abs_drift,
+            "peak_pending": self.peak_pending,
+            "pnl_tolerance": self.pnl_tolerance,
+            "time_tolerance_s": self.time_tolerance_s,
+            "max_lag_s": self.max_lag_s,
+            "max_untimed": self.max_untimed,
+        }
+
+
+def reconcile(closed_path: Path, closes_path: Path, out_dir: Optional[Path] = None,
+              pnl_tolerance: float = 0.01, time_tolerance_s: float = 5.0,
+              max_lag_s: float = 3600.0, max_untimed: int = 10000) -> Dict[str, object]:
+    """Reconcile two files; when ``out_dir`` is given write mismatches, drift and summary there."""
+    space = id_space(Path(closed_path))
+
+    def _run(rec: Reconciler) -> Dict[str, object]:
+        summary = rec.run(merge_lots(iter_csv_trades(Path(closed_path), space)),
+                          merge_lots(iter_closes(Path(closes_path), space)))
+        summary["id_space"] = space
+        return summary
+
+    if out_dir is None:
+        return _run(Reconciler(pnl_tolerance, time_tolerance_s, max_lag_s, max_untimed=max_untimed))
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with (out_dir / "reconcile_mismatches.csv").open("w", encoding="utf-8", newline="") as fm, \
+         (out_dir / "reconcile_drift.csv").open("w", encoding="utf-8", newline="") as fd:
+        mismatch_writer = csv.writer(fm)
+        mismatch_writer.writerow(MISMATCH_COLUMNS)
+        drift_writer = csv.writer(fd)
+        drift_writer.writerow(DRIFT_COLUMNS)
+        summary = _run(Reconciler(pnl_tolerance, time_tolerance_s, max_lag_s, mismatch_writer, drift_writer,
+                                  max_untimed))
+    summary["closed_path"] = str(closed_path)
+    summary["closes_path"] = str(closes_path)
+    (out_dir / "reconcile_summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Trade-level reconciliation of closed trades vs trade_closes.log")
+    ap.add_argument("--closed", required=True, help="closed_trades_fifo*.csv")
+    ap.add_argument("--closes", required=True, help="trade_closes.log (JSONL/text) or closes CSV")
+    ap.add_argument("--out", default=None, help="Output directory (default: alongside --closed)")
+    ap.add_argument("--pnl-tol", type=float, default=0.01, help="Absolute PnL tolerance per trade")
+    ap.add_argument("--time-tol", type=float, default=5.0, help="Close-time tolerance in seconds")
+    ap.add_argument("--max-lag", type=float, default=3600.0,
+                    help="Seconds an unmatched record waits for its pair before being flushed")
+    ap.add_argument("--max-untimed", type=int, default=10000,
+                    help="Later records an untimestamped record waits for its pair before being flushed")
+    args = ap.parse_args(argv)
+
+    out_dir = Path(args.out) if args.out else Path(args.closed).parent
+    summary = reconcile(Path(args.closed), Path(args.closes), out_dir,
+                        args.pnl_tol, args.time_tol, args.max_lag, args.max_untimed)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Content-addressed cache for post-run analysis results.
+
+The key is a digest over:
+  - the tool name, plus a digest of its source file and of every
+    scripts/analyzers module it imports (``import_closure``), so a code change
+    in the tool or in a helper it uses invalidates the tool's entries;
+  - the normalized arguments;
+  - the content digest of every input file.
+
+Input digests are memoized by (path, size, mtime_ns) in the cache index. A
+repeat lookup over an unchanged run directory therefore costs a few ``stat``
+calls, not a re-read of orders.csv.
+
+An entry holds the files the tool wrote into its output directory (captured
+by diffing the directory before and after the run) and a small JSON payload
+(return code, summary). On a hit the files are copied back and the payload
+is returned, so the tool can print its usual output and exit.
+
+The store lives in ``$BOTG_RESULT_CACHE`` (default ``~/.cache/botg/results``).
+``index.sqlite`` tracks entries and last use; ``blobs/<key>/`` holds the
+files. Least recently used entries are evicted once the total exceeds
+``--cache-max-mb``.
+
+Usage:
+  python -m scripts.analyzers.result_cache stats
+  python -m scripts.analyzers.result_cache prune --max-mb 256
+  python -m scripts.analyzers.result_cache clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+CACHE_ENV = "BOTG_RESULT_CACHE"
+CACHE_FORMAT = 1
+DEFAULT_MAX_MB = 512
+HASH_CHUNK_BYTES = 1024 * 1024
+# Arguments that change how a tool runs but not what it produces
+NEUTRAL_ARGS = frozenset({"no_cache", "cache_dir", "cache_max_mb", "profile", "perf_dir"})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    payload_json TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+CREATE TABLE IF NOT EXISTS file_digests (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+"""
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def default_cache_dir() -> Path:
+    env = os.environ.get(CACHE_ENV)
+    return Path(env) if env else Path.home() / ".cache" / "botg" / "results"
+
+
+def add_cache_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--no-cache", action="store_true", help="Always recompute; do not read or write the result cache")
+    parser.add_argument("--cache-dir", default=None, help=f"Result cache directory (default: ${CACHE_ENV} or ~/.cache/botg/results)")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB, help="Evict least recently used entries above this size")
+
+
+def _hash_file(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+ANALYZERS_DIR = Path(__file__).resolve().parent
+_ANALYZER_PACKAGES = ("scripts.analyzers", "analyzers")
+
+
+def _analyzer_imports(path: Path) -> List[Path]:
+    """scripts/analyzers modules named by the import statements of ``path``."""
+    names: List[str] = []
+    in_package = path.parent == ANALYZERS_DIR
+    for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"), str(path))):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module or ""
+            if node.level and not in_package:
+                continue
+            if module in _ANALYZER_PACKAGES or (node.level and not module):
+                names.extend(alias.name for alias in node.names)  # from scripts.analyzers import x
+                continue
+            modules = [module]
+        else:
+            continue
+        for module in modules:
+            for package in _ANALYZER_PACKAGES:
+                if module.startswith(package + "."):
+                    names.append(module[len(package) + 1:])
+                    break
+            else:
+                if in_package:  # relative, or bare when run as scripts/analyzers/x.py
+                    names.append(module)
+    found = (ANALYZERS_DIR / f"{name.partition('.')[0]}.py" for name in names)
+    return [p for p in found if p.is_file()]
+
+
+def import_closure(entry: Path) -> List[Path]:
+    """``entry`` plus every scripts/analyzers module it imports, directly or through other analyzers."""
+    seen = set()
+    stack = [Path(entry).resolve()]
+    while stack:
+        path = stack.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        stack.extend(_analyzer_imports(path))
+    return sorted(seen)
+
+
+def code_version(*sources: Path) -> str:
+    """Digest of the given source files; part of every key for that tool."""
+    h = hashlib.blake2b(digest_size=8)
+    for source in sources:
+        h.update(Path(source).read_bytes())
+    return h.hexdigest()
+
+
+def snapshot_dir(out_dir: Path) -> Snapshot:
+    """Relative path -> (size, mtime_ns) for every file under ``out_dir``."""
+    out_dir = Path(out_dir)
+    if not out_dir.is_dir():
+        return {}
+    snap: Snapshot = {}
+    for path in out_dir.rglob("*"):
+        if path.is_file():
+            st = path.stat()
+            snap[path.relative_to(out_dir).as_posix()] = (st.st_size, st.st_mtime_ns)
+    return snap
+
+
+def changed_files(out_dir: Path, before: Snapshot) -> List[str]:
+    after = snapshot_dir(out_dir)
+    return sorted(name for name, sig in after.items() if before.get(name) != sig)
+
+
+class ResultCache:
+    """Size-bounded LRU store of tool outputs keyed by tool, code, arguments and input content."""
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.root = Path(root) if root else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.blobs = self.root / "blobs"
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.root / "index.sqlite"), timeout=30)
+        self.conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> Optional["ResultCache"]:
+        """Cache configured by ``add_cache_args``; None when disabled or unusable."""
+        if getattr(args, "no_cache", False):
+            return None
+        try:
+            return cls(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+        except (OSError, sqlite3.Error):
+            return None
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -- keys ---------------------------------------------------------------
+
+    def file_digest(self, path: Path) -> str:
+        path = Path(path).resolve()
+        st = path.stat()
+        row = self.conn.execute("SELECT size, mtime_ns, digest FROM file_digests WHERE path = ?", (str(path),)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        digest = _hash_file(path)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO file_digests(path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                              (str(path), st.st_size, st.st_mtime_ns, digest))
+        return digest
+
+    def key(self, tool: str, version: str, args: Mapping[str, object], inputs: Iterable[Path]) -> str:
+        material = {
+            "format": CACHE_FORMAT,
+            "tool": tool,
+            "version": version,
+            "args": {k: str(v) for k, v in sorted(args.items()) if k not in NEUTRAL_ARGS},
+            "inputs": sorted(
+                (Path(p).name, self.file_digest(Path(p))) for p in inputs if Path(p).is_file()
+            ),
+        }
+        return hashlib.blake2b(json.dumps(material, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+    # -- entries ------------------------------------------------------------
+
+    def restore(self, key: str, out_dir: Optional[Path] = None) -> Optional[Dict[str, object]]:
+        """Copy a hit's files into ``out_dir`` and return its payload; None on a miss."""
+        row = self.conn.execute("SELECT payload_json FROM entries WHERE key = ?", (key,)).fetchone()
+        blob = self.blobs / key
+        if row is None or not blob.is_dir():
+            return None
+        if out_dir is not None:
+            out_dir = Path(out_dir)
+            for path in blob.rglob("*"):
+                if path.is_file():
+                    target = out_dir / path.relative_to(blob)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(path, target)
+        with self.conn:
+            self.conn.execute("UPDATE entries SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]) if row[0] else {}
+
+    def store(self, key: str, tool: str, out_dir: Optional[Path] = None, files: Sequence[str] = (),
+              payload: Optional[Mapping[str, object]] = None) -> None:
+        """Save ``files`` (relative to ``out_dir``) and ``payload`` under ``key``, then evict LRU entries."""
+        tmp = self.blobs / f"{key}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        size = 0
+        for name in files:
+            src = Path(out_dir) / name  # type: ignore[arg-type]
+            dst = tmp / name
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(src, dst)
+            size += dst.stat().st_size
+        final = self.blobs / key
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        payload_json = json.dumps(payload or {})
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries(key, tool, size_bytes, created_at, last_used, hits, payload_json)"
+                " VALUES (?, ?, ?, ?, ?, 0, ?)", (key, tool, size + len(payload_json), now, now, payload_json))
+        self.evict()
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Drop least recently used entries until the total fits; returns entries removed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        total = self.conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM entries").fetchone()[0]
+        removed = 0
+        if total <= limit:
+            return 0
+        for key, size in self.conn.execute("SELECT key, size_bytes FROM entries ORDER BY last_used").fetchall():
+            if total <= limit:
+                break
+            shutil.rmtree(self.blobs / key, ignore_errors=True)
+            with self.conn:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, object]:
+        entries, size, hits = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(hits), 0) FROM entries").fetchone()
+        by_tool = dict(self.conn.execute("SELECT tool, COUNT(*) FROM entries GROUP BY tool").fetchall())
+        return {"root": str(self.root), "entries": entries, "size_mb": round(size / (1024 * 1024), 3),
+                "hits": hits, "by_tool": by_tool, "max_mb": round(self.max_bytes / (1024 * 1024), 1)}
+
+    def clear(self) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("DELETE FROM file_digests")
+        shutil.rmtree(self.blobs, ignore_errors=True)
+        self.blobs.mkdir(parents=True, exist_ok=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Inspect or trim the post-run result cache")
+    ap.add_argument("command", choices=("stats", "prune", "clear"))
+    ap.add_argument("--cache-dir", default=None, help=f"Cache directory (default: ${CACHE_ENV} or ~/.cache/botg/results)")
+    ap.add_argument("--max-mb", type=float, default=DEFAULT_MAX_MB, help="Size limit for prune")
+    args = ap.parse_args(argv)
+
+    cache = ResultCache(args.cache_dir, int(args.max_mb * 1024 * 1024))
+    try:
+        if args.command == "prune":
+            print(f"evicted {cache.evict()} entries")
+        elif args.command == "clear":
+            cache.clear()
+        print(json.dumps(cache.stats(), indent=2))
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""Incremental 1s/1m/1h OHLC rollups of risk_snapshots.csv in a small columnar store.
+
+RiskSnapshotPersister appends a 20-column row on every pass of the risk
+loop. postrun_report and audit R2/R9/R11 each load the whole file to look at
+a handful of columns. This builds, once, per-bucket open/high/low/close of
+equity, balance, drawdown, R_used, exposure and margin at three resolutions.
+Later runs only read what was appended since.
+
+Store layout (``<run-dir>/risk_rollup`` by default):
+  meta.json              source byte offset and header, row count per resolution,
+                         first/last/min/max timestamp (epoch ns), clock checks, and the
+                         still-open bucket of every resolution
+  <res>/ts_ms.i8         bucket start (epoch ms), int64 little-endian
+  <res>/count.i4         snapshots in the bucket
+  <res>/<field>_<o|h|l|c>.f8   one float64 column per field and OHLC part
+
+Columns are raw arrays: appending is a file append, and reading is
+``np.fromfile`` of just the columns needed. A week of 1h buckets is about
+35 KB; the same week at 1m is about 2 MB.
+
+Each update reads the new complete lines from the saved byte offset in
+chunks. It aggregates them per bucket with pandas, merges the first bucket
+into the saved open bucket, appends the buckets that are now closed, and
+keeps the last one open. ``meta.json`` is replaced atomically after the
+columns are written. Its row counts are authoritative, so columns left
+longer by an interrupted update are cut back on the next one. A source that
+shrank below the offset, or whose header changed, is rebuilt from scratch.
+
+Snapshot times are clamped to be non-decreasing before bucketing, so a
+backward clock jump lands in the current bucket. Backward jumps and
+duplicate timestamps are counted in meta.json; that is audit R9's check.
+
+Usage:
+  python -m scripts.analyzers.risk_rollup --run-dir D:/botg/logs/artifacts/telemetry_run_X
+  python -m scripts.analyzers.risk_rollup --risk run/risk_snapshots.csv --store run/risk_rollup --follow --interval 10
+
+Outputs:
+  the store above; a JSON summary of meta.json (without open buckets) on stdout
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    from .lazy_imports import lazy_import
+    from .perf import PerfRecorder, add_perf_args
+except ImportError:  # run as scripts/analyzers/risk_rollup.py
+    from lazy_imports import lazy_import
+    from perf import PerfRecorder, add_perf_args
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+STORE_FORMAT = 2
+STORE_DIR = "risk_rollup"
+RESOLUTIONS: Dict[str, int] = {"1s": 1000, "1m": 60_000, "1h": 3_600_000}
+FIELDS: Sequence[str] = ("equity", "balance", "drawdown", "R_used", "exposure", "margin")
+PARTS: Sequence[str] = ("o", "h", "l", "c")
+TIMESTAMP_COLUMNS: Sequence[str] = ("timestamp_utc", "timestamp")
+READ_CHUNK_BYTES = 32 * 1024 * 1024
+HEADER_PROBE_BYTES = 64 * 1024
+
+
+def _columns(fields: Sequence[str]) -> List[Tuple[str, str]]:
+    """(column name, dtype) of a resolution's store, in file order."""
+    return [("ts_ms", "<i8"), ("count", "<i4")] + [(f"{f}_{p}", "<f8") for f in fields for p in PARTS]
+
+
+def _suffix(dtype: str) -> str:
+    return dtype[1:]
+
+
+class RiskRollup:
+    """One store directory; ``update()`` folds in whatever the source gained since the last call."""
+
+    def __init__(self, source: Path, store: Optional[Path] = None):
+        self.source = Path(source)
+        self.store = Path(store) if store else self.source.parent / STORE_DIR
+        self.meta: Dict[str, object] = self._load_meta() or {}
+
+    # -- meta ------------------------------------------------------------------
+
+    def _load_meta(self) -> Optional[Dict[str, object]]:
+        try:
+            meta = json.loads((self.store / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("format") == STORE_FORMAT else None
+
+    def _save_meta(self) -> None:
+        tmp = self.store / "meta.json.tmp"
+        tmp.write_text(json.dumps(self.meta, indent=1), encoding="utf-8")
+        os.replace(tmp, self.store / "meta.json")
+
+    def _reset(self, header: str, fields: Sequence[str], ts_col: str) -> None:
+        if self.store.exists():
+            for res in RESOLUTIONS:
+                shutil.rmtree(self.store / res, ignore_errors=True)
+        self.store.mkdir(parents=True, exist_ok=True)
+        self.meta = {
+            "format": STORE_FORMAT, "source": self.source.name, "header": header, "timestamp_column": ts_col,
+            "fields": list(fields), "offset": len(header.encode("utf-8")) + 1, "snapshots": 0, "bad_rows": 0,
+            "first_ts_ns": None, "last_ts_ns": None, "min_ts_ns": None, "max_ts_ns": None,
+            "backward_jumps": 0, "duplicates": 0, "clamped_ts_ms": None,
+            "resolutions": {res: {"width_ms": width, "rows": 0} for res, width in RESOLUTIONS.items()},
+            "open": {},
+        }
+        for res in RESOLUTIONS:
+            (self.store / res).mkdir(parents=True, exist_ok=True)
+
+    # -- source ----------------------------------------------------------------
+
+    def _header(self) -> Optional[bytes]:
+        with self.source.open("rb") as fh:
+            first = fh.readline(HEADER_PROBE_BYTES)
+        return first if first.endswith(b"\n") else None
+
+    def _trim(self) -> None:
+        """Cut every column back to the row count meta.json vouches for."""
+        fields = self.meta["fields"]  # type: ignore[index]
+        for res, info in self.meta["resolutions"].items():  # type: ignore[union-attr]
+            for name, dtype in _columns(fields):  # type: ignore[arg-type]
+                path = self.store / res / f"{name}.{_suffix(dtype)}"
+                want = info["rows"] * np.dtype(dtype).itemsize
+                if path.exists() and path.stat().st_size != want:
+                    os.truncate(path, want)
+
+    def update(self, max_bytes: Optional[int] = None) -> int:
+        """Fold new complete lines into the store; returns the snapshots added."""
+        if not self.source.exists():
+            return 0
+        raw_header = self._header()
+        if raw_header is None:
+            return 0
+        header = raw_header.decode("utf-8-sig", errors="replace").rstrip("\r\n")
+        size = self.source.stat().st_size
+        if (not self.meta or self.meta.get("header") != header
+                or size < int(self.meta.get("offset", 0))):  # type: ignore[arg-type]
+            names = header.split(",")
+            ts_col = next((c for c in TIMESTAMP_COLUMNS if c in names), None)
+            if ts_col is None:
+                raise ValueError(f"{self.source}: no {'/'.join(TIMESTAMP_COLUMNS)} column")
+            self._reset(header, [f for f in FIELDS if f in names], ts_col)
+            self.meta["offset"] = len(raw_header)
+        else:
+            self._trim()
+
+        added = 0
+        budget = max_bytes if max_bytes is not None else size
+        with self.source.open("rb") as fh:
+            offset = int(self.meta["offset"])  # type: ignore[arg-type]
+            while offset < size and budget > 0:
+                fh.seek(offset)
+                chunk = fh.read(min(READ_CHUNK_BYTES, size - offset, budget))
+                end = chunk.rfind(b"\n")
+                if end < 0:
+                    break
+                chunk = chunk[:end + 1]
+                added += self._ingest(chunk)
+                offset += len(chunk)
+                budget -= len(chunk)
+                self.meta["offset"] = offset
+        self._save_meta()
+        return added
+
+    # -- aggregation -------------------------------------------------------------
+
+    def _ingest(self, chunk: bytes) -> int:
+        meta = self.meta
+        names = str(meta["header"]).split(",")
+        ts_col, fields = str(meta["timestamp_column"]), list(meta["fields"])  # type: ignore[arg-type]
+        frame = pd.read_csv(io.BytesIO(chunk), header=None, names=names, usecols=[ts_col] + fields,
+                            on_bad_lines="skip", dtype={f: "float64" for f in fields}, encoding_errors="replace")
+        stamps = pd.to_datetime(frame[ts_col], utc=True, format="ISO8601", errors="coerce")
+        valid = stamps.notna().to_numpy()
+        meta["bad_rows"] = int(meta["bad_rows"]) + int((~valid).sum()) + chunk.count(b"\n") - len(frame)  # type: ignore[arg-type]
+        if not valid.any():
+            return 0
+        # Clock checks keep full precision: ToString("o") writes 100 ns ticks, so two
+        # snapshots in the same millisecond are not duplicates. Buckets only need ms.
+        ts_ns = stamps.dt.as_unit("ns").to_numpy(dtype=np.int64, na_value=0)[valid]
+        ts = ts_ns // 1_000_000
+        values = {f: frame[f].to_numpy(dtype=np.float64)[valid] for f in fields}
+
+        # Clock checks on the raw order, then clamp to non-decreasing for bucketing
+        prev = meta["last_ts_ns"]
+        raw_prev = np.r_[ts_ns[:1] - 1 if prev is None else [prev], ts_ns[:-1]]
+        meta["backward_jumps"] = int(meta["backward_jumps"]) + int((ts_ns < raw_prev).sum())  # type: ignore[arg-type]
+        meta["duplicates"] = int(meta["duplicates"]) + int((ts_ns == raw_prev).sum())  # type: ignore[arg-type]
+        meta["first_ts_ns"] = int(ts_ns[0]) if meta["first_ts_ns"] is None else meta["first_ts_ns"]
+        meta["last_ts_ns"] = int(ts_ns[-1])
+        lo, hi = int(ts_ns.min()), int(ts_ns.max())
+        meta["min_ts_ns"] = lo if meta["min_ts_ns"] is None else min(int(meta["min_ts_ns"]), lo)  # type: ignore[arg-type]
+        meta["max_ts_ns"] = hi if meta["max_ts_ns"] is None else max(int(meta["max_ts_ns"]), hi)  # type: ignore[arg-type]
+        floor = meta["clamped_ts_ms"]
+        clamped = np.maximum.accumulate(ts if floor is None else np.maximum(ts, int(floor)))  # type: ignore[arg-type]
+        meta["clamped_ts_ms"] = int(clamped[-1])
+        meta["snapshots"] = int(meta["snapshots"]) + len(ts)  # type: ignore[arg-type]
+
+        for res, width in RESOLUTIONS.items():
+            self._roll(res, width, clamped, values, fields)
+        return len(ts)
+
+    def _roll(self, res: str, width: int, ts: np.ndarray, values: Mapping[str, np.ndarray],
+              fields: Sequence[str]) -> None:
+        bucket = ts // width * width
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        cols: Dict[str, np.ndarray] = {"ts_ms": bucket[starts], "count": np.diff(np.r_[starts, len(ts)]).astype(np.int32)}
+        for f in fields:
+            v = values[f]
+            cols[f"{f}_o"] = v[starts]
+            cols[f"{f}_h"] = np.fmax.reduceat(v, starts)
+            cols[f"{f}_l"] = np.fmin.reduceat(v, starts)
+            cols[f"{f}_c"] = v[np.r_[starts[1:], len(ts)] - 1]
+
+        open_bucket = self.meta["open"].get(res)  # type: ignore[union-attr]
+        if open_bucket is not None:
+            if open_bucket["ts_ms"] == int(cols["ts_ms"][0]):
+                cols["count"][0] += open_bucket["count"]
+                for f in fields:
+                    cols[f"{f}_o"][0] = open_bucket[f"{f}_o"]
+                    cols[f"{f}_h"][0] = np.fmax(open_bucket[f"{f}_h"], cols[f"{f}_h"][0])
+                    cols[f"{f}_l"][0] = np.fmin(open_bucket[f"{f}_l"], cols[f"{f}_l"][0])
+            else:
+                cols = {name: np.r_[np.array([open_bucket[name]], dtype=arr.dtype), arr] for name, arr in cols.items()}
+
+        # Everything but the last bucket is closed
+        closed = len(cols["ts_ms"]) - 1
+        if closed:
+            for name, dtype in _columns(fields):
+                with (self.store / res / f"{name}.{_suffix(dtype)}").open("ab") as fh:
+                    fh.write(np.ascontiguousarray(cols[name][:closed], dtype=dtype).tobytes())
+            self.meta["resolutions"][res]["rows"] += closed  # type: ignore[index]
+        self.meta["open"][res] = {name: _scalar(arr[-1]) for name, arr in cols.items()}  # type: ignore[index]
+
+
+def _scalar(value) -> object:
+    value = value.item()
+    return None if isinstance(value, float) and value != value else value
+
+
+# -- readers ---------------------------------------------------------------------
+
+def load(store: Path, resolution: str = "1m", columns: Optional[Sequence[str]] = None,
+         include_open: bool = True) -> Dict[str, np.ndarray]:
+    """Columns of one resolution as arrays (``ts_ms``, ``count``, ``equity_c``...), open bucket appended."""
+    store = Path(store)
+    meta = json.loads((store / "meta.json").read_text(encoding="utf-8"))
+    if resolution not in meta["resolutions"]:
+        raise ValueError(f"unknown resolution {resolution!r} (have {', '.join(meta['resolutions'])})")
+    rows = meta["resolutions"][resolution]["rows"]
+    wanted = set(columns) | {"ts_ms"} if columns else None
+    out: Dict[str, np.ndarray] = {}
+    for name, dtype in _columns(meta["fields"]):
+        if wanted is not None and name not in wanted:
+            continue
+        path = store / resolution / f"{name}.{_suffix(dtype)}"
+        arr = np.fromfile(path, dtype=dtype, count=rows) if rows else np.zeros(0, dtype=dtype)
+        open_bucket = meta["open"].get(resolution)
+        if include_open and open_bucket is not None:
+            tail = open_bucket[name]
+            arr = np.r_[arr, np.array([np.nan if tail is None else tail], dtype=dtype)]
+        out[name] = arr
+    return out
+
+
+def frame(store: Path, resolution: str = "1m", columns: Optional[Sequence[str]] = None) -> "pd.DataFrame":
+    """``load`` as a DataFrame with a UTC ``timestamp`` column first."""
+    data = load(store, resolution, columns)
+    out = pd.DataFrame(data)
+    out.insert(0, "timestamp", pd.to_datetime(out["ts_ms"], unit="ms", utc=True))
+    return out
+
+
+def pick_resolution(store: Path, max_points: int = 2000) -> str:
+    """Finest resolution with at most ``max_points`` buckets (coarsest when none fits): what a chart should read."""
+    meta = json.loads((Path(store) / "meta.json").read_text(encoding="utf-8"))
+    ordered = sorted(meta["resolutions"].items(), key=lambda kv: kv[1]["width_ms"])
+    for res, info in ordered:
+        if info["rows"] + 1 <= max_points:
+            return res
+    return ordered[-1][0]
+
+
+def fresh_meta(source: Path, store: Optional[Path] = None) -> Optional[Dict[str, object]]:
+    """meta.json when the store covers every complete line of ``source``; None when stale or missing."""
+    source = Path(source)
+    store = Path(store) if store else source.parent / STORE_DIR
+    try:
+        meta = json.loads((store / "meta.json").read_text(encoding="utf-8"))
+        size = source.stat().st_size
+        with source.open("rb") as fh:
+            header = fh.readline(HEADER_PROBE_BYTES).decode("utf-8-sig", errors="replace").rstrip("\r\n")
+            fh.seek(int(meta["offset"]))
+            tail = fh.read(size - int(meta["offset"]))
+    except (OSError, ValueError, KeyError):
+        return None
+    if meta.get("format") != STORE_FORMAT or meta.get("header") != header or b"\n" in tail:
+        return None
+    return meta
+
+
+def summary(meta: Mapping[str, object]) -> Dict[str, object]:
+    return {k: v for k, v in meta.items() if k not in ("open", "header")}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Incremental 1s/1m/1h OHLC rollups of risk_snapshots.csv")
+    ap.add_argument("--run-dir", default=None, help="Run directory (reads risk_snapshots.csv)")
+    ap.add_argument("--risk", default=None, help="risk_snapshots.csv (overrides --run-dir)")
+    ap.add_argument("--store", default=None, help=f"Store directory (default: <risk dir>/{STORE_DIR})")
+    ap.add_argument("--rebuild", action="store_true", help="Drop the store and rebuild from the top")
+    ap.add_argument("--follow", action="store_true", help="Keep updating every --interval seconds")
+    ap.add_argument("--interval", type=float, default=10.0)
+    add_perf_args(ap)
+    args = ap.parse_args(argv)
+
+    if not args.risk and not args.run_dir:
+        ap.error("give --run-dir or --risk")
+    risk = Path(args.risk) if args.risk else Path(args.run_dir) / "risk_snapshots.csv"
+    rollup = RiskRollup(risk, Path(args.store) if args.store else None)
+    if args.rebuild:
+        rollup.meta = {}
+
+    perf = PerfRecorder("risk_rollup", args.profile)
+    with perf:
+        with perf.stage("update") as span:
+            span.rows = rollup.update()
+    perf.write(Path(args.perf_dir) if args.perf_dir else rollup.store)
+    print(json.dumps(summary(rollup.meta), indent=2))
+    while args.follow:
+        try:
+            time.sleep(args.interval)
+            added = rollup.update()
+        except KeyboardInterrupt:
+            break
+        if added:
+            print(json.dumps({"added": added, "snapshots": rollup.meta["snapshots"],
+                              "last_ts_ns": rollup.meta["last_ts_ns"]}), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
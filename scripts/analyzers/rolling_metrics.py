@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""Rolling performance metrics over closed trades, orders.csv and risk snapshots.
+
+The other analyzers report whole-run figures: total P&L, max drawdown, fill
+rate. A run that was fine for 20 hours and broke down in the last four has
+the same whole-run figures as one that was mediocre throughout. This tool
+recomputes the metrics over sliding windows so the degradation shows up
+where it happened.
+
+Each stream is read once. Every event goes into one or more windows, either
+the last N events (``events:50``) or the last T minutes (``time:60m``). A
+bounded window keeps its events in a deque and evicts from the left; the
+whole-run window keeps only the running aggregates below, so its memory does
+not grow with the run. Each metric is updated in O(1) per event added or
+evicted:
+  mean / std        sums and sums of squares, shifted by the first value so
+                    the variance does not cancel catastrophically. They are
+                    rebuilt from the window after about one window's worth of
+                    evictions, so float drift stays bounded at amortized O(1).
+  win rate, Sortino running count of positive values and sum of squared losses
+  min / max         monotonic deques of (sequence, value); plain running
+                    min/max for the whole-run window
+  p50 / p95 / p99   QuantileSketch with remove(); bucket counts are exact,
+                    so the result stays within the sketch's relative accuracy
+  event kinds       a Counter (REQUEST/FILL/REJECT rows in the window)
+The total cost is therefore linear in events whatever the window size, for
+time windows too. A row is written every ``--every`` events (count windows)
+or once per ``--every-minutes`` of data time (time windows).
+
+Trades metrics use the closed-trade P&L in close-time order. The Sharpe and
+Sortino proxies are per trade and not annualized: mean / std and
+mean / sqrt(mean(min(pnl, 0)^2)). Orders metrics are fill_rate_pct
+(orders whose first FILL is in the window / REQUEST rows in the window, as
+in postrun_report) and logged latency_ms quantiles over the window's FILL
+rows. Risk metrics are equity,
+the window's equity peak and the drawdown from it, the mean/std of the
+snapshot-to-snapshot equity change, and the deepest ``drawdown`` the
+snapshot itself reported.
+
+Timestamps that go backwards (rows written out of order) are clamped to
+the latest time seen, so a window never grows backwards.
+
+Usage:
+  python -m scripts.analyzers.rolling_metrics --run-dir D:/botg/logs/artifacts/telemetry_run_X --out run/rolling
+  python -m scripts.analyzers.rolling_metrics --trades closed_trades_fifo_reconstructed.csv --trade-window 100 --span-minutes 240
+
+Outputs (written to --out):
+  - rolling_trades.csv    per window: trades, win rate, expectancy, std, Sharpe/Sortino proxies, best/worst trade
+  - rolling_orders.csv    per window: requests, filled orders, fill rows, rejects, fill rate, latency p50/p95/p99/max
+  - rolling_risk.csv      per window: equity, window peak, drawdown from peak, equity-change mean/std
+  - rolling_summary.json  whole-run value and the worst/best window (with its time) for every metric
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+from collections import Counter, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .perf import PerfRecorder, add_perf_args
+from .reconcile_trades import parse_timestamp
+from .sketches import DEFAULT_RELATIVE_ACCURACY, QuantileSketch
+
+PNL_COLUMNS: Sequence[str] = ("pnl_currency", "net_realized_usd", "pnl", "realized_pnl_usd")
+CLOSE_COLUMNS: Sequence[str] = ("close_time", "exit_time", "timestamp", "close_time_iso")
+SNAPSHOT_TIME_COLUMNS: Sequence[str] = ("timestamp_utc", "timestamp", "timestamp_iso")
+LATENCY_QUANTILES: Sequence[float] = (0.5, 0.95, 0.99)
+
+# Event: (timestamp ms, value or None, kind or None)
+Event = Tuple[int, Optional[float], Optional[str]]
+Row = Dict[str, object]
+
+
+class RollingWindow:
+    """Sliding window over timestamped values: the last ``size`` events, the last ``span_ms``, or everything.
+
+    ``push(t, value, kind)`` adds an event, then evicts whatever falls out of the
+    window. ``value`` may be None for events that only count towards ``kinds``.
+    The unbounded window never evicts, so it keeps no events, only the aggregates.
+    """
+
+    def __init__(self, size: Optional[int] = None, span_ms: Optional[int] = None, extrema: bool = True,
+                 sketch: bool = False, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if size is not None and size <= 0 or span_ms is not None and span_ms <= 0:
+            raise ValueError("window size/span must be positive")
+        if size is not None and span_ms is not None:
+            raise ValueError("a window is either count-based or time-based")
+        self.size = size
+        self.span_ms = span_ms
+        self.bounded = size is not None or span_ms is not None
+        self.events: deque = deque()  # (t, seq, value, kind); stays empty when unbounded
+        self.last_value: Optional[float] = None
+        self.kinds: Counter = Counter()
+        self.last_t: Optional[int] = None
+        self._seq = 0
+        self._extrema = extrema
+        self._max: deque = deque()  # (seq, value), values decreasing
+        self._min: deque = deque()  # (seq, value), values increasing
+        self._low: Optional[float] = None  # unbounded window only
+        self._high: Optional[float] = None
+        self.sketch = QuantileSketch(relative_accuracy) if sketch else None
+        self._reset_sums()
+
+    @property
+    def label(self) -> str:
+        if self.size is not None:
+            return f"events:{self.size}"
+        if self.span_ms is not None:
+            return f"time:{self.span_ms // 60000}m" if self.span_ms % 60000 == 0 else f"time:{self.span_ms}ms"
+        return "all"
+
+    def _reset_sums(self) -> None:
+        self.n = 0
+        self._shift = 0.0
+        self._s = 0.0
+        self._ss = 0.0
+        self._positive = 0
+        self._losses = 0
+        self._loss_ss = 0.0
+        self._evicted = 0
+
+    def _add(self, value: float) -> None:
+        if self.n == 0:
+            self._shift = value
+        d = value - self._shift
+        self.n += 1
+        self._s += d
+        self._ss += d * d
+        if value > 0:
+            self._positive += 1
+        elif value < 0:
+            self._losses += 1
+            self._loss_ss += value * value
+
+    def _remove(self, value: float) -> None:
+        d = value - self._shift
+        self.n -= 1
+        self._s -= d
+        self._ss -= d * d
+        if value > 0:
+            self._positive -= 1
+        elif value < 0:
+            self._losses -= 1
+            self._loss_ss -= value * value
+
+    def _rebuild(self) -> None:
+        self._reset_sums()
+        for _, _, value, _ in self.events:
+            if value is not None:
+                self._add(value)
+
+    def push(self, t: int, value: Optional[float] = None, kind: Optional[str] = None) -> None:
+        if self.last_t is not None and t < self.last_t:
+            t = self.last_t
+        self.last_t = t
+        self._seq += 1
+        if value is not None and value != value:
+            value = None
+        self.last_value = value
+        if kind is not None:
+            self.kinds[kind] += 1
+        if not self.bounded:
+            if value is not None:
+                self._add(value)
+                if self.sketch is not None:
+                    self.sketch.add(value)
+                if self._extrema:
+                    self._low = value if self._low is None else min(self._low, value)
+                    self._high = value if self._high is None else max(self._high, value)
+            return
+        self.events.append((t, self._seq, value, kind))
+        if value is not None:
+            self._add(value)
+            if self.sketch is not None:
+                self.sketch.add(value)
+            if self._extrema:
+                while self._max and self._max[-1][1] <= value:
+                    self._max.pop()
+                self._max.append((self._seq, value))
+                while self._min and self._min[-1][1] >= value:
+                    self._min.pop()
+                self._min.append((self._seq, value))
+        self._evict(t)
+
+    def _evict(self, now: int) -> None:
+        events = self.events
+        if self.size is not None:
+            stale = len(events) - self.size
+        elif self.span_ms is not None:
+            stale = 0
+            cutoff = now - self.span_ms
+            for event in events:
+                if event[0] > cutoff:
+                    break
+                stale += 1
+        else:
+            return
+        for _ in range(stale):
+            _, seq, value, kind = events.popleft()
+            if kind is not None:
+                self.kinds[kind] -= 1
+            if value is not None:
+                self._remove(value)
+                if self.sketch is not None:
+                    self.sketch.remove(value)
+                self._evicted += 1
+        if stale and self._extrema:
+            first = events[0][1] if events else self._seq + 1
+            while self._max and self._max[0][0] < first:
+                self._max.popleft()
+            while self._min and self._min[0][0] < first:
+                self._min.popleft()
+        if self._evicted > max(len(events), 1024):
+            self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self.events) if self.bounded else self._seq
+
+    @property
+    def sum(self) -> float:
+        return self._s + self._shift * self.n
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._shift + self._s / self.n if self.n else None
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation of the values in the window."""
+        if self.n < 2:
+            return None
+        return math.sqrt(max(0.0, (self._ss - self._s * self._s / self.n) / (self.n - 1)))
+
+    @property
+    def positive_rate(self) -> Optional[float]:
+        return self._positive / self.n if self.n else None
+
+    @property
+    def downside_deviation(self) -> Optional[float]:
+        """sqrt(mean(min(value, 0)^2)), the Sortino denominator."""
+        if not self.n:
+            return None
+        return math.sqrt(max(0.0, self._loss_ss) / self.n) if self._losses else 0.0
+
+    @property
+    def max(self) -> Optional[float]:
+        if not self.bounded:
+            return self._high
+        return self._max[0][1] if self._max else None
+
+    @property
+    def min(self) -> Optional[float]:
+        if not self.bounded:
+            return self._low
+        return self._min[0][1] if self._min else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.sketch is None or self.n == 0:
+            return None
+        # The sketch's own min/max are only bounds after evictions; clamp to the exact extrema instead
+        value = self.sketch.quantile(q)
+        if value is None:
+            return None
+        low, high = self.min, self.max
+        if low is not None and value < low:
+            return low
+        if high is not None and value > high:
+            return high
+        return value
+
+
+def _iso(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000.0, tz=timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _float(text: Optional[str]) -> Optional[float]:
+    try:
+        value = float(text) if text not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+    return value if value is not None and math.isfinite(value) else None
+
+
+def _epoch_ms(text: Optional[str]) -> Optional[int]:
+    if not text:
+        return None
+    text = text.strip()
+    if text.isdigit():
+        num = int(text)
+        return num if num > 10_000_000_000 else num * 1000
+    seconds = parse_timestamp(text)
+    return int(round(seconds * 1000)) if seconds is not None else None
+
+
+def _ratio(num: Optional[float], den: Optional[float]) -> Optional[float]:
+    return num / den if num is not None and den else None
+
+
+def _pick(header: Sequence[str], candidates: Sequence[str], wanted: Optional[str] = None) -> Optional[str]:
+    if wanted:
+        return wanted if wanted in header else None
+    return next((c for c in candidates if c in header), None)
+
+
+# ---- stream readers -------------------------------------------------------
+
+def trade_events(path: Path, column: Optional[str] = None) -> List[Event]:
+    """(close time ms, P&L, None) per closed trade, in close order."""
+    with Path(path).open("r", encoding="utf-8-sig", newline="") as fh:
+        reader = csv.DictReader(fh)
+        header = reader.fieldnames or []
+        pnl_col = _pick(header, PNL_COLUMNS, column)
+        time_col = _pick(header, CLOSE_COLUMNS)
+        if pnl_col is None or time_col is None:
+            raise ValueError(f"{path}: need a P&L column ({', '.join(PNL_COLUMNS)}) "
+                             f"and a close time ({', '.join(CLOSE_COLUMNS)})")
+        events = []
+        for row in reader:
+            ts, pnl = _epoch_ms(row.get(time_col)), _float(row.get(pnl_col))
+            if ts is not None and pnl is not None:
+                events.append((ts, pnl, None))
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def order_events(path: Path) -> Iterator[Event]:
+    """(row time ms, latency_ms for FILL rows else None, kind) per orders.csv row, in file order.
+
+    kind is the phase, except that the first FILL of each order id is
+    FILLED_ORDER. Partial fills write several FILL rows per order, and the fill
+    rate counts orders.
+    """
+    filled = set()
+    with Path(path).open("r", encoding="utf-8-sig", newline="") as fh:
+        for row in csv.DictReader(fh):
+            phase = (row.get("phase") or row.get("status") or "").strip().upper()
+            ts = _epoch_ms(row.get("epoch_ms")) or _epoch_ms(row.get("timestamp_iso")) or _epoch_ms(row.get("timestamp"))
+            if ts is None or not phase:
+                continue
+            if phase != "FILL":
+                yield ts, None, phase
+                continue
+            oid = row.get("order_id") or row.get("orderId") or row.get("client_order_id") or ""
+            first = not oid or oid not in filled
+            if first and oid:
+                filled.add(oid)
+            yield ts, _float(row.get("latency_ms")), "FILLED_ORDER" if first else phase
+
+
+def snapshot_rows(path: Path) -> Iterator[Tuple[int, float, Optional[float]]]:
+    """(time ms, equity, reported drawdown) per risk snapshot."""
+    with Path(path).open("r", encoding="utf-8-sig", newline="") as fh:
+        reader = csv.DictReader(fh)
+        time_col = _pick(reader.fieldnames or [], SNAPSHOT_TIME_COLUMNS)
+        if time_col is None:
+            return
+        for row in reader:
+            ts, equity = _epoch_ms(row.get(time_col)), _float(row.get("equity"))
+            if ts is not None and equity is not None:
+                yield ts, equity, _float(row.get("drawdown"))
+
+
+# ---- per-stream metrics -----------------------------------------------------
+
+def trade_row(w: RollingWindow) -> Row:
+    mean, std, down = w.mean, w.std, w.downside_deviation
+    return {
+        "trades": w.n, "win_rate": w.positive_rate, "expectancy": mean, "pnl_sum": w.sum, "pnl_std": std,
+        "sharpe_proxy": _ratio(mean, std), "sortino_proxy": _ratio(mean, down),
+        "worst_trade": w.min, "best_trade": w.max,
+    }
+
+
+def order_row(w: RollingWindow) -> Row:
+    requests, filled = w.kinds["REQUEST"], w.kinds["FILLED_ORDER"]
+    row: Row = {
+        "requests": requests, "filled_orders": filled, "fill_rows": filled + w.kinds["FILL"],
+        "rejects": w.kinds["REJECT"], "fill_rate_pct": 100.0 * filled / requests if requests else None,
+        "latency_mean": w.mean,
+    }
+    for q in LATENCY_QUANTILES:
+        row[f"latency_p{round(q * 100, 1):g}"] = w.quantile(q)
+    row["latency_max"] = w.max
+    return row
+
+
+class _RiskWindows:
+    """Equity, equity change and reported drawdown over the same window (each sees every snapshot)."""
+
+    def __init__(self, make: Callable[[], RollingWindow]):
+        self.equity, self.change, self.reported = make(), make(), make()
+        self._last: Optional[float] = None
+
+    @property
+    def label(self) -> str:
+        return self.equity.label
+
+    def __len__(self) -> int:
+        return len(self.equity)
+
+    def push(self, t: int, equity: float, drawdown: Optional[float]) -> None:
+        self.equity.push(t, equity)
+        self.change.push(t, equity - self._last if self._last is not None else None)
+        self.reported.push(t, drawdown)
+        self._last = equity
+
+    def row(self) -> Row:
+        peak = self.equity.max
+        equity = self.equity.last_value
+        return {
+            "snapshots": self.equity.n, "equity": equity, "window_peak": peak,
+            "drawdown_from_peak": equity - peak if equity is not None and peak is not None else None,
+            "equity_change_mean": self.change.mean, "equity_change_std": self.change.std,
+            "reported_drawdown_max": self.reported.max,
+        }
+
+
+# ---- driver ----------------------------------------------------------------
+
+Window = Union[RollingWindow, _RiskWindows]
+
+
+class _Emitter:
+    """Decides when a window writes a row: every ``every`` events, or once per ``every_ms`` of data time."""
+
+    def __init__(self, every: int = 1, every_ms: Optional[int] = None, min_events: int = 1):
+        self.every = max(1, every)
+        self.every_ms = every_ms
+        self.min_events = min_events
+        self._pushed = 0
+        self._next_ms: Optional[int] = None
+
+    def due(self, t: int, count: int) -> bool:
+        self._pushed += 1
+        if self.every_ms:
+            if self._next_ms is not None and t < self._next_ms:
+                return False
+            self._next_ms = (t // self.every_ms + 1) * self.every_ms
+        elif self._pushed % self.every:
+            return False
+        return count >= self.min_events
+
+
+class _Extremes:
+    """Smallest and largest value of every numeric column across emitted rows, with the row time."""
+
+    def __init__(self) -> None:
+        self.low: Dict[str, Tuple[float, str]] = {}
+        self.high: Dict[str, Tuple[float, str]] = {}
+
+    def update(self, row: Row) -> None:
+        stamp = str(row["timestamp"])
+        for key, value in row.items():
+            if key in ("timestamp", "window") or not isinstance(value, (int, float)):
+                continue
+            if key not in self.low or value < self.low[key][0]:
+                self.low[key] = (value, stamp)
+            if key not in self.high or value > self.high[key][0]:
+                self.high[key] = (value, stamp)
+
+    def to_dict(self) -> Dict[str, Dict[str, object]]:
+        return {key: {"min": self.low[key][0], "min_at": self.low[key][1],
+                      "max": self.high[key][0], "max_at": self.high[key][1]} for key in self.low}
+
+
+def roll(events: Iterable[tuple], windows: Sequence[Tuple[Window, _Emitter]],
+         row_of: Callable[[Window], Row], overall: Window) -> Tuple[List[Row], Dict[str, object]]:
+    """Push every event into every window; returns the emitted rows and the per-window summary."""
+    rows: List[Row] = []
+    extremes = {window.label: _Extremes() for window, _ in windows}
+    last_t: Optional[int] = None
+    count = 0
+    for event in events:
+        t = event[0]
+        last_t = t if last_t is None else max(last_t, t)
+        count += 1
+        overall.push(*event)
+        for window, emitter in windows:
+            window.push(*event)
+            if emitter.due(t, len(window)):
+                row: Row = {"timestamp": _iso(last_t), "window": window.label}
+                row.update(row_of(window))
+                rows.append(row)
+                extremes[window.label].update(row)
+    summary: Dict[str, object] = {"events": count, "overall": row_of(overall) if count else {},
+                                  "windows": {label: ext.to_dict() for label, ext in extremes.items()}}
+    return rows, summary
+
+
+def write_rows(path: Path, rows: List[Row]) -> None:
+    if not rows:
+        return
+    with path.open("w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: (f"{v:.10g}" if isinstance(v, float) else ("" if v is None else v)) for k, v in row.items()})
+
+
+def run(out_dir: Path, trades: Optional[Path] = None, orders: Optional[Path] = None, risk: Optional[Path] = None,
+        trade_window: int = 50, order_window: int = 1000, snapshot_window: int = 60, span_minutes: float = 60.0,
+        every: int = 1, every_minutes: float = 1.0, min_trades: int = 10,
+        perf: Optional[PerfRecorder] = None) -> Dict[str, object]:
+    """Roll every stream given and write the outputs; returns the summary."""
+    perf = perf or PerfRecorder("rolling_metrics")
+    span_ms = int(span_minutes * 60000)
+    every_ms = max(1, int(every_minutes * 60000))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    summary: Dict[str, object] = {"span_minutes": span_minutes}
+
+    if trades is not None:
+        with perf.stage("trades") as span:
+            events = trade_events(trades)
+            windows = [(RollingWindow(size=trade_window), _Emitter(every, min_events=min(min_trades, trade_window))),
+                       (RollingWindow(span_ms=span_ms), _Emitter(every, min_events=min_trades))]
+            rows, summary["trades"] = roll(events, windows, trade_row, RollingWindow())
+            write_rows(out_dir / "rolling_trades.csv", rows)
+            span.rows = len(events)
+    if orders is not None:
+        with perf.stage("orders") as span:
+            windows = [(RollingWindow(size=order_window, sketch=True), _Emitter(every_ms=every_ms)),
+                       (RollingWindow(span_ms=span_ms, sketch=True), _Emitter(every_ms=every_ms))]
+            rows, summary["orders"] = roll(order_events(orders), windows, order_row,
+                                           RollingWindow(sketch=True))
+            write_rows(out_dir / "rolling_orders.csv", rows)
+            span.rows = summary["orders"]["events"]  # type: ignore[index]
+    if risk is not None:
+        with perf.stage("risk") as span:
+            windows = [(_RiskWindows(lambda: RollingWindow(size=snapshot_window)), _Emitter(every)),
+                       (_RiskWindows(lambda: RollingWindow(span_ms=span_ms)), _Emitter(every))]
+            rows, summary["risk"] = roll(snapshot_rows(risk), windows, _RiskWindows.row,
+                                         _RiskWindows(RollingWindow))
+            write_rows(out_dir / "rolling_risk.csv", rows)
+            span.rows = summary["risk"]["events"]  # type: ignore[index]
+
+    (out_dir / "rolling_summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Rolling win rate/expectancy/Sharpe, fill rate, latency and drawdown")
+    ap.add_argument("--run-dir", default=None, help="Run directory; picks up the standard file names")
+    ap.add_argument("--trades", default=None, help="closed_trades_fifo_reconstructed.csv (or any closed-trade CSV)")
+    ap.add_argument("--orders", default=None, help="orders.csv")
+    ap.add_argument("--risk", default=None, help="risk_snapshots.csv")
+    ap.add_argument("--trade-window", type=int, default=50, help="Count window in trades")
+    ap.add_argument("--order-window", type=int, default=1000, help="Count window in orders.csv rows")
+    ap.add_argument("--snapshot-window", type=int, default=60, help="Count window in snapshots")
+    ap.add_argument("--span-minutes", type=float, default=60.0, help="Time window length")
+    ap.add_argument("--every", type=int, default=1, help="Trades/risk: write a row every N events")
+    ap.add_argument("--every-minutes", type=float, default=1.0, help="Orders: write a row per N minutes of data")
+    ap.add_argument("--min-trades", type=int, default=10, help="Skip trade windows with fewer trades")
+    ap.add_argument("--out", default=None, help="Output directory (default: <run-dir>/rolling)")
+    add_perf_args(ap)
+    args = ap.parse_args(argv)
+
+    run_dir = Path(args.run_dir) if args.run_dir else None
+
+    def pick(explicit: Optional[str], *names: str) -> Optional[Path]:
+        if explicit:
+            return Path(explicit)
+        for name in names:
+            if run_dir is not None and (run_dir / name).exists():
+                return run_dir / name
+        return None
+
+    trades = pick(args.trades, "closed_trades_fifo_reconstructed.csv", "closed_trades_fifo.csv")
+    orders = pick(args.orders, "orders.csv")
+    risk = pick(args.risk, "risk_snapshots.csv")
+    if trades is None and orders is None and risk is None:
+        ap.error("nothing to roll: give --run-dir or at least one of --trades/--orders/--risk")
+    base = run_dir or next(p for p in (trades, orders, risk) if p is not None).parent
+    out_dir = Path(args.out) if args.out else base / "rolling"
+
+    perf = PerfRecorder("rolling_metrics", args.profile)
+    with perf:
+        summary = run(out_dir, trades, orders, risk, args.trade_window, args.order_window, args.snapshot_window,
+                      args.span_minutes, args.every, args.every_minutes, args.min_trades, perf)
+    perf.write(Path(args.perf_dir) if args.perf_dir else out_dir)
+    print(json.dumps({k: v.get("overall", v) if isinstance(v, dict) else v for k, v in summary.items()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""Persistent run catalog for the artifacts tree.
+
+Indexes ``telemetry_run_*`` and ``smoke_*`` directories into a small SQLite
+database (``<artifacts>/run_catalog.sqlite`` by default) so tools can resolve
+the latest run, a run by id, or a time range without listing and stat-ing the
+whole archive on every invocation.
+
+Each record holds the run path, kind, start/end time, total size, the file
+inventory (name -> bytes), selected ``run_metadata.json`` fields and the point
+values (PVU/PVL) that ``analyzer.py`` would otherwise rediscover by hand.
+
+Refresh is incremental: known runs are skipped unless they were still open
+when last indexed (a file written within ``OPEN_RUN_IDLE_S``, so no end time
+yet) or ``--full`` is given. Only ``refresh`` writes the database; lookups
+(``resolve_latest_run``, ``lookup_point_values``) open it read-only and fall
+back to a directory scan when it is missing or does not cover every run.
+
+Usage:
+  python -m scripts.analyzers.run_catalog refresh --root <logdir>/artifacts [--full]
+  python -m scripts.analyzers.run_catalog latest --root <artifacts> [--kind smoke]
+  python -m scripts.analyzers.run_catalog get --root <artifacts> --id telemetry_run_20251101_120000
+  python -m scripts.analyzers.run_catalog query --root <artifacts> --since 2025-11-01 --until 2025-11-08
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+CATALOG_FILENAME = "run_catalog.sqlite"
+RUN_PREFIXES: Tuple[str, ...] = ("telemetry_run_", "smoke_")
+METADATA_FIELDS: Sequence[str] = (
+    "run_id",
+    "start_time_iso",
+    "host",
+    "git_commit",
+    "mode",
+    "hours",
+    "seconds_per_hour",
+    "data_source",
+    "broker_name",
+    "server",
+    "account_id",
+)
+# Files whose last line carries the latest event timestamp (first column).
+END_TIME_SOURCES: Sequence[str] = ("telemetry.csv", "risk_snapshots.csv", "orders.csv")
+# A run with a file written this recently is still open: no end time, re-indexed on refresh.
+OPEN_RUN_IDLE_S = 15 * 60
+
+_NAME_TS = re.compile(r"(\d{8})[_-]?(\d{6})")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    parent_id TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    mtime REAL,
+    size_bytes INTEGER,
+    files_json TEXT,
+    metadata_json TEXT,
+    pvu REAL,
+    pvl REAL,
+    indexed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_kind_start ON runs(kind, start_time);
+CREATE INDEX IF NOT EXISTS idx_runs_name ON runs(name);
+CREATE INDEX IF NOT EXISTS idx_runs_path ON runs(path);
+"""
+
+
+@dataclass
+class RunRecord:
+    """One catalogued run directory."""
+
+    run_id: str
+    name: str
+    path: str
+    kind: str
+    parent_id: Optional[str] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    mtime: float = 0.0
+    size_bytes: int = 0
+    files: Dict[str, int] = field(default_factory=dict)
+    metadata: Dict[str, object] = field(default_factory=dict)
+    pvu: Optional[float] = None
+    pvl: Optional[float] = None
+    indexed_at: Optional[str] = None
+
+
+def _utc_iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _run_kind(name: str) -> Optional[str]:
+    for prefix in RUN_PREFIXES:
+        if name.startswith(prefix):
+            return prefix.rstrip("_")
+    return None
+
+
+def start_time_from_name(name: str) -> Optional[str]:
+    """Parse ``yyyyMMdd_HHmmss`` embedded in a run directory name."""
+    match = _NAME_TS.search(name)
+    if not match:
+        return None
+    try:
+        parsed = datetime.strptime(match.group(1) + match.group(2), "%Y%m%d%H%M%S")
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _read_json(path: Path) -> Optional[object]:
+    try:
+        with path.open("r", encoding="utf-8-sig") as handle:
+            return json.load(handle)
+    except Exception:
+        return None
+
+
+def _as_float(value: object) -> Optional[float]:
+    try:
+        number = float(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+    return number if number else None
+
+
+def discover_point_values(run_dir: Path, metadata: Optional[object] = None) -> Tuple[Optional[float], Optional[float]]:
+    """Return ``(pvu, pvl)`` from run metadata or small ``*risk*.json`` side files.
+
+    Only JSON side files are parsed: ``risk_snapshots.csv`` can be gigabytes and
+    never holds point values.
+    """
+    md = metadata if metadata is not None else _read_json(run_dir / "run_metadata.json")
+    pvl: Optional[float] = None
+    pvu: Optional[float] = None
+    if isinstance(md, dict):
+        pvl = _as_float(md.get("pointValuePerLot")) or pvl
+        extra = md.get("extra")
+        if isinstance(extra, dict):
+            pvl = _as_float(extra.get("pointValuePerLot")) or pvl
+        snapshot = md.get("config_snapshot")
+        execution = snapshot.get("execution") if isinstance(snapshot, dict) else None
+        if isinstance(execution, dict):
+            pvl = _as_float(execution.get("pointValuePerLot")) or pvl
+            pvu = _as_float(execution.get("pointValuePerUnit")) or pvu
+        pvu = _as_float(md.get("pvu_used")) or _as_float(md.get("point_value_per_unit")) or pvu
+
+    if pvu is None and pvl is None:
+        try:
+            side_files = sorted(p for p in run_dir.glob("*risk*.json") if p.is_file())
+        except OSError:
+            side_files = []
+        for side_file in side_files:
+            data = _read_json(side_file)
+            if not isinstance(data, dict):
+                continue
+            for key, value in data.items():
+                lowered = str(key).lower()
+                if pvl is None and "point" in lowered and "lot" in lowered:
+                    pvl = _as_float(value)
+                if pvu is None and "pvu" in lowered:
+                    pvu = _as_float(value)
+
+    if pvu is None and pvl is not None and isinstance(md, dict):
+        snapshot = md.get("config_snapshot")
+        risk = snapshot.get("risk") if isinstance(snapshot, dict) else None
+        if isinstance(risk, dict):
+            lot_size = _as_float(risk.get("LotSizeDefault") or risk.get("lot_size_default"))
+            if lot_size and lot_size > 0:
+                pvu = pvl / lot_size
+    return pvu, pvl
+
+
+def _last_line_timestamp(path: Path, max_bytes: int = 8192) -> Optional[str]:
+    """Read the first column of the last non-empty line without scanning the file."""
+    try:
+        with path.open("rb") as handle:
+            handle.seek(0, os.SEEK_END)
+            size = handle.tell()
+            if size == 0:
+                return None
+            handle.seek(max(0, size - max_bytes))
+            tail = handle.read().decode("utf-8", errors="replace")
+    except OSError:
+        return None
+    for line in reversed(tail.splitlines()):
+        text = line.strip()
+        if not text:
+            continue
+        first = text.split(",", 1)[0].strip().strip('"')
+        if first and first[:1].isdigit() and "T" in first:
+            return first
+        # orders.csv starts with the phase; the timestamp is the second column
+        parts = text.split(",", 2)
+        if len(parts) > 1 and parts[1][:1].isdigit() and "T" in parts[1]:
+            return parts[1].strip()
+        return None
+    return None
+
+
+def scan_run_dir(path: Path, *, root: Path, parent_id: Optional[str] = None) -> Tuple[RunRecord, List[Path]]:
+    """Build a record for ``path`` and return it with any nested ``smoke_*`` dirs."""
+    files: Dict[str, int] = {}
+    nested: List[Path] = []
+    latest_mtime = 0.0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name.startswith("smoke_"):
+                        nested.append(Path(entry.path))
+                    continue
+                info = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            files[entry.name] = int(info.st_size)
+            latest_mtime = max(latest_mtime, info.st_mtime)
+
+    dir_mtime = path.stat().st_mtime
+    md = _read_json(path / "run_metadata.json") if "run_metadata.json" in files else None
+    metadata: Dict[str, object] = {}
+    if isinstance(md, dict):
+        metadata = {key: md[key] for key in METADATA_FIELDS if key in md}
+    pvu, pvl = discover_point_values(path, md if md is not None else {})
+
+    start_time = metadata.get("start_time_iso") if isinstance(metadata.get("start_time_iso"), str) else None
+    start_time = start_time or start_time_from_name(path.name) or _utc_iso(dir_mtime)
+    end_time: Optional[str] = None
+    for name in END_TIME_SOURCES:
+        if name in files:
+            end_time = _last_line_timestamp(path / name)
+            if end_time:
+                break
+    if end_time is None and latest_mtime:
+        end_time = _utc_iso(latest_mtime)
+    if latest_mtime and time.time() - latest_mtime < OPEN_RUN_IDLE_S:
+        end_time = None
+
+    try:
+        run_id = path.resolve().relative_to(root.resolve()).as_posix()
+    except ValueError:
+        run_id = path.name
+    record = RunRecord(
+        run_id=run_id,
+        name=path.name,
+        path=str(path),
+        kind=_run_kind(path.name) or "run",
+        parent_id=parent_id,
+        start_time=start_time,
+        end_time=end_time,
+        mtime=dir_mtime,
+        size_bytes=sum(files.values()),
+        files=files,
+        metadata=metadata,
+        pvu=pvu,
+        pvl=pvl,
+        indexed_at=_utc_iso(datetime.now(timezone.utc).timestamp()),
+    )
+    return record, nested
+
+
+class RunCatalog:
+    """SQLite-backed index of run directories under one artifacts root."""
+
+    def __init__(self, root: Path, db_path: Optional[Path] = None, *, readonly: bool = False):
+        self.root = Path(root)
+        self.db_path = Path(db_path) if db_path else self.root / CATALOG_FILENAME
+        if readonly:
+            self._conn = sqlite3.connect(self.db_path.resolve().as_uri() + "?mode=ro", uri=True)
+        else:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.row_factory = sqlite3.Row
+        if not readonly:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "RunCatalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- writes -------------------------------------------------------
+    def upsert(self, record: RunRecord) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO runs (run_id, name, path, kind, parent_id, start_time, end_time, mtime,"
+            " size_bytes, files_json, metadata_json, pvu, pvl, indexed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                record.run_id, record.name, record.path, record.kind, record.parent_id,
+                record.start_time, record.end_time, record.mtime, record.size_bytes,
+                json.dumps(record.files, sort_keys=True), json.dumps(record.metadata, sort_keys=True, default=str),
+                record.pvu, record.pvl, record.indexed_at,
+            ),
+        )
+
+    def index_run(self, path: Path, parent_id: Optional[str] = None) -> RunRecord:
+        """(Re)index one run directory and its nested smoke runs."""
+        record, nested = scan_run_dir(Path(path), root=self.root, parent_id=parent_id)
+        self.upsert(record)
+        for child in nested:
+            self.index_run(child, parent_id=record.run_id)
+        self._conn.commit()
+        return record
+
+    def refresh(self, *, full: bool = False) -> Dict[str, int]:
+        """Index new runs; re-index open runs, or everything when ``full``.
+
+        Only one directory listing of the root is needed. Known, closed runs are
+        not stat-ed unless ``full`` is set; open runs (no end time) always are.
+        """
+        stats = {"seen": 0, "indexed": 0, "removed": 0}
+        if not self.root.is_dir():
+            return stats
+        known = self.top_level()
+        seen_paths = set()
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not _run_kind(entry.name):
+                    continue
+                try:
+                    if not entry.is_dir():
+                        continue
+                except OSError:
+                    continue
+                stats["seen"] += 1
+                seen_paths.add(entry.path)
+                row = known.get(entry.path)
+                if full or row is None or not row["end_time"]:
+                    self.index_run(Path(entry.path))
+                    stats["indexed"] += 1
+        if full:
+            for path in set(known) - seen_paths:
+                self._conn.execute("DELETE FROM runs WHERE path = ? OR parent_id IN"
+                                   " (SELECT run_id FROM runs WHERE path = ?)", (path, path))
+                stats["removed"] += 1
+            self._conn.commit()
+        return stats
+
+    # -- reads --------------------------------------------------------
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> RunRecord:
+        return RunRecord(
+            run_id=row["run_id"],
+            name=row["name"],
+            path=row["path"],
+            kind=row["kind"],
+            parent_id=row["parent_id"],
+            start_time=row["start_time"],
+            end_time=row["end_time"],
+            mtime=row["mtime"] or 0.0,
+            size_bytes=row["size_bytes"] or 0,
+            files=json.loads(row["files_json"] or "{}"),
+            metadata=json.loads(row["metadata_json"] or "{}"),
+            pvu=row["pvu"],
+            pvl=row["pvl"],
+            indexed_at=row["indexed_at"],
+        )
+
+    def get(self, run_id: str) -> Optional[RunRecord]:
+        """Look a run up by catalog id, directory name or path."""
+        row = self._conn.execute(
+            "SELECT * FROM runs WHERE run_id = ? OR name = ? OR path = ? ORDER BY start_time DESC LIMIT 1",
+            (run_id, run_id, run_id),
+        ).fetchone()
+        return self._to_record(row) if row else None
+
+    def top_level(self) -> Dict[str, sqlite3.Row]:
+        """Path -> ``(path, kind, end_time, mtime)`` of every run directly under the root."""
+        return {row["path"]: row for row in self._conn.execute(
+            "SELECT path, kind, end_time, mtime FROM runs WHERE parent_id IS NULL")}
+
+    def latest(self, kind: str = "telemetry_run") -> Optional[RunRecord]:
+        """Same rules as ``scan_latest_run``, on the indexed state."""
+        if kind == "smoke":
+            sql = ("SELECT * FROM runs WHERE kind = 'smoke' ORDER BY"
+                   " parent_id IN (SELECT run_id FROM runs WHERE kind = 'telemetry_run') DESC, path DESC LIMIT 1")
+            row = self._conn.execute(sql).fetchone()
+        else:
+            row = self._conn.execute(
+                "SELECT * FROM runs WHERE kind = ? AND parent_id IS NULL ORDER BY mtime DESC LIMIT 1", (kind,)
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def query(self, *, kind: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None) -> Iterator[RunRecord]:
+        """Yield runs ordered by start time, optionally filtered by kind and range."""
+        clauses: List[str] = []
+        params: List[object] = []
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if since:
+            clauses.append("start_time >= ?")
+            params.append(since)
+        if until:
+            clauses.append("start_time < ?")
+            params.append(until)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        for row in self._conn.execute(f"SELECT * FROM runs{where} ORDER BY start_time, name", params):
+            yield self._to_record(row)
+
+
+def _run_dirs(root: Path, prefix: str) -> List[str]:
+    try:
+        with os.scandir(root) as entries:
+            return [e.path for e in entries if e.name.startswith(prefix) and e.is_dir()]
+    except OSError:
+        return []
+
+
+def scan_latest_run(root: Path, kind: str = "telemetry_run") -> Optional[Path]:
+    """Newest run of ``kind`` by listing ``root``: the catalog-free baseline.
+
+    Telemetry runs: newest directory mtime. Smoke runs: the last path among
+    ``smoke_*`` dirs nested in telemetry runs, else among top-level ``smoke_*``.
+    """
+    root = Path(root)
+    if kind == "smoke":
+        nested = [p for run in _run_dirs(root, "telemetry_run_") for p in _run_dirs(Path(run), "smoke_")]
+        found = nested or _run_dirs(root, "smoke_")
+        return Path(max(found)) if found else None
+    runs = _run_dirs(root, kind + "_")
+    return Path(max(runs, key=os.path.getmtime)) if runs else None
+
+
+def _catalog_latest(root: Path, kind: str) -> Optional[Path]:
+    """Answer from a read-only catalog, or ``None`` when it is missing or stale."""
+    db_path = root / CATALOG_FILENAME
+    if not db_path.exists():
+        return None
+    listing = [e for prefix in RUN_PREFIXES for e in _run_dirs(root, prefix)]
+    try:
+        with RunCatalog(root, db_path, readonly=True) as catalog:
+            known = catalog.top_level()
+            if any(path not in known for path in listing):
+                return None  # runs created since the last refresh
+            open_runs = [path for path in listing if not known[path]["end_time"]]
+            if kind == "smoke":
+                # Open runs may have grown smoke_* dirs the catalog has not seen
+                record = None if open_runs else catalog.latest(kind)
+                return Path(record.path) if record else None
+    except sqlite3.Error:
+        return None
+    # Open runs are re-stat-ed: their directory mtime may have moved since indexing
+    candidates = [(os.path.getmtime(path) if path in open_runs else known[path]["mtime"] or 0.0, path)
+                  for path in listing if known[path]["kind"] == kind]
+    return Path(max(candidates)[1]) if candidates else None
+
+
+def resolve_latest_run(root: Path, kind: str = "telemetry_run") -> Optional[Path]:
+    """Return the newest run of ``kind`` under ``root``; never writes the catalog."""
+    root = Path(root)
+    return _catalog_latest(root, kind) or scan_latest_run(root, kind)
+
+
+def lookup_point_values(run_dir: Path) -> Optional[Tuple[Optional[float], Optional[float]]]:
+    """Return catalogued ``(pvu, pvl)`` for ``run_dir`` if a catalog sits next to it."""
+    run_dir = Path(run_dir)
+    db_path = run_dir.parent / CATALOG_FILENAME
+    if not db_path.exists():
+        return None
+    try:
+        with RunCatalog(run_dir.parent, db_path, readonly=True) as catalog:
+            record = catalog.get(str(run_dir)) or catalog.get(run_dir.name)
+    except sqlite3.Error:
+        return None
+    if record is None:
+        return None
+    return record.pvu, record.pvl
+
+
+def _print_records(records: Sequence[RunRecord], full: bool) -> None:
+    out = []
+    for record in records:
+        data = asdict(record)
+        if not full:
+            data.pop("files", None)
+        out.append(data)
+    print(json.dumps(out if len(out) != 1 else out[0], indent=2, default=str))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Index and query run artifacts")
+    parser.add_argument("command", choices=("refresh", "latest", "get", "query"))
+    parser.add_argument("--root", required=True, help="Artifacts directory holding telemetry_run_* dirs")
+    parser.add_argument("--db", default=None, help=f"Catalog path (default: <root>/{CATALOG_FILENAME})")
+    parser.add_argument("--full", action="store_true", help="Re-index every run and drop vanished ones")
+    parser.add_argument("--kind", default=None, help="telemetry_run or smoke")
+    parser.add_argument("--id", dest="run_id", default=None, help="Run id, directory name or path")
+    parser.add_argument("--since", default=None, help="ISO start time lower bound (inclusive)")
+    parser.add_argument("--until", default=None, help="ISO start time upper bound (exclusive)")
+    parser.add_argument("--files", action="store_true", help="Include file inventory in output")
+    args = parser.parse_args(argv)
+
+    with RunCatalog(Path(args.root), Path(args.db) if args.db else None) as catalog:
+        if args.command == "refresh":
+            print(json.dumps(catalog.refresh(full=args.full), indent=2))
+            return 0
+        catalog.refresh()
+        if args.command == "latest":
+            record = catalog.latest(args.kind or "telemetry_run")
+            records = [record] if record else []
+        elif args.command == "get":
+            if not args.run_id:
+                parser.error("get requires --id")
+            record = catalog.get(args.run_id)
+            records = [record] if record else []
+        else:
+            records = list(catalog.query(kind=args.kind, since=args.since, until=args.until))
+    if not records:
+        print("null")
+        return 1
+    _print_records(records, args.files)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
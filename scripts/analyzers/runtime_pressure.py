@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Correlate GC / memory pressure from telemetry.csv with order latency and fills.
+
+TelemetryCollector writes one row per minute with cumulative GC collection
+counts (``gen0``/``gen1``/``gen2``), ``memoryMB`` and per-minute order counters.
+This analyzer turns the cumulative counters into per-minute deltas. It then
+assigns each orders.csv row to the telemetry minute that reports it, using a
+vectorized ``merge_asof`` (forward, within one interval). Per-minute latency
+and slippage are aggregated there.
+
+Reported:
+  - Pearson/Spearman correlation between pressure drivers (gen deltas, memory
+    growth) and outcomes (latency, |slippage|, fill rate, ticks/sec)
+  - the lag (in minutes) with the strongest driver -> outcome correlation
+  - minutes flagged ``runtime_bound``: GC/memory pressure coinciding with
+    latency, fill-rate or tick-rate degradation
+  - a throughput summary for bound vs unbound minutes
+
+Usage:
+  python -m scripts.analyzers.runtime_pressure --telemetry telemetry.csv --orders orders.csv --out reports/runtime
+
+Outputs (written to --out):
+  - runtime_pressure_minutes.csv   one row per telemetry minute
+  - runtime_pressure_report.json   correlations, lags, flags, throughput
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+from .lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+GC_COLUMNS: Sequence[str] = ("gen0", "gen1", "gen2")
+DRIVERS: Sequence[str] = ("gen0_delta", "gen1_delta", "gen2_delta", "memory_delta_mb", "memoryMB")
+OUTCOMES: Sequence[str] = ("latency_ms_mean", "latency_ms_p95", "slippage_abs_mean", "fill_rate", "ticksPerSec")
+ORDER_COLUMNS: Sequence[str] = (
+    "phase", "timestamp_iso", "latency_ms", "slippage_pips", "slippage", "price_requested", "price_filled", "side",
+)
+
+MEMORY_GROWTH_MB = float(os.getenv("RUNTIME_MEMORY_GROWTH_MB", "32"))
+LATENCY_DEGRADE_FACTOR = float(os.getenv("RUNTIME_LATENCY_FACTOR", "1.5"))
+FILL_RATE_DROP = float(os.getenv("RUNTIME_FILL_RATE_DROP", "0.10"))
+TPS_DEGRADE_FACTOR = float(os.getenv("RUNTIME_TPS_FACTOR", "0.5"))
+
+
+def _counter_delta(series: pd.Series) -> pd.Series:
+    """Per-interval delta of a cumulative counter; a drop (process restart) restarts from the raw value."""
+    delta = series.diff()
+    reset = delta < 0
+    delta = delta.where(~reset, series)
+    return delta.fillna(0.0)
+
+
+def load_telemetry(path: str) -> pd.DataFrame:
+    tel = pd.read_csv(path)
+    if "timestamp_iso" not in tel.columns:
+        raise ValueError("telemetry.csv missing column: timestamp_iso")
+    tel["ts"] = pd.to_datetime(tel["timestamp_iso"], utc=True, errors="coerce")
+    tel = tel.dropna(subset=["ts"]).sort_values("ts").reset_index(drop=True)
+    for col in tel.columns:
+        if col not in ("timestamp_iso", "ts"):
+            tel[col] = pd.to_numeric(tel[col], errors="coerce")
+    for col in GC_COLUMNS:
+        if col in tel.columns:
+            tel[f"{col}_delta"] = _counter_delta(tel[col])
+    if "memoryMB" in tel.columns:
+        tel["memory_delta_mb"] = tel["memoryMB"].diff().fillna(0.0)
+    if {"ordersRequestedLastMinute", "ordersFilledLastMinute"}.issubset(tel.columns):
+        requested = tel["ordersRequestedLastMinute"].where(tel["ordersRequestedLastMinute"] > 0)
+        tel["fill_rate"] = tel["ordersFilledLastMinute"] / requested
+    return tel
+
+
+def load_orders(path: str) -> pd.DataFrame:
+    orders = pd.read_csv(path, usecols=lambda c: c in ORDER_COLUMNS)
+    if "timestamp_iso" not in orders.columns:
+        raise ValueError("orders.csv missing column: timestamp_iso")
+    orders["ts"] = pd.to_datetime(orders["timestamp_iso"], utc=True, errors="coerce")
+    orders = orders.dropna(subset=["ts"])
+    if "phase" in orders.columns:
+        orders = orders[orders["phase"].astype(str).str.upper() == "FILL"]
+    orders["latency_ms"] = pd.to_numeric(orders["latency_ms"], errors="coerce") if "latency_ms" in orders.columns else np.nan
+    # Per row: pips (comparable across symbols) first, then the price-unit column, then the prices
+    slip = pd.to_numeric(orders["slippage_pips"], errors="coerce") if "slippage_pips" in orders.columns else None
+    if "slippage" in orders.columns:
+        price_units = pd.to_numeric(orders["slippage"], errors="coerce")
+        slip = price_units if slip is None else slip.fillna(price_units)
+    if {"price_requested", "price_filled"}.issubset(orders.columns):
+        derived = (pd.to_numeric(orders["price_filled"], errors="coerce")
+                   - pd.to_numeric(orders["price_requested"], errors="coerce"))
+        slip = derived if slip is None else slip.fillna(derived)
+    orders["slippage_abs"] = slip.abs() if slip is not None else np.nan
+    return orders.sort_values("ts").reset_index(drop=True)
+
+
+def per_minute(tel: pd.DataFrame, orders: pd.DataFrame) -> pd.DataFrame:
+    """Attach per-minute order latency / slippage aggregates to each telemetry row."""
+    interval = tel["ts"].diff().median() if len(tel) > 1 else pd.Timedelta(minutes=1)
+    if pd.isna(interval) or interval <= pd.Timedelta(0):
+        interval = pd.Timedelta(minutes=1)
+    frame = tel.copy()
+    if orders.empty:
+        for col in ("fills", "latency_ms_mean", "latency_ms_p95", "slippage_abs_mean"):
+            frame[col] = np.nan
+        return frame
+    # Each telemetry row reports the interval ending at its timestamp
+    joined = pd.merge_asof(
+        orders[["ts", "latency_ms", "slippage_abs"]],
+        tel[["ts"]].rename(columns={"ts": "minute"}),
+        left_on="ts", right_on="minute", direction="forward", tolerance=interval,
+    ).dropna(subset=["minute"])
+    grouped = joined.groupby("minute")
+    agg = pd.DataFrame({
+        "fills": grouped.size(),
+        "latency_ms_mean": grouped["latency_ms"].mean(),
+        "latency_ms_p95": grouped["latency_ms"].quantile(0.95),
+        "slippage_abs_mean": grouped["slippage_abs"].mean(),
+    })
+    return frame.merge(agg, left_on="ts", right_index=True, how="left")
+
+
+def _corr(x: pd.Series, y: pd.Series, method: str) -> Optional[float]:
+    pair = pd.concat([x, y], axis=1).dropna()
+    if len(pair) < 3 or pair.iloc[:, 0].nunique() < 2 or pair.iloc[:, 1].nunique() < 2:
+        return None
+    if method == "spearman":
+        # Pearson on ranks; pandas' own spearman path needs scipy
+        pair = pair.rank()
+    value = pair.iloc[:, 0].corr(pair.iloc[:, 1])
+    return None if pd.isna(value) else round(float(value), 4)
+
+
+def correlations(frame: pd.DataFrame, max_lag: int) -> List[Dict[str, object]]:
+    """Driver/outcome correlations at lag 0 plus the strongest lag in 0..max_lag minutes."""
+    results: List[Dict[str, object]] = []
+    for driver in DRIVERS:
+        if driver not in frame.columns:
+            continue
+        for outcome in OUTCOMES:
+            if outcome not in frame.columns:
+                continue
+            pearson = _corr(frame[driver], frame[outcome], "pearson")
+            spearman = _corr(frame[driver], frame[outcome], "spearman")
+            best_lag, best_r = None, None
+            for lag in range(0, max_lag + 1):
+                r = _corr(frame[driver], frame[outcome].shift(-lag), "pearson")
+                if r is not None and (best_r is None or abs(r) > abs(best_r)):
+                    best_lag, best_r = lag, r
+            results.append({
+                "driver": driver, "outcome": outcome, "pearson": pearson, "spearman": spearman,
+                "best_lag_min": best_lag, "best_lag_pearson": best_r,
+            })
+    return results
+
+
+def flag_runtime_bound(frame: pd.DataFrame) -> pd.DataFrame:
+    """Mark minutes where GC/memory pressure coincides with a degraded outcome."""
+    frame = frame.copy()
+    pressure = pd.Series(False, index=frame.index)
+    if "gen2_delta" in frame.columns:
+        pressure |= frame["gen2_delta"] > 0
+    if "memory_delta_mb" in frame.columns:
+        pressure |= frame["memory_delta_mb"] >= MEMORY_GROWTH_MB
+    degraded = pd.Series(False, index=frame.index)
+    if "latency_ms_mean" in frame.columns and frame["latency_ms_mean"].notna().any():
+        degraded |= frame["latency_ms_mean"] > LATENCY_DEGRADE_FACTOR * frame["latency_ms_mean"].median()
+    if "fill_rate" in frame.columns and frame["fill_rate"].notna().any():
+        degraded |= frame["fill_rate"] < frame["fill_rate"].median() - FILL_RATE_DROP
+    if "ticksPerSec" in frame.columns and frame["ticksPerSec"].notna().any():
+        degraded |= frame["ticksPerSec"] < TPS_DEGRADE_FACTOR * frame["ticksPerSec"].median()
+    frame["gc_pressure"] = pressure
+    frame["degraded"] = degraded
+    frame["runtime_bound"] = pressure & degraded
+    return frame
+
+
+def _describe(series: Optional[pd.Series]) -> Dict[str, Optional[float]]:
+    if series is None:
+        return {"median": None, "p95": None, "max": None}
+    s = series.dropna()
+    if s.empty:
+        return {"median": None, "p95": None, "max": None}
+    return {"median": float(s.median()), "p95": float(s.quantile(0.95)), "max": float(s.max())}
+
+
+def throughput(frame: pd.DataFrame) -> Dict[str, object]:
+    bound = frame["runtime_bound"]
+    out: Dict[str, object] = {"minutes": int(len(frame)), "runtime_bound_minutes": int(bound.sum())}
+    for col in ("ticksPerSec", "ordersRequestedLastMinute", "fills"):
+        if col in frame.columns:
+            out[col] = {"unbound": _describe(frame.loc[~bound, col]), "bound": _describe(frame.loc[bound, col])}
+    if bound.any() and "ordersRequestedLastMinute" in frame.columns:
+        # Lowest load at which the bot was already runtime-bound: an upper bound on sustainable throughput
+        out["orders_per_min_ceiling"] = float(frame.loc[bound, "ordersRequestedLastMinute"].min())
+    return out
+
+
+def analyze(telemetry_csv: str, orders_csv: Optional[str]) -> pd.DataFrame:
+    tel = load_telemetry(telemetry_csv)
+    orders = load_orders(orders_csv) if orders_csv and os.path.exists(orders_csv) else pd.DataFrame(columns=["ts"])
+    return flag_runtime_bound(per_minute(tel, orders))
+
+
+def main(telemetry_csv: str, orders_csv: Optional[str], out_dir: str, max_lag: int = 5) -> Dict[str, object]:
+    frame = analyze(telemetry_csv, orders_csv)
+    os.makedirs(out_dir, exist_ok=True)
+    frame.drop(columns=["ts"]).to_csv(os.path.join(out_dir, "runtime_pressure_minutes.csv"), index=False)
+    report = {
+        "telemetry": telemetry_csv,
+        "orders": orders_csv,
+        "gc_columns_present": [c for c in GC_COLUMNS if c in frame.columns],
+        "correlations": correlations(frame, max_lag),
+        "throughput": throughput(frame),
+        "runtime_bound_minutes": frame.loc[frame["runtime_bound"], "timestamp_iso"].astype(str).tolist(),
+        "thresholds": {
+            "memory_growth_mb": MEMORY_GROWTH_MB,
+            "latency_factor": LATENCY_DEGRADE_FACTOR,
+            "fill_rate_drop": FILL_RATE_DROP,
+            "tps_factor": TPS_DEGRADE_FACTOR,
+        },
+    }
+    with open(os.path.join(out_dir, "runtime_pressure_report.json"), "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GC/runtime pressure vs latency/fill correlation report")
+    parser.add_argument("--telemetry", required=True)
+    parser.add_argument("--orders", default=None)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--max-lag", type=int, default=5, help="Max lag in minutes to scan")
+    args = parser.parse_args()
+    main(args.telemetry, args.orders, args.out, args.max_lag)
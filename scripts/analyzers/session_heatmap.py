@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""Hour-of-week x metric-bin histograms per symbol, mergeable across runs, rendered as heatmaps.
+
+fillrate_hourly.csv, fill_breakdown_by_hour.csv and analysis_per_hour.csv
+are per run, one-dimensional, and recomputed from scratch. Here each run
+adds, in one vectorized pass over orders.csv and the reconstructed trades,
+into fixed arrays per symbol:
+  - latency_ms, slippage_pips and per-trade pnl: counts over hour-of-week
+    (168, Monday 00 UTC = 0) x fixed metric bins, plus per-hour sums
+  - requests, fills (first FILL per order id, as postrun_report counts them),
+    trades and wins: counts per hour-of-week
+
+The bins never change, so accumulators merge by plain addition. A store of
+many weeks is a few hundred KB of .npz, and a multi-week view is a merge,
+not a rescan. Quantiles are read from the histograms by interpolating
+within the bin. Means and sums are exact.
+
+Usage:
+  python -m scripts.analyzers.session_heatmap add --store heatmaps.npz --run-dir runs/run_A --run-dir runs/run_B
+  python -m scripts.analyzers.session_heatmap merge a.npz b.npz --out all.npz
+  python -m scripts.analyzers.session_heatmap render --store all.npz --out reports/heatmaps [--symbol EURUSD]
+
+Outputs:
+  add/merge: the .npz store (a run already in the store is skipped)
+  render:    heatmap_<view>[_<symbol>].csv, a weekday x hour (7 x 24) grid per view, and
+             heatmaps[_<symbol>].png when matplotlib is available
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from .kpi_cube import ORDER_ID_COLUMNS, PNL_COLUMNS
+    from .lazy_imports import lazy_import, use_agg_backend
+    from .perf import PerfRecorder, add_perf_args
+except ImportError:  # run as scripts/analyzers/session_heatmap.py
+    from kpi_cube import ORDER_ID_COLUMNS, PNL_COLUMNS
+    from lazy_imports import lazy_import, use_agg_backend
+    from perf import PerfRecorder, add_perf_args
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+plt = lazy_import("matplotlib.pyplot", optional=True, before_load=use_agg_backend)  # PNGs optional
+
+STORE_FORMAT = 1
+HOURS_OF_WEEK = 168
+WEEKDAYS: Sequence[str] = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+RECONSTRUCTED = "closed_trades_fifo_reconstructed.csv"
+# Left bin edges; the last bin is open-ended. Values below the first edge are dropped.
+METRIC_EDGES: Dict[str, Tuple[float, ...]] = {
+    "latency_ms": (0, 1, 2, 5, 10, 20, 50, 100, 150, 250, 500, 1000, 2500, 5000),
+    "slippage_pips": (float("-inf"), -5, -2, -1, -0.5, -0.2, -0.05, 0.05, 0.2, 0.5, 1, 2, 5),
+    "pnl": (float("-inf"), -500, -200, -100, -50, -20, -5, 0, 5, 20, 50, 100, 200, 500),
+}
+COUNTERS: Sequence[str] = ("requests", "fills", "trades", "wins")
+# (view name, source, statistic) rendered by ``render``
+VIEWS: Sequence[Tuple[str, str, str]] = (
+    ("fill_rate", "fills", "rate"),
+    ("latency_ms_p50", "latency_ms", "p50"),
+    ("latency_ms_p95", "latency_ms", "p95"),
+    ("slippage_pips_mean", "slippage_pips", "mean"),
+    ("slippage_pips_p95", "slippage_pips", "p95"),
+    ("pnl_sum", "pnl", "sum"),
+    ("win_rate", "wins", "rate"),
+    ("trades", "trades", "count"),
+)
+RATE_DENOMINATORS = {"fills": "requests", "wins": "trades"}
+
+
+def hour_of_week(epoch_ms: "np.ndarray") -> "np.ndarray":
+    """Hour of the UTC week (Monday 00:00 = 0) of epoch milliseconds; 1970-01-01 was a Thursday."""
+    hours = epoch_ms // 3_600_000
+    return ((hours // 24 + 3) % 7) * 24 + hours % 24
+
+
+def _epoch_ms(frame: "pd.DataFrame", iso_columns: Sequence[str], epoch_column: Optional[str] = None) -> "np.ndarray":
+    """Epoch ms per row from ``epoch_column`` where numeric, else the first ISO column that parses; -1 if none."""
+    out = np.full(len(frame), -1, dtype=np.int64)
+    if epoch_column and epoch_column in frame:
+        epoch = pd.to_numeric(frame[epoch_column], errors="coerce").to_numpy(dtype=np.float64)
+        ok = np.isfinite(epoch)
+        out[ok] = epoch[ok].astype(np.int64)
+    for column in iso_columns:
+        missing = out < 0
+        if not missing.any():
+            break
+        if column in frame:
+            stamps = pd.to_datetime(frame[column][missing], utc=True, format="ISO8601", errors="coerce")
+            out[missing] = stamps.dt.as_unit("ms").to_numpy(dtype=np.int64, na_value=-1)
+    return out
+
+
+def _first(columns: Iterable[str], header: Sequence[str]) -> Optional[str]:
+    return next((c for c in columns if c in header), None)
+
+
+class SessionHeatmap:
+    """Per-symbol hour-of-week histograms and counters; every array merges by addition."""
+
+    def __init__(self) -> None:
+        self.symbols: List[str] = []
+        self.hist = {m: np.zeros((0, HOURS_OF_WEEK, len(e)), dtype=np.int64) for m, e in METRIC_EDGES.items()}
+        self.sums = {m: np.zeros((0, HOURS_OF_WEEK), dtype=np.float64) for m in METRIC_EDGES}
+        self.counts = {c: np.zeros((0, HOURS_OF_WEEK), dtype=np.int64) for c in COUNTERS}
+        self.runs: List[str] = []
+
+    # -- building ----------------------------------------------------------------
+
+    def _codes(self, symbols: "np.ndarray") -> "np.ndarray":
+        """Store index per symbol name, growing every array for new symbols."""
+        names = pd.Series(symbols, dtype="string").fillna("").str.strip().str.upper().to_numpy(dtype=object)
+        known = {s: i for i, s in enumerate(self.symbols)}
+        new = [s for s in dict.fromkeys(names.tolist()) if s not in known]
+        if new:
+            self._grow(len(self.symbols) + len(new))
+            for s in new:
+                known[s] = len(self.symbols)
+                self.symbols.append(s)
+        return np.fromiter((known[s] for s in names), dtype=np.int64, count=len(names))
+
+    def _grow(self, n: int) -> None:
+        def pad(arr):
+            return np.concatenate([arr, np.zeros((n - arr.shape[0],) + arr.shape[1:], dtype=arr.dtype)])
+        self.hist = {k: pad(v) for k, v in self.hist.items()}
+        self.sums = {k: pad(v) for k, v in self.sums.items()}
+        self.counts = {k: pad(v) for k, v in self.counts.items()}
+
+    def _count(self, name: str, codes: "np.ndarray", how: "np.ndarray") -> None:
+        flat = np.bincount(codes * HOURS_OF_WEEK + how, minlength=len(self.symbols) * HOURS_OF_WEEK)
+        self.counts[name] += flat.reshape(len(self.symbols), HOURS_OF_WEEK)
+
+    def _observe(self, metric: str, codes: "np.ndarray", how: "np.ndarray", values: "np.ndarray") -> None:
+        edges = np.asarray(METRIC_EDGES[metric], dtype=np.float64)
+        keep = np.isfinite(values) & (values >= edges[0])
+        codes, how, values = codes[keep], how[keep], values[keep]
+        bins = np.searchsorted(edges, values, side="right") - 1
+        cell = codes * HOURS_OF_WEEK + how
+        size = len(self.symbols) * HOURS_OF_WEEK
+        self.hist[metric] += np.bincount(cell * len(edges) + bins, minlength=size * len(edges)).reshape(
+            len(self.symbols), HOURS_OF_WEEK, len(edges))
+        self.sums[metric] += np.bincount(cell, weights=values, minlength=size).reshape(len(self.symbols), HOURS_OF_WEEK)
+
+    def add_orders(self, frame: "pd.DataFrame") -> int:
+        """REQUEST/FILL counts, fill latency and slippage from an orders.csv frame; returns rows used."""
+        header = list(frame.columns)
+        id_col = _first(ORDER_ID_COLUMNS, header)
+        phase = frame["phase"].astype("string").str.upper().fillna("").to_numpy(dtype=object)
+        epoch = _epoch_ms(frame, ("timestamp_iso", "timestamp"), "epoch_ms")
+        symbol = (frame["symbol"] if "symbol" in frame else pd.Series("", index=frame.index)).astype("string").fillna("")
+        if id_col is not None:
+            # Rows that do not repeat the symbol take it from another row of the same order
+            ids = frame[id_col].astype("string").fillna("")
+            known = symbol.str.strip() != ""
+            by_id = pd.Series(symbol[known].to_numpy(), index=ids[known].to_numpy())
+            by_id = by_id[~by_id.index.duplicated()]
+            symbol = symbol.where(known, ids.map(by_id)).fillna("")
+        valid = epoch >= 0
+        request = valid & (phase == "REQUEST")
+        fill = valid & (phase == "FILL")
+        codes = self._codes(symbol.to_numpy(dtype=object))
+        how = hour_of_week(np.where(valid, epoch, 0))
+
+        self._count("requests", codes[request], how[request])
+        first_fill = fill.copy()
+        if id_col is not None:
+            fill_rows = np.flatnonzero(fill)
+            first_fill[fill_rows[pd.Series(ids.to_numpy()[fill_rows]).duplicated().to_numpy()]] = False
+        self._count("fills", codes[first_fill], how[first_fill])
+        for metric in ("latency_ms", "slippage_pips"):
+            if metric in frame:
+                values = pd.to_numeric(frame[metric], errors="coerce").to_numpy(dtype=np.float64)
+                self._observe(metric, codes[fill], how[fill], values[fill])
+        return int(request.sum() + fill.sum())
+
+    def add_trades(self, frame: "pd.DataFrame") -> int:
+        """Closed-trade counts, wins and P&L bins by close hour; returns trades used."""
+        pnl_col = _first(PNL_COLUMNS, list(frame.columns))
+        if pnl_col is None or "symbol" not in frame:
+            return 0
+        epoch = _epoch_ms(frame, ("close_time", "timestamp"))
+        pnl = pd.to_numeric(frame[pnl_col], errors="coerce").to_numpy(dtype=np.float64)
+        keep = (epoch >= 0) & np.isfinite(pnl)
+        codes = self._codes(frame["symbol"].to_numpy(dtype=object))[keep]
+        how, pnl = hour_of_week(epoch[keep]), pnl[keep]
+        self._count("trades", codes, how)
+        self._count("wins", codes[pnl > 0], how[pnl > 0])
+        self._observe("pnl", codes, how, pnl)
+        return int(keep.sum())
+
+    def add_run(self, run_dir: Path, run_id: Optional[str] = None) -> bool:
+        """Add a run directory once; False when ``run_id`` (default: resolved path) is already in."""
+        run_dir = Path(run_dir)
+        run_id = run_id or run_dir.resolve().as_posix()
+        if run_id in self.runs:
+            return False
+        orders = run_dir / "orders.csv"
+        if orders.exists():
+            header = list(pd.read_csv(orders, nrows=0).columns)
+            wanted = {"phase", "timestamp_iso", "timestamp", "epoch_ms", "symbol", "latency_ms", "slippage_pips",
+                      *ORDER_ID_COLUMNS}
+            self.add_orders(pd.read_csv(orders, usecols=[c for c in header if c in wanted], dtype=str,
+                                        on_bad_lines="skip"))
+        trades = run_dir / RECONSTRUCTED
+        if trades.exists():
+            self.add_trades(pd.read_csv(trades, dtype=str, on_bad_lines="skip"))
+        self.runs.append(run_id)
+        return True
+
+    def merge(self, other: "SessionHeatmap") -> "SessionHeatmap":
+        """Add ``other`` into this accumulator; its runs already present here are not double counted."""
+        overlap = set(self.runs) & set(other.runs)
+        if overlap:
+            raise ValueError(f"runs already merged: {', '.join(sorted(overlap))}")
+        codes = self._codes(np.array(other.symbols, dtype=object))
+        for name, arr in other.hist.items():
+            np.add.at(self.hist[name], codes, arr)
+        for name, arr in other.sums.items():
+            np.add.at(self.sums[name], codes, arr)
+        for name, arr in other.counts.items():
+            np.add.at(self.counts[name], codes, arr)
+        self.runs.extend(other.runs)
+        return self
+
+    # -- persistence ----------------------------------------------------------------
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"format": STORE_FORMAT, "symbols": self.symbols, "runs": self.runs,
+                "edges": {m: [float(e) for e in edges] for m, edges in METRIC_EDGES.items()}}
+        arrays = {f"hist/{k}": v for k, v in self.hist.items()}
+        arrays.update({f"sum/{k}": v for k, v in self.sums.items()})
+        arrays.update({f"count/{k}": v for k, v in self.counts.items()})
+        buf = io.BytesIO()
+        np.savez_compressed(buf, meta=np.array(json.dumps(meta)), **arrays)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(buf.getvalue())
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "SessionHeatmap":
+        with np.load(Path(path), allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("format") != STORE_FORMAT:
+                raise ValueError(f"{path}: unsupported heatmap store format {meta.get('format')!r}")
+            stored = {m: tuple(e) for m, e in meta["edges"].items()}
+            if stored != {m: tuple(float(x) for x in e) for m, e in METRIC_EDGES.items()}:
+                raise ValueError(f"{path}: built with different metric bins")
+            heat = cls()
+            heat.symbols, heat.runs = list(meta["symbols"]), list(meta["runs"])
+            heat.hist = {m: data[f"hist/{m}"] for m in METRIC_EDGES}
+            heat.sums = {m: data[f"sum/{m}"] for m in METRIC_EDGES}
+            heat.counts = {c: data[f"count/{c}"] for c in COUNTERS}
+        return heat
+
+    # -- views ----------------------------------------------------------------------
+
+    def _select(self, arr: "np.ndarray", symbol: Optional[str]) -> "np.ndarray":
+        if symbol is None:
+            return arr.sum(axis=0)
+        key = symbol.strip().upper()
+        if key not in self.symbols:
+            raise ValueError(f"unknown symbol {symbol!r} (have {', '.join(self.symbols)})")
+        return arr[self.symbols.index(key)]
+
+    def grid(self, source: str, stat: str, symbol: Optional[str] = None) -> "np.ndarray":
+        """7 x 24 (weekday x UTC hour) grid of ``stat`` over ``source``; NaN where there is no data."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if source in COUNTERS:
+                counts = self._select(self.counts[source], symbol).astype(np.float64)
+                if stat == "rate":
+                    denom = self._select(self.counts[RATE_DENOMINATORS[source]], symbol)
+                    values = np.where(denom > 0, counts / denom, np.nan)
+                else:
+                    values = counts
+            else:
+                hist = self._select(self.hist[source], symbol)
+                n = hist.sum(axis=1)
+                total = self._select(self.sums[source], symbol)
+                if stat == "count":
+                    values = n.astype(np.float64)
+                elif stat == "sum":
+                    values = np.where(n > 0, total, np.nan)
+                elif stat == "mean":
+                    values = np.where(n > 0, total / n, np.nan)
+                elif stat.startswith("p"):
+                    values = hist_quantile(hist, np.asarray(METRIC_EDGES[source], dtype=np.float64),
+                                           float(stat[1:]) / 100.0)
+                else:
+                    raise ValueError(f"unknown statistic {stat!r}")
+        return values.reshape(7, 24)
+
+
+def hist_quantile(hist: "np.ndarray", edges: "np.ndarray", q: float) -> "np.ndarray":
+    """Quantile per row of ``hist`` (rows x bins), interpolated within the bin; open-ended bins give their finite edge."""
+    n = hist.sum(axis=1)
+    cum = np.cumsum(hist, axis=1)
+    target = q * n
+    idx = np.minimum((cum < target[:, None]).sum(axis=1), hist.shape[1] - 1)
+    rows = np.arange(hist.shape[0])
+    before = np.where(idx > 0, cum[rows, np.maximum(idx - 1, 0)], 0)
+    in_bin = hist[rows, idx]
+    lo = edges[idx]
+    hi = np.r_[edges[1:], np.inf][idx]
+    frac = np.where(in_bin > 0, (target - before) / np.maximum(in_bin, 1), 0.0)
+    value = np.where(np.isfinite(lo) & np.isfinite(hi), lo + frac * (hi - lo), np.where(np.isfinite(lo), lo, hi))
+    return np.where(n > 0, value, np.nan)
+
+
+def render(heat: SessionHeatmap, out_dir: Path, symbol: Optional[str] = None) -> List[Path]:
+    """Write one weekday x hour CSV per view (and a PNG panel when matplotlib is available)."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    suffix = f"_{symbol.strip().upper()}" if symbol else ""
+    grids = {name: heat.grid(source, stat, symbol) for name, source, stat in VIEWS}
+    written = []
+    for name, grid in grids.items():
+        path = out_dir / f"heatmap_{name}{suffix}.csv"
+        frame = pd.DataFrame(grid, index=pd.Index(WEEKDAYS, name="weekday"), columns=[f"{h:02d}" for h in range(24)])
+        frame.to_csv(path, float_format="%.6g")
+        written.append(path)
+    if plt is not None:
+        fig, axes = plt.subplots(len(grids), 1, figsize=(12, 2.6 * len(grids)))
+        for ax, (name, grid) in zip(axes, grids.items()):
+            image = ax.imshow(np.ma.masked_invalid(grid), aspect="auto", cmap="viridis")
+            ax.set_title(f"{name}{' ' + symbol.upper() if symbol else ''} (UTC)")
+            ax.set_yticks(range(7), WEEKDAYS)
+            ax.set_xticks(range(0, 24, 2), [f"{h:02d}" for h in range(0, 24, 2)])
+            fig.colorbar(image, ax=ax)
+        fig.tight_layout()
+        path = out_dir / f"heatmaps{suffix}.png"
+        fig.savefig(path, dpi=100)
+        plt.close(fig)
+        written.append(path)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Hour-of-week x metric histograms per symbol, mergeable across runs")
+    sub = ap.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Add run directories to a store (created when missing)")
+    add.add_argument("--store", required=True, help="Heatmap store (.npz)")
+    add.add_argument("--run-dir", action="append", required=True, help="Run directory; repeat for more")
+    merge = sub.add_parser("merge", help="Sum stores into one")
+    merge.add_argument("stores", nargs="+")
+    merge.add_argument("--out", required=True)
+    show = sub.add_parser("render", help="Weekday x hour grids (CSV, PNG with matplotlib)")
+    show.add_argument("--store", required=True)
+    show.add_argument("--out", required=True, help="Output directory")
+    show.add_argument("--symbol", default=None, help="One symbol (default: all symbols summed)")
+    for parser in (add, merge, show):
+        add_perf_args(parser)
+    args = ap.parse_args(argv)
+
+    perf = PerfRecorder(f"session_heatmap_{args.command}", args.profile)
+    with perf:
+        if args.command == "add":
+            store = Path(args.store)
+            heat = SessionHeatmap.load(store) if store.exists() else SessionHeatmap()
+            added, skipped = [], []
+            for run_dir in args.run_dir:
+                with perf.stage("add_run") as span:
+                    (added if heat.add_run(Path(run_dir)) else skipped).append(run_dir)
+                    span.rows = 1
+            heat.save(store)
+            out_dir = store.parent
+            print(json.dumps({"store": str(store), "added": added, "skipped": skipped,
+                              "runs": len(heat.runs), "symbols": heat.symbols}, indent=2))
+        elif args.command == "merge":
+            with perf.stage("merge") as span:
+                heat = SessionHeatmap.load(Path(args.stores[0]))
+                for other in args.stores[1:]:
+                    heat.merge(SessionHeatmap.load(Path(other)))
+                span.rows = len(args.stores)
+            out = heat.save(Path(args.out))
+            out_dir = out.parent
+            print(json.dumps({"store": str(out), "runs": len(heat.runs), "symbols": heat.symbols}, indent=2))
+        else:
+            out_dir = Path(args.out)
+            with perf.stage("render"):
+                written = render(SessionHeatmap.load(Path(args.store)), out_dir, args.symbol)
+            print(json.dumps([str(p) for p in written], indent=2))
+    perf.write(Path(args.perf_dir) if args.perf_dir else out_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,206 @@
+"""Mergeable quantile sketches shared by the streaming analyzers.
+
+``QuantileSketch`` is a log-bucketed sketch with a relative-error guarantee
+(DDSketch style): every value lands in bucket ``ceil(log_gamma(|v|))`` so a
+quantile read back is within ``relative_accuracy`` of the true value. Sketches
+built with the same accuracy merge by adding bucket counts, which makes them
+safe to build per run / per chunk / per process and combine afterwards.
+
+Serialized form (``to_dict``) is plain JSON so sketches can be stored next to
+the other artifacts and merged across runs later.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, Mapping, Optional, Sequence
+
+from .lazy_imports import lazy_import
+
+# Only add_many's vectorized branch needs numpy; load it there, not at import
+np = lazy_import("numpy", optional=True)
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Values closer to zero than this are counted in the zero bucket.
+MIN_INDEXABLE_VALUE = 1e-9
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch over signed floats."""
+
+    __slots__ = ("relative_accuracy", "_gamma", "_log_gamma", "positive", "negative",
+                 "zero_count", "count", "sum", "min", "max")
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0.0 < relative_accuracy < 1.0:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, magnitude: float) -> int:
+        return int(math.ceil(math.log(magnitude) / self._log_gamma))
+
+    def _value(self, key: int) -> float:
+        return 2.0 * self._gamma ** key / (self._gamma + 1.0)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        """Add one observation (NaN is ignored)."""
+        if value != value or weight <= 0:
+            return
+        if value > MIN_INDEXABLE_VALUE:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0) + weight
+        elif value < -MIN_INDEXABLE_VALUE:
+            key = self._key(-value)
+            self.negative[key] = self.negative.get(key, 0) + weight
+        else:
+            self.zero_count += weight
+        self.count += weight
+        self.sum += value * weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def remove(self, value: float, weight: int = 1) -> None:
+        """Take back an observation added earlier (sliding windows).
+
+        Bucket counts stay exact; ``min``/``max`` only reset once the sketch
+        is empty, so in between they are bounds rather than the window's
+        extrema. Track those separately when they matter.
+        """
+        if value != value or weight <= 0:
+            return
+        if value > MIN_INDEXABLE_VALUE:
+            store, key = self.positive, self._key(value)
+        elif value < -MIN_INDEXABLE_VALUE:
+            store, key = self.negative, self._key(-value)
+        else:
+            self.zero_count -= weight
+            store = None
+        if store is not None:
+            left = store.get(key, 0) - weight
+            if left > 0:
+                store[key] = left
+            else:
+                store.pop(key, None)
+        self.count -= weight
+        self.sum -= value * weight
+        if self.count <= 0:
+            self.positive.clear()
+            self.negative.clear()
+            self.zero_count = self.count = 0
+            self.sum = 0.0
+            self.min, self.max = math.inf, -math.inf
+
+    def add_many(self, values: Iterable[float]) -> None:
+        """Add a batch of observations; vectorized when numpy is available."""
+        if np is None:
+            for value in values:
+                self.add(float(value))
+            return
+        arr = np.asarray(values, dtype=np.float64).ravel()
+        arr = arr[~np.isnan(arr)]
+        if arr.size == 0:
+            return
+        for store, part in ((self.positive, arr[arr > MIN_INDEXABLE_VALUE]),
+                            (self.negative, -arr[arr < -MIN_INDEXABLE_VALUE])):
+            if part.size == 0:
+                continue
+            keys = np.ceil(np.log(part) / self._log_gamma).astype(np.int64)
+            uniq, counts = np.unique(keys, return_counts=True)
+            for key, cnt in zip(uniq.tolist(), counts.tolist()):
+                store[key] = store.get(key, 0) + cnt
+        self.zero_count += int(np.count_nonzero(np.abs(arr) <= MIN_INDEXABLE_VALUE))
+        self.count += int(arr.size)
+        self.sum += float(arr.sum())
+        self.min = min(self.min, float(arr.min()))
+        self.max = max(self.max, float(arr.max()))
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold ``other`` into this sketch in place and return ``self``."""
+        if not math.isclose(other.relative_accuracy, self.relative_accuracy):
+            raise ValueError("cannot merge sketches with different relative accuracy")
+        for key, cnt in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + cnt
+        for key, cnt in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + cnt
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the approximate ``q`` quantile (0..1), or None when empty."""
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(self.min, -self._value(key))
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self.max, self._value(key))
+        return self.max
+
+    def quantiles(self, qs: Sequence[float] = (0.5, 0.95, 0.99)) -> Dict[str, Optional[float]]:
+        """Return ``{"p50": ..., "p95": ...}`` for the requested quantiles."""
+        return {f"p{round(q * 100, 1):g}": self.quantile(q) for q in qs}
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "positive": {str(k): v for k, v in self.positive.items()},
+            "negative": {str(k): v for k, v in self.negative.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, object]) -> "QuantileSketch":
+        sketch = cls(float(data.get("relative_accuracy", DEFAULT_RELATIVE_ACCURACY)))  # type: ignore[arg-type]
+        sketch.positive = {int(k): int(v) for k, v in dict(data.get("positive") or {}).items()}  # type: ignore[arg-type]
+        sketch.negative = {int(k): int(v) for k, v in dict(data.get("negative") or {}).items()}  # type: ignore[arg-type]
+        sketch.zero_count = int(data.get("zero_count", 0))  # type: ignore[arg-type]
+        sketch.count = int(data.get("count", 0))  # type: ignore[arg-type]
+        sketch.sum = float(data.get("sum", 0.0))  # type: ignore[arg-type]
+        if sketch.count:
+            sketch.min = float(data["min"])  # type: ignore[arg-type]
+            sketch.max = float(data["max"])  # type: ignore[arg-type]
+        return sketch
+
+
+def merge_all(sketches: Iterable[QuantileSketch],
+              relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> QuantileSketch:
+    """Merge any number of sketches into a new one."""
+    merged = QuantileSketch(relative_accuracy)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Build OHLC bid/ask/mid bars from Level1SnapshotLogger ticks.
+
+The bot aggregates bars in C# (BarAggregator) but never writes them out, so
+``reconstruct_fifo.py --bars-dir`` had nothing to read. This builds the same
+timeframes offline from the L1 tick log (``timestamp_utc,symbol,bid,ask,...``;
+the synthetic/legacy ``l1_stream.csv`` with a ``timestamp`` column works too).
+
+Ticks are loaded once, sorted by (symbol, time), and bucketed by integer
+division of the epoch milliseconds. Each bucket is then reduced with a single
+pandas groupby (first/max/min/last per price column). Coarser timeframes are
+rolled up from the finest bars rather than from the ticks again. Timeframes
+default to ``Preprocessor.Timeframes`` in config.runtime.json (M1/M5/M15).
+A bar's ``timestamp_ms`` is its open time (UTC).
+
+Usage:
+  python -m scripts.analyzers.tick_bars --l1 run/l1_snapshots.csv --out run/bars
+  python path_issues/reconstruct_fifo.py --orders run/orders.csv --bars-dir run/bars --out trades.csv
+
+Outputs (written to --out):
+  - <symbol>_bars.csv         finest timeframe; the layout reconstruct_fifo.load_bars reads (open..close = mid)
+  - <symbol>_<tf>_bars.csv    coarser timeframes, same columns
+  - bars_<TF>.npz             all symbols for one timeframe as columnar arrays (see load_bars_npz)
+  - bars_manifest.json        timeframes, symbols, tick/bar counts
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+try:
+    from .lazy_imports import lazy_import
+    from .perf import PerfRecorder, add_perf_args
+except ImportError:  # run as scripts/analyzers/tick_bars.py
+    from lazy_imports import lazy_import
+    from perf import PerfRecorder, add_perf_args
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+DEFAULT_TIMEFRAMES: Sequence[str] = ("M1", "M5", "M15")
+DEFAULT_CONFIG = Path(__file__).resolve().parents[2] / "config.runtime.json"
+TIMESTAMP_COLUMNS: Sequence[str] = ("timestamp_utc", "timestamp")
+PRICES: Sequence[str] = ("mid", "bid", "ask")
+OHLC: Sequence[str] = ("open", "high", "low", "close")
+# Column order of every bar table; mid OHLC keeps the plain names load_bars expects
+BAR_COLUMNS: Sequence[str] = (
+    "timestamp_ms", "open", "high", "low", "close",
+    "bid_open", "bid_high", "bid_low", "bid_close",
+    "ask_open", "ask_high", "ask_low", "ask_close", "ticks",
+)
+_UNIT_MINUTES = {"M": 1, "H": 60, "D": 1440}
+
+
+def timeframe_minutes(name: str) -> int:
+    """``"M5"`` -> 5, ``"H1"`` -> 60, ``"D1"`` -> 1440 (cAlgo TimeFrame names)."""
+    match = re.fullmatch(r"([MHD])(\d+)", name.strip().upper())
+    if not match or int(match.group(2)) <= 0:
+        raise ValueError(f"unsupported timeframe {name!r} (expected e.g. M1, M15, H1, D1)")
+    return _UNIT_MINUTES[match.group(1)] * int(match.group(2))
+
+
+def load_timeframes(config_path: Optional[Path] = None) -> List[str]:
+    """``Preprocessor.Timeframes`` from config.runtime.json, finest first; the defaults when absent."""
+    path = Path(config_path) if config_path else DEFAULT_CONFIG
+    try:
+        names = json.loads(path.read_text(encoding="utf-8-sig"))["Preprocessor"]["Timeframes"]
+    except (OSError, ValueError, KeyError, TypeError):
+        names = list(DEFAULT_TIMEFRAMES)
+    return sorted({str(n).upper() for n in names}, key=timeframe_minutes)
+
+
+def read_ticks(path: Path) -> pd.DataFrame:
+    """Ticks as ``symbol, ts_ms, bid, ask, mid`` sorted by (symbol, ts_ms); bad or one-sided quotes are dropped."""
+    header = pd.read_csv(path, nrows=0).columns
+    ts_col = next((c for c in TIMESTAMP_COLUMNS if c in header), None)
+    if ts_col is None or not {"symbol", "bid", "ask"} <= set(header):
+        raise ValueError(f"{path}: expected {'/'.join(TIMESTAMP_COLUMNS)}, symbol, bid, ask columns")
+    raw = pd.read_csv(path, usecols=[ts_col, "symbol", "bid", "ask"],
+                      dtype={"symbol": "category", "bid": "float64", "ask": "float64"})
+    stamps = pd.to_datetime(raw[ts_col], utc=True, format="ISO8601", errors="coerce")
+    symbols = raw["symbol"]
+    # Normalise the handful of categories, not millions of cells
+    names = symbols.cat.categories.str.strip().str.upper()
+    if names.is_unique:
+        symbols = symbols.cat.rename_categories(names)
+    else:
+        symbols = symbols.astype(str).str.strip().str.upper().astype("category")
+    ticks = pd.DataFrame({
+        "symbol": symbols,
+        "ts_ms": stamps.dt.as_unit("ms").astype("int64"),
+        "bid": raw["bid"],
+        "ask": raw["ask"],
+    })
+    valid = stamps.notna() & ticks["symbol"].notna() & (ticks["bid"] > 0) & (ticks["ask"] > 0)
+    ticks = ticks[valid.to_numpy()]
+    ticks = ticks.assign(mid=(ticks["bid"] + ticks["ask"]) / 2.0)
+    # Stable, so same-millisecond ticks keep file order for open/close
+    return ticks.sort_values(["symbol", "ts_ms"], kind="stable", ignore_index=True)
+
+
+def _reduce(frame: pd.DataFrame, width_ms: int, sources: Dict[str, Dict[str, str]], count: str) -> pd.DataFrame:
+    """Group ``frame`` into ``width_ms`` buckets per symbol; ``sources[price][ohlc]`` names the input column."""
+    funcs = {"open": "first", "high": "max", "low": "min", "close": "last"}
+    keyed = frame.assign(timestamp_ms=frame["ts_ms"] // width_ms * width_ms)
+    spec = {}
+    for price in PRICES:
+        prefix = "" if price == "mid" else f"{price}_"
+        for part in OHLC:
+            spec[f"{prefix}{part}"] = (sources[price][part], funcs[part])
+    spec["ticks"] = (count, "size" if count == "ts_ms" else "sum")
+    bars = keyed.groupby(["symbol", "timestamp_ms"], sort=True, observed=True).agg(**spec).reset_index()
+    bars["ticks"] = bars["ticks"].astype("int64")
+    return bars[["symbol", *BAR_COLUMNS]]
+
+
+def build_bars(ticks: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """OHLC bars of ``minutes`` from ticks sorted by (symbol, ts_ms)."""
+    sources = {price: dict.fromkeys(OHLC, price) for price in PRICES}
+    return _reduce(ticks, minutes * 60_000, sources, "ts_ms")
+
+
+def rollup_bars(bars: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """Coarser bars from finer ones (the finer width must divide ``minutes``)."""
+    sources = {price: {part: (part if price == "mid" else f"{price}_{part}") for part in OHLC} for price in PRICES}
+    return _reduce(bars.rename(columns={"timestamp_ms": "ts_ms"}), minutes * 60_000, sources, "ticks")
+
+
+def build_timeframes(ticks: pd.DataFrame, timeframes: Sequence[str]) -> Dict[str, pd.DataFrame]:
+    """Bars per timeframe; each one is rolled up from the finest earlier timeframe that divides it."""
+    out: Dict[str, pd.DataFrame] = {}
+    for name in sorted(timeframes, key=timeframe_minutes):
+        minutes = timeframe_minutes(name)
+        base = next((tf for tf in reversed(list(out)) if minutes % timeframe_minutes(tf) == 0), None)
+        out[name] = build_bars(ticks, minutes) if base is None else rollup_bars(out[base], minutes)
+    return out
+
+
+def bars_csv_name(symbol: str, timeframe: str, finest: bool) -> str:
+    return f"{symbol.lower()}_bars.csv" if finest else f"{symbol.lower()}_{timeframe.lower()}_bars.csv"
+
+
+def write_bars(bars_by_tf: Dict[str, pd.DataFrame], out_dir: Path) -> Dict[str, object]:
+    """Per-symbol CSVs and one columnar .npz per timeframe; returns the manifest."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest: Dict[str, object] = {"timeframes": {}, "symbols": []}
+    symbols = set()
+    for index, (timeframe, bars) in enumerate(bars_by_tf.items()):
+        files = []
+        for symbol, group in bars.groupby("symbol", sort=True, observed=True):
+            name = bars_csv_name(symbol, timeframe, finest=index == 0)
+            group.to_csv(out_dir / name, columns=list(BAR_COLUMNS), index=False, float_format="%.10g")
+            files.append(name)
+            symbols.add(symbol)
+        codes, uniques = pd.factorize(bars["symbol"], sort=True)
+        arrays = {col: bars[col].to_numpy() for col in BAR_COLUMNS}
+        np.savez_compressed(out_dir / f"bars_{timeframe}.npz", symbols=np.asarray(uniques, dtype=str),
+                            symbol_code=codes.astype("int32"), **arrays)
+        manifest["timeframes"][timeframe] = {
+            "minutes": timeframe_minutes(timeframe), "bars": int(len(bars)),
+            "npz": f"bars_{timeframe}.npz", "csv": files,
+        }
+    manifest["symbols"] = sorted(symbols)
+    return manifest
+
+
+def load_bars_npz(path: Path, symbol: Optional[str] = None) -> pd.DataFrame:
+    """Read a ``bars_<TF>.npz`` back as a bar table (optionally one symbol)."""
+    with np.load(path, allow_pickle=False) as data:
+        symbols = data["symbols"]
+        frame = pd.DataFrame({col: data[col] for col in BAR_COLUMNS})
+        frame.insert(0, "symbol", symbols[data["symbol_code"]] if len(symbols) else [])
+    if symbol is not None:
+        frame = frame[frame["symbol"] == symbol.upper()].reset_index(drop=True)
+    return frame
+
+
+def run(l1_path: Path, out_dir: Path, timeframes: Sequence[str], perf: Optional[PerfRecorder] = None) -> Dict[str, object]:
+    perf = perf or PerfRecorder("tick_bars")
+    with perf.stage("load") as span:
+        ticks = read_ticks(l1_path)
+        span.rows = len(ticks)
+    with perf.stage("aggregate") as span:
+        bars_by_tf = build_timeframes(ticks, timeframes)
+        span.rows = sum(len(b) for b in bars_by_tf.values())
+    with perf.stage("write"):
+        manifest = write_bars(bars_by_tf, out_dir)
+    manifest["source"] = str(l1_path)
+    manifest["ticks"] = int(len(ticks))
+    if len(ticks):
+        manifest["first_ts_ms"] = int(ticks["ts_ms"].min())
+        manifest["last_ts_ms"] = int(ticks["ts_ms"].max())
+    (out_dir / "bars_manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Build OHLC bid/ask/mid bars from L1 ticks")
+    ap.add_argument("--l1", required=True, help="l1_snapshots.csv (or l1_stream.csv)")
+    ap.add_argument("--out", default=None, help="Output directory (default: <l1 dir>/bars)")
+    ap.add_argument("--config", default=None, help="config.runtime.json for Preprocessor.Timeframes")
+    ap.add_argument("--timeframes", default=None, help="Comma-separated override, e.g. M1,M5,H1")
+    add_perf_args(ap)
+    args = ap.parse_args(argv)
+
+    l1_path = Path(args.l1)
+    out_dir = Path(args.out) if args.out else l1_path.parent / "bars"
+    if args.timeframes:
+        timeframes = sorted({t.strip().upper() for t in args.timeframes.split(",") if t.strip()}, key=timeframe_minutes)
+    else:
+        timeframes = load_timeframes(Path(args.config) if args.config else None)
+    perf = PerfRecorder("tick_bars", args.profile)
+    with perf:
+        manifest = run(l1_path, out_dir, timeframes, perf)
+    perf.write(Path(args.perf_dir) if args.perf_dir else out_dir)
+    print(json.dumps({"ticks": manifest["ticks"], "symbols": manifest["symbols"],
+                      "bars": {tf: info["bars"] for tf, info in manifest["timeframes"].items()}}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,225 @@
+"""Streaming reader for trade_closes.log.
+
+The bot writes trade_closes.log in two shapes:
+
+- ``TradeCloseLogger``: one JSON object per line,
+  ``{"timestamp_iso": "...", "payload": {...}}``
+- ``ClosedTradesWriter`` (legacy): a ``line`` header, then text lines
+  ``<iso> CLOSED <id> <side> size=<n> pnl=<x>``
+
+``iter_trade_closes`` reads both in one binary pass. Each line becomes a
+``CloseRecord`` holding only the fields the analyzers use, plus the line's
+byte offset. JSON is decoded with ``orjson`` when it is installed and with
+the stdlib ``json`` module otherwise. ``TradeClosesIndex`` maps order/trade
+ids to byte offsets, so one close can be re-read without scanning the
+whole log again.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    import orjson as _orjson
+except Exception:  # pragma: no cover - optional speedup
+    _orjson = None  # type: ignore
+
+loads: Callable[[bytes], object] = _orjson.loads if _orjson is not None else json.loads
+FAST_DECODER = _orjson is not None
+
+TRADE_ID_FIELDS: Sequence[str] = ("trade_id", "tradeid", "id")
+ORDER_ID_FIELDS: Sequence[str] = (
+    "close_order_id", "exit_order_id", "exit_orderid", "order_id", "orderid", "position_id", "positionid",
+)
+TIME_FIELDS: Sequence[str] = ("close_time_iso", "close_time", "closetime", "timestamp_iso", "timestamp")
+PNL_FIELDS: Sequence[str] = (
+    "realized_pnl_usd", "net_realized_usd", "realized_usd", "pnl_in_account_currency", "pnl",
+)
+SIDE_FIELDS: Sequence[str] = ("side", "direction", "tradetype")
+SIZE_FIELDS: Sequence[str] = ("size", "volume", "volumeinunits", "qty", "quantity")
+SYMBOL_FIELDS: Sequence[str] = ("symbol", "symbolname")
+
+_TEXT_RE = re.compile(r"^(?P<ts>\S+)\s+CLOSED\s+(?P<id>\S+)(?P<rest>.*)$")
+_KV_RE = re.compile(r"(\w+)=(\S+)")
+_SIDES = {"buy": "BUY", "sell": "SELL", "long": "BUY", "short": "SELL"}
+
+PathLike = Union[str, Path]
+
+
+class CloseRecord(NamedTuple):
+    offset: int
+    timestamp_iso: str
+    trade_id: str
+    order_id: str
+    symbol: str
+    side: str
+    size: Optional[float]
+    pnl: Optional[float]
+    pnl_text: str
+    pnl_field: str = ""  # PNL_FIELDS name the value came from ("pnl" for text lines)
+
+
+def normalize_id(value: Optional[str]) -> str:
+    """Canonical id used for joins (matches path_issues/reconstruct_fifo.normalize_order_id)."""
+    if not value:
+        return ""
+    return str(value).strip().lstrip("T-").lower()
+
+
+def _to_float(value: object) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+
+
+def _first_field(fields: Mapping[str, object], lowered: Mapping[str, str],
+                 names: Sequence[str]) -> Tuple[str, object]:
+    for name in names:
+        key = lowered.get(name)
+        if key is not None:
+            value = fields[key]
+            if value is not None and value != "":
+                return name, value
+    return "", None
+
+
+def _first(fields: Mapping[str, object], lowered: Mapping[str, str], names: Sequence[str]) -> object:
+    return _first_field(fields, lowered, names)[1]
+
+
+def _from_json(obj: object, offset: int) -> Optional[CloseRecord]:
+    if not isinstance(obj, dict):
+        return None
+    payload = obj.get("payload")
+    fields = payload if isinstance(payload, dict) else obj
+    lowered = {str(k).lower(): k for k in fields}
+    pnl_field, pnl_raw = _first_field(fields, lowered, PNL_FIELDS)
+    ts = _first(fields, lowered, TIME_FIELDS) or obj.get("timestamp_iso") or ""
+    side = str(_first(fields, lowered, SIDE_FIELDS) or "")
+    return CloseRecord(
+        offset=offset,
+        timestamp_iso=str(ts),
+        trade_id=str(_first(fields, lowered, TRADE_ID_FIELDS) or ""),
+        order_id=str(_first(fields, lowered, ORDER_ID_FIELDS) or ""),
+        symbol=str(_first(fields, lowered, SYMBOL_FIELDS) or ""),
+        side=_SIDES.get(side.lower(), side.upper()),
+        size=_to_float(_first(fields, lowered, SIZE_FIELDS)),
+        pnl=_to_float(pnl_raw),
+        pnl_text="" if pnl_raw is None else str(pnl_raw),
+        pnl_field=pnl_field,
+    )
+
+
+def _from_text(line: str, offset: int) -> Optional[CloseRecord]:
+    m = _TEXT_RE.match(line)
+    if not m:
+        return None
+    rest = m.group("rest")
+    kv = {k.lower(): v for k, v in _KV_RE.findall(rest)}
+    side = ""
+    for token in rest.split():
+        if "=" not in token and token.lower() in _SIDES:
+            side = _SIDES[token.lower()]
+            break
+    pnl_text = kv.get("pnl", "")
+    token = m.group("id")
+    return CloseRecord(
+        offset=offset,
+        timestamp_iso=m.group("ts"),
+        trade_id=token,
+        order_id=token,
+        symbol=kv.get("symbol", ""),
+        side=side,
+        size=_to_float(kv.get("size")),
+        pnl=_to_float(pnl_text),
+        pnl_text=pnl_text,
+        pnl_field="pnl" if "pnl" in kv else "",
+    )
+
+
+def parse_line(raw: bytes, offset: int = 0) -> Optional[CloseRecord]:
+    """Parse one raw log line; returns None for headers, heartbeats and malformed lines."""
+    s = raw.strip()
+    if not s:
+        return None
+    if s[:1] == b"{":
+        try:
+            return _from_json(loads(s), offset)
+        except ValueError:
+            return None
+    return _from_text(s.decode("utf-8", errors="replace"), offset)
+
+
+def iter_trade_closes(path: PathLike, require_pnl: bool = True) -> Iterator[CloseRecord]:
+    """Stream close records from ``path`` in file order (one pass, constant memory)."""
+    with open(path, "rb") as fh:
+        offset = 0
+        first = True
+        for raw in fh:
+            line_offset = offset
+            offset += len(raw)
+            if first:
+                first = False
+                if raw.startswith(b"\xef\xbb\xbf"):
+                    raw = raw[3:]
+            rec = parse_line(raw, line_offset)
+            if rec is None or (require_pnl and rec.pnl is None):
+                continue
+            yield rec
+
+
+def looks_like_trade_closes(path: PathLike, probe_lines: int = 5) -> bool:
+    """True when the first non-header lines are JSON or ``CLOSED`` records (vs. a CSV export)."""
+    with open(path, "rb") as fh:
+        for i, raw in enumerate(fh):
+            if i >= probe_lines:
+                break
+            s = raw.lstrip(b"\xef\xbb\xbf").strip()
+            if not s or s == b"line":
+                continue
+            return s[:1] == b"{" or _TEXT_RE.match(s.decode("utf-8", errors="replace")) is not None
+    return False
+
+
+class TradeClosesIndex:
+    """Order/trade id -> byte offsets of the matching lines, for random access."""
+
+    def __init__(self, path: PathLike, offsets: Dict[str, List[int]]):
+        self.path = Path(path)
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, path: PathLike) -> "TradeClosesIndex":
+        offsets: Dict[str, List[int]] = {}
+        for rec in iter_trade_closes(path, require_pnl=False):
+            keys = {normalize_id(rec.order_id), normalize_id(rec.trade_id)}
+            keys.discard("")
+            for key in keys:
+                offsets.setdefault(key, []).append(rec.offset)
+        return cls(path, offsets)
+
+    def __contains__(self, key: str) -> bool:
+        return normalize_id(key) in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def get(self, key: str) -> List[CloseRecord]:
+        """Read back every close logged for ``key`` by seeking to its offsets."""
+        found = self.offsets.get(normalize_id(key))
+        if not found:
+            return []
+        records: List[CloseRecord] = []
+        with self.path.open("rb") as fh:
+            for offset in found:
+                fh.seek(offset)
+                rec = parse_line(fh.readline(), offset)
+                if rec is not None:
+                    records.append(rec)
+        return records
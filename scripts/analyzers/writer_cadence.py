@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Write cadence, jitter and stalls of the bot's CSV writers, checked against order latency.
+
+RiskSnapshotPersister and TelemetryCollector append on a timer, and
+OrderLifecycleLogger appends per order event. A timer writer that stalls on
+I/O leaves a hole in its own timestamps. That is the "local IO bottleneck"
+audit R8 can only guess at. Each file is read in chunks, timestamp column
+only. Per file, this reports:
+  - the inter-row interval distribution (QuantileSketch; mean/std/CV)
+  - burstiness B = (std - mean) / (std + mean): -1 metronome, 0 Poisson, ->1 bursts
+  - backward clock jumps (and the largest), duplicate timestamps
+  - for timer writers: the expected interval (``--interval`` or the median of
+    the first 256 intervals), stalls (gaps above ``--stall-factor`` x expected)
+    and the intervals they missed
+
+Every FILL with ``latency_ms`` covers a window [fill - latency, fill]. An
+order is writer-overlapped when a stall of any timer writer intersects that
+window. Spike rates (latency above ``--spike-ms``, R8's p99 threshold)
+inside and outside stalls give a lift and a verdict:
+  likely      overlapped spike rate >= 2x the clean rate, with 3+ overlapped spikes
+  ruled_out   no spike falls inside a stall
+  inconclusive otherwise
+
+Usage:
+  python -m scripts.analyzers.writer_cadence --run-dir D:/botg/logs/artifacts/telemetry_run_X
+  python -m scripts.analyzers.writer_cadence --run-dir run --interval risk_snapshots.csv=1 --spike-ms 100
+
+Outputs (written to --out, default <run-dir>/writer_cadence):
+  - writer_cadence.json   per-file cadence stats and the latency correlation
+  - writer_stalls.csv     file, writer, start, end, gap_ms, missed, orders/spikes in flight
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    from .lazy_imports import lazy_import
+    from .perf import PerfRecorder, add_perf_args
+    from .sketches import QuantileSketch
+except ImportError:  # run as scripts/analyzers/writer_cadence.py
+    from lazy_imports import lazy_import
+    from perf import PerfRecorder, add_perf_args
+    from sketches import QuantileSketch
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# file -> (writer, writes on a timer)
+WRITERS: Dict[str, Tuple[str, bool]] = {
+    "risk_snapshots.csv": ("RiskSnapshotPersister", True),
+    "telemetry.csv": ("TelemetryCollector", True),
+    "orders.csv": ("OrderLifecycleLogger", False),
+}
+TIMESTAMP_COLUMNS: Sequence[str] = ("timestamp_utc", "timestamp_iso", "timestamp")
+EXPECTED_SAMPLE = 256
+DEFAULT_STALL_FACTOR = 1.5
+DEFAULT_SPIKE_MS = 250.0
+DEFAULT_CHUNK_ROWS = 500_000
+LIKELY_LIFT = 2.0
+LIKELY_MIN_SPIKES = 3
+
+
+def _iso(us: int) -> str:
+    return pd.Timestamp(int(us), unit="us", tz="UTC").strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def to_us(values: "pd.Series") -> "np.ndarray":
+    """Epoch microseconds (int64) of ISO timestamps; unparseable values become -1."""
+    stamps = pd.to_datetime(values, utc=True, format="ISO8601", errors="coerce")
+    return stamps.dt.as_unit("us").to_numpy(dtype=np.int64, na_value=-1)
+
+
+class WriterCadence:
+    """Streaming cadence stats of one file's timestamp column, fed chunk by chunk in file order."""
+
+    def __init__(self, name: str, writer: str, periodic: bool, expected_ms: Optional[float] = None,
+                 stall_factor: float = DEFAULT_STALL_FACTOR):
+        self.name = name
+        self.writer = writer
+        self.periodic = periodic
+        self.expected_ms = expected_ms
+        self.stall_factor = stall_factor
+        self.rows = 0
+        self.unparsed = 0
+        self.intervals = QuantileSketch()
+        self.sum_sq = 0.0
+        self.backward_jumps = 0
+        self.max_backward_ms = 0.0
+        self.duplicates = 0
+        self.missed = 0
+        self.stalls: List[Tuple[int, int, float, int]] = []  # start_us, end_us, gap_ms, missed
+        self._last: Optional[int] = None
+        self._pending: List[Tuple["np.ndarray", "np.ndarray"]] = []  # (start_us, end_us) before expected is known
+
+    def add(self, ts_us: "np.ndarray") -> None:
+        valid = ts_us >= 0
+        self.unparsed += int((~valid).sum())
+        ts = ts_us[valid]
+        if not len(ts):
+            return
+        self.rows += len(ts)
+        prev = np.r_[ts[:1] if self._last is None else [self._last], ts[:-1]]
+        if self._last is None:
+            prev, ts_cmp = prev[1:], ts[1:]
+        else:
+            ts_cmp = ts
+        self._last = int(ts[-1])
+        diff_ms = (ts_cmp - prev) / 1000.0
+
+        back = diff_ms < 0
+        self.backward_jumps += int(back.sum())
+        if back.any():
+            self.max_backward_ms = max(self.max_backward_ms, float(-diff_ms[back].min()))
+        self.duplicates += int((diff_ms == 0).sum())
+        forward = ~back
+        fwd = diff_ms[forward]
+        self.intervals.add_many(fwd)
+        self.sum_sq += float(np.dot(fwd, fwd))
+
+        if self.periodic:
+            starts, ends = prev[forward], ts_cmp[forward]
+            if self.expected_ms is None:
+                self._pending.append((starts, ends))
+                if sum(len(s) for s, _ in self._pending) >= EXPECTED_SAMPLE:
+                    self._settle()
+            else:
+                self._stalls(starts, ends)
+
+    def _settle(self) -> None:
+        """Fix the expected interval from the buffered head of the file, then scan the buffer."""
+        starts = np.concatenate([s for s, _ in self._pending]) if self._pending else np.zeros(0, np.int64)
+        ends = np.concatenate([e for _, e in self._pending]) if self._pending else np.zeros(0, np.int64)
+        self._pending = []
+        head = (ends - starts)[:EXPECTED_SAMPLE] / 1000.0
+        head = head[head > 0]
+        if not len(head):
+            self.periodic = False
+            return
+        self.expected_ms = float(np.median(head))
+        self._stalls(starts, ends)
+
+    def _stalls(self, starts: "np.ndarray", ends: "np.ndarray") -> None:
+        gaps = (ends - starts) / 1000.0
+        hit = np.flatnonzero(gaps > self.stall_factor * self.expected_ms)
+        missed = np.maximum(np.rint(gaps[hit] / self.expected_ms).astype(np.int64) - 1, 1)
+        self.missed += int(missed.sum())
+        self.stalls.extend(zip(starts[hit].tolist(), ends[hit].tolist(), gaps[hit].tolist(), missed.tolist()))
+
+    def finish(self) -> None:
+        if self.periodic and self.expected_ms is None:
+            self._settle()
+
+    def summary(self) -> Dict[str, object]:
+        n = self.intervals.count
+        mean = self.intervals.mean
+        std = float(np.sqrt(max(self.sum_sq / n - mean * mean, 0.0))) if n else None
+        out: Dict[str, object] = {
+            "writer": self.writer, "rows": self.rows, "unparsed": self.unparsed, "periodic": self.periodic,
+            "intervals": n,
+            "interval_ms": dict(self.intervals.quantiles((0.5, 0.9, 0.99)), mean=mean, std=std,
+                                max=self.intervals.max if n else None),
+            "cv": std / mean if n and mean else None,
+            "burstiness": (std - mean) / (std + mean) if n and (std + mean) else None,
+            "backward_jumps": self.backward_jumps, "max_backward_ms": self.max_backward_ms,
+            "duplicates": self.duplicates,
+        }
+        if self.periodic:
+            out.update(expected_interval_ms=self.expected_ms, stalls=len(self.stalls), missed_intervals=self.missed,
+                       stall_ms_total=round(sum(s[2] for s in self.stalls), 3),
+                       missed_share=self.missed / (self.missed + n) if n else None)
+        return out
+
+
+def scan(path: Path, cadence: WriterCadence, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+         fills: Optional[List[Tuple["np.ndarray", "np.ndarray"]]] = None) -> None:
+    """Feed ``path`` into ``cadence``; with ``fills``, also collect (fill_us, latency_ms) of FILL rows."""
+    header = list(pd.read_csv(path, nrows=0).columns)
+    ts_col = next((c for c in TIMESTAMP_COLUMNS if c in header), None)
+    if ts_col is None:
+        raise ValueError(f"{path}: no {'/'.join(TIMESTAMP_COLUMNS)} column")
+    want_fills = fills is not None and {"phase", "latency_ms"} <= set(header)
+    usecols = [ts_col] + (["phase", "latency_ms"] if want_fills else [])
+    for chunk in pd.read_csv(path, usecols=usecols, dtype={ts_col: "string", "phase": "category"},
+                             chunksize=chunk_rows, on_bad_lines="skip"):
+        ts = to_us(chunk[ts_col])
+        cadence.add(ts)
+        if want_fills:
+            latency = pd.to_numeric(chunk["latency_ms"], errors="coerce").to_numpy(dtype=np.float64)
+            keep = (chunk["phase"] == "FILL").to_numpy() & (ts >= 0) & (latency >= 0)
+            fills.append((ts[keep], latency[keep]))
+    cadence.finish()
+
+
+def correlate(fill_us: "np.ndarray", latency_ms: "np.ndarray", cadences: Sequence[WriterCadence],
+              spike_ms: float = DEFAULT_SPIKE_MS) -> Tuple[Dict[str, object], List[Dict[str, object]]]:
+    """(latency correlation summary, stall rows with orders/spikes in flight)."""
+    request_us = fill_us - (latency_ms * 1000.0).astype(np.int64)
+    spike = latency_ms > spike_ms
+    overlapped = np.zeros(len(fill_us), dtype=bool)
+    order_fill, order_req = np.sort(fill_us), np.sort(request_us)
+    spike_fill, spike_req = np.sort(fill_us[spike]), np.sort(request_us[spike])
+    per_writer: Dict[str, Dict[str, int]] = {}
+    stall_rows: List[Dict[str, object]] = []
+
+    def in_flight(fills_sorted: "np.ndarray", reqs_sorted: "np.ndarray", start: "np.ndarray",
+                  end: "np.ndarray") -> "np.ndarray":
+        # Windows with fill > start and request < end; fill <= start and request >= end cannot both hold
+        return (len(fills_sorted) - np.searchsorted(fills_sorted, start, "right")
+                - (len(reqs_sorted) - np.searchsorted(reqs_sorted, end, "left")))
+
+    for cad in cadences:
+        if not cad.stalls:
+            continue
+        stalls = np.array([(s, e) for s, e, _, _ in cad.stalls], dtype=np.int64)
+        order = np.argsort(stalls[:, 0], kind="stable")
+        starts, reach = stalls[order, 0], np.maximum.accumulate(stalls[order, 1])
+        # An order overlaps some stall iff the furthest-reaching stall starting before its fill ends after its request
+        idx = np.searchsorted(starts, fill_us, "left") - 1
+        hit = (idx >= 0) & (reach[np.maximum(idx, 0)] > request_us)
+        overlapped |= hit
+        per_writer[cad.name] = {"orders": int(hit.sum()), "spikes": int((hit & spike).sum())}
+        orders_in = in_flight(order_fill, order_req, stalls[:, 0], stalls[:, 1])
+        spikes_in = in_flight(spike_fill, spike_req, stalls[:, 0], stalls[:, 1])
+        for (s, e, gap, missed), n_orders, n_spikes in zip(cad.stalls, orders_in.tolist(), spikes_in.tolist()):
+            stall_rows.append({"file": cad.name, "writer": cad.writer, "start": _iso(s), "end": _iso(e),
+                               "gap_ms": round(gap, 3), "missed": missed,
+                               "orders_in_flight": n_orders, "spikes_in_flight": n_spikes})
+
+    def rate(mask: "np.ndarray") -> Optional[float]:
+        return float(spike[mask].mean()) if mask.any() else None
+
+    def pct(mask: "np.ndarray") -> Dict[str, Optional[float]]:
+        values = latency_ms[mask]
+        if not len(values):
+            return {"p50": None, "p95": None}
+        p50, p95 = np.percentile(values, [50, 95])
+        return {"p50": float(p50), "p95": float(p95)}
+
+    clean = ~overlapped
+    over_rate, clean_rate = rate(overlapped), rate(clean)
+    over_spikes, spikes = int((overlapped & spike).sum()), int(spike.sum())
+    if over_rate is not None and clean_rate:
+        lift: Optional[float] = over_rate / clean_rate
+    elif over_rate:
+        lift = float("inf")
+    else:
+        lift = None
+    if over_spikes == 0:
+        verdict = "ruled_out"
+    elif over_spikes >= LIKELY_MIN_SPIKES and (clean_rate == 0 or (lift or 0) >= LIKELY_LIFT):
+        verdict = "likely"
+    else:
+        verdict = "inconclusive"
+    summary = {
+        "fills": int(len(fill_us)), "spike_ms": spike_ms, "spikes": spikes,
+        "overlapped_orders": int(overlapped.sum()), "overlapped_spikes": over_spikes,
+        "spike_rate_overlapped": over_rate, "spike_rate_clean": clean_rate,
+        "lift": None if lift is None or lift == float("inf") else lift,
+        "spikes_explained_share": over_spikes / spikes if spikes else None,
+        "latency_overlapped_ms": pct(overlapped), "latency_clean_ms": pct(clean),
+        "by_file": per_writer, "verdict": verdict,
+    }
+    stall_rows.sort(key=lambda r: (r["start"], r["file"]))
+    return summary, stall_rows
+
+
+STALL_COLUMNS = ["file", "writer", "start", "end", "gap_ms", "missed", "orders_in_flight", "spikes_in_flight"]
+
+
+def run(run_dir: Path, out_dir: Path, intervals: Optional[Mapping[str, float]] = None,
+        stall_factor: float = DEFAULT_STALL_FACTOR, spike_ms: float = DEFAULT_SPIKE_MS,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS, perf: Optional[PerfRecorder] = None) -> Dict[str, object]:
+    perf = perf or PerfRecorder("writer_cadence")
+    intervals = intervals or {}
+    cadences: List[WriterCadence] = []
+    fills: List[Tuple["np.ndarray", "np.ndarray"]] = []
+    for name, (writer, periodic) in WRITERS.items():
+        path = Path(run_dir) / name
+        if not path.exists():
+            continue
+        expected = intervals.get(name)
+        cad = WriterCadence(name, writer, periodic or expected is not None,
+                            expected * 1000.0 if expected is not None else None, stall_factor)
+        with perf.stage(f"scan:{name}") as span:
+            scan(path, cad, chunk_rows, fills if name == "orders.csv" else None)
+            span.rows = cad.rows
+        cadences.append(cad)
+
+    with perf.stage("correlate") as span:
+        fill_us = np.concatenate([f for f, _ in fills]) if fills else np.zeros(0, np.int64)
+        latency = np.concatenate([l for _, l in fills]) if fills else np.zeros(0, np.float64)
+        correlation, stall_rows = correlate(fill_us, latency, cadences, spike_ms)
+        span.rows = len(fill_us)
+
+    with perf.stage("write"):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(stall_rows, columns=STALL_COLUMNS).to_csv(out_dir / "writer_stalls.csv", index=False)
+        summary = {"run_dir": str(run_dir), "stall_factor": stall_factor,
+                   "files": {cad.name: cad.summary() for cad in cadences}, "latency": correlation}
+        (out_dir / "writer_cadence.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary
+
+
+def _interval_arg(text: str) -> Tuple[str, float]:
+    name, sep, seconds = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected FILE=SECONDS, got {text!r}")
+    try:
+        return name, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad seconds in {text!r}") from None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Writer cadence, jitter and stalls vs order latency spikes")
+    ap.add_argument("--run-dir", required=True, help="Run directory (risk_snapshots.csv, telemetry.csv, orders.csv)")
+    ap.add_argument("--out", default=None, help="Output directory (default: <run-dir>/writer_cadence)")
+    ap.add_argument("--interval", action="append", type=_interval_arg, default=[], metavar="FILE=SECONDS",
+                    help="Configured write interval of a file (default: median of its first intervals)")
+    ap.add_argument("--stall-factor", type=float, default=DEFAULT_STALL_FACTOR,
+                    help="Gap counted as a stall above this multiple of the expected interval")
+    ap.add_argument("--spike-ms", type=float, default=DEFAULT_SPIKE_MS, help="Order latency counted as a spike")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per read; bounds memory")
+    add_perf_args(ap)
+    args = ap.parse_args(argv)
+
+    run_dir = Path(args.run_dir)
+    out_dir = Path(args.out) if args.out else run_dir / "writer_cadence"
+    perf = PerfRecorder("writer_cadence", args.profile)
+    with perf:
+        summary = run(run_dir, out_dir, dict(args.interval), args.stall_factor, args.spike_ms, args.chunk_rows, perf)
+    perf.write(Path(args.perf_dir) if args.perf_dir else out_dir)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,17 +4,38 @@ Gate2 Risk Audit Script - Analyzes 12 risk categories (R1-R12)
 Generates comprehensive CSV/JSON/MD reports for CI validation
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import json
 import csv
-import pandas as pd
-import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Tuple
+from typing import Callable, Dict, List, Any, Optional, Tuple
 import argparse
 
+try:
+    from analyzers.lazy_imports import lazy_import
+    from analyzers.perf import PerfRecorder, add_perf_args
+    from analyzers.prefix_scan import scan as prefix_scan
+    from analyzers.result_cache import (
+        ResultCache, add_cache_args, changed_files, code_version, import_closure, snapshot_dir,
+    )
+    from analyzers.risk_rollup import fresh_meta as risk_rollup_meta
+except ImportError:  # imported as scripts.audit_gate2_risks
+    from scripts.analyzers.lazy_imports import lazy_import
+    from scripts.analyzers.perf import PerfRecorder, add_perf_args
+    from scripts.analyzers.prefix_scan import scan as prefix_scan
+    from scripts.analyzers.result_cache import (
+        ResultCache, add_cache_args, changed_files, code_version, import_closure, snapshot_dir,
+    )
+    from scripts.analyzers.risk_rollup import fresh_meta as risk_rollup_meta
+
+# Loaded on first use; --help and the unified CLI do not pay for them
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
 # Required columns per file type (with schema mapping)
 # Actual schema: orders has timestamp_request/ack/fill, risk has timestamp_utc, telemetry has timestamp_iso
 REQUIRED_COLUMNS = {
@@ -40,10 +61,15 @@ REQUIRED_FILES = [
 class Gate2RiskAuditor:
     """Comprehensive risk auditor for Gate2 artifacts"""
     
-    def __init__(self, input_dir: str, output_dir: str):
+    def __init__(self, input_dir: str, output_dir: str, perf: PerfRecorder = None,
+                 frame_loader: Optional[Callable[[Path], pd.DataFrame]] = None, use_risk_rollup: bool = True):
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.perf = perf or PerfRecorder('audit_gate2_risks')
+        self.frame_loader = frame_loader or pd.read_csv
+        self.use_risk_rollup = use_risk_rollup
+        self._frames: Dict[str, pd.DataFrame] = {}
         
         self.results = {
             'R1_schema_validation': {'status': 'OK', 'evidence': [], 'root_cause': '', 'patch': ''},
@@ -75,48 +101,48 @@ class Gate2RiskAuditor:
             'gaps_count': 0
         }
     
+    def read_frame(self, path: Path) -> pd.DataFrame:
+        """Full CSV read, parsed once per file; each audit gets its own copy (audits add columns)"""
+        key = str(path)
+        if key not in self._frames:
+            self._frames[key] = self.frame_loader(path)
+        return self._frames[key].copy()
+    
+    def risk_rollup(self, risk_file: Path) -> Optional[Dict[str, Any]]:
+        """meta.json of an up-to-date risk_rollup store beside ``risk_file``, if enabled and present"""
+        return risk_rollup_meta(risk_file) if self.use_risk_rollup else None
+    
+    def input_files(self) -> List[Path]:
+        """Every artifact file the audits may read (result cache key)"""
+        names = set(REQUIRED_FILES) | set(REQUIRED_COLUMNS) | {'run_metadata.json', 'gate2_validation.json'}
+        files = [self.input_dir / name for name in sorted(names)]
+        return files + sorted(self.input_dir.glob('*.log'))
+    
     def audit_all(self):
         """Run all 12 risk audits"""
         print("Starting comprehensive Gate2 risk audit...")
         
-        # R5 first - check file existence
-        self.audit_r5_missing_files()
-        
-        # R4 - check required columns
-        self.audit_r4_missing_columns()
-        
-        # R1 - schema validation
-        self.audit_r1_schema_validation()
-        
-        # R2 - telemetry span
-        self.audit_r2_telemetry_span()
-        
-        # R3 - config drift
-        self.audit_r3_config_drift()
-        
-        # R6 - friction anomalies
-        self.audit_r6_friction()
-        
-        # R7 - order explosion
-        self.audit_r7_order_explosion()
-        
-        # R8 - latency spikes
-        self.audit_r8_latency_spikes()
-        
-        # R9 - clock drift
-        self.audit_r9_clock_drift()
-        
-        # R10 - GH upload failures
-        self.audit_r10_gh_upload()
-        
-        # R11 - risk discipline
-        self.audit_r11_risk_discipline()
-        
-        # R12 - path/unicode issues
-        self.audit_r12_path_unicode()
+        audits = [
+            ('R5_missing_files', self.audit_r5_missing_files),        # first - check file existence
+            ('R4_missing_columns', self.audit_r4_missing_columns),
+            ('R1_schema_validation', self.audit_r1_schema_validation),
+            ('R2_telemetry_span', self.audit_r2_telemetry_span),
+            ('R3_config_drift', self.audit_r3_config_drift),
+            ('R6_friction_anomaly', self.audit_r6_friction),
+            ('R7_order_explosion', self.audit_r7_order_explosion),
+            ('R8_latency_spikes', self.audit_r8_latency_spikes),
+            ('R9_clock_drift', self.audit_r9_clock_drift),
+            ('R10_gh_upload_fail', self.audit_r10_gh_upload),
+            ('R11_risk_discipline', self.audit_r11_risk_discipline),
+            ('R12_path_unicode', self.audit_r12_path_unicode),
+        ]
+        for name, audit in audits:
+            with self.perf.stage(name):
+                audit()
         
         # Generate all reports
-        self.generate_reports()
+        with self.perf.stage('write'):
+            self.generate_reports()
         
         print(f"\nAudit complete! Reports saved to: {self.output_dir}")
         return self.results
@@ -162,10 +188,19 @@ class Gate2RiskAuditor:
         risk_file = self.input_dir / 'risk_snapshots.csv'
         if risk_file.exists():
             try:
-                df = pd.read_csv(risk_file)
-                if 'timestamp_utc' in df.columns and len(df) > 0:
-                    df['timestamp_utc'] = pd.to_datetime(df['timestamp_utc'])
-                    span = (df['timestamp_utc'].max() - df['timestamp_utc'].min()).total_seconds() / 3600
+                # An up-to-date risk_rollup store already knows the span; otherwise read the column
+                rollup = self.risk_rollup(risk_file)
+                if rollup and rollup['snapshots']:
+                    start = pd.Timestamp(rollup['min_ts_ns'], unit='ns', tz='UTC')
+                    end = pd.Timestamp(rollup['max_ts_ns'], unit='ns', tz='UTC')
+                else:
+                    df = self.read_frame(risk_file)
+                    start = end = None
+                    if 'timestamp_utc' in df.columns and len(df) > 0:
+                        df['timestamp_utc'] = pd.to_datetime(df['timestamp_utc'])
+                        start, end = df['timestamp_utc'].min(), df['timestamp_utc'].max()
+                if start is not None:
+                    span = (end - start).total_seconds() / 3600
                     self.kpi['span_hours_risk'] = span
                     
                     if span < 23.75:  # 23h45m
@@ -175,8 +210,8 @@ class Gate2RiskAuditor:
                         )
                         gaps.append({
                             'source': 'risk_snapshots.csv',
-                            'start': df['timestamp_utc'].min().isoformat(),
-                            'end': df['timestamp_utc'].max().isoformat(),
+                            'start': start.isoformat(),
+                            'end': end.isoformat(),
                             'duration_hours': span
                         })
             except Exception as e:
@@ -186,7 +221,7 @@ class Gate2RiskAuditor:
         telem_file = self.input_dir / 'telemetry.csv'
         if telem_file.exists():
             try:
-                df = pd.read_csv(telem_file)
+                df = self.read_frame(telem_file)
                 # CORRECTED: Use timestamp_iso, not timestamp_utc
                 if 'timestamp_iso' in df.columns and len(df) > 0:
                     df['timestamp_iso'] = pd.to_datetime(df['timestamp_iso'])
@@ -354,7 +389,7 @@ class Gate2RiskAuditor:
             return
         
         try:
-            df = pd.read_csv(orders_file)
+            df = self.read_frame(orders_file)
             
             # Ensure status column is uppercase for comparison
             if 'status' in df.columns:
@@ -507,19 +542,24 @@ class Gate2RiskAuditor:
             return
         
         try:
-            df = pd.read_csv(orders_file)
+            # Logger layout (phase first, status mirrors phase): count FILL line
+            # prefixes instead of loading the whole file
+            counts = prefix_scan(orders_file)
+            if counts.phase_first:
+                filled_count = counts.phases['FILL']
+            else:
+                df = self.read_frame(orders_file)
+                if 'status' not in df.columns:
+                    return
+                filled_count = int(df['status'].str.upper().isin(['FILL', 'FILLED']).sum())
             
-            if 'status' in df.columns:
-                df['status_upper'] = df['status'].str.upper()
-                filled_count = len(df[df['status_upper'].isin(['FILL', 'FILLED'])])
-                
-                if filled_count > 300000:
-                    self.results['R7_order_explosion']['status'] = 'NG'
-                    self.results['R7_order_explosion']['evidence'].append(
-                        f"Order explosion: {filled_count:,} fills > 300k threshold"
-                    )
-                    self.results['R7_order_explosion']['root_cause'] = 'Excessive order frequency or strategy runaway'
-                    self.results['R7_order_explosion']['patch'] = 'Add order rate limiter in RiskManager (max 200 orders/minute) and daily cap check'
+            if filled_count > 300000:
+                self.results['R7_order_explosion']['status'] = 'NG'
+                self.results['R7_order_explosion']['evidence'].append(
+                    f"Order explosion: {filled_count:,} fills > 300k threshold"
+                )
+                self.results['R7_order_explosion']['root_cause'] = 'Excessive order frequency or strategy runaway'
+                self.results['R7_order_explosion']['patch'] = 'Add order rate limiter in RiskManager (max 200 orders/minute) and daily cap check'
             
         except Exception as e:
             print(f"  Error checking order count: {e}")
@@ -533,7 +573,7 @@ class Gate2RiskAuditor:
             return
         
         try:
-            df = pd.read_csv(orders_file)
+            df = self.read_frame(orders_file)
             
             if 'latency_ms' in df.columns:
                 latency = df['latency_ms'].dropna()
@@ -578,20 +618,25 @@ class Gate2RiskAuditor:
         risk_file = self.input_dir / 'risk_snapshots.csv'
         if risk_file.exists():
             try:
-                df = pd.read_csv(risk_file)
-                if 'timestamp_utc' in df.columns and len(df) > 1:
-                    df['timestamp_utc'] = pd.to_datetime(df['timestamp_utc'])
-                    
-                    # Check monotonic
-                    diffs = df['timestamp_utc'].diff().dt.total_seconds()
-                    non_monotonic = (diffs < 0).sum()
-                    duplicates = (diffs == 0).sum()
+                rollup = self.risk_rollup(risk_file)
+                non_monotonic = duplicates = 0
+                if rollup:
+                    non_monotonic, duplicates = rollup['backward_jumps'], rollup['duplicates']
+                else:
+                    df = self.read_frame(risk_file)
+                    if 'timestamp_utc' in df.columns and len(df) > 1:
+                        df['timestamp_utc'] = pd.to_datetime(df['timestamp_utc'])
+                        
+                        # Check monotonic
+                        diffs = df['timestamp_utc'].diff().dt.total_seconds()
+                        non_monotonic = (diffs < 0).sum()
+                        duplicates = (diffs == 0).sum()
                     
-                    if non_monotonic > 0 or duplicates > 0:
-                        self.results['R9_clock_drift']['status'] = 'NG'
-                        self.results['R9_clock_drift']['evidence'].append(
-                            f"risk_snapshots: {non_monotonic} backward jumps, {duplicates} duplicates"
-                        )
+                if non_monotonic > 0 or duplicates > 0:
+                    self.results['R9_clock_drift']['status'] = 'NG'
+                    self.results['R9_clock_drift']['evidence'].append(
+                        f"risk_snapshots: {non_monotonic} backward jumps, {duplicates} duplicates"
+                    )
             except Exception as e:
                 print(f"  Error checking clock in risk_snapshots: {e}")
         
@@ -645,7 +690,7 @@ class Gate2RiskAuditor:
             return
         
         try:
-            df = pd.read_csv(risk_file)
+            df = self.read_frame(risk_file)
             
             if 'closed_pnl' in df.columns or 'equity' in df.columns:
                 # Assume R = $10 (from user spec: LV0: R=$10)
@@ -926,6 +971,8 @@ def main():
     parser = argparse.ArgumentParser(description='Gate2 Risk Audit - Analyze 12 risk categories')
     parser.add_argument('-InputDir', '--input-dir', required=True, help='Path to artifacts directory')
     parser.add_argument('-OutDir', '--output-dir', required=True, help='Path to output reports directory')
+    add_perf_args(parser)
+    add_cache_args(parser)
     
     args = parser.parse_args()
     
@@ -936,8 +983,28 @@ def main():
     print(f"Output Directory: {args.output_dir}")
     print(f"\nAnalyzing 12 risk categories (R1-R12)...\n")
     
-    auditor = Gate2RiskAuditor(args.input_dir, args.output_dir)
-    results = auditor.audit_all()
+    perf = PerfRecorder('audit_gate2_risks', args.profile)
+    auditor = Gate2RiskAuditor(args.input_dir, args.output_dir, perf)
+    cache = ResultCache.from_args(args)
+    with perf:
+        results = None
+        if cache is not None:
+            with perf.stage('cache_lookup'):
+                key = cache.key('audit_gate2_risks', code_version(*import_closure(Path(__file__))),
+                                dict(vars(args), input_dir=auditor.input_dir.resolve(),
+                                     output_dir=auditor.output_dir.resolve()),
+                                auditor.input_files())
+                hit = cache.restore(key, auditor.output_dir)
+            if hit is not None:
+                results = hit['results']
+                print(f"Cached audit restored to: {args.output_dir}")
+        if results is None:
+            before = snapshot_dir(auditor.output_dir)
+            results = auditor.audit_all()
+            if cache is not None:
+                cache.store(key, 'audit_gate2_risks', auditor.output_dir,
+                            changed_files(auditor.output_dir, before), {'results': results})
+    perf.write(Path(args.perf_dir) if args.perf_dir else Path(args.output_dir))
     
     # Print summary
     ng_count = sum(1 for v in results.values() if v['status'] == 'NG')
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Time and memory-profile the analyzer entry points on synthetic runs.
+
+For each size, a deterministic synthetic run is generated (see
+``synth_artifacts``; generated runs are cached under ``--data``). Each entry
+point then runs as its own subprocess. Every output, including
+perf_summary.json, goes to ``<out>/work/work_<size>``, so the cached dataset
+is never modified and later runs time the same input. Wall time is recorded, and so is the
+child's peak RSS, taken from ``os.wait4`` where the platform supports it. The
+results are written as JSON. ``--compare`` flags any entry that became slower
+or larger by more than ``--threshold`` compared with an earlier results file.
+
+Usage:
+  python -m scripts.bench.run_benchmarks --sizes 1000,10000,100000 --out bench_results
+  python -m scripts.bench.run_benchmarks --sizes 100000 --entries reconstruct,validator --compare bench_results/latest.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .synth_artifacts import FORMAT_VERSION, generate
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_SIZES: Sequence[int] = (1000, 10000, 100000)
+
+# name -> argv builder(run_dir, work_dir); paths are relative to the repo root
+EntryBuilder = Callable[[Path, Path], List[str]]
+ENTRIES: Dict[str, EntryBuilder] = {
+    "reconstruct": lambda run, work: [
+        "path_issues/reconstruct_fifo.py", "--orders", str(run / "orders.csv"),
+        "--closes", str(run / "trade_closes.log"), "--meta", str(run / "run_metadata.json"),
+        "--out", str(work / "closed_trades_fifo_reconstructed.csv")],
+    "compute_pnl_fifo": lambda run, work: [
+        "scripts/compute_pnl_fifo.py", "--orders", str(run / "orders.csv"),
+        "--closes", str(run / "trade_closes.log"), "--out", str(work / "closed_trades_fifo.csv")],
+    "fill_breakdown": lambda run, work: [
+        "scripts/compute_fill_breakdown_stream.py", "--orders", str(run / "orders.csv"),
+        "--outdir", str(work / "fill_breakdown")],
+    "validator": lambda run, work: [
+        "scripts/validate_artifacts.py", "--artifacts", str(run), "--out", str(work / "validation.json")],
+    "audit": lambda run, work: [
+        "scripts/audit_gate2_risks.py", "--input-dir", str(run), "--output-dir", str(work / "audit")],
+    "join_l1_fills": lambda run, work: [
+        "scripts/analyzers/join_l1_fills.py", "--orders", str(run / "l1_orders.csv"),
+        "--l1", str(run / "l1_snapshots.csv"), "--out-fees", str(work / "l1" / "fees.csv"),
+        "--out-kpi", str(work / "l1" / "kpi.json")],
+    "postrun_report": lambda run, work: [
+        "scripts/postrun_report.py", "--orders", str(run / "orders.csv"),
+        "--risk", str(run / "risk_snapshots.csv"), "--out", str(work / "report")],
+}
+
+
+def _peak_rss_mb(rusage) -> Optional[float]:
+    if rusage is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(rusage.ru_maxrss / scale, 1)
+
+
+def run_entry(argv: List[str], timeout_s: Optional[float] = None) -> Dict[str, object]:
+    """Run one entry point as a child process; return seconds, peak RSS and exit code."""
+    cmd = [sys.executable, "-X", "utf8"] + argv
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=str(REPO_ROOT), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    rusage = None
+    if hasattr(os, "wait4") and timeout_s is None:
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        stderr = proc.stderr.read() if proc.stderr else b""
+    else:
+        _, stderr = proc.communicate(timeout=timeout_s)
+    elapsed = time.perf_counter() - start
+    if proc.stderr:
+        proc.stderr.close()
+    result: Dict[str, object] = {
+        "seconds": round(elapsed, 4),
+        "peak_rss_mb": _peak_rss_mb(rusage),
+        "returncode": proc.returncode,
+    }
+    if proc.returncode != 0:
+        result["stderr_tail"] = stderr.decode("utf-8", errors="replace")[-500:]
+    return result
+
+
+def ensure_dataset(data_dir: Path, size: int, symbols: int, seed: int) -> Path:
+    run = data_dir / f"synth_{size}_s{symbols}_seed{seed}"
+    marker = run / "run_metadata.json"
+    try:
+        current = json.loads(marker.read_text(encoding="utf-8"))["synthetic"].get("format") == FORMAT_VERSION
+    except (OSError, ValueError, KeyError):
+        current = False
+    if not current:
+        shutil.rmtree(run, ignore_errors=True)
+        generate(run, size, symbols, seed)
+    return run
+
+
+def run_suite(sizes: Sequence[int], entries: Sequence[str], data_dir: Path, symbols: int = 3,
+              seed: int = 7, repeat: int = 1, work_dir: Optional[Path] = None) -> Dict[str, object]:
+    """Time ``entries`` per size; outputs go under ``work_dir`` (default: ``<data_dir>/../work``)."""
+    work_root = Path(work_dir) if work_dir is not None else Path(data_dir).parent / "work"
+    results: List[Dict[str, object]] = []
+    for size in sizes:
+        gen_start = time.perf_counter()
+        run = ensure_dataset(data_dir, size, symbols, seed)
+        gen_seconds = round(time.perf_counter() - gen_start, 3)
+        work = work_root / f"work_{size}"
+        shutil.rmtree(work, ignore_errors=True)
+        work.mkdir(parents=True)
+        for name in entries:
+            best: Optional[Dict[str, object]] = None
+            for _ in range(max(1, repeat)):
+                outcome = run_entry(ENTRIES[name](run, work))
+                if best is None or outcome["seconds"] < best["seconds"]:  # type: ignore[operator]
+                    best = outcome
+            assert best is not None
+            best.update({"entry": name, "fills": size, "generate_seconds": gen_seconds})
+            results.append(best)
+            print(f"{name:18s} fills={size:<9d} {best['seconds']:>9.3f}s  rss={best['peak_rss_mb']} MB"
+                  f"  rc={best['returncode']}")
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "symbols": symbols,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], threshold: float) -> List[Dict[str, object]]:
+    """Entries slower or larger than baseline by more than ``threshold`` (fraction)."""
+    base = {(r["entry"], r["fills"]): r for r in baseline.get("results", [])}  # type: ignore[union-attr]
+    regressions: List[Dict[str, object]] = []
+    for r in current.get("results", []):  # type: ignore[union-attr]
+        prev = base.get((r["entry"], r["fills"]))
+        if prev is None:
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            now_v, prev_v = r.get(metric), prev.get(metric)
+            if now_v is None or not prev_v:
+                continue
+            change = (now_v - prev_v) / prev_v
+            if change > threshold:
+                regressions.append({"entry": r["entry"], "fills": r["fills"], "metric": metric,
+                                    "baseline": prev_v, "current": now_v, "change": round(change, 3)})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark analyzer entry points on synthetic runs")
+    ap.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="Comma-separated fill counts")
+    ap.add_argument("--entries", default=",".join(ENTRIES), help="Comma-separated subset of: " + ", ".join(ENTRIES))
+    ap.add_argument("--symbols", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=1, help="Runs per entry; the fastest is kept")
+    ap.add_argument("--data", default=None, help="Dataset cache directory (default: <out>/data)")
+    ap.add_argument("--out", default="bench_results", help="Results directory")
+    ap.add_argument("--compare", default=None, help="Earlier results JSON to check for regressions")
+    ap.add_argument("--threshold", type=float, default=0.25, help="Regression threshold as a fraction")
+    args = ap.parse_args(argv)
+
+    entries = [e.strip() for e in args.entries.split(",") if e.strip()]
+    unknown = [e for e in entries if e not in ENTRIES]
+    if unknown:
+        ap.error(f"unknown entries: {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    out_dir = Path(args.out)
+    data_dir = Path(args.data) if args.data else out_dir / "data"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    report = run_suite(sizes, entries, data_dir, args.symbols, args.seed, args.repeat, out_dir / "work")
+    exit_code = 0
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")), args.threshold)
+        report["regressions"] = regressions
+        for reg in regressions:
+            print(f"REGRESSION {reg['entry']} fills={reg['fills']} {reg['metric']}: "
+                  f"{reg['baseline']} -> {reg['current']} (+{reg['change'] * 100:.0f}%)")
+        exit_code = 1 if regressions else 0
+
+    stamp = time.strftime("%Y%m%d_%H%M%S", time.gmtime())
+    text = json.dumps(report, indent=2)
+    (out_dir / f"bench_{stamp}.json").write_text(text, encoding="utf-8")
+    (out_dir / "latest.json").write_text(text, encoding="utf-8")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
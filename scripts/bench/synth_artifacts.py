@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic run artifacts at configurable scale.
+
+Writes a telemetry_run-style directory with the same files and headers the bot
+produces:
+
+  orders.csv            exact OrderLifecycleLogger header; REQUEST/ACK/FILL rows,
+                        with a configurable share of orders filled in two partials
+  risk_snapshots.csv    RiskSnapshotPersister header, one row per simulated minute
+  telemetry.csv         TelemetryCollector header (incl. memoryMB/gen0-2), per minute
+  trade_closes.log      TradeCloseLogger JSON lines, one per round trip
+  l1_snapshots.csv      Level1SnapshotLogger header; bid/ask at every request and fill
+  l1_orders.csv         fills in the join_l1_fills.py input layout
+  run_metadata.json
+
+Every file is written row by row, so generating 10M fills costs constant memory.
+The same ``--seed`` always gives byte-identical output.
+
+Usage:
+  python -m scripts.bench.synth_artifacts --out /tmp/synth_100k --fills 100000 --symbols 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+ORDERS_HEADER: Sequence[str] = (
+    "phase", "timestamp_iso", "epoch_ms", "orderId", "intendedPrice", "stopLoss", "execPrice", "theoretical_lots",
+    "theoretical_units", "requestedVolume", "filledSize", "slippage", "brokerMsg",
+    "client_order_id", "side", "action", "type", "status", "reason", "latency_ms", "price_requested", "price_filled",
+    "size_requested", "size_filled", "session", "host",
+    "order_id", "timestamp_request", "timestamp_ack", "timestamp_fill",
+    "symbol", "bid_at_request", "ask_at_request", "spread_pips_at_request", "bid_at_fill", "ask_at_fill",
+    "spread_pips_at_fill", "request_server_time", "fill_server_time",
+    "timestamp", "requested_lots", "commission_usd", "spread_cost_usd", "slippage_pips",
+)
+RISK_HEADER: Sequence[str] = (
+    "timestamp_utc", "equity", "balance", "open_pnl", "closed_pnl", "margin", "free_margin", "drawdown", "R_used",
+    "exposure", "long_exposure", "short_exposure", "net_exposure", "largest_pos_pnl", "largest_pos_pct",
+    "most_exposed_symbol", "most_exposed_volume", "total_positions", "long_positions", "short_positions",
+)
+TELEMETRY_HEADER: Sequence[str] = (
+    "timestamp_iso", "ticksPerSec", "signalsLastMinute", "ordersRequestedLastMinute", "ordersFilledLastMinute",
+    "errorsLastMinute", "memoryMB", "gen0", "gen1", "gen2",
+)
+L1_HEADER: Sequence[str] = ("timestamp_utc", "symbol", "bid", "ask", "spread_pips", "source_server")
+L1_ORDERS_HEADER: Sequence[str] = (
+    "order_id", "symbol", "side", "lots", "timestamp_submit", "timestamp_fill", "price_requested", "price_filled",
+)
+
+# symbol -> (start price, point size, point value per lot)
+SYMBOLS: Dict[str, tuple] = {
+    "EURUSD": (1.0850, 0.0001, 10.0),
+    "GBPUSD": (1.2650, 0.0001, 10.0),
+    "USDJPY": (149.50, 0.01, 6.7),
+    "XAUUSD": (2350.0, 0.01, 1.0),
+    "AUDUSD": (0.6550, 0.0001, 10.0),
+    "USDCAD": (1.3650, 0.0001, 7.3),
+    "NZDUSD": (0.6050, 0.0001, 10.0),
+    "USDCHF": (0.9050, 0.0001, 11.0),
+}
+LOT_UNITS = 100000
+# Bumped whenever a file name or layout changes, so cached benchmark datasets are regenerated
+FORMAT_VERSION = 2
+START = datetime(2025, 1, 6, 0, 0, tzinfo=timezone.utc)
+START_EQUITY = 10000.0
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat(timespec="microseconds").replace("+00:00", "Z")
+
+
+def _fmt(value: float, digits: int = 6) -> str:
+    return f"{value:.{digits}f}".rstrip("0").rstrip(".")
+
+
+def symbol_universe(n: int) -> List[str]:
+    names = list(SYMBOLS)
+    out = names[:n]
+    i = 0
+    while len(out) < n:
+        out.append(f"SYN{i:03d}")
+        i += 1
+    return out
+
+
+def _spec(symbol: str) -> tuple:
+    return SYMBOLS.get(symbol, (1.0, 0.0001, 10.0))
+
+
+class _Minutes:
+    """Per-minute accumulator for telemetry.csv / risk_snapshots.csv rows."""
+
+    def __init__(self, tel_writer, risk_writer, rng: random.Random):
+        self.tel = tel_writer
+        self.risk = risk_writer
+        self.rng = rng
+        self.minute = 0
+        self.requested = 0
+        self.filled = 0
+        self.gen = [0, 0, 0]
+        self.memory = 180.0
+        self.closed_pnl = 0.0
+        self.peak = START_EQUITY
+        self.exposure = 0.0
+
+    def advance_to(self, when: datetime) -> None:
+        target = int((when - START).total_seconds() // 60)
+        while self.minute < target:
+            self.minute += 1
+            ts = _iso(START + timedelta(minutes=self.minute))
+            self.gen[0] += self.rng.randint(5, 15)
+            self.gen[1] += self.rng.randint(0, 3)
+            self.gen[2] += 1 if self.rng.random() < 0.05 else 0
+            self.memory = max(120.0, self.memory + self.rng.uniform(-4.0, 5.0))
+            self.tel.writerow([ts, _fmt(self.rng.uniform(2.0, 12.0), 3), self.requested, self.requested,
+                               self.filled, 0, int(self.memory), *self.gen])
+            equity = START_EQUITY + self.closed_pnl
+            self.peak = max(self.peak, equity)
+            self.risk.writerow([ts, _fmt(equity, 2), _fmt(equity, 2), 0, _fmt(self.closed_pnl, 2), 0, _fmt(equity, 2),
+                                _fmt(self.peak - equity, 2), 0, _fmt(self.exposure, 2), _fmt(max(self.exposure, 0), 2),
+                                _fmt(max(-self.exposure, 0), 2), _fmt(self.exposure, 2), 0, 0, "", 0, 0, 0, 0])
+            self.requested = 0
+            self.filled = 0
+
+
+def generate(out_dir: Path, fills: int, symbols: int = 3, seed: int = 7, partial_rate: float = 0.1) -> Dict[str, object]:
+    """Write a synthetic run with at least ``fills`` FILL rows; returns a small manifest."""
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    universe = symbol_universe(max(1, symbols))
+    prices = {s: _spec(s)[0] for s in universe}
+
+    with (out_dir / "orders.csv").open("w", encoding="utf-8", newline="") as f_orders, \
+         (out_dir / "risk_snapshots.csv").open("w", encoding="utf-8", newline="") as f_risk, \
+         (out_dir / "telemetry.csv").open("w", encoding="utf-8", newline="") as f_tel, \
+         (out_dir / "trade_closes.log").open("w", encoding="utf-8", newline="\n") as f_closes, \
+         (out_dir / "l1_snapshots.csv").open("w", encoding="utf-8", newline="") as f_l1, \
+         (out_dir / "l1_orders.csv").open("w", encoding="utf-8", newline="") as f_l1o:
+        orders = csv.writer(f_orders)
+        orders.writerow(ORDERS_HEADER)
+        risk = csv.writer(f_risk)
+        risk.writerow(RISK_HEADER)
+        tel = csv.writer(f_tel)
+        tel.writerow(TELEMETRY_HEADER)
+        l1 = csv.writer(f_l1)
+        l1.writerow(L1_HEADER)
+        l1o = csv.writer(f_l1o)
+        l1o.writerow(L1_ORDERS_HEADER)
+        minutes = _Minutes(tel, risk, rng)
+
+        now = START
+        fill_rows = 0
+        order_seq = 0
+        trades = 0
+        open_pos: Dict[str, tuple] = {}  # symbol -> (side, units, entry price, entry order id)
+        col = {name: i for i, name in enumerate(ORDERS_HEADER)}
+
+        def order_row(phase: str, when: datetime, **values: object) -> None:
+            row: List[object] = [""] * len(ORDERS_HEADER)
+            row[col["phase"]] = phase
+            row[col["timestamp_iso"]] = _iso(when)
+            row[col["epoch_ms"]] = int(when.timestamp() * 1000)
+            row[col["status"]] = phase
+            row[col["host"]] = "SYNTH"
+            for key, value in values.items():
+                row[col[key]] = value
+            orders.writerow(row)
+
+        while fill_rows < fills:
+            now += timedelta(seconds=rng.uniform(1.0, 20.0))
+            minutes.advance_to(now)
+            symbol = universe[rng.randrange(len(universe))]
+            _, point, pv_lot = _spec(symbol)
+            prices[symbol] = max(point * 10, prices[symbol] + rng.gauss(0, 8) * point)
+            mid = prices[symbol]
+            spread = point * rng.uniform(0.5, 2.5)
+            bid, ask = mid - spread / 2, mid + spread / 2
+
+            position = open_pos.get(symbol)
+            if position is None:
+                side = "BUY" if rng.random() < 0.5 else "SELL"
+                units = rng.choice((1000, 2000, 5000, 10000, 20000, 50000, 100000))
+            else:
+                side = "SELL" if position[0] == "BUY" else "BUY"
+                units = position[1]
+            order_seq += 1
+            oid = f"SYN-{order_seq}"
+            lots = units / LOT_UNITS
+            px_req = ask if side == "BUY" else bid
+            digits = max(2, len(_fmt(point, 8).split(".")[-1]) + 1)
+
+            t_req = now
+            t_ack = t_req + timedelta(milliseconds=rng.uniform(5, 40))
+            latency = rng.lognormvariate(4.5, 0.5)
+            t_fill = t_req + timedelta(milliseconds=latency)
+            skew = timedelta(milliseconds=rng.uniform(-15, 15))
+            slip_pts = rng.gauss(0.2, 0.8)
+            px_fill = px_req + (1 if side == "BUY" else -1) * slip_pts * point
+
+            common = dict(orderId=oid, client_order_id=oid, order_id=oid, side=side, action=side, type="Market",
+                          symbol=symbol, requestedVolume=units, size_requested=units, theoretical_units=units,
+                          theoretical_lots=_fmt(lots), requested_lots=_fmt(lots), intendedPrice=_fmt(px_req, digits),
+                          price_requested=_fmt(px_req, digits), bid_at_request=_fmt(bid, digits),
+                          ask_at_request=_fmt(ask, digits), spread_pips_at_request=_fmt(spread / point, 3),
+                          timestamp_request=_iso(t_req), request_server_time=_iso(t_req + skew), session=symbol)
+            order_row("REQUEST", t_req, reason="OK", timestamp=_iso(t_req), **common)
+            order_row("ACK", t_ack, reason="OK", timestamp_ack=_iso(t_ack), timestamp=_iso(t_ack), **common)
+            minutes.requested += 1
+            quote = [symbol, _fmt(bid, digits), _fmt(ask, digits), _fmt(spread / point, 3), "SYNTH"]
+            l1.writerow([_iso(t_req), *quote])
+
+            parts = [units] if rng.random() >= partial_rate or units < 2000 else [units // 2, units - units // 2]
+            for i, part in enumerate(parts):
+                t_part = t_fill + timedelta(milliseconds=50 * i)
+                l1.writerow([_iso(t_part), *quote])
+                order_row("FILL", t_part, execPrice=_fmt(px_fill, digits), filledSize=part, size_filled=part,
+                          price_filled=_fmt(px_fill, digits), slippage=_fmt(px_fill - px_req, 8),
+                          slippage_pips=_fmt(slip_pts, 4), latency_ms=int(latency + 50 * i), reason="OK",
+                          timestamp_ack=_iso(t_ack), timestamp_fill=_iso(t_part), fill_server_time=_iso(t_part + skew),
+                          bid_at_fill=_fmt(bid, digits), ask_at_fill=_fmt(ask, digits),
+                          spread_pips_at_fill=_fmt(spread / point, 3), timestamp=_iso(t_part),
+                          commission_usd=_fmt(3.5 * part / LOT_UNITS, 4), **common)
+                fill_rows += 1
+            minutes.filled += 1
+            l1o.writerow([oid, symbol, side, _fmt(lots), _iso(t_req), _iso(t_fill),
+                          _fmt(px_req, digits), _fmt(px_fill, digits)])
+
+            if position is None:
+                open_pos[symbol] = (side, units, px_fill, oid)
+                minutes.exposure += units if side == "BUY" else -units
+            else:
+                entry_side, _, entry_px, entry_oid = open_pos.pop(symbol)
+                direction = 1 if entry_side == "BUY" else -1
+                pnl = (px_fill - entry_px) * direction * (units / LOT_UNITS) * pv_lot / point
+                minutes.closed_pnl += pnl
+                minutes.exposure -= units if entry_side == "BUY" else -units
+                trades += 1
+                payload = {"trade_id": f"T-{trades}", "order_id": oid, "entry_order_id": entry_oid, "symbol": symbol,
+                           "side": entry_side, "volume": units, "close_time": _iso(t_fill),
+                           "realized_pnl_usd": round(pnl, 6)}
+                f_closes.write(json.dumps({"timestamp_iso": _iso(t_fill), "payload": payload}) + "\n")
+        minutes.advance_to(now + timedelta(minutes=1))
+
+    end = now + timedelta(minutes=1)
+    metadata = {
+        "run_id": f"telemetry_run_synth_{seed}",
+        "start_time_iso": _iso(START),
+        "end_time_iso": _iso(end),
+        "mode": "paper",
+        "simulation": {"enabled": True},
+        "synthetic": {"fills": fill_rows, "orders": order_seq, "trades": trades, "symbols": universe,
+                      "seed": seed, "partial_rate": partial_rate, "format": FORMAT_VERSION},
+        "point_value_per_lot": {s: _spec(s)[2] for s in universe},
+        "config_snapshot": {"execution": {"pointValuePerLot": _spec(universe[0])[2]},
+                            "risk": {"LotSizeDefault": LOT_UNITS}},
+    }
+    (out_dir / "run_metadata.json").write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+    return metadata["synthetic"]  # type: ignore[return-value]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Generate deterministic synthetic run artifacts")
+    ap.add_argument("--out", required=True, help="Output run directory")
+    ap.add_argument("--fills", type=int, default=1000, help="Minimum number of FILL rows")
+    ap.add_argument("--symbols", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--partial-rate", type=float, default=0.1, help="Share of orders filled in two partials")
+    args = ap.parse_args(argv)
+    print(json.dumps(generate(Path(args.out), args.fills, args.symbols, args.seed, args.partial_rate), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,10 @@
+# botg-analyze: unified entry point for the Python post-run analyzers (scripts/botg_analyze.py)
+#   pwsh scripts/botg-analyze.ps1 <command> [args...]
+#   pwsh scripts/botg-analyze.ps1 --help
+$ErrorActionPreference = 'Stop'
+
+$repoRoot = Split-Path -Parent $PSScriptRoot
+$env:PYTHONPATH = if ($env:PYTHONPATH) { $repoRoot + [IO.Path]::PathSeparator + $env:PYTHONPATH } else { $repoRoot }
+
+& python -X utf8 -m scripts.botg_analyze @args
+exit $LASTEXITCODE
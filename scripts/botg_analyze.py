@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""botg-analyze: one entry point for the post-run analysis tools.
+
+  botg-analyze <command> [command args...]
+
+Each command runs the existing script's own CLI with its own arguments, so
+``botg-analyze audit -InputDir X -OutDir Y`` behaves exactly like
+``python scripts/audit_gate2_risks.py -InputDir X -OutDir Y``. Only the
+selected command's module is imported. The analysis modules load pandas,
+numpy and matplotlib lazily (analyzers/lazy_imports.py), so listing
+commands, ``<command> --help`` and the stdlib-only tools start in tens of
+milliseconds rather than the ~0.5 s a pandas import costs.
+``botg-analyze startup`` measures that per command against STARTUP_BUDGET_S.
+
+Usage:
+  python -m scripts.botg_analyze --help
+  python -m scripts.botg_analyze analyze --fills run/closed_trades_fifo_reconstructed.csv --outdir out
+  python -m scripts.botg_analyze startup --repeat 5
+  pwsh scripts/botg-analyze.ps1 validate --artifacts <run>
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import runpy
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+STARTUP_BUDGET_S = 0.5
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib")
+
+# command -> (module run as __main__, one-line summary)
+COMMANDS: Dict[str, Tuple[str, str]] = {
+    "reconstruct": ("path_issues.reconstruct_fifo", "FIFO-reconstruct closed trades from orders.csv"),
+    "pnl": ("scripts.compute_pnl_fifo", "FIFO P&L from orders.csv"),
+    "fill-breakdown": ("scripts.compute_fill_breakdown_stream", "Streaming fill breakdown by hour/side"),
+    "make-closes": ("scripts.make_closes_from_reconstructed", "Clean reconstructed trades and emit closes"),
+    "reconcile": ("scripts.analyzers.reconcile_trades", "Closed trades vs trade_closes.log"),
+    "validate": ("scripts.validate_artifacts", "Gate2 artifact validator"),
+    "audit": ("scripts.audit_gate2_risks", "Gate2 risk audit (R1-R12)"),
+    "analyze": ("scripts.analyze_postrun", "Slippage/latency percentiles, hourly fill rate, plots"),
+    "report": ("scripts.postrun_report", "report.pdf + kpi.json (needs matplotlib)"),
+    "l1-join": ("scripts.analyzers.join_l1_fills", "Fees and slippage against the L1 stream"),
+    "bars": ("scripts.analyzers.tick_bars", "OHLC bid/ask/mid bars from L1 ticks (M1/M5/M15)"),
+    "quote-quality": ("scripts.analyzers.quote_quality", "Spread, tick-gap and stale-quote analytics over L1 snapshots"),
+    "mtm": ("scripts.analyzers.mtm_equity", "Tick-resolution mark-to-market equity and drawdown"),
+    "exposure": ("scripts.analyzers.exposure_timeline", "Exact position/exposure timeline vs risk snapshots"),
+    "drawdown-mc": ("scripts.analyzers.drawdown_mc", "Block-bootstrap Monte Carlo of max drawdown"),
+    "cube": ("scripts.analyzers.kpi_cube", "One-pass KPI rollup cube (build/query slices)"),
+    "heatmap": ("scripts.analyzers.session_heatmap", "Hour-of-week heatmaps per symbol, mergeable across runs"),
+    "cadence": ("scripts.analyzers.writer_cadence", "Writer cadence/jitter/stalls vs order latency spikes"),
+    "risk-rollup": ("scripts.analyzers.risk_rollup", "Incremental 1s/1m/1h OHLC store of risk snapshots"),
+    "rolling": ("scripts.analyzers.rolling_metrics", "Rolling win rate/Sharpe, fill rate, p95 latency, drawdown"),
+    "pipeline": ("scripts.postrun_pipeline", "All postrun steps as one in-process DAG"),
+    "catalog": ("scripts.analyzers.run_catalog", "Index of run directories"),
+    "batch-kpis": ("scripts.analyzers.batch_kpis", "KPIs across many runs"),
+    "latency": ("scripts.analyzers.latency_decomposition", "Order latency decomposition"),
+    "lifecycle": ("scripts.analyzers.order_lifecycle", "Order lifecycle tracker"),
+    "phase-scan": ("scripts.analyzers.prefix_scan", "orders.csv rows per phase/hour from line prefixes"),
+    "pressure": ("scripts.analyzers.runtime_pressure", "GC/memory pressure vs latency and fills"),
+    "live-tail": ("scripts.analyzers.live_tail", "Live KPIs while a run is writing"),
+    "perf": ("scripts.analyzers.perf", "Show perf_summary.json stage timings"),
+    "cache": ("scripts.analyzers.result_cache", "Inspect or trim the result cache"),
+}
+
+
+def run_command(name: str, argv: Sequence[str]) -> int:
+    """Run ``name``'s module as ``__main__`` with ``argv``; returns its exit code."""
+    module, _ = COMMANDS[name]
+    saved = sys.argv
+    sys.argv = [f"botg-analyze {name}", *argv]
+    try:
+        with warnings.catch_warnings():
+            # re-running a module that is already imported (tests, the pipeline) is intended
+            warnings.filterwarnings("ignore", message=".*found in sys.modules", category=RuntimeWarning)
+            runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as exc:
+        if exc.code is None or isinstance(exc.code, int):
+            return exc.code or 0
+        print(exc.code, file=sys.stderr)
+        return 1
+    finally:
+        sys.argv = saved
+    return 0
+
+
+def measure_startup(commands: Sequence[str], repeat: int = 3) -> Dict[str, float]:
+    """Best-of-``repeat`` wall seconds for ``botg-analyze <command> --help`` in a fresh interpreter."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])))
+    results: Dict[str, float] = {}
+    for name in commands:
+        best = float("inf")
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-m", "scripts.botg_analyze", name, "--help"], cwd=REPO_ROOT, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+            best = min(best, time.perf_counter() - start)
+        results[name] = round(best, 4)
+    return results
+
+
+def _startup(argv: Sequence[str]) -> int:
+    ap = argparse.ArgumentParser(prog="botg-analyze startup", description="Time `<command> --help` for each command")
+    ap.add_argument("commands", nargs="*", help="Commands to time (default: all)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--budget", type=float, default=STARTUP_BUDGET_S, help="Seconds allowed per command")
+    args = ap.parse_args(argv)
+
+    unknown = [c for c in args.commands if c not in COMMANDS]
+    if unknown:
+        ap.error(f"unknown commands: {', '.join(unknown)}")
+    timings = measure_startup(args.commands or list(COMMANDS), args.repeat)
+    over = [name for name, seconds in timings.items() if seconds > args.budget]
+    for name, seconds in timings.items():
+        print(f"{name:16s} {seconds * 1000:8.1f} ms{'  OVER BUDGET' if name in over else ''}")
+    return 1 if over else 0
+
+
+def _usage() -> str:
+    lines = ["usage: botg-analyze <command> [args...]", "", "commands:"]
+    lines += [f"  {name:16s} {summary}" for name, (_, summary) in COMMANDS.items()]
+    lines += [f"  {'startup':16s} Time each command's start-up against the budget", "",
+              "Run `botg-analyze <command> --help` for a command's options."]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(_usage())
+        return 0 if argv else 2
+    name, rest = argv[0], argv[1:]
+    if name == "startup":
+        return _startup(rest)
+    if name not in COMMANDS:
+        print(f"botg-analyze: unknown command {name!r}\n\n{_usage()}", file=sys.stderr)
+        return 2
+    return run_command(name, rest)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,6 +3,11 @@ import sys, csv, argparse, json, time
 from pathlib import Path
 from datetime import datetime, timezone
 
+try:
+    from analyzers.perf import PerfRecorder, add_perf_args
+except ImportError:  # imported as scripts.compute_fill_breakdown_stream
+    from scripts.analyzers.perf import PerfRecorder, add_perf_args
+
 
 def parse_iso_to_hour_z(s: str) -> str:
     if not s:
@@ -100,6 +105,7 @@ def main():
     ap.add_argument('--orders', required=True)
     ap.add_argument('--outdir', required=True)
     ap.add_argument('--chunksize', type=int, default=100000)
+    add_perf_args(ap)
     args = ap.parse_args()
 
     orders = Path(args.orders)
@@ -140,6 +146,9 @@ def main():
         log(f"Orders file missing or empty: {orders}", level='error')
         return 20
 
+    perf = PerfRecorder('compute_fill_breakdown_stream', args.profile)
+    perf.start()
+    span = perf.begin('parse_aggregate')
     # Streaming read via csv module
     with orders.open('r', encoding='utf-8-sig', newline='') as f:
         reader = csv.DictReader(f)
@@ -189,6 +198,9 @@ def main():
                 elapsed = time.time() - start
                 log(f"Processed {total_rows} rows (chunk {chunk_idx}); elapsed {elapsed:.1f}s", rows=total_rows, chunk=chunk_idx, elapsed_sec=elapsed)
 
+    perf.end(span, rows=total_rows)
+
+    span = perf.begin('write')
     # Write outputs
     by_side_path = outdir / 'fill_rate_by_side.csv'
     with by_side_path.open('w', encoding='utf-8', newline='') as f:
@@ -203,6 +215,8 @@ def main():
         w.writeheader()
         for hour in sorted(by_hour.keys()):
             w.writerow(by_hour[hour].as_row(hour, is_hour=True))
+    perf.end(span)
+    perf.stop()
 
     elapsed = time.time() - start
     # Compute chunks_processed based on chunksize
@@ -221,6 +235,7 @@ def main():
         }, indent=2), encoding='utf-8')
     except Exception:
         pass
+    perf.write(Path(args.perf_dir) if args.perf_dir else outdir)
     return 0
 
 
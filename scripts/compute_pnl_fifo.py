@@ -7,6 +7,13 @@ from collections import deque, defaultdict
 from datetime import datetime
 from pathlib import Path
 
+try:
+    from analyzers.perf import PerfRecorder, add_perf_args
+    from analyzers.trade_closes import iter_trade_closes
+except ImportError:  # imported as scripts.compute_pnl_fifo
+    from scripts.analyzers.perf import PerfRecorder, add_perf_args
+    from scripts.analyzers.trade_closes import iter_trade_closes
+
 # Helper: parse ISO timestamp safely
 def parse_dt(s):
     try:
@@ -172,6 +179,7 @@ def main():
     ap.add_argument('--commission', type=float, default=0.0, help='Commission per fill (USD), applied at exit side')
     ap.add_argument('--closes', type=str, default=None, help='Optional path to trade_closes.log (jsonl) for reconciliation')
     ap.add_argument('--meta', type=str, default=None, help='Optional path to run_metadata.json for metadata and PVU')
+    add_perf_args(ap)
     args = ap.parse_args()
 
     log_dir = Path((Path.cwd() / 'logs'))
@@ -204,10 +212,16 @@ def main():
         except Exception:
             pass
 
-    rows = read_orders(orders_path)
-    closed, unmatched = fifo_pnl(rows, point_value_per_unit=args.pvu, default_commission=args.commission)
+    perf = PerfRecorder('compute_pnl_fifo', args.profile)
+    perf.start()
+    with perf.stage('load') as span:
+        rows = read_orders(orders_path)
+        span.rows = len(rows)
+    with perf.stage('match', rows=len(rows)):
+        closed, unmatched = fifo_pnl(rows, point_value_per_unit=args.pvu, default_commission=args.commission)
 
     out_path = Path(args.out) if args.out else (orders_path.parent / 'closed_trades_fifo.csv')
+    span = perf.begin('write', rows=len(closed))
     # Write CSV
     if closed:
         cols = list(closed[0].keys())
@@ -221,6 +235,8 @@ def main():
             w = csv.writer(f)
             w.writerow(['side_closed','entry_orderid','entry_time','entry_price','exit_orderid','exit_time','exit_price','size','pnl_price_units','realized_usd','commission','net_realized_usd'])
 
+    perf.end(span)
+
     # Summary JSON
     total = sum(r['net_realized_usd'] for r in closed) if closed else 0.0
     summary = {
@@ -233,24 +249,26 @@ def main():
         'unmatched_fills_count': unmatched,
     }
     if args.closes and Path(args.closes).exists():
+        span = perf.begin('closes')
         try:
-            rc_lines = Path(args.closes).read_text(encoding='utf-8').splitlines()
-            rc = [json.loads(l) for l in rc_lines if l.strip()]
-            # New TradeCloseLogger writes { timestamp_iso, payload: {...} }
-            def extract_realized(obj):
-                if isinstance(obj, dict):
-                    if 'payload' in obj and isinstance(obj['payload'], dict):
-                        return float(obj['payload'].get('realized_pnl_usd', 0.0) or 0.0)
-                    return float(obj.get('realized_pnl_usd', 0.0) or 0.0)
-                return 0.0
-            summary['trade_closes_count'] = len(rc)
-            summary['trade_closes_sum_usd'] = sum(extract_realized(x) for x in rc)
+            count = 0
+            total_closes = 0.0
+            for rec in iter_trade_closes(args.closes, require_pnl=False):
+                count += 1
+                # Same definition as always: TradeCloseLogger's realized_pnl_usd only
+                if rec.pnl_field == 'realized_pnl_usd':
+                    total_closes += rec.pnl or 0.0
+            summary['trade_closes_count'] = count
+            summary['trade_closes_sum_usd'] = total_closes
         except Exception:
             pass
+        perf.end(span, rows=summary.get('trade_closes_count'))
     if args.meta and Path(args.meta).exists():
         summary['run_metadata'] = str(Path(args.meta))
     with (out_path.parent / 'pnl_summary.json').open('w', encoding='utf-8') as jf:
         json.dump(summary, jf, indent=2)
+    perf.stop()
+    perf.write(Path(args.perf_dir) if args.perf_dir else out_path.parent)
 
     print(json.dumps(summary, indent=2))
 
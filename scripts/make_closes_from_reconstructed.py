@@ -1,16 +1,24 @@
 #!/usr/bin/env python3
 # scripts/make_closes_from_reconstructed.py (no pandas)
-import sys, csv, json, argparse
+import sys, csv, json, argparse, hashlib, os, sqlite3, tempfile
 from pathlib import Path
 from datetime import datetime, timezone
 
+# Dedup keeps a 128-bit fingerprint per unique key instead of the key tuple itself.
+# A 16-byte digest in a set costs ~100 bytes; above the budget, fingerprints spill to SQLite.
+FINGERPRINT_BYTES = 16
+FINGERPRINT_ENTRY_BYTES = 100
+
 # Accept --artifact and optional --input; default to using reconstructed file if present,
 # otherwise fall back to closed_trades_fifo.csv inside the artifact directory.
-def parse_args():
+def parse_args(argv=None):
     p = argparse.ArgumentParser(description='Prepare cleaned closes and trade_closes CSV/JSONL for reconcile.')
     p.add_argument('--artifact', default='.', help='Artifact directory containing CSVs')
     p.add_argument('--input', default=None, help='Explicit input CSV (overrides autodetect)')
-    return p.parse_args()
+    p.add_argument('--dedup-mem-mb', type=float, default=256.0,
+                   help='In-memory fingerprint budget in MB before spilling to an on-disk SQLite table')
+    p.add_argument('--spill-dir', default=None, help='Directory for the spill table (default: system temp)')
+    return p.parse_args(argv)
 
 
 def to_iso_utc(val: str) -> str:
@@ -28,8 +36,69 @@ def to_iso_utc(val: str) -> str:
         return s
 
 
-def main():
-    args = parse_args()
+def fingerprint(values) -> bytes:
+    """Fixed-size 128-bit hash of the normalized key values."""
+    h = hashlib.blake2b(digest_size=FINGERPRINT_BYTES)
+    for v in values:
+        h.update(v.encode('utf-8'))
+        h.update(b'\x1f')
+    return h.digest()
+
+
+class FingerprintSet:
+    """Set of fingerprints held in memory up to max_keys, then spilled to a temporary SQLite table."""
+
+    def __init__(self, max_keys: int, spill_dir=None):
+        self.max_keys = max(1, int(max_keys))
+        self.spill_dir = spill_dir
+        self.mem = set()
+        self.spilled = 0
+        self._db = None
+        self._db_path = None
+
+    def __len__(self):
+        return len(self.mem) + self.spilled
+
+    def add(self, fp: bytes) -> bool:
+        """Insert fp; return False when it was already present."""
+        if fp in self.mem:
+            return False
+        if self._db is not None and self._db.execute('SELECT 1 FROM fp WHERE k = ?', (fp,)).fetchone():
+            return False
+        self.mem.add(fp)
+        if len(self.mem) >= self.max_keys:
+            self._spill()
+        return True
+
+    def _spill(self):
+        if self._db is None:
+            fd, name = tempfile.mkstemp(prefix='dedup_', suffix='.sqlite', dir=self.spill_dir)
+            os.close(fd)
+            self._db_path = Path(name)
+            self._db = sqlite3.connect(name)
+            self._db.execute('PRAGMA journal_mode=OFF')
+            self._db.execute('PRAGMA synchronous=OFF')
+            self._db.execute('CREATE TABLE fp (k BLOB PRIMARY KEY) WITHOUT ROWID')
+        # Sorted insert keeps the B-tree build sequential
+        self._db.executemany('INSERT OR IGNORE INTO fp (k) VALUES (?)', ((k,) for k in sorted(self.mem)))
+        self._db.commit()
+        self.spilled += len(self.mem)
+        self.mem.clear()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._db_path is not None:
+            try:
+                self._db_path.unlink()
+            except OSError:
+                pass
+            self._db_path = None
+
+
+def main(argv=None):
+    args = parse_args(argv)
     art = Path(args.artifact)
     art.mkdir(parents=True, exist_ok=True)
 
@@ -50,7 +119,9 @@ def main():
     print('Loading', inp)
 
     rows_in = 0
-    seen_keys = set()
+    rows_cleaned = 0
+    seen_keys = FingerprintSet(args.dedup_mem_mb * 1024 * 1024 / FINGERPRINT_ENTRY_BYTES, args.spill_dir)
+    # fingerprint -> [key values, count]; only duplicated keys keep their values
     dup_counts = {}
     key_cols = ['open_time','close_time','open_price','close_price','pnl','side','volume','symbol']
 
@@ -59,41 +130,51 @@ def main():
     CLOSES_CSV = art / 'trade_closes_like_from_reconstructed.csv'
     CLOSES_JSONL = art / 'trade_closes_like_from_reconstructed.jsonl'
 
-    with inp.open('r', encoding='utf-8-sig', newline='') as fin, \
-         CLEAN.open('w', encoding='utf-8', newline='') as fclean, \
-         CLOSES_CSV.open('w', encoding='utf-8', newline='') as fcsv, \
-         CLOSES_JSONL.open('w', encoding='utf-8') as fjsonl:
-        reader = csv.DictReader(fin)
-        cols = reader.fieldnames or []
-        wclean = csv.DictWriter(fclean, fieldnames=cols)
-        wclean.writeheader()
-
-        wclose = csv.writer(fcsv)
-        wclose.writerow(['trade_id','close_time','pnl'])
-
-        trade_id_col = 'trade_id' if 'trade_id' in cols else None
-        close_time_col = 'close_time' if 'close_time' in cols else None
-        pnl_col = 'pnl' if 'pnl' in cols else ('net_realized_usd' if 'net_realized_usd' in cols else None)
-
-        pnl_sum = 0.0
-        for r in reader:
-            rows_in += 1
-            key = tuple((c, (r.get(c) or '').strip()) for c in key_cols)
-            if key in seen_keys:
-                dup_counts[key] = dup_counts.get(key, 1) + 1
-                continue
-            seen_keys.add(key)
-            wclean.writerow(r)
-
-            tid = str(r.get(trade_id_col) or '') if trade_id_col else ''
-            ct = to_iso_utc(r.get(close_time_col) or '') if close_time_col else ''
-            try:
-                pnl_v = float(r.get(pnl_col)) if pnl_col and r.get(pnl_col) not in (None, '') else 0.0
-            except Exception:
-                pnl_v = 0.0
-            pnl_sum += pnl_v
-            wclose.writerow([tid, ct, f"{pnl_v:.10f}"])
-            fjsonl.write(json.dumps({"trade_id": tid, "close_time": ct, "pnl": pnl_v}, ensure_ascii=False) + '\n')
+    try:
+        with inp.open('r', encoding='utf-8-sig', newline='') as fin, \
+             CLEAN.open('w', encoding='utf-8', newline='') as fclean, \
+             CLOSES_CSV.open('w', encoding='utf-8', newline='') as fcsv, \
+             CLOSES_JSONL.open('w', encoding='utf-8') as fjsonl:
+            reader = csv.DictReader(fin)
+            cols = reader.fieldnames or []
+            wclean = csv.DictWriter(fclean, fieldnames=cols)
+            wclean.writeheader()
+
+            wclose = csv.writer(fcsv)
+            wclose.writerow(['trade_id','close_time','pnl'])
+
+            trade_id_col = 'trade_id' if 'trade_id' in cols else None
+            close_time_col = 'close_time' if 'close_time' in cols else None
+            pnl_col = 'pnl' if 'pnl' in cols else ('net_realized_usd' if 'net_realized_usd' in cols else None)
+
+            pnl_sum = 0.0
+            for r in reader:
+                rows_in += 1
+                values = [(r.get(c) or '').strip() for c in key_cols]
+                fp = fingerprint(values)
+                if not seen_keys.add(fp):
+                    group = dup_counts.get(fp)
+                    if group is None:
+                        dup_counts[fp] = [values, 2]
+                    else:
+                        group[1] += 1
+                    continue
+                rows_cleaned += 1
+                wclean.writerow(r)
+
+                tid = str(r.get(trade_id_col) or '') if trade_id_col else ''
+                ct = to_iso_utc(r.get(close_time_col) or '') if close_time_col else ''
+                try:
+                    pnl_v = float(r.get(pnl_col)) if pnl_col and r.get(pnl_col) not in (None, '') else 0.0
+                except Exception:
+                    pnl_v = 0.0
+                pnl_sum += pnl_v
+                wclose.writerow([tid, ct, f"{pnl_v:.10f}"])
+                fjsonl.write(json.dumps({"trade_id": tid, "close_time": ct, "pnl": pnl_v}, ensure_ascii=False) + '\n')
+    finally:
+        # Always drop the spill table, even when the input is malformed
+        spilled = seen_keys.spilled
+        seen_keys.close()
 
     print('Wrote cleaned closed trades:', CLEAN)
     print('Wrote closes CSV:', CLOSES_CSV)
@@ -104,20 +185,21 @@ def main():
             out_cols = key_cols + ['count']
             w = csv.writer(f)
             w.writerow(out_cols)
-            for key, cnt in sorted(dup_counts.items(), key=lambda kv: kv[1], reverse=True):
-                vals = [v for (_, v) in key] + [cnt]
-                w.writerow(vals)
+            for vals, cnt in sorted(dup_counts.values(), key=lambda g: g[1], reverse=True):
+                w.writerow(vals + [cnt])
         print('Wrote duplicate groups:', DUPS, 'count:', len(dup_counts))
     else:
         print('No exact duplicates found on key columns')
 
     summary = {
         'rows_in': rows_in,
-        'rows_cleaned': len(seen_keys),
+        'rows_cleaned': rows_cleaned,
         'pnl_sum_cleaned': pnl_sum,
         'duplicate_groups': len(dup_counts),
+        'fingerprints_spilled': spilled,
     }
     print('SUMMARY:', summary)
+    return summary
 
 
 if __name__ == '__main__':
@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""In-process postrun pipeline: the postrun steps as a DAG in one interpreter.
+
+Replaces the chain of separate ``python`` launches in the PowerShell wrappers
+(postrun_collect.ps1, ci_reconstruct_validate.ps1, postrun_analyze.ps1). Each
+launch paid interpreter start-up, a pandas import and a fresh parse of the
+same CSVs.
+
+Steps and dependencies:
+
+  reconstruct  -> make_closes -> reconcile  (with --with-l1: M1/M5/M15 bars first, for MAE/MFE)
+  reconstruct  -> validate
+  reconstruct  -> audit                     (after rollup when it runs)
+  reconstruct  -> plots                     (analyze_postrun, optional)
+  reconstruct  -> cube                      (kpi_cube, optional)
+  reconstruct  -> heatmap                   (session_heatmap, optional)
+  rollup                                    (risk_rollup, optional, incremental)
+  cadence                                   (writer_cadence, optional)
+  report                                    (postrun_report, optional, needs matplotlib; after rollup)
+  l1                                        (join_l1_fills, optional, --with-l1)
+  mtm                                       (mtm_equity, optional, --with-l1)
+  quotes                                    (quote_quality, optional, --with-l1)
+
+Ready steps run concurrently on a thread pool. Steps that drive matplotlib
+share a lock, because pyplot state is process-global. An ``ArtifactStore``
+parses each run file once (csv rows for reconstruct, one DataFrame per file
+for the audit and the report) and hands copies to every step that needs it.
+A failed or skipped step skips its dependents; ``after`` steps (the rollup
+before the audit and the report) only order the run. Optional steps never fail the
+pipeline; a required step that is skipped (e.g. reconcile without
+trade_closes.log) does not fail it either.
+
+Usage:
+  python -m scripts.postrun_pipeline --run-dir D:/botg/logs/artifacts/telemetry_run_X
+  python scripts/postrun_pipeline.py --run-dir <run> --out <run>/postrun --workers 4 --with-l1
+
+Outputs (written to --out, default <run-dir>/postrun):
+  - <run-dir>/closed_trades_fifo_reconstructed.csv  (as postrun_collect.ps1 does)
+  - closes/      make_closes_from_reconstructed.py outputs
+  - reconcile/   reconcile_mismatches.csv, reconcile_drift.csv, reconcile_summary.json
+  - validation.json
+  - kpi_cube.json.gz  symbol x side x hour x reason x session rollup (kpi_cube.py)
+  - session_heatmap.npz, heatmaps/  hour-of-week histograms per symbol and their weekday x hour grids
+  - <run-dir>/risk_rollup/  1s/1m/1h OHLC of risk_snapshots.csv, kept beside its source (risk_rollup.py)
+  - audit/       audit_gate2_risks.py reports
+  - writer_cadence/  write intervals, stalls and stall-overlapped latency spikes per writer
+  - plots/       analyze_postrun.py outputs
+  - report/      report.pdf, kpi.json
+  - l1/          fees_slippage.csv, kpi_slippage.json
+  - bars/        tick_bars.py outputs (--with-l1 and an L1 tick log present)
+  - mtm/         tick-resolution equity curve, intratrade episodes, mtm_summary.json
+  - quote_quality/  spread/gap/stale-quote tables per symbol x hour x source_server
+  - pipeline_summary.json   per-step status, wall/CPU seconds, sum of steps vs end to end
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from scripts.analyzers.perf import PerfRecorder, Span, add_perf_args
+except ImportError:  # run as scripts/postrun_pipeline.py without the repo root on sys.path
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from scripts.analyzers.perf import PerfRecorder, Span, add_perf_args
+
+RECONSTRUCTED = "closed_trades_fifo_reconstructed.csv"
+# Level1SnapshotLogger default name first, then the legacy l1_stream.csv
+L1_TICK_FILES: Sequence[str] = ("l1_snapshots.csv", "l1_stream.csv")
+
+
+class ArtifactStore:
+    """Parse each run artifact once and share it across steps (thread-safe, lazy)."""
+
+    def __init__(self, run_dir: Path):
+        self.run_dir = Path(run_dir)
+        self._values: Dict[Tuple[str, str], Any] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.loads: Dict[str, float] = {}
+        self.hits = 0
+
+    def path(self, name: str) -> Path:
+        return self.run_dir / name
+
+    def _once(self, kind: str, name: str, loader: Callable[[Path], Any]) -> Any:
+        key = (kind, name)
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key in self._values:
+                self.hits += 1
+                return self._values[key]
+            start = time.perf_counter()
+            value = self._values[key] = loader(self.path(name))
+            self.loads[f"{kind}:{name}"] = round(time.perf_counter() - start, 4)
+            return value
+
+    def rows(self, name: str) -> Tuple[List[str], List[Dict[str, str]]]:
+        """(fieldnames, rows) via csv.DictReader; callers must not mutate the rows."""
+        def load(path: Path) -> Tuple[List[str], List[Dict[str, str]]]:
+            with path.open("r", encoding="utf-8-sig", newline="") as fh:
+                reader = csv.DictReader(fh)
+                return list(reader.fieldnames or []), list(reader)
+        return self._once("rows", name, load)
+
+    def frame(self, name: str):
+        """Shared pandas DataFrame for ``name``; callers that add columns must ``.copy()``."""
+        def load(path: Path):
+            import pandas as pd
+            return pd.read_csv(path, on_bad_lines="skip")
+        return self._once("frame", name, load)
+
+    def frame_for_path(self, path: Path):
+        """Adapter for loaders keyed by full path (``Gate2RiskAuditor.frame_loader``)."""
+        path = Path(path)
+        if path.parent.resolve() == self.run_dir.resolve():
+            return self.frame(path.name)
+        import pandas as pd
+        return pd.read_csv(path)
+
+    def stats(self) -> Dict[str, object]:
+        return {"loads_s": self.loads, "shared_hits": self.hits}
+
+
+class StepSkipped(Exception):
+    """Raised by a step that cannot run here (missing input or optional package)."""
+
+
+@dataclass
+class Context:
+    run_dir: Path
+    out_dir: Path
+    store: ArtifactStore
+    with_l1: bool = False
+
+
+@dataclass
+class Step:
+    name: str
+    func: Callable[[Context], Optional[Dict[str, object]]]
+    deps: Sequence[str] = ()
+    optional: bool = False
+    after: Sequence[str] = ()  # ordering only: wait for these, but run even if they fail or are skipped
+    resources: Sequence[str] = ()
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str  # ok | failed | skipped
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    detail: Dict[str, object] = field(default_factory=dict)
+    error: str = ""
+
+
+# -- steps --------------------------------------------------------------------
+
+def step_reconstruct(ctx: Context) -> Dict[str, object]:
+    from path_issues.reconstruct_fifo import (build_rows, fills_from_rows, load_metadata, read_closes_log,
+                                              reconstruct, write_output)
+
+    fieldnames, rows = ctx.store.rows("orders.csv")
+    fills = fills_from_rows(fieldnames, rows, "FILL")
+    closes = ctx.store.path("trade_closes.log")
+    meta = ctx.store.path("run_metadata.json")
+    closes_lookup = read_closes_log(str(closes) if closes.exists() else None)
+    bars_dir = _build_bars(ctx) if ctx.with_l1 else None
+    matches = reconstruct(fills)
+    out_rows = build_rows(matches, closes_lookup, load_metadata(str(meta) if meta.exists() else None),
+                          str(bars_dir) if bars_dir else None)
+    write_output(ctx.run_dir / RECONSTRUCTED, out_rows)
+    return {"fills": len(fills), "trades": len(out_rows), "bars": bool(bars_dir)}
+
+
+def _build_bars(ctx: Context) -> Optional[Path]:
+    """Bars for MAE/MFE from the run's L1 tick log, or None when the run has none."""
+    from scripts.analyzers.tick_bars import load_timeframes, run as build_bars
+
+    ticks = next((p for p in map(ctx.store.path, L1_TICK_FILES) if p.exists()), None)
+    if ticks is None:
+        return None
+    build_bars(ticks, ctx.out_dir / "bars", load_timeframes())
+    return ctx.out_dir / "bars"
+
+
+def step_make_closes(ctx: Context) -> Dict[str, object]:
+    from scripts.make_closes_from_reconstructed import main as make_closes
+
+    return make_closes(["--artifact", str(ctx.out_dir / "closes"), "--input", str(ctx.run_dir / RECONSTRUCTED)])
+
+
+def step_reconcile(ctx: Context) -> Dict[str, object]:
+    from scripts.analyzers.reconcile_trades import reconcile
+
+    closes = ctx.store.path("trade_closes.log")
+    if not closes.exists():
+        raise StepSkipped("no trade_closes.log")
+    summary = reconcile(ctx.out_dir / "closes" / "closed_trades_fifo_reconstructed_cleaned.csv", closes,
+                        ctx.out_dir / "reconcile")
+    return {k: summary[k] for k in ("matched", "pnl_mismatch", "missing_close", "extra_close") if k in summary}
+
+
+def step_validate(ctx: Context) -> Dict[str, object]:
+    from scripts.validate_artifacts import validate_artifacts
+
+    result = validate_artifacts(ctx.run_dir)
+    (ctx.out_dir / "validation.json").write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    return {"pass": result.get("pass"), "reasons": result.get("reasons")}
+
+
+def step_audit(ctx: Context) -> Dict[str, object]:
+    from scripts.audit_gate2_risks import Gate2RiskAuditor
+
+    # Runs after the rollup step, so R2/R9 read its meta.json when the store is current
+    auditor = Gate2RiskAuditor(str(ctx.run_dir), str(ctx.out_dir / "audit"), frame_loader=ctx.store.frame_for_path)
+    results = auditor.audit_all()
+    return {"ng": sorted(k for k, v in results.items() if v["status"] == "NG")}
+
+
+def step_plots(ctx: Context) -> Dict[str, object]:
+    from scripts.analyze_postrun import main as analyze_postrun
+
+    analyze_postrun(["--fills", str(ctx.run_dir / RECONSTRUCTED), "--outdir", str(ctx.out_dir / "plots"), "--no-cache"])
+    return {}
+
+
+def step_cube(ctx: Context) -> Dict[str, object]:
+    from scripts.analyzers.kpi_cube import CUBE_FILE, KpiCube
+
+    cube = KpiCube()
+    cube.add_orders(ctx.store.rows("orders.csv")[1])
+    trades = ctx.run_dir / RECONSTRUCTED
+    if trades.exists():
+        with trades.open("r", encoding="utf-8-sig", newline="") as fh:
+            cube.add_trades(csv.DictReader(fh))
+    cube.save(ctx.out_dir / CUBE_FILE)
+    return {"cells": len(cube.cells)}
+
+
+def step_heatmap(ctx: Context) -> Dict[str, object]:
+    from scripts.analyzers.session_heatmap import SessionHeatmap, render
+
+    if not ctx.store.path("orders.csv").exists():
+        raise StepSkipped("no orders.csv")
+    heat = SessionHeatmap()
+    heat.add_orders(ctx.store.frame("orders.csv"))
+    trades = ctx.run_dir / RECONSTRUCTED
+    if trades.exists():
+        import pandas as pd
+        heat.add_trades(pd.read_csv(trades, dtype=str, on_bad_lines="skip"))
+    heat.runs.append(ctx.run_dir.resolve().as_posix())
+    heat.save(ctx.out_dir / "session_heatmap.npz")
+    render(heat, ctx.out_dir / "heatmaps")
+    return {"symbols": len(heat.symbols)}
+
+
+def step_rollup(ctx: Context) -> Dict[str, object]:
+    from scripts.analyzers.risk_rollup import RiskRollup
+
+    risk = ctx.store.path("risk_snapshots.csv")
+    if not risk.exists():
+        raise StepSkipped("no risk_snapshots.csv")
+    rollup = RiskRollup(risk)
+    added = rollup.update()
+    return {"added": added, "snapshots": rollup.meta.get("snapshots", 0)}
+
+
+def step_cadence(ctx: Context) -> Dict[str, object]:
+    from scripts.analyzers.writer_cadence import run as writer_cadence
+
+    summary = writer_cadence(ctx.run_dir, ctx.out_dir / "writer_cadence")
+    if not summary["files"]:
+        raise StepSkipped("no writer files")
+    return {"verdict": summary["latency"]["verdict"],
+            "stalls": sum(f.get("stalls", 0) for f in summary["files"].values())}
+
+
+def step_report(ctx: Context) -> Dict[str, object]:
+    from scripts.analyzers.lazy_imports import missing_modules
+    from scripts.postrun_report import REQUIRED_PACKAGES, TelemetryAnalyzer
+
+    missing = missing_modules(*REQUIRED_PACKAGES)
+    if missing:
+        raise StepSkipped(f"postrun_report needs {', '.join(missing)}")
+
+    analyzer = TelemetryAnalyzer(ctx.store.path("orders.csv"), ctx.store.path("risk_snapshots.csv"))
+    analyzer.orders_df = ctx.store.frame("orders.csv").copy()
+    analyzer.risk_df = ctx.store.frame("risk_snapshots.csv").copy()
+    if not analyzer.run(ctx.out_dir / "report"):
+        raise RuntimeError("postrun_report failed")
+    return {}
+
+
+def step_l1(ctx: Context) -> Dict[str, object]:
+    from scripts.analyzers.join_l1_fills import main as join_l1_fills
+
+    ticks = next((p for p in map(ctx.store.path, L1_TICK_FILES) if p.exists()), None)
+    if ticks is None:
+        raise StepSkipped("no L1 tick log")
+    orders = ctx.store.path("l1_orders.csv")
+    if not orders.exists():
+        orders = ctx.store.path("orders.csv")
+    out = ctx.out_dir / "l1"
+    out.mkdir(parents=True, exist_ok=True)
+    join_l1_fills(str(orders), str(ticks),
+                  str(out / "fees_slippage.csv"), str(out / "kpi_slippage.json"))
+    return {}
+
+
+def step_mtm(ctx: Context) -> Dict[str, object]:
+    from scripts.analyzers.mtm_equity import run as mtm_equity
+
+    ticks = next((p for p in map(ctx.store.path, L1_TICK_FILES) if p.exists()), None)
+    if ticks is None:
+        raise StepSkipped("no L1 tick log")
+    meta = ctx.store.path("run_metadata.json")
+    summary = mtm_equity(ctx.store.path("orders.csv"), ticks, ctx.out_dir / "mtm", meta if meta.exists() else None)
+    return {k: summary.get(k) for k in ("final_equity_net", "max_drawdown", "worst_intratrade")}
+
+
+def step_quotes(ctx: Context) -> Dict[str, object]:
+    from scripts.analyzers.quote_quality import run as quote_quality
+
+    ticks = next((p for p in map(ctx.store.path, L1_TICK_FILES) if p.exists()), None)
+    if ticks is None:
+        raise StepSkipped("no L1 tick log")
+    summary = quote_quality(ticks, ctx.out_dir / "quote_quality")
+    return {"rows": summary["rows"], "streams": len(summary["streams"])}
+
+
+def default_steps(with_l1: bool = False) -> List[Step]:
+    steps = [
+        Step("reconstruct", step_reconstruct),
+        Step("make_closes", step_make_closes, deps=("reconstruct",)),
+        Step("reconcile", step_reconcile, deps=("make_closes",)),
+        Step("validate", step_validate, deps=("reconstruct",)),
+        Step("audit", step_audit, deps=("reconstruct",), after=("rollup",)),
+        Step("plots", step_plots, deps=("reconstruct",), optional=True, resources=("matplotlib",)),
+        Step("cube", step_cube, deps=("reconstruct",), optional=True),
+        Step("heatmap", step_heatmap, deps=("reconstruct",), optional=True, resources=("matplotlib",)),
+        Step("rollup", step_rollup, optional=True),
+        Step("cadence", step_cadence, optional=True),
+        Step("report", step_report, optional=True, resources=("matplotlib",), after=("rollup",)),
+    ]
+    if with_l1:
+        steps.append(Step("l1", step_l1, optional=True))
+        steps.append(Step("mtm", step_mtm, optional=True))
+        steps.append(Step("quotes", step_quotes, optional=True))
+    return steps
+
+
+# -- scheduler ----------------------------------------------------------------
+
+def _check_graph(steps: Sequence[Step]) -> None:
+    names = {s.name for s in steps}
+    if len(names) != len(steps):
+        raise ValueError("duplicate step names")
+    for step in steps:
+        unknown = set(step.deps) - names
+        if unknown:
+            raise ValueError(f"step {step.name} depends on unknown steps: {sorted(unknown)}")
+    done: set = set()
+    remaining = list(steps)
+    while remaining:
+        ready = [s for s in remaining if set(s.deps) | (set(s.after) & names) <= done]
+        if not ready:
+            raise ValueError(f"dependency cycle among: {sorted(s.name for s in remaining)}")
+        done.update(s.name for s in ready)
+        remaining = [s for s in remaining if s.name not in done]
+
+
+def _execute(step: Step, ctx: Context, locks: Dict[str, threading.Lock]) -> StepResult:
+    held = [locks[r] for r in sorted(step.resources)]
+    for lock in held:
+        lock.acquire()
+    wall0 = time.perf_counter()
+    cpu0 = time.thread_time()
+    try:
+        detail = step.func(ctx) or {}
+        status, error = "ok", ""
+    except StepSkipped as exc:
+        detail, status, error = {}, "skipped", str(exc)
+    except SystemExit as exc:  # wrapped script mains exit on bad input
+        detail, status, error = {}, ("ok" if not exc.code else "failed"), ("" if not exc.code else f"exit {exc.code}")
+    except Exception as exc:
+        detail, status, error = {}, "failed", f"{type(exc).__name__}: {exc}"
+    finally:
+        for lock in reversed(held):
+            lock.release()
+    return StepResult(step.name, status, round(time.perf_counter() - wall0, 4), round(time.thread_time() - cpu0, 4),
+                      detail, error)
+
+
+def run_steps(steps: Sequence[Step], ctx: Context, workers: int = 4) -> Dict[str, StepResult]:
+    """Run ``steps`` respecting dependencies; independent steps overlap on a thread pool."""
+    _check_graph(steps)
+    locks = {r: threading.Lock() for s in steps for r in s.resources}
+    names = {s.name for s in steps}
+    pending = {s.name: s for s in steps}
+    results: Dict[str, StepResult] = {}
+    running: Dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="postrun") as pool:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for name, step in list(pending.items()):
+                    blocked = [d for d in step.deps if d in results and results[d].status != "ok"]
+                    if blocked:
+                        results[name] = StepResult(name, "skipped", error=f"dependency {blocked[0]} {results[blocked[0]].status}")
+                        del pending[name]
+                        progressed = True
+                    elif all(d in results for d in (*step.deps, *(set(step.after) & names))):
+                        running[pool.submit(_execute, step, ctx, locks)] = name
+                        del pending[name]
+            if not running:
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                results[running.pop(fut)] = fut.result()
+    return results
+
+
+def run_pipeline(run_dir: Path, out_dir: Optional[Path] = None, workers: int = 4, with_l1: bool = False,
+                 only: Optional[Sequence[str]] = None, profile: Optional[str] = None) -> Dict[str, object]:
+    run_dir = Path(run_dir)
+    out_dir = Path(out_dir) if out_dir else run_dir / "postrun"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    steps = default_steps(with_l1)
+    if only:
+        wanted = set(only)
+        unknown = wanted - {s.name for s in steps}
+        if unknown:
+            raise ValueError(f"unknown steps: {', '.join(sorted(unknown))}")
+        # keep requested steps and everything they depend on
+        by_name = {s.name: s for s in steps}
+        stack = list(wanted)
+        while stack:
+            for dep in by_name[stack.pop()].deps:
+                if dep not in wanted:
+                    wanted.add(dep)
+                    stack.append(dep)
+        steps = [s for s in steps if s.name in wanted]
+
+    ctx = Context(run_dir, out_dir, ArtifactStore(run_dir), with_l1)
+    perf = PerfRecorder("postrun_pipeline", profile)
+    with perf:
+        results = run_steps(steps, ctx, workers)
+    for step in steps:
+        res = results[step.name]
+        span = Span(step.name)
+        span.wall_s, span.cpu_s = res.wall_s, res.cpu_s
+        perf.spans.append(span)
+    perf.write(out_dir)
+
+    required_failed = [s.name for s in steps if not s.optional and results[s.name].status == "failed"]
+    summary = {
+        "run_dir": str(run_dir),
+        "out_dir": str(out_dir),
+        "ok": not required_failed,
+        "failed_required": required_failed,
+        "wall_s": round(perf.wall_s, 4),
+        "sum_step_wall_s": round(sum(r.wall_s for r in results.values()), 4),
+        "workers": workers,
+        "steps": {s.name: asdict(results[s.name]) for s in steps},
+        "store": ctx.store.stats(),
+    }
+    (out_dir / "pipeline_summary.json").write_text(json.dumps(summary, indent=2, default=str), encoding="utf-8")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Run the postrun steps as an in-process DAG")
+    ap.add_argument("--run-dir", required=True, help="Run artifact directory (orders.csv, risk_snapshots.csv, ...)")
+    ap.add_argument("--out", default=None, help="Output directory (default: <run-dir>/postrun)")
+    ap.add_argument("--workers", type=int, default=4, help="Concurrent steps")
+    ap.add_argument("--with-l1", action="store_true", help="Also run the L1 fees/slippage join")
+    ap.add_argument("--only", default=None, help="Comma-separated steps to run (dependencies are added)")
+    add_perf_args(ap)
+    args = ap.parse_args(argv)
+
+    only = [s.strip() for s in args.only.split(",") if s.strip()] if args.only else None
+    known = {s.name for s in default_steps(True)}
+    if only and set(only) - known:
+        ap.error(f"unknown steps: {', '.join(sorted(set(only) - known))}; known: {', '.join(sorted(known))}")
+    # Naming an L1 step (l1, mtm, quotes) implies --with-l1
+    with_l1 = args.with_l1 or bool(only and set(only) - {s.name for s in default_steps(False)})
+    summary = run_pipeline(Path(args.run_dir), Path(args.out) if args.out else None, args.workers,
+                           with_l1, only, args.profile)
+    for name, res in summary["steps"].items():
+        note = res["error"] or ""
+        print(f"{name:12s} {res['status']:8s} {res['wall_s']:>8.3f}s {note}")
+    print(f"end-to-end {summary['wall_s']:.3f}s (sum of steps {summary['sum_step_wall_s']:.3f}s)")
+    return 0 if summary["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,7 +8,8 @@ Usage:
     python scripts/postrun_report.py --orders <path> --risk <path> --out <outdir>
 
 Features:
-    - Equity curve plot
+    - Equity curve plot (from the risk_rollup store when it is current, see
+      scripts/analyzers/risk_rollup.py; otherwise from risk_snapshots.csv)
     - P&L analysis (total, max DD, max profit)
     - Trade statistics (count, win rate, avg P&L)
     - R-violations detection
@@ -24,40 +25,62 @@ from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
 try:
-    import pandas as pd
-    import matplotlib
-    matplotlib.use('Agg')  # Non-interactive backend
-    import matplotlib.pyplot as plt
-    from matplotlib.backends.backend_pdf import PdfPages
-    import matplotlib.dates as mdates
-except ImportError as e:
-    print(f"ERROR: Missing required package: {e}")
-    print("\nInstall required packages:")
-    print("  pip install pandas matplotlib")
-    sys.exit(1)
+    from analyzers.lazy_imports import lazy_import, missing_modules, use_agg_backend
+    from analyzers.perf import PerfRecorder, add_perf_args
+    from analyzers.result_cache import (
+        ResultCache, add_cache_args, changed_files, code_version, import_closure, snapshot_dir,
+    )
+    from analyzers.risk_rollup import STORE_DIR, fresh_meta, frame as rollup_frame, pick_resolution
+except ImportError:  # imported as scripts.postrun_report
+    from scripts.analyzers.lazy_imports import lazy_import, missing_modules, use_agg_backend
+    from scripts.analyzers.perf import PerfRecorder, add_perf_args
+    from scripts.analyzers.result_cache import (
+        ResultCache, add_cache_args, changed_files, code_version, import_closure, snapshot_dir,
+    )
+    from scripts.analyzers.risk_rollup import STORE_DIR, fresh_meta, frame as rollup_frame, pick_resolution
+
+REQUIRED_PACKAGES = ('pandas', 'matplotlib')
+
+# Loaded on first use; main() checks REQUIRED_PACKAGES before running
+pd = lazy_import('pandas')
+plt = lazy_import('matplotlib.pyplot', before_load=use_agg_backend)  # Non-interactive backend
+mdates = lazy_import('matplotlib.dates', before_load=use_agg_backend)
+
+# risk_snapshots.csv columns the KPIs read; the other ~12 columns are never parsed
+RISK_COLUMNS = ('timestamp_utc', 'equity', 'balance', 'open_pnl', 'closed_pnl', 'R_used', 'margin', 'free_margin')
+CHART_MAX_POINTS = 2000
 
 
 class TelemetryAnalyzer:
     """Analyzes trading telemetry and generates reports"""
     
-    def __init__(self, orders_path: Path, risk_path: Path):
+    def __init__(self, orders_path: Path, risk_path: Path, perf: Optional[PerfRecorder] = None,
+                 use_risk_rollup: bool = True):
         self.orders_path = orders_path
         self.risk_path = risk_path
+        self.use_risk_rollup = use_risk_rollup
         self.orders_df = None
         self.risk_df = None
+        self.risk_chart = None  # risk_rollup buckets for the equity/drawdown charts, when current
         self.kpi = {}
+        self.perf = perf or PerfRecorder('postrun_report')
         
     def load_data(self) -> bool:
         """Load CSV files"""
         try:
-            print(f"Loading orders from: {self.orders_path}")
-            # Use python engine for large files
-            self.orders_df = pd.read_csv(self.orders_path, engine='python', on_bad_lines='skip')
+            # Frames may be preloaded by a caller that already parsed the artifacts
+            if self.orders_df is None:
+                print(f"Loading orders from: {self.orders_path}")
+                # Use python engine for large files
+                self.orders_df = pd.read_csv(self.orders_path, engine='python', on_bad_lines='skip')
             print(f"  → {len(self.orders_df)} orders loaded")
             
-            print(f"Loading risk snapshots from: {self.risk_path}")
-            self.risk_df = pd.read_csv(self.risk_path, engine='python', on_bad_lines='skip')
+            if self.risk_df is None:
+                print(f"Loading risk snapshots from: {self.risk_path}")
+                self.risk_df = pd.read_csv(self.risk_path, usecols=lambda c: c in RISK_COLUMNS, on_bad_lines='skip')
             print(f"  → {len(self.risk_df)} snapshots loaded")
+            if self.use_risk_rollup:
+                self.load_risk_chart()
             
             # Parse timestamps
             if 'timestamp_utc' in self.risk_df.columns:
@@ -68,6 +91,17 @@ class TelemetryAnalyzer:
             print(f"ERROR loading data: {e}")
             return False
     
+    def load_risk_chart(self) -> None:
+        """Chart data from an up-to-date risk_rollup store, at the finest resolution that fits a chart"""
+        meta = fresh_meta(self.risk_path)
+        if not meta or not meta['snapshots'] or 'equity' not in meta['fields']:
+            return
+        store = self.risk_path.parent / STORE_DIR
+        resolution = pick_resolution(store, CHART_MAX_POINTS)
+        columns = [f'{f}_{p}' for f in ('equity', 'balance') if f in meta['fields'] for p in ('c', 'h', 'l')]
+        self.risk_chart = rollup_frame(store, resolution, columns)
+        print(f"  → charts from {STORE_DIR}/{resolution}: {len(self.risk_chart)} buckets")
+
     def analyze_equity(self) -> Dict:
         """Analyze equity curve"""
         if self.risk_df is None or len(self.risk_df) == 0:
@@ -265,12 +299,18 @@ class TelemetryAnalyzer:
             ax.text(0.5, 0.5, 'No data', ha='center', va='center')
             return
         
-        timestamps = self.risk_df['timestamp'] if 'timestamp' in self.risk_df.columns else range(len(self.risk_df))
-        equity = self.risk_df['equity'].astype(float)
-        balance = self.risk_df['balance'].astype(float)
+        if self.risk_chart is not None:
+            chart = self.risk_chart
+            timestamps, equity = chart['timestamp'], chart['equity_c']
+            balance = chart['balance_c'] if 'balance_c' in chart.columns else None
+        else:
+            timestamps = self.risk_df['timestamp'] if 'timestamp' in self.risk_df.columns else range(len(self.risk_df))
+            equity = self.risk_df['equity'].astype(float)
+            balance = self.risk_df['balance'].astype(float)
         
         ax.plot(timestamps, equity, label='Equity', linewidth=2, color='#2E86AB')
-        ax.plot(timestamps, balance, label='Balance', linewidth=1.5, color='#A23B72', linestyle='--')
+        if balance is not None:
+            ax.plot(timestamps, balance, label='Balance', linewidth=1.5, color='#A23B72', linestyle='--')
         
         ax.set_xlabel('Time', fontsize=10)
         ax.set_ylabel('Value (USD)', fontsize=10)
@@ -278,7 +318,7 @@ class TelemetryAnalyzer:
         ax.legend(loc='best', fontsize=9)
         ax.grid(True, alpha=0.3)
         
-        if 'timestamp' in self.risk_df.columns:
+        if self.risk_chart is not None or 'timestamp' in self.risk_df.columns:
             ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
             plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
     
@@ -312,10 +352,15 @@ class TelemetryAnalyzer:
             ax.text(0.5, 0.5, 'No data', ha='center', va='center')
             return
         
-        timestamps = self.risk_df['timestamp'] if 'timestamp' in self.risk_df.columns else range(len(self.risk_df))
-        equity = self.risk_df['equity'].astype(float)
-        
-        running_max = equity.expanding().max()
+        if self.risk_chart is not None:
+            # Deepest point of each bucket against the highest equity seen so far
+            timestamps = self.risk_chart['timestamp']
+            equity = self.risk_chart['equity_l']
+            running_max = self.risk_chart['equity_h'].cummax()
+        else:
+            timestamps = self.risk_df['timestamp'] if 'timestamp' in self.risk_df.columns else range(len(self.risk_df))
+            equity = self.risk_df['equity'].astype(float)
+            running_max = equity.expanding().max()
         drawdown = equity - running_max
         drawdown_pct = (drawdown / running_max * 100).where(running_max > 0, 0)
         
@@ -327,7 +372,7 @@ class TelemetryAnalyzer:
         ax.set_title('Drawdown', fontsize=12, fontweight='bold')
         ax.grid(True, alpha=0.3)
         
-        if 'timestamp' in self.risk_df.columns:
+        if self.risk_chart is not None or 'timestamp' in self.risk_df.columns:
             ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
             plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
     
@@ -392,6 +437,8 @@ class TelemetryAnalyzer:
         """Generate PDF report"""
         print(f"\nGenerating PDF report: {output_path}")
         
+        from matplotlib.backends.backend_pdf import PdfPages
+
         with PdfPages(output_path) as pdf:
             # Page 1: Overview
             fig, axes = plt.subplots(2, 2, figsize=(11, 8.5))
@@ -426,12 +473,17 @@ class TelemetryAnalyzer:
         print("="*70)
         
         # Load data
-        if not self.load_data():
+        with self.perf.stage('load') as span:
+            loaded = self.load_data()
+            if loaded:
+                span.rows = len(self.orders_df) + len(self.risk_df)
+        if not loaded:
             return False
         
         # Compute KPI
         print("\nComputing KPI...")
-        self.kpi = self.compute_kpi()
+        with self.perf.stage('aggregate', rows=len(self.orders_df)):
+            self.kpi = self.compute_kpi()
         print("  ✓ KPI computed")
         
         # Generate outputs
@@ -440,8 +492,9 @@ class TelemetryAnalyzer:
         pdf_path = output_dir / 'report.pdf'
         json_path = output_dir / 'kpi.json'
         
-        self.generate_pdf_report(pdf_path)
-        self.save_kpi_json(json_path)
+        with self.perf.stage('write'):
+            self.generate_pdf_report(pdf_path)
+            self.save_kpi_json(json_path)
         
         print("\n" + "="*70)
         print("  ✅ ANALYSIS COMPLETE")
@@ -471,9 +524,18 @@ Examples:
                        help='Path to risk_snapshots.csv')
     parser.add_argument('--out', required=True, type=Path,
                        help='Output directory for report.pdf and kpi.json')
+    add_perf_args(parser)
+    add_cache_args(parser)
     
     args = parser.parse_args()
     
+    missing = missing_modules(*REQUIRED_PACKAGES)
+    if missing:
+        print(f"ERROR: Missing required package: {', '.join(missing)}")
+        print("\nInstall required packages:")
+        print("  pip install pandas matplotlib")
+        sys.exit(1)
+    
     # Validate inputs
     if not args.orders.exists():
         print(f"ERROR: Orders file not found: {args.orders}")
@@ -484,8 +546,27 @@ Examples:
         sys.exit(1)
     
     # Run analyzer
-    analyzer = TelemetryAnalyzer(args.orders, args.risk)
-    success = analyzer.run(args.out)
+    perf = PerfRecorder('postrun_report', args.profile)
+    analyzer = TelemetryAnalyzer(args.orders, args.risk, perf)
+    cache = ResultCache.from_args(args)
+    with perf:
+        hit = None
+        if cache is not None:
+            with perf.stage('cache_lookup'):
+                key = cache.key('postrun_report', code_version(*import_closure(Path(__file__))),
+                                dict(vars(args), orders=args.orders.resolve(), risk=args.risk.resolve(),
+                                     out=args.out.resolve()),
+                                [args.orders, args.risk])
+                hit = cache.restore(key, args.out)
+        if hit is not None:
+            success = True
+            print(f"Cached report restored to: {args.out}")
+        else:
+            before = snapshot_dir(args.out)
+            success = analyzer.run(args.out)
+            if success and cache is not None:
+                cache.store(key, 'postrun_report', args.out, changed_files(args.out, before))
+    perf.write(Path(args.perf_dir) if args.perf_dir else args.out)
     
     sys.exit(0 if success else 1)
 
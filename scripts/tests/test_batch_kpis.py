@@ -0,0 +1,80 @@
+import csv
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.analyzers.batch_kpis import aggregate, closed_trade_pnl, scan_orders
+from scripts.bench.synth_artifacts import generate
+
+ORDERS = """phase,orderId,latency_ms,slippage_pips,slippage
+REQUEST,A,,,
+REQUEST,B,,,
+REQUEST,C,,,
+REQUEST,D,,,
+FILL,A,12,0.5,0.00005
+FILL,A,15,-1.5,-0.00015
+Filled,B,20,,0.0002
+REJECT,C,,,
+FILL,,30,1.0,0.0001
+"""
+
+
+class BatchKpisTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_scan_orders_counts_partial_fills_once(self) -> None:
+        path = self.root / "orders.csv"
+        path.write_text(ORDERS, encoding="utf-8")
+        scanned = scan_orders(path)
+        self.assertEqual(scanned["counts"], {"REQUEST": 4, "ACK": 0, "FILL": 4, "REJECT": 1})
+        self.assertEqual(scanned["filled_orders"], 3)  # A, B and the id-less row
+        self.assertEqual(scanned["latency"].count, 4)
+        # slippage_pips wins over the price-unit column; B has no pips value
+        self.assertEqual(scanned["slippage"].count, 3)
+        self.assertAlmostEqual(scanned["slippage"].mean, 1.0)
+
+    def test_closed_trade_pnl_orders_by_close_time(self) -> None:
+        with (self.root / "closed_trades_fifo_reconstructed.csv").open("w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["close_time", "pnl_currency"])
+            writer.writerow(["2025-01-06T00:03:00Z", "5"])
+            writer.writerow(["2025-01-06T00:01:00Z", "10"])
+            writer.writerow(["2025-01-06T00:02:00Z", "-8"])
+            writer.writerow(["2025-01-06T00:04:00Z", ""])
+        pnl = closed_trade_pnl(self.root)
+        self.assertEqual(pnl["trades"], 3)
+        self.assertAlmostEqual(pnl["pnl"], 7.0)
+        self.assertAlmostEqual(pnl["max_drawdown"], 8.0)
+        self.assertEqual(pnl["pnl_source"], "closed_trades_fifo_reconstructed.csv")
+        self.assertIsNone(closed_trade_pnl(self.root / "missing"))
+
+    def test_pool_matches_serial_and_fill_rate_uses_order_ids(self) -> None:
+        runs = []
+        for seed in (1, 2, 3):
+            run_dir = self.root / f"telemetry_run_{seed}"
+            generate(run_dir, fills=300, symbols=2, seed=seed)
+            runs.append(str(run_dir))
+        serial = aggregate(runs, workers=1)
+        pooled = aggregate(runs, workers=2)
+        self.assertEqual(serial["rows"], pooled["rows"])
+        self.assertEqual(serial["summary"], pooled["summary"])
+
+        with (Path(runs[0]) / "orders.csv").open(newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        requests = sum(1 for r in rows if r["phase"] == "REQUEST")
+        filled = len({r["orderId"] for r in rows if r["phase"] == "FILL"})
+        first = serial["rows"][0]
+        self.assertEqual(first["error"], "")
+        self.assertEqual(first["filled_orders"], filled)
+        self.assertEqual(first["fill_rate_percent"], round(100.0 * filled / requests, 2))
+        self.assertLessEqual(serial["summary"]["fill_rate_percent"], 100.0)
+        self.assertEqual(serial["summary"]["filled_orders"], sum(r["filled_orders"] for r in serial["rows"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
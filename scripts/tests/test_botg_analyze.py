@@ -0,0 +1,78 @@
+import contextlib
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.analyze_postrun import main as analyze_main
+from scripts.botg_analyze import COMMANDS, HEAVY_MODULES, REPO_ROOT, STARTUP_BUDGET_S, main, measure_startup
+
+FILLS_CSV = """order_id,timestamp,latency_ms,slippage
+1,2025-01-06T00:10:00.250Z,120,0.00012
+2,2025-01-06T00:40:00.000Z,80,-0.00031
+3,2025-01-06T01:05:00.500Z,,0.00007
+4,,95,0.00002
+5,2025-01-06T01:55:00.125Z,300,NaN
+6,2025-01-06T02:20:00.000Z,150,-0.00044
+"""
+
+
+class BotgAnalyzeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_help_and_unknown_command(self) -> None:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(main(["--help"]), 0)
+        for name in COMMANDS:
+            self.assertIn(name, out.getvalue())
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(main(["no-such-command"]), 2)
+
+    def test_help_does_not_import_heavy_modules(self) -> None:
+        code = (
+            "import sys, contextlib, io\n"
+            "from scripts.botg_analyze import COMMANDS, HEAVY_MODULES, run_command\n"
+            "loaded = {}\n"
+            "for name in COMMANDS:\n"
+            "    with contextlib.redirect_stdout(io.StringIO()):\n"
+            "        run_command(name, ['--help'])\n"
+            "    loaded[name] = [m for m in HEAVY_MODULES if m in sys.modules]\n"
+            "print(loaded)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        loaded = eval(result.stdout.strip().splitlines()[-1])
+        self.assertEqual({name: mods for name, mods in loaded.items() if mods}, {})
+        self.assertEqual(set(loaded), set(COMMANDS))
+
+    def test_startup_budget(self) -> None:
+        timings = measure_startup(["analyze", "audit", "report", "l1-join", "validate"], repeat=3)
+        over = {name: seconds for name, seconds in timings.items() if seconds > STARTUP_BUDGET_S}
+        self.assertEqual(over, {}, f"start-up over {STARTUP_BUDGET_S}s budget")
+
+    def test_result_cache_key_covers_flags(self) -> None:
+        fills = self.tmp / "fills.csv"
+        fills.write_text(FILLS_CSV, encoding="utf-8")
+        base = ["--fills", str(fills), "--outdir", str(self.tmp / "out"), "--cache-dir", str(self.tmp / "cache")]
+
+        def restored(extra) -> bool:
+            buf = io.StringIO()
+            with contextlib.redirect_stdout(buf):
+                analyze_main(base + extra)
+            return "Cached results restored" in buf.getvalue()
+
+        self.assertFalse(restored(["--no-plots"]))
+        self.assertTrue(restored(["--no-plots"]))
+        # A run that wants plots must not get the plot-less outputs back
+        self.assertFalse(restored([]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from scripts.analyzers.drawdown_mc import _units, load_pnl, main, max_drawdown, simulate
+
+TRADES_CSV = """trade_id,close_time,pnl_currency,net_realized_usd
+b,2025-01-06T10:05:00Z,-30,-31
+a,2025-01-06T10:00:00Z,10,9
+c,2025-01-06T10:10:00Z,5,4
+d,2025-01-06T10:20:00Z,,0
+e,2025-01-06T10:15:00Z,40,39
+"""
+
+
+class DrawdownMcTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.pnl = np.random.default_rng(3).normal(0.5, 20.0, 500)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_load_pnl_orders_by_close_time(self) -> None:
+        path = self.tmp / "trades.csv"
+        path.write_text(TRADES_CSV, encoding="utf-8")
+        pnl, column = load_pnl(path)
+        self.assertEqual((column, pnl.tolist()), ("pnl_currency", [10.0, -30.0, 5.0, 40.0]))
+        self.assertEqual(load_pnl(path, "net_realized_usd")[0].tolist(), [9.0, -31.0, 4.0, 39.0, 0.0])
+        self.assertEqual(max_drawdown(pnl), -30.0)
+        self.assertEqual(max_drawdown(np.array([5.0, 1.0])), 0.0)
+        self.assertEqual(max_drawdown(np.array([-5.0, 1.0])), -5.0)
+
+    def test_paths_match_a_brute_force_resample(self) -> None:
+        block = 7
+        drawdowns, terminals = simulate(self.pnl, 300, block=block, seed=9)
+        n = len(self.pnl)
+        blocks = -(-n // block)
+        unit_count, unit_seed = _units(300, 9)[1]
+        starts = np.random.default_rng(unit_seed).integers(0, n, size=(unit_count, blocks))
+        for row in (0, 17, unit_count - 1):
+            path = np.concatenate([self.pnl[(s + np.arange(block)) % n] for s in starts[row]])[:n]
+            self.assertAlmostEqual(drawdowns[256 + row], max_drawdown(path))
+            self.assertAlmostEqual(terminals[256 + row], path.sum())
+
+    def test_whole_series_block_only_rotates(self) -> None:
+        _, terminals = simulate(self.pnl, 50, block=len(self.pnl), seed=1)
+        np.testing.assert_allclose(terminals, self.pnl.sum())
+
+    def test_seed_reproducible_across_chunking_and_workers(self) -> None:
+        base = simulate(self.pnl, 1000, seed=4)
+        for kwargs in ({"memory_mb": 0.001}, {"memory_mb": 0.001, "workers": 2}):
+            other = simulate(self.pnl, 1000, seed=4, **kwargs)
+            np.testing.assert_array_equal(base[0], other[0])
+            np.testing.assert_array_equal(base[1], other[1])
+
+    def test_cli_summary(self) -> None:
+        path = self.tmp / "trades.csv"
+        path.write_text(TRADES_CSV, encoding="utf-8")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(main(["--trades", str(path), "--paths", "2000", "--workers", "1",
+                                   "--dd-threshold", "20", "--out", str(self.tmp / "out"), "--save-paths"]), 0)
+        summary = json.loads((self.tmp / "out" / "drawdown_mc.json").read_text(encoding="utf-8"))
+        self.assertEqual((summary["trades"], summary["paths"], summary["realized_max_drawdown"]), (4, 2000, -30.0))
+        quantiles = list(summary["max_drawdown_quantiles"].values())
+        self.assertEqual(quantiles, sorted(quantiles))
+        self.assertLessEqual(quantiles[-1], 0.0)
+        self.assertTrue((self.tmp / "out" / "drawdown_mc_paths.npz").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from path_issues.reconstruct_fifo import read_fills
+from scripts.analyzers.exposure_timeline import StepSeries, build_timeline, cross_check, read_snapshots, summarize
+
+T0 = 1736157600000  # 2025-01-06T10:00:00Z
+ORDERS_CSV = """phase,timestamp_iso,symbol,side,size_filled,price_filled
+FILL,2025-01-06T10:00:10.000Z,EURUSD,BUY,1000,1.1
+FILL,2025-01-06T10:00:20.000Z,GBPUSD,SELL,2000,1.25
+FILL,2025-01-06T10:00:30.000Z,EURUSD,BUY,1000,1.1
+FILL,2025-01-06T10:00:40.000Z,EURUSD,SELL,2000,1.2
+FILL,2025-01-06T10:01:30.000Z,GBPUSD,BUY,2000,1.25
+"""
+# 10:00:25 and 10:01:00 straddle the 10:00:30-10:00:40 peak; 10:02:00 still shows a closed short
+RISK_CSV = """timestamp_utc,long_exposure,short_exposure,net_exposure
+2025-01-06T10:00:00Z,0,0,0
+2025-01-06T10:00:25Z,1000,2000,-1000
+2025-01-06T10:01:00Z,0,2000,-2000
+2025-01-06T10:02:00Z,0,500,-500
+"""
+
+
+class ExposureTimelineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        (self.tmp / "orders.csv").write_text(ORDERS_CSV, encoding="utf-8")
+        (self.tmp / "risk.csv").write_text(RISK_CSV, encoding="utf-8")
+        self.timeline = build_timeline(read_fills(self.tmp / "orders.csv", "FILL"), basis="units")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_step_series_matches_brute_force(self) -> None:
+        rng = random.Random(5)
+        series, points, t = StepSeries(), [], 0
+        for _ in range(200):
+            t += rng.randint(1, 50)
+            value = float(rng.randint(-5, 5))
+            series.append(t, value)
+            points.append((t, value))
+
+        def value_at(x):
+            return next((v for pt, v in reversed(points) if pt <= x), 0.0)
+
+        for _ in range(100):
+            a, b = sorted(rng.randint(-10, t + 10) for _ in range(2))
+            self.assertEqual(series.value_at(a), value_at(a))
+            self.assertAlmostEqual(series.integral(a, b), sum(value_at(x) for x in range(a, b)))
+            self.assertEqual(abs(series.max_in(a, b)), max(abs(value_at(x)) for x in range(a, b + 1)))
+
+    def test_positions_and_account_sweep(self) -> None:
+        eur = self.timeline.positions["EURUSD"]
+        self.assertEqual([eur.value_at(T0 + s * 1000) for s in (5, 10, 35, 40)], [0.0, 1000.0, 2000.0, 0.0])
+        self.assertEqual(self.timeline.long.value_at(T0 + 35_000), 2000.0)
+        self.assertEqual(self.timeline.short.value_at(T0 + 35_000), 2000.0)
+        self.assertEqual(self.timeline.gross.max_in(T0, T0 + 120_000), 4000.0)
+        self.assertEqual(self.timeline.open_symbols.max_in(T0, T0 + 120_000), 2.0)
+        # EURUSD: 1000 for 20 s then 2000 for 10 s over a 60 s window
+        self.assertAlmostEqual(self.timeline.exposure["EURUSD"].time_weighted(T0, T0 + 60_000), 40000 / 60)
+
+        summary = summarize(self.timeline)
+        self.assertEqual(summary["account"]["max_gross"], 4000.0)
+        self.assertEqual(summary["account"]["max_gross_ts"], "2025-01-06T10:00:30.000Z")
+        self.assertAlmostEqual(summary["symbols"]["EURUSD"]["time_in_market_pct"], 100 * 30 / 80)
+
+    def test_notional_basis_uses_fill_price(self) -> None:
+        notional = build_timeline(read_fills(self.tmp / "orders.csv", "FILL"), basis="notional")
+        self.assertAlmostEqual(notional.short.value_at(T0 + 25_000), 2500.0)
+        self.assertAlmostEqual(notional.long.value_at(T0 + 25_000), 1100.0)
+
+    def test_cross_check_flags_mismatches_and_missed_peaks(self) -> None:
+        mismatches, missed = cross_check(self.timeline, read_snapshots(self.tmp / "risk.csv"))
+        self.assertEqual([m["ts_iso"] for m in mismatches], ["2025-01-06T10:02:00.000Z"])
+        self.assertEqual(mismatches[0]["fields"], "short_exposure;net_exposure")
+        self.assertEqual([(m["from_ts_iso"], m["peak_ts_iso"], m["peak_gross"]) for m in missed],
+                         [("2025-01-06T10:00:25.000Z", "2025-01-06T10:00:30.000Z", 4000.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import csv
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+
+from scripts.analyzers.kpi_cube import KpiCube, build, hour_of, main
+from scripts.bench.synth_artifacts import generate
+
+
+class KpiCubeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.run_dir = self.root / "run"
+        generate(self.run_dir, fills=500, symbols=2, seed=11)
+        with (self.run_dir / "orders.csv").open(newline="") as fh:
+            self.rows = list(csv.DictReader(fh))
+        self.trades = self.run_dir / "closed_trades_fifo_reconstructed.csv"
+        with self.trades.open("w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["symbol", "position_side", "close_time", "close_order_id", "pnl_currency"])
+            writer.writerow(["EURUSD", "LONG", "2025-01-06T00:10:00Z", "", "12.5"])
+            writer.writerow(["EURUSD", "SHORT", "2025-01-06T01:10:00Z", "", "-4"])
+            writer.writerow(["EURUSD", "LONG", "2025-01-06T01:20:00Z", "", "3"])
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_rollups_match_a_direct_count(self) -> None:
+        cube = build(self.run_dir / "orders.csv", self.trades)
+        expected = Counter((r["side"], r["phase"]) for r in self.rows)
+        by_side = {row["side"]: row for row in cube.table(["side"])}
+        for side in ("BUY", "SELL"):
+            self.assertEqual(by_side[side]["requests"], expected[side, "REQUEST"])
+            self.assertEqual(by_side[side]["fills"], expected[side, "FILL"])
+        self.assertEqual(by_side["BUY"]["trades"], 2)
+        self.assertAlmostEqual(by_side["BUY"]["pnl"], 15.5)
+        self.assertEqual(by_side["SELL"]["win_rate"], 0.0)
+
+        latencies = sorted(float(r["latency_ms"]) for r in self.rows
+                           if r["phase"] == "FILL" and r["symbol"] == "EURUSD" and r["latency_ms"])
+        total = cube.table(where={"symbol": ["EURUSD"]})[0]
+        self.assertAlmostEqual(total["latency_ms_mean"], sum(latencies) / len(latencies))
+        exact = latencies[int(0.95 * (len(latencies) - 1))]
+        self.assertAlmostEqual(total["latency_ms_p95"], exact, delta=exact * 0.02)
+        slips = [float(r["slippage_pips"]) for r in self.rows
+                 if r["phase"] == "FILL" and r["symbol"] == "EURUSD" and r["slippage_pips"]]
+        self.assertAlmostEqual(total["slippage_mean"], sum(slips) / len(slips))
+
+        hours = Counter(hour_of(r) for r in self.rows if r["phase"] == "REQUEST")
+        by_hour = {row["hour"]: row["requests"] for row in cube.table(["hour"]) if row["requests"]}
+        self.assertEqual(by_hour, dict(hours))
+
+    def test_persisted_cube_answers_the_same_and_merges(self) -> None:
+        cube = build(self.run_dir / "orders.csv", self.trades)
+        path = cube.save(self.root / "cube.json.gz")
+        loaded = KpiCube.load(path)
+        self.assertEqual(loaded.table(["symbol", "side"]), cube.table(["symbol", "side"]))
+
+        doubled = KpiCube.load(path).merge(loaded)
+        once, twice = cube.table()[0], doubled.table()[0]
+        self.assertEqual(twice["requests"], 2 * once["requests"])
+        self.assertEqual(twice["trades"], 2 * once["trades"])
+        self.assertAlmostEqual(twice["latency_ms_p50"], once["latency_ms_p50"])
+
+        with self.assertRaises(ValueError):
+            cube.rollup(["venue"])
+
+    def test_blank_pips_fall_back_to_price_unit_slippage(self) -> None:
+        rows = [
+            {"phase": "FILL", "orderId": "A", "symbol": "EURUSD", "timestamp_iso": "2025-01-06T00:00:01Z",
+             "slippage_pips": "-1.5", "slippage": "-0.00015"},
+            {"phase": "FILL", "orderId": "B", "symbol": "EURUSD", "timestamp_iso": "2025-01-06T00:00:02Z",
+             "slippage_pips": "", "slippage": "0.5"},
+        ]
+        cube = KpiCube()
+        cube.add_orders(rows)
+        self.assertAlmostEqual(cube.table()[0]["slippage_mean"], -0.5)
+
+    def test_hour_of_handles_iso_offsets_and_epochs(self) -> None:
+        self.assertEqual(hour_of({"timestamp_iso": "2025-01-06T13:59:59.9999999Z"}), "2025-01-06T13")
+        self.assertEqual(hour_of({"timestamp_iso": "2025-01-06T13:30:00+02:00"}), "2025-01-06T11")
+        self.assertEqual(hour_of({"epoch_ms": "1736172000000"}), "2025-01-06T14")
+
+    def test_cli_build_and_query(self) -> None:
+        out = self.root / "cube.json.gz"
+        self.assertEqual(main(["build", "--run-dir", str(self.run_dir), "--out", str(out)]), 0)
+        table = self.root / "by_symbol.csv"
+        self.assertEqual(main(["query", str(out), "--by", "symbol", "--where", "side=BUY", "--csv", str(table)]), 0)
+        with table.open(newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(sum(int(r["requests"]) for r in rows),
+                         sum(1 for r in self.rows if r["phase"] == "REQUEST" and r["side"] == "BUY"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import csv
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.analyzers.latency_decomposition import ALL, decompose, write_outputs
+from scripts.bench.synth_artifacts import generate
+
+COLUMNS = ["phase", "timestamp_iso", "order_id", "side", "symbol", "latency_ms", "timestamp_request",
+           "timestamp_ack", "timestamp_fill", "request_server_time", "fill_server_time"]
+
+
+class LatencyDecompositionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmpdir.name)
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def _write_orders(self, rows) -> Path:
+        path = self.root / "orders.csv"
+        with path.open("w", encoding="utf-8", newline="") as fh:
+            writer = csv.DictWriter(fh, fieldnames=COLUMNS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+        return path
+
+    def test_stages_from_lifecycle_rows(self) -> None:
+        rows = []
+        for i, (symbol, side) in enumerate((("EURUSD", "BUY"), ("XAUUSD", "SELL"))):
+            oid = f"ORD-{i}"
+            req = f"2025-01-01T10:00:0{i}.000Z"
+            ack = f"2025-01-01T10:00:0{i}.050Z"
+            fill = f"2025-01-01T10:00:0{i}.250Z"
+            rows.append({"phase": "REQUEST", "timestamp_iso": req, "order_id": oid, "side": side, "symbol": symbol,
+                         "timestamp_request": req})
+            rows.append({"phase": "ACK", "timestamp_iso": ack, "order_id": oid, "side": side, "symbol": symbol,
+                         "timestamp_request": req, "timestamp_ack": ack})
+            rows.append({"phase": "FILL", "timestamp_iso": fill, "order_id": oid, "side": side, "symbol": symbol,
+                         "latency_ms": "250", "timestamp_request": req, "timestamp_ack": ack, "timestamp_fill": fill,
+                         "request_server_time": f"2025-01-01T10:00:0{i}.020Z",
+                         "fill_server_time": f"2025-01-01T10:00:0{i}.220Z"})
+        rows.append({"phase": "REQUEST", "timestamp_iso": "2025-01-01T11:00:00Z", "order_id": "ORD-9",
+                     "side": "BUY", "symbol": "EURUSD"})
+
+        decomposer = decompose(self._write_orders(rows))
+
+        overall = decomposer.sketches[(ALL, ALL, ALL)]
+        self.assertEqual(overall["request_to_fill_ms"].count, 2)
+        self.assertAlmostEqual(overall["request_to_ack_ms"].quantile(0.5), 50.0, delta=1.0)
+        self.assertAlmostEqual(overall["ack_to_fill_ms"].quantile(0.5), 200.0, delta=4.0)
+        self.assertAlmostEqual(overall["server_request_to_fill_ms"].quantile(0.5), 200.0, delta=4.0)
+        self.assertAlmostEqual(overall["request_clock_offset_ms"].quantile(0.5), 20.0, delta=0.5)
+        self.assertAlmostEqual(overall["fill_report_delay_ms"].quantile(0.5), 30.0, delta=0.5)
+        self.assertIn(("XAUUSD", "SELL", "10"), decomposer.sketches)
+        self.assertEqual(decomposer.in_flight, {})
+        self.assertEqual(decomposer.peak_in_flight, 1)
+
+        write_outputs(decomposer, self.root / "out")
+        with (self.root / "out" / "latency_budget.csv").open(newline="") as fh:
+            budget = list(csv.DictReader(fh))
+        self.assertEqual(budget[0]["symbol"], ALL)
+        data = json.loads((self.root / "out" / "latency_sketches.json").read_text())
+        self.assertIn("EURUSD|BUY|10", data["sketches"])
+
+    def test_partial_fills_count_each_order_once(self) -> None:
+        generate(self.root / "run", fills=400, symbols=2, seed=9, partial_rate=0.5)
+        with (self.root / "run" / "orders.csv").open(newline="") as fh:
+            fills = [r["order_id"] for r in csv.DictReader(fh) if r["phase"] == "FILL"]
+        self.assertGreater(len(fills), len(set(fills)))
+
+        decomposer = decompose(self.root / "run" / "orders.csv")
+
+        self.assertEqual(decomposer.orders_completed, len(set(fills)))
+        self.assertEqual(decomposer.rows_after_fill, len(fills) - len(set(fills)))
+        self.assertEqual(decomposer.sketches[(ALL, ALL, ALL)]["request_to_fill_ms"].count, len(set(fills)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.analyzers.live_tail import FileTail, LiveTailService
+
+
+class FileTailTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmpdir.name)
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_follows_appends_and_waits_for_complete_lines(self) -> None:
+        path = self.root / "orders.csv"
+        path.write_bytes(b"phase,order_id\nREQUEST,A\nFILL,")
+        tail = FileTail(path)
+        rows, _ = tail.poll()
+        self.assertEqual(rows, [{"phase": "REQUEST", "order_id": "A"}])
+        with path.open("ab") as fh:
+            fh.write(b"A\r\n")
+        rows, _ = tail.poll()
+        self.assertEqual(rows, [{"phase": "FILL", "order_id": "A"}])
+        self.assertEqual(tail.poll()[0], [])
+
+    def test_header_rewrite_and_truncation(self) -> None:
+        path = self.root / "orders.csv"
+        path.write_bytes(b"phase,id\nREQUEST,A\n")
+        tail = FileTail(path)
+        tail.poll()
+        # EnsureHeader-style rewrite of line 1 followed by an append
+        path.write_bytes(b"phase,order_id\nREQUEST,A\nFILL,A\n")
+        rows, _ = tail.poll()
+        self.assertEqual(rows, [{"phase": "FILL", "order_id": "A"}])
+        path.write_bytes(b"phase,order_id\nREQUEST,B\n")
+        rows, _ = tail.poll()
+        self.assertEqual(rows, [{"phase": "REQUEST", "order_id": "B"}])
+        self.assertEqual(tail.rewinds, 1)
+
+
+class LiveTailServiceTests(unittest.TestCase):
+    def test_publishes_incremental_kpis(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            run = Path(tmp)
+            (run / "orders.csv").write_text(
+                "phase,timestamp_iso,order_id,latency_ms\n"
+                "REQUEST,2025-01-01T00:00:00Z,A,\n"
+                "FILL,2025-01-01T00:00:01Z,A,120\n"
+                "REQUEST,2025-01-01T00:00:02Z,B,\n",
+                encoding="utf-8",
+            )
+            (run / "risk_snapshots.csv").write_text(
+                "timestamp_utc,equity,exposure\n2025-01-01T00:00:00Z,100,1\n2025-01-01T00:01:00Z,90,3\n"
+                "2025-01-01T00:02:00Z,95,2\n",
+                encoding="utf-8",
+            )
+            out = run / "live.json"
+            service = LiveTailService(run, interval_s=0.01, json_path=out)
+            asyncio.run(service.run(duration_s=0))
+            snap = json.loads(out.read_text())
+            self.assertEqual(snap["orders"]["fill_rate_percent"], 50.0)
+            self.assertEqual(snap["orders"]["in_flight"], 1)
+            self.assertEqual(snap["risk"]["max_drawdown"], 10.0)
+            self.assertEqual(snap["risk"]["exposure_max"], 3.0)
+
+            with (run / "orders.csv").open("a", encoding="utf-8") as fh:
+                fh.write("FILL,2025-01-01T00:00:03Z,B,80\n")
+            service.poll_once()
+            self.assertEqual(service.publish()["orders"]["fill_rate_percent"], 100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import contextlib
+import csv
+import io
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.make_closes_from_reconstructed import main
+
+OUTPUTS = (
+    "closed_trades_fifo_reconstructed_cleaned.csv",
+    "duplicate_groups_from_reconstructed.csv",
+    "trade_closes_like_from_reconstructed.csv",
+    "trade_closes_like_from_reconstructed.jsonl",
+)
+HEADER = ["trade_id", "open_time", "close_time", "open_price", "close_price", "pnl", "side", "volume", "symbol"]
+
+
+class MakeClosesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        rng = random.Random(4)
+        self.rows = []
+        for i in range(1500):
+            if self.rows and rng.random() < 0.2:
+                self.rows.append(list(rng.choice(self.rows)))  # exact duplicate close
+                continue
+            minute = i % 60
+            self.rows.append([f"T-{i}", f"2025-01-06T00:{minute:02d}:00Z", f"2025-01-06T01:{minute:02d}:30Z",
+                              f"{1.1 + i / 1e5:.5f}", f"{1.1 + i / 1e5 + 0.0002:.5f}", f"{rng.uniform(-5, 5):.2f}",
+                              rng.choice(("BUY", "SELL")), "1000", "EURUSD"])
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _artifact(self, name: str, extra_row=None) -> Path:
+        art = self.root / name
+        art.mkdir()
+        with (art / "closed_trades_fifo_reconstructed.csv").open("w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(HEADER)
+            writer.writerows(self.rows)
+            if extra_row:
+                writer.writerow(extra_row)
+        return art
+
+    def _run(self, *argv: str):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return main(list(argv))
+
+    def test_spilled_dedup_matches_in_memory(self) -> None:
+        spill = self.root / "spill"
+        spill.mkdir()
+        mem, disk = self._artifact("mem"), self._artifact("disk")
+        expected = self._run("--artifact", str(mem))
+        got = self._run("--artifact", str(disk), "--dedup-mem-mb", "0.01", "--spill-dir", str(spill))
+        self.assertEqual(expected.pop("fingerprints_spilled"), 0)
+        self.assertGreater(got.pop("fingerprints_spilled"), 0)
+        self.assertEqual(got, expected)
+        self.assertGreater(expected["duplicate_groups"], 0)
+        for name in OUTPUTS:
+            self.assertEqual((disk / name).read_bytes(), (mem / name).read_bytes(), name)
+        self.assertEqual(list(spill.iterdir()), [])
+
+    def test_spill_table_is_removed_on_error(self) -> None:
+        spill = self.root / "spill"
+        spill.mkdir()
+        # A row with more fields than the header cannot be written back out
+        art = self._artifact("bad", extra_row=HEADER + ["surplus"])
+        with self.assertRaises(ValueError):
+            self._run("--artifact", str(art), "--dedup-mem-mb", "0.01", "--spill-dir", str(spill))
+        self.assertEqual(list(spill.iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
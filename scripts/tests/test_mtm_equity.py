@@ -0,0 +1,104 @@
+import bisect
+import tempfile
+import unittest
+from pathlib import Path
+
+from path_issues.reconstruct_fifo import read_fills
+from scripts.analyzers.mtm_equity import drawdown_summary, mtm_equity, run
+from scripts.analyzers.tick_bars import read_ticks
+from scripts.bench.synth_artifacts import generate
+
+ORDERS_CSV = """phase,timestamp_iso,symbol,side,size_filled,price_filled,commission
+FILL,2025-01-06T10:00:01.000Z,EURUSD,BUY,2,1.10020,0.5
+FILL,2025-01-06T10:00:05.000Z,EURUSD,SELL,2,1.10100,0.5
+FILL,2025-01-06T10:00:02.000Z,XAUUSD,SELL,1,2350.00,0
+FILL,2025-01-06T10:00:06.000Z,XAUUSD,BUY,1,2349.00,0
+"""
+L1_CSV = """timestamp_utc,symbol,bid,ask
+2025-01-06T10:00:00.0000000Z,EURUSD,1.10000,1.10020
+2025-01-06T10:00:03.0000000Z,EURUSD,1.09900,1.09920
+2025-01-06T10:00:04.0000000Z,EURUSD,1.10200,1.10220
+2025-01-06T10:00:03.5000000Z,XAUUSD,2352.00,2352.50
+"""
+
+
+def brute_force_equity(fills, ticks, at_ms):
+    """Account P&L at ``at_ms`` by replaying fills and marking with the last tick (slow reference)."""
+    total = 0.0
+    for symbol in {f.symbol for f in fills}:
+        q = cash = 0.0
+        last_price = None
+        for f in fills:
+            if f.symbol == symbol and f.epoch_ms <= at_ms:
+                signed = float(f.volume) if f.side == "BUY" else -float(f.volume)
+                q += signed
+                cash -= signed * float(f.price)
+                last_price = float(f.price)
+        if last_price is None:
+            continue
+        rows = ticks[ticks["symbol"] == symbol.upper()]
+        i = bisect.bisect_right(rows["ts_ms"].tolist(), at_ms) - 1
+        if q == 0:
+            mark = 0.0
+        elif i < 0:
+            mark = last_price
+        else:
+            mark = rows["bid"].iloc[i] if q > 0 else rows["ask"].iloc[i]
+        total += q * mark + cash
+    return total
+
+
+class MtmEquityTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        (self.tmp / "orders.csv").write_text(ORDERS_CSV, encoding="utf-8")
+        (self.tmp / "l1.csv").write_text(L1_CSV, encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_marks_longs_to_bid_and_shorts_to_ask(self) -> None:
+        fills = read_fills(self.tmp / "orders.csv", "FILL")
+        curve, eps, missing = mtm_equity(fills, read_ticks(self.tmp / "l1.csv"), {"XAUUSD": 100})
+        self.assertEqual(missing, [])
+        t0 = 1736157600000
+        at = dict(zip(curve["ts_ms"] - t0, curve["equity_gross"]))
+        self.assertAlmostEqual(at[1000], -0.0004)           # long marked to bid 1.10000 right after buying at ask
+        self.assertAlmostEqual(at[3000], -0.0024)           # EURUSD bid 1.09900
+        self.assertAlmostEqual(at[3500], -250.0 - 0.0024)   # XAU short marked to ask 2352.50, 100 per point
+        self.assertAlmostEqual(at[6000], 0.0016 + 100.0)    # both closed: realized only
+        self.assertAlmostEqual(curve["equity_net"].iloc[-1], 100.0016 - 1.0)
+
+        eur = eps[eps["symbol"] == "EURUSD"].iloc[0]
+        self.assertAlmostEqual(eur["max_adverse"], -0.0024)
+        self.assertAlmostEqual(eur["max_favorable"], 0.0036)
+        self.assertAlmostEqual(eur["result"], 0.0016)
+        self.assertTrue(eur["closed"])
+        xau = eps[eps["symbol"] == "XAUUSD"].iloc[0]
+        self.assertAlmostEqual(xau["max_adverse"], -250.0)
+
+        summary = drawdown_summary(curve)
+        # Deepest at the EURUSD close: XAU still -250, EUR +0.0016 realized, both commissions paid
+        self.assertAlmostEqual(summary["max_drawdown"], -250.0 + 0.0016 - 1.0)
+        self.assertEqual(summary["trough_ts_ms"], t0 + 5000)
+        self.assertEqual(summary["recovered_ts_ms"], t0 + 6000)
+
+    def test_matches_brute_force_replay(self) -> None:
+        run_dir = self.tmp / "run"
+        generate(run_dir, fills=300, seed=11)
+        fills = read_fills(run_dir / "orders.csv", "FILL")
+        ticks = read_ticks(run_dir / "l1_snapshots.csv")
+        curve, _, _ = mtm_equity(fills, ticks)
+        for i in range(0, len(curve), max(1, len(curve) // 40)):
+            ts, gross = int(curve["ts_ms"].iloc[i]), curve["equity_gross"].iloc[i]
+            self.assertAlmostEqual(gross, brute_force_equity(fills, ticks, ts), places=4)
+
+        summary = run(run_dir / "orders.csv", run_dir / "l1_snapshots.csv", run_dir / "mtm")
+        self.assertEqual(summary["fills"], len(fills))
+        for name in ("equity_curve.npz", "equity_curve.csv", "intratrade_episodes.csv", "mtm_summary.json"):
+            self.assertTrue((run_dir / "mtm" / name).exists(), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from scripts.analyzers.order_lifecycle import OrderLifecycleTracker
+
+
+def _row(phase, oid, second, **extra):
+    ts = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=second)
+    row = {"phase": phase, "order_id": oid, "timestamp_iso": ts.isoformat()}
+    row.update(extra)
+    return row
+
+
+class OrderLifecycleTrackerTests(unittest.TestCase):
+    def test_events_and_completion(self) -> None:
+        events = []
+        tracker = OrderLifecycleTracker(timeout_s=60, on_event=events.append)
+        rows = [
+            _row("REQUEST", "A", 0, size_requested="1"), _row("ACK", "A", 1), _row("FILL", "A", 2, size_filled="1"),
+            _row("FILL", "A", 3, size_filled="1"),      # duplicate: past the requested size
+            _row("REQUEST", "U", 3), _row("FILL", "U", 3, size_filled="1"),
+            _row("FILL", "U", 4, size_filled="1"),      # requested size unknown: another partial
+            _row("ACK", "B", 4),                        # ack without request
+            _row("REQUEST", "C", 5),                    # never progresses -> stuck
+            _row("REQUEST", "D", 6), _row("REJECT", "D", 7, reason="NoMoney"),
+            _row("REQUEST", "E", 8, size_requested="2"), _row("FILL", "E", 9, size_filled="1"),
+            _row("REQUEST", "F", 200),                  # advances the clock past C's timeout
+            _row("FILL", "E", 201, size_filled="1"),    # E stuck before its second partial arrives
+        ]
+        for row in rows:
+            tracker.feed(row)
+        tracker.finish()
+
+        kinds = [(e.kind, e.order_id) for e in events]
+        self.assertIn(("duplicate_fill", "A"), kinds)
+        self.assertEqual([k for k in kinds if k[1] == "U"], [])
+        self.assertIn(("ack_without_request", "B"), kinds)
+        self.assertIn(("stuck", "C"), kinds)
+        self.assertIn(("reject", "D"), kinds)
+        self.assertIn(("pending", "F"), kinds)
+        self.assertIn(("late_fill", "E"), kinds)
+        self.assertNotIn(("fill_without_request", "E"), kinds)
+        stuck_e = [e for e in events if e.kind == "stuck" and e.order_id == "E"]
+        self.assertEqual(stuck_e[0].state, "PARTIALLY_FILLED")
+        summary = tracker.summary()
+        self.assertEqual(summary["filled_orders"], 3)
+        self.assertEqual(summary["in_flight"], 0)
+
+    def test_fill_after_reject_and_after_stuck(self) -> None:
+        events = []
+        tracker = OrderLifecycleTracker(timeout_s=60, on_event=events.append)
+        rows = [
+            _row("REQUEST", "R", 0, size_requested="1"), _row("ERROR", "R", 1, reason="Timeout"),
+            _row("FILL", "R", 2, size_filled="1"),      # broker filled it after all
+            _row("FILL", "R", 3),                       # now a genuine duplicate
+            _row("REQUEST", "S", 4, size_requested="2"), _row("ACK", "S", 5),
+            _row("REQUEST", "T", 100),                  # S evicted as stuck
+            _row("FILL", "S", 101, size_filled="1"),    # late partial resumes S
+            _row("FILL", "S", 102, size_filled="1"),
+            _row("FILL", "T", 103),
+        ]
+        for row in rows:
+            tracker.feed(row)
+        tracker.finish()
+
+        kinds = [(e.kind, e.order_id) for e in events]
+        self.assertEqual([k for k in kinds if k[1] == "R"],
+                         [("reject", "R"), ("fill_after_reject", "R"), ("duplicate_fill", "R")])
+        self.assertEqual([k for k in kinds if k[1] == "S"], [("stuck", "S"), ("late_fill", "S")])
+        summary = tracker.summary()
+        self.assertEqual((summary["requests"], summary["filled_orders"]), (3, 3))
+        self.assertEqual((summary["fill_without_request"], summary["pending"]), (0, 0))
+
+    def test_memory_tracks_in_flight_only(self) -> None:
+        tracker = OrderLifecycleTracker(timeout_s=30)
+        for i in range(20000):
+            oid = f"O{i}"
+            tracker.feed(_row("REQUEST", oid, i))
+            tracker.feed(_row("FILL", oid, i))
+        self.assertLessEqual(tracker.peak_in_flight, 1)
+        self.assertLess(len(tracker.completed), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from scripts.analyzers.perf import SUMMARY_NAME, PerfRecorder
+
+
+def _busy(seconds: float) -> int:
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def _write_tool(out_dir: str, tool: str) -> None:
+    with PerfRecorder(tool) as perf:
+        pass
+    perf.write(Path(out_dir))
+
+
+class PerfRecorderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_stages_and_merged_summary(self) -> None:
+        perf = PerfRecorder("tool_a")
+        with perf:
+            with perf.stage("parse") as span:
+                _busy(0.02)
+                span.rows = 10
+            span = perf.begin("write")
+            perf.end(span, rows=3)
+        perf.write(self.tmp)
+        with PerfRecorder("tool_b") as other:
+            pass
+        other.write(self.tmp)
+
+        tools = json.loads((self.tmp / SUMMARY_NAME).read_text(encoding="utf-8"))["tools"]
+        self.assertEqual(set(tools), {"tool_a", "tool_b"})
+        stages = tools["tool_a"]["stages"]
+        self.assertEqual([(s["name"], s["rows"]) for s in stages], [("parse", 10), ("write", 3)])
+        self.assertGreaterEqual(stages[0]["wall_s"], 0.02)
+        self.assertGreater(stages[0]["cpu_s"], 0.0)
+        self.assertGreaterEqual(tools["tool_a"]["wall_s"], stages[0]["wall_s"])
+
+    def test_profile_files(self) -> None:
+        for mode, suffix in (("cprofile", ".pstats"), ("sample", ".folded")):
+            perf = PerfRecorder(f"prof_{mode}", profile=mode)
+            with perf:
+                _busy(0.05)
+            perf.write(self.tmp)
+            self.assertTrue((self.tmp / f"prof_{mode}{suffix}").exists())
+        folded = (self.tmp / "prof_sample.folded").read_text(encoding="utf-8")
+        self.assertIn("_busy", folded)
+        with self.assertRaises(ValueError):
+            PerfRecorder("x", profile="bogus")
+
+    def test_concurrent_writers_keep_every_record(self) -> None:
+        names = [f"t{i}" for i in range(24)]
+        with ThreadPoolExecutor(8) as threads, ProcessPoolExecutor(4) as procs:
+            futures = [(threads if i % 2 else procs).submit(_write_tool, str(self.tmp), name)
+                       for i, name in enumerate(names)]
+            for future in futures:
+                future.result()
+        tools = json.loads((self.tmp / SUMMARY_NAME).read_text(encoding="utf-8"))["tools"]
+        self.assertEqual(set(tools), set(names))
+        self.assertEqual([p.name for p in self.tmp.iterdir()], [SUMMARY_NAME])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from scripts.bench.synth_artifacts import generate
+from scripts.postrun_pipeline import ArtifactStore, Context, Step, StepSkipped, default_steps, main, run_pipeline, run_steps
+
+
+class SchedulerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.ctx = Context(self.tmp, self.tmp, ArtifactStore(self.tmp))
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_order_failure_and_resources(self) -> None:
+        events = []
+        active = {"matplotlib": 0, "max": 0}
+        guard = threading.Lock()
+
+        def record(name, fail=False, resource=False, skip=False):
+            def func(ctx):
+                if resource:
+                    with guard:
+                        active["matplotlib"] += 1
+                        active["max"] = max(active["max"], active["matplotlib"])
+                time.sleep(0.02)
+                if resource:
+                    with guard:
+                        active["matplotlib"] -= 1
+                events.append(name)
+                if fail:
+                    raise ValueError("boom")
+                if skip:
+                    raise StepSkipped("nothing to do")
+                return {"name": name}
+            return func
+
+        steps = [
+            Step("a", record("a")),
+            Step("b", record("b", fail=True), deps=("a",)),
+            Step("c", record("c"), deps=("b",)),
+            Step("d", record("d", skip=True), deps=("a",)),
+            Step("e", record("e"), deps=("d",)),
+            Step("p1", record("p1", resource=True), resources=("matplotlib",)),
+            Step("p2", record("p2", resource=True), resources=("matplotlib",)),
+        ]
+        results = run_steps(steps, self.ctx, workers=4)
+        self.assertLess(events.index("a"), events.index("b"))
+        self.assertEqual(results["b"].status, "failed")
+        self.assertIn("boom", results["b"].error)
+        self.assertEqual(results["c"].status, "skipped")
+        self.assertNotIn("c", events)
+        self.assertEqual(results["d"].status, "skipped")
+        self.assertEqual(results["e"].status, "skipped")
+        self.assertEqual(results["a"].detail, {"name": "a"})
+        self.assertEqual(active["max"], 1)
+
+    def test_after_orders_steps_without_blocking_them(self) -> None:
+        events = []
+
+        def record(name, fail=False):
+            def func(ctx):
+                time.sleep(0.02)
+                events.append(name)
+                if fail:
+                    raise ValueError("boom")
+            return func
+
+        steps = [Step("rollup", record("rollup", fail=True), optional=True),
+                 Step("audit", record("audit"), after=("rollup",))]
+        results = run_steps(steps, self.ctx, workers=4)
+        self.assertEqual(events, ["rollup", "audit"])
+        self.assertEqual(results["audit"].status, "ok")
+        # An ``after`` step that is not part of the run is not waited for
+        self.assertEqual(run_steps(steps[1:], self.ctx)["audit"].status, "ok")
+
+    def test_rejects_cycles_and_unknown_deps(self) -> None:
+        noop = lambda ctx: None  # noqa: E731
+        with self.assertRaises(ValueError):
+            run_steps([Step("a", noop, deps=("b",)), Step("b", noop, deps=("a",))], self.ctx)
+        with self.assertRaises(ValueError):
+            run_steps([Step("a", noop, deps=("missing",))], self.ctx)
+
+    def test_store_parses_once(self) -> None:
+        (self.tmp / "orders.csv").write_text("phase,order_id\nFILL,1\n", encoding="utf-8")
+        store = self.ctx.store
+        first = store.rows("orders.csv")
+        self.assertIs(first, store.rows("orders.csv"))
+        self.assertEqual(first[0], ["phase", "order_id"])
+        self.assertEqual(store.stats()["shared_hits"], 1)
+
+
+class PipelineEndToEndTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.run_dir = Path(self._tmp.name) / "run"
+        generate(self.run_dir, fills=400, symbols=2)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_pipeline_writes_step_outputs(self) -> None:
+        summary = run_pipeline(self.run_dir, only=["reconcile", "validate", "audit"])
+        out = self.run_dir / "postrun"
+        self.assertTrue(summary["ok"], summary["steps"])
+        self.assertEqual(set(summary["steps"]), {"reconstruct", "make_closes", "reconcile", "validate", "audit"})
+        self.assertTrue((self.run_dir / "closed_trades_fifo_reconstructed.csv").exists())
+        self.assertTrue((out / "closes" / "closed_trades_fifo_reconstructed_cleaned.csv").exists())
+        self.assertTrue((out / "reconcile" / "reconcile_summary.json").exists())
+        self.assertTrue((out / "validation.json").exists())
+        self.assertTrue((out / "audit" / "audit_validator.json").exists())
+        written = json.loads((out / "pipeline_summary.json").read_text(encoding="utf-8"))
+        self.assertEqual(written["steps"]["reconstruct"]["status"], "ok")
+        self.assertGreater(written["steps"]["reconstruct"]["detail"]["fills"], 0)
+
+    def test_only_l1_step_implies_with_l1(self) -> None:
+        out = self.run_dir / "only_quotes"
+        main(["--run-dir", str(self.run_dir), "--out", str(out), "--only", "quotes"])
+        written = json.loads((out / "pipeline_summary.json").read_text(encoding="utf-8"))
+        self.assertEqual(set(written["steps"]), {"quotes"})
+        with self.assertRaises(ValueError):
+            run_pipeline(self.run_dir, out, only=["mtm"])
+
+    def test_plotting_steps_share_the_matplotlib_resource(self) -> None:
+        steps = {s.name: s for s in default_steps(True)}
+        for name in ("plots", "heatmap", "report"):
+            self.assertIn("matplotlib", steps[name].resources, name)
+
+
+if __name__ == "__main__":
+    unittest.main()
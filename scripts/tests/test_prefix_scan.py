@@ -0,0 +1,76 @@
+import csv
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+
+from scripts.analyzers import prefix_scan
+from scripts.analyzers.prefix_scan import PHASES, hours_without_rows, scan
+from scripts.bench.synth_artifacts import generate
+from scripts.validate_artifacts import validate_artifacts
+
+
+class PrefixScanTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        generate(self.tmp, fills=400, seed=7)
+        self.orders = self.tmp / "orders.csv"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _csv_counts(self):
+        with self.orders.open(newline="", encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+        phases = Counter(row["phase"] for row in rows)
+        hours = Counter((row["timestamp_iso"][:13].replace(" ", "T"), row["phase"]) for row in rows)
+        return len(rows), phases, hours
+
+    def test_counts_match_csv_parsing(self) -> None:
+        rows, phases, hours = self._csv_counts()
+        counts = scan(self.orders, by_hour=True)
+        self.assertTrue(counts.phase_first)
+        self.assertEqual(counts.lines, rows)
+        self.assertEqual(counts.other_lines, 0)
+        self.assertEqual(counts.phases, {p: phases.get(p, 0) for p in PHASES})
+        flat = {(hour, phase): n for hour, per in counts.rows_per_hour.items() for phase, n in per.items()}
+        self.assertEqual(flat, dict(hours))
+
+    def test_split_ranges_give_same_counts(self) -> None:
+        whole = scan(self.orders, by_hour=True)
+        original = prefix_scan.MIN_BYTES_PER_WORKER
+        prefix_scan.MIN_BYTES_PER_WORKER = 1  # force several ranges on a small file
+        try:
+            header = len(self.orders.open("rb").readline())
+            ranges = prefix_scan._ranges(str(self.orders), header, self.orders.stat().st_size, 7)
+            self.assertEqual(len(ranges), 7)
+            total = sum(prefix_scan._scan_range(str(self.orders), a, b, False)[0] for a, b in ranges)
+            self.assertEqual(total, whole.lines)
+            split = scan(self.orders, by_hour=True, workers=3)
+        finally:
+            prefix_scan.MIN_BYTES_PER_WORKER = original
+        self.assertEqual((split.lines, split.phases, split.rows_per_hour),
+                         (whole.lines, whole.phases, whole.rows_per_hour))
+
+    def test_other_lines_and_gaps(self) -> None:
+        path = self.tmp / "mixed.csv"
+        path.write_text("phase,timestamp_iso,status\n"
+                        "REQUEST,2025-01-06T10:00:00Z,REQUEST\n"
+                        "\"FILL\",2025-01-06T10:00:01Z,FILL\n"
+                        "note without phase\n"
+                        "FILL,2025-01-06T13:00:00Z,FILL", encoding="utf-8")
+        counts = scan(path, by_hour=True)
+        self.assertEqual(counts.phases, {"REQUEST": 1, "ACK": 0, "FILL": 2, "REJECT": 0})
+        self.assertEqual(counts.other_lines, 1)
+        self.assertEqual(hours_without_rows(counts.rows_per_hour), ["2025-01-06T11", "2025-01-06T12"])
+
+    def test_validator_scans_phases_only_when_asked(self) -> None:
+        (self.tmp / "closed_trades_fifo_reconstructed.csv").write_text("trade_id,pnl\n", encoding="utf-8")
+        self.assertNotIn("orders_scan", validate_artifacts(self.tmp))
+        report = validate_artifacts(self.tmp, phase_scan=True)
+        self.assertEqual(report["orders_scan"]["phases"], scan(self.orders).phases)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import csv
+import json
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from scripts.analyzers.quote_quality import run
+
+T0 = datetime(2025, 1, 6, 0, 59, 59, tzinfo=timezone.utc)
+
+
+def _stamp(ms: int) -> str:
+    return (T0 + timedelta(milliseconds=ms)).strftime("%Y-%m-%dT%H:%M:%S.%f") + "0Z"
+
+
+class QuoteQualityTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _write(self, rows) -> Path:
+        path = self.root / "l1_snapshots.csv"
+        with path.open("w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["timestamp_utc", "symbol", "bid", "ask", "spread_pips", "source_server"])
+            writer.writerows(rows)
+        return path
+
+    def test_spreads_gaps_and_frozen_quotes(self) -> None:
+        # EURUSD: a locked and a crossed quote, a 7 s hole, then the same quote repeated for 3 s
+        eur = [(0, 1.10000, 1.10002), (100, 1.10001, 1.10001), (200, 1.10003, 1.10002),
+               (7200, 1.10000, 1.10002), (8200, 1.10000, 1.10002), (10200, 1.10000, 1.10002),
+               (10300, 1.10001, 1.10003)]
+        jpy = [(50 + 400 * i, 157.100, 157.115) for i in range(5)]
+        rows = [(_stamp(t), "EURUSD", bid, ask, "", "Live") for t, bid, ask in eur]
+        rows += [(_stamp(t), "usdjpy", bid, ask, "", "Live") for t, bid, ask in jpy]
+        rows.sort(key=lambda r: r[0])
+        summary = run(self._write(rows), self.root / "out", chunk_rows=3, stale_ms=5000, top=2)
+
+        eurusd = summary["streams"]["EURUSD|Live"]
+        self.assertEqual((eurusd["ticks"], eurusd["locked"], eurusd["crossed"]), (7, 1, 1))
+        self.assertEqual(eurusd["stale_gaps"], 1)
+        self.assertEqual(eurusd["repeated"], 2)
+        self.assertAlmostEqual(eurusd["spread_max_pips"], 0.2)
+        self.assertAlmostEqual(eurusd["longest_no_tick_ms"], 7000.0)
+        usdjpy = summary["streams"]["USDJPY|Live"]
+        self.assertAlmostEqual(usdjpy["spread_p50_pips"], 1.5, delta=0.02)
+        self.assertAlmostEqual(usdjpy["longest_unchanged_ms"], 1600.0)
+
+        with (self.root / "out" / "quote_quality_by_hour.csv").open(newline="") as fh:
+            hours = {(r["symbol"], r["hour"]): int(r["ticks"]) for r in csv.DictReader(fh)}
+        self.assertEqual(hours[("EURUSD", "2025-01-06T00")], 3)
+        self.assertEqual(hours[("EURUSD", "2025-01-06T01")], 4)
+        with (self.root / "out" / "stale_intervals.csv").open(newline="") as fh:
+            intervals = [r for r in csv.DictReader(fh) if r["symbol"] == "EURUSD" and r["kind"] == "no_tick"]
+        self.assertEqual([r["rank"] for r in intervals], ["1", "2"])
+        self.assertEqual(intervals[0]["start"], "2025-01-06T00:59:59.200Z")
+        with (self.root / "out" / "stale_intervals.csv").open(newline="") as fh:
+            frozen = [float(r["duration_ms"]) for r in csv.DictReader(fh)
+                      if r["symbol"] == "EURUSD" and r["kind"] == "unchanged"]
+        # The 7 s hole, then 1.10000/1.10002 repeated from 7200 until the change at 10300
+        self.assertEqual(frozen, [7000.0, 3100.0])
+
+    def test_results_do_not_depend_on_chunking(self) -> None:
+        rng = random.Random(4)
+        rows, t = [], 0
+        quotes = {"EURUSD": 1.1, "GBPUSD": 1.27, "XAUUSD": 2650.0}
+        for _ in range(3000):
+            t += rng.choice((1, 3, 40, 900, 6000))
+            symbol = rng.choice(list(quotes))
+            if rng.random() < 0.7:
+                quotes[symbol] += rng.choice((-1, 1)) * (0.01 if symbol == "XAUUSD" else 0.00001)
+            bid = round(quotes[symbol], 2 if symbol == "XAUUSD" else 5)
+            spread = rng.choice((0, 1, 2, 5)) * (0.01 if symbol == "XAUUSD" else 0.00001)
+            rows.append((_stamp(t), symbol, bid, round(bid + spread, 5), "", rng.choice(("A", "B"))))
+        path = self._write(rows)
+        whole = run(path, self.root / "whole", chunk_rows=100_000)
+        pieces = run(path, self.root / "pieces", chunk_rows=97)
+        for name in ("quote_quality_by_hour.csv", "tick_gap_histogram.csv", "stale_intervals.csv"):
+            self.assertEqual((self.root / "whole" / name).read_text(), (self.root / "pieces" / name).read_text(), name)
+        # Sums differ only in summation order
+        rounded = lambda summary: json.loads(json.dumps(summary["streams"]),
+                                             parse_float=lambda text: round(float(text), 9))
+        self.assertEqual(rounded(whole), rounded(pieces))
+
+
+if __name__ == "__main__":
+    unittest.main()
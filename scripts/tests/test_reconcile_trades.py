@@ -0,0 +1,129 @@
+import csv
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.analyzers.reconcile_trades import Reconciler, TradeRecord, iter_csv_trades, reconcile
+from scripts.bench.synth_artifacts import generate
+from scripts.postrun_pipeline import run_pipeline
+
+SCRIPTS = Path(__file__).resolve().parents[1]
+
+
+CLOSED_HEADER = "trade_id;close_time_iso;pnl_in_account_currency"
+
+
+class ReconcileTradesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmpdir.name)
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_reports_per_trade_mismatches_missing_and_extra(self) -> None:
+        closed = self.root / "closed_trades_fifo.csv"
+        closed.write_text("\n".join([
+            CLOSED_HEADER,
+            "T1;2025-01-01T10:00:00.0000000Z;10.0",
+            "T2;2025-01-01T10:01:00.0000000Z;-5.0",
+            "T3;2025-01-01T10:02:00.0000000Z;2.5",
+        ]) + "\n", encoding="utf-8")
+        closes = self.root / "trade_closes.log"
+        lines = [
+            {"timestamp_iso": "2025-01-01T10:00:01Z", "payload": {"trade_id": "T1", "realized_pnl_usd": 10.0}},
+            {"timestamp_iso": "2025-01-01T10:01:00Z", "payload": {"trade_id": "T2", "realized_pnl_usd": -4.0}},
+            {"timestamp_iso": "2025-01-01T10:03:00Z", "payload": {"trade_id": "T9", "realized_pnl_usd": 1.0}},
+        ]
+        closes.write_text("\n".join(json.dumps(x) for x in lines) + "\n", encoding="utf-8")
+
+        summary = reconcile(closed, closes, self.root / "out")
+
+        self.assertEqual(summary["matched"], 2)
+        self.assertEqual(summary["pnl_mismatch"], 1)
+        self.assertEqual(summary["missing_close"], 1)
+        self.assertEqual(summary["extra_close"], 1)
+        self.assertAlmostEqual(summary["drift"], 0.5)
+        with (self.root / "out" / "reconcile_mismatches.csv").open(newline="") as fh:
+            kinds = {(r["kind"], r["trade_id"]) for r in csv.DictReader(fh)}
+        self.assertEqual(kinds, {("pnl_mismatch", "T2"), ("missing_close", "T3"), ("extra_close", "T9")})
+        self.assertTrue((self.root / "out" / "reconcile_summary.json").exists())
+
+    def test_text_close_lines_and_time_tolerance(self) -> None:
+        closed = self.root / "closed.csv"
+        closed.write_text("trade_id,close_time_iso,pnl_in_account_currency\nT1,2025-01-01T10:00:00Z,3\n", encoding="utf-8")
+        closes = self.root / "trade_closes.log"
+        closes.write_text("line\n2025-01-01T10:00:30Z CLOSED T1 Buy size=1 pnl=3\n", encoding="utf-8")
+
+        summary = reconcile(closed, closes, time_tolerance_s=5.0)
+
+        self.assertEqual(summary["matched"], 1)
+        self.assertEqual(summary["time_mismatch"], 1)
+        self.assertEqual(summary["pnl_mismatch"], 0)
+
+    def test_pending_state_stays_bounded_by_lag_window(self) -> None:
+        closed = (TradeRecord(f"C{i}", float(i), 1.0, "") for i in range(5000))
+        closes = (TradeRecord(f"X{i}", float(i), 1.0, "") for i in range(5000))
+
+        summary = Reconciler(max_lag_s=10.0).run(closed, closes)
+
+        self.assertEqual(summary["missing_close"], 5000)
+        self.assertEqual(summary["extra_close"], 5000)
+        self.assertLess(summary["peak_pending"], 50)
+
+    def test_untimed_and_id_less_records_stay_bounded(self) -> None:
+        closed = (TradeRecord(f"C{i}" if i % 2 else "", None, 1.0, "") for i in range(5000))
+        closes = (TradeRecord(f"X{i}" if i % 2 else "", None, 2.0, "") for i in range(5000))
+
+        summary = Reconciler(max_untimed=20).run(closed, closes)
+
+        self.assertEqual(summary["closed_without_id"], 2500)
+        self.assertEqual(summary["closes_without_id"], 2500)
+        self.assertAlmostEqual(summary["closes_without_id_sum"], 5000.0)
+        self.assertEqual(summary["missing_close"], 2500)
+        self.assertEqual(summary["extra_close"], 2500)
+        self.assertLessEqual(summary["peak_pending"], 42)
+
+    def test_synthetic_run_joins_on_close_order_id(self) -> None:
+        run_dir, out = self.root / "run", self.root / "postrun"
+        generate(run_dir, fills=300, symbols=2, seed=7)
+        run_pipeline(run_dir, out, only=["reconcile"])
+        closed = out / "closes" / "closed_trades_fifo_reconstructed_cleaned.csv"
+        with closed.open(newline="") as fh:
+            close_orders = {r["close_order_id"] for r in csv.DictReader(fh)}
+
+        summary = json.loads((out / "reconcile" / "reconcile_summary.json").read_text(encoding="utf-8"))
+
+        self.assertEqual(summary["id_space"], "order")
+        self.assertEqual(summary["closed_rows"], len(close_orders))  # FIFO lots summed per close order
+        self.assertEqual(summary["matched"], len(close_orders))
+        self.assertEqual(summary["missing_close"], 0)
+        self.assertEqual(summary["extra_close"], 0)
+
+    def test_closed_pnl_column_lookup_order(self) -> None:
+        path = self.root / "closed.csv"
+        path.write_text("trade_id,pnl_in_account_currency,net_realized_usd\nT1,1.5,2.5\n", encoding="utf-8")
+        self.assertEqual([r.pnl for r in iter_csv_trades(path)], [2.5])
+        path.write_text("trade_id,pnl_in_account_currency,gross_realized_usd\nT1,1.5,3.5\n", encoding="utf-8")
+        self.assertEqual([r.pnl for r in iter_csv_trades(path)], [3.5])
+        path.write_text("trade_id,pnl_currency\nT1,4.5\n", encoding="utf-8")
+        self.assertEqual([r.pnl for r in iter_csv_trades(path)], [4.5])
+
+    def test_reconcile_script_writes_files_only_with_out(self) -> None:
+        closed = self.root / "closed.csv"
+        closed.write_text("trade_id,close_time_iso,net_realized_usd\nT1,2025-01-01T10:00:00Z,3\n", encoding="utf-8")
+        closes = self.root / "trade_closes.log"
+        closes.write_text("2025-01-01T10:00:00Z CLOSED T1 Buy size=1 pnl=3\n", encoding="utf-8")
+        cmd = [sys.executable, str(SCRIPTS / "reconcile.py"), "--closed", str(closed), "--closes", str(closes)]
+        result = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+        self.assertEqual((result["closed_sum"], result["trades"]["matched"]), (3.0, 1))
+        self.assertFalse((self.root / "reconcile_summary.json").exists())
+        subprocess.run(cmd + ["--out", str(self.root / "out")], check=True, capture_output=True)
+        self.assertTrue((self.root / "out" / "reconcile_summary.json").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.analyzers.result_cache import ResultCache, changed_files, import_closure, snapshot_dir
+
+SCRIPTS = Path(__file__).resolve().parents[1]
+
+
+class ResultCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.cache = ResultCache(self.tmp / "cache")
+        self.orders = self.tmp / "orders.csv"
+        self.orders.write_text("phase,order_id\nREQUEST,1\n", encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def test_key_tracks_content_args_and_version(self) -> None:
+        base = self.cache.key("tool", "v1", {"strict": False}, [self.orders])
+        self.assertEqual(base, self.cache.key("tool", "v1", {"strict": False, "no_cache": False}, [self.orders]))
+        self.assertNotEqual(base, self.cache.key("tool", "v2", {"strict": False}, [self.orders]))
+        self.assertNotEqual(base, self.cache.key("tool", "v1", {"strict": True}, [self.orders]))
+        self.orders.write_text("phase,order_id\nREQUEST,2\n", encoding="utf-8")
+        st = self.orders.stat()
+        os.utime(self.orders, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        self.assertNotEqual(base, self.cache.key("tool", "v1", {"strict": False}, [self.orders]))
+
+    def test_store_restore_changed_outputs(self) -> None:
+        out = self.tmp / "out"
+        out.mkdir()
+        (out / "unrelated.txt").write_text("keep", encoding="utf-8")
+        before = snapshot_dir(out)
+        (out / "kpi.json").write_text('{"a": 1}', encoding="utf-8")
+        (out / "sub").mkdir()
+        (out / "sub" / "table.csv").write_text("x\n1\n", encoding="utf-8")
+        files = changed_files(out, before)
+        self.assertEqual(files, ["kpi.json", "sub/table.csv"])
+
+        key = self.cache.key("tool", "v1", {}, [self.orders])
+        self.cache.store(key, "tool", out, files, {"returncode": 0})
+        target = self.tmp / "restored"
+        self.assertEqual(self.cache.restore(key, target), {"returncode": 0})
+        self.assertEqual((target / "sub" / "table.csv").read_text(encoding="utf-8"), "x\n1\n")
+        self.assertFalse((target / "unrelated.txt").exists())
+        self.assertIsNone(self.cache.restore("missing", target))
+
+    def test_lru_eviction(self) -> None:
+        out = self.tmp / "out"
+        out.mkdir()
+        (out / "blob.bin").write_bytes(b"x" * 4000)
+        self.cache.max_bytes = 10_000
+        for key in ("a", "b"):
+            self.cache.store(key, "tool", out, ["blob.bin"])
+        self.cache.restore("a")  # "b" becomes least recently used
+        self.cache.store("c", "tool", out, ["blob.bin"])
+        self.assertIsNone(self.cache.restore("b"))
+        self.assertIsNotNone(self.cache.restore("a"))
+        self.assertIsNotNone(self.cache.restore("c"))
+        self.assertEqual(self.cache.stats()["entries"], 2)
+
+    def test_import_closure_follows_analyzer_imports(self) -> None:
+        audit = {p.name for p in import_closure(SCRIPTS / "audit_gate2_risks.py")}
+        self.assertTrue({"audit_gate2_risks.py", "prefix_scan.py", "risk_rollup.py", "lazy_imports.py"} <= audit)
+        validate = {p.name for p in import_closure(SCRIPTS / "validate_artifacts.py")}
+        self.assertIn("prefix_scan.py", validate)
+        self.assertNotIn("risk_rollup.py", validate)
+
+
+if __name__ == "__main__":
+    unittest.main()
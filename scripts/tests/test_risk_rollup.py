@@ -0,0 +1,149 @@
+import contextlib
+import io
+import json
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.analyzers.risk_rollup import RiskRollup, fresh_meta, load, main, pick_resolution
+from scripts.audit_gate2_risks import Gate2RiskAuditor
+from scripts.postrun_report import TelemetryAnalyzer
+
+T0 = datetime(2025, 1, 6, 0, 58, 30, tzinfo=timezone.utc)
+HEADER = "timestamp_utc,equity,balance,open_pnl,closed_pnl,margin,drawdown,R_used,exposure\n"
+
+
+def _line(ms: int, equity: float) -> str:
+    stamp = (T0 + timedelta(milliseconds=ms)).strftime("%Y-%m-%dT%H:%M:%S.%f") + "Z"
+    return f"{stamp},{equity:.2f},10000,{equity - 10000:.2f},0,{abs(equity - 10000) / 10:.2f}," \
+           f"{max(0.0, 10000 - equity):.2f},0.5,{equity * 3:.2f}\n"
+
+
+class RiskRollupTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        rng = random.Random(8)
+        self.lines, t, equity = [], 0, 10000.0
+        for _ in range(4000):
+            t += rng.choice((0, 250, 400, 1000, 9000))
+            equity += rng.uniform(-5, 5)
+            self.lines.append(_line(t, equity))
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _write(self, name: str, text: str, mode: str = "w") -> Path:
+        path = self.root / name
+        with path.open(mode, newline="") as fh:
+            fh.write(text)
+        return path
+
+    def test_ohlc_matches_a_pandas_resample(self) -> None:
+        risk = self._write("risk_snapshots.csv", HEADER + "".join(self.lines))
+        RiskRollup(risk).update()
+        frame = pd.read_csv(risk)
+        frame.index = pd.to_datetime(frame["timestamp_utc"], utc=True)
+        for res, rule in (("1s", "1s"), ("1m", "1min"), ("1h", "1h")):
+            expected = frame["equity"].resample(rule).ohlc().dropna()
+            got = load(risk.parent / "risk_rollup", res)
+            self.assertEqual(len(got["ts_ms"]), len(expected), res)
+            self.assertEqual(int(got["count"].sum()), len(frame))
+            for part, column in zip("ohlc", ("open", "high", "low", "close")):
+                self.assertEqual(got[f"equity_{part}"].tolist(), expected[column].tolist(), f"{res} {column}")
+        meta = fresh_meta(risk)
+        self.assertEqual(meta["snapshots"], len(frame))
+        self.assertEqual(meta["duplicates"], int((frame.index.to_series().diff() == pd.Timedelta(0)).sum()))
+        self.assertNotIn("free_margin", meta["fields"])
+
+    def test_report_charts_read_the_rollup_when_current(self) -> None:
+        risk = self._write("risk_snapshots.csv", HEADER + "".join(self.lines))
+        orders = self._write("orders.csv", "status,order_id\nREQUEST,1\n")
+        report = TelemetryAnalyzer(orders, risk)
+        with contextlib.redirect_stdout(io.StringIO()):
+            report.load_data()
+        self.assertIsNone(report.risk_chart)  # no store yet: charts use the frame
+
+        RiskRollup(risk).update()
+        report = TelemetryAnalyzer(orders, risk)
+        with contextlib.redirect_stdout(io.StringIO()):
+            report.load_data()
+        resolution = pick_resolution(risk.parent / "risk_rollup", 2000)
+        expected = load(risk.parent / "risk_rollup", resolution)
+        self.assertEqual(report.risk_chart["equity_c"].tolist(), expected["equity_c"].tolist())
+        self.assertNotIn("drawdown", report.risk_df.columns)  # KPIs parse only the columns they use
+        self.assertEqual(len(report.risk_df), len(self.lines))
+
+    def test_incremental_updates_equal_one_build(self) -> None:
+        whole = self._write("whole.csv", HEADER + "".join(self.lines))
+        RiskRollup(whole, self.root / "whole_store").update()
+
+        # Grow the file in uneven pieces, including a half-written last line
+        text = HEADER + "".join(self.lines)
+        grown = self.root / "grown.csv"
+        cuts = sorted(random.Random(2).sample(range(len(HEADER) + 1, len(text)), 12)) + [len(text)]
+        start = 0
+        for cut in cuts:
+            self._write("grown.csv", text[start:cut], mode="a")
+            start = cut
+            RiskRollup(grown, self.root / "grown_store").update(max_bytes=4096)
+        self.assertIsNone(fresh_meta(grown, self.root / "grown_store"))
+        while RiskRollup(grown, self.root / "grown_store").update():
+            pass
+        self.assertIsNotNone(fresh_meta(grown, self.root / "grown_store"))
+        for res in ("1s", "1m", "1h"):
+            a, b = load(self.root / "whole_store", res), load(self.root / "grown_store", res)
+            self.assertEqual(sorted(a), sorted(b))
+            for name in a:
+                self.assertEqual(a[name].tolist(), b[name].tolist(), f"{res} {name}")
+
+    def test_truncation_rebuilds_and_clock_jumps_are_counted(self) -> None:
+        risk = self._write("risk_snapshots.csv", HEADER + "".join(self.lines[:50]))
+        RiskRollup(risk).update()
+        # A restarted writer truncates the file; a backward jump lands in the open bucket
+        self._write("risk_snapshots.csv", HEADER + _line(60_000, 9990) + _line(59_000, 9980) + _line(61_000, 10010))
+        rollup = RiskRollup(risk)
+        self.assertEqual(rollup.update(), 3)
+        self.assertEqual((rollup.meta["snapshots"], rollup.meta["backward_jumps"]), (3, 1))
+        minutes = load(risk.parent / "risk_rollup", "1m")
+        self.assertEqual(minutes["count"].tolist(), [3])
+        self.assertEqual((minutes["equity_o"][0], minutes["equity_l"][0], minutes["equity_c"][0]), (9990, 9980, 10010))
+        self.assertEqual(pick_resolution(risk.parent / "risk_rollup", max_points=1), "1m")
+
+    def test_sub_millisecond_snapshots_are_not_duplicates(self) -> None:
+        # RiskSnapshotPersister writes ToString("o"): 100 ns ticks
+        rows = ["2025-01-06T00:00:00.1234561Z", "2025-01-06T00:00:00.1234565Z", "2025-01-06T00:00:00.1234565Z",
+                "2025-01-06T00:00:01.0000000Z"]
+        risk = self._write("risk_snapshots.csv", HEADER + "".join(
+            f"{stamp},10000,10000,0,0,0,0,0,0\n" for stamp in rows))
+        RiskRollup(risk).update()
+        meta = fresh_meta(risk)
+        self.assertEqual((meta["duplicates"], meta["backward_jumps"]), (1, 0))
+        verdicts = []
+        for use_store in (True, False):
+            auditor = Gate2RiskAuditor(str(self.root), str(self.root / f"audit_{use_store}"), use_risk_rollup=use_store)
+            with contextlib.redirect_stdout(io.StringIO()):
+                auditor.audit_r9_clock_drift()
+            verdicts.append(auditor.results["R9_clock_drift"]["evidence"])
+        self.assertEqual(verdicts[0], verdicts[1])
+        self.assertEqual(verdicts[0], ["risk_snapshots: 0 backward jumps, 1 duplicates"])
+
+    def test_cli_is_idempotent(self) -> None:
+        run_dir = self.root / "run"
+        run_dir.mkdir()
+        self._write("run/risk_snapshots.csv", HEADER + "".join(self.lines))
+        self.assertEqual(main(["--run-dir", str(run_dir)]), 0)
+        before = {p.name: p.read_bytes() for p in (run_dir / "risk_rollup" / "1m").iterdir()}
+        self.assertEqual(main(["--run-dir", str(run_dir)]), 0)
+        after = {p.name: p.read_bytes() for p in (run_dir / "risk_rollup" / "1m").iterdir()}
+        self.assertEqual(before, after)
+        meta = json.loads((run_dir / "risk_rollup" / "meta.json").read_text())
+        self.assertEqual(meta["snapshots"], len(self.lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import csv
+import json
+import math
+import random
+import statistics
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.analyzers.rolling_metrics import RollingWindow, run
+from scripts.analyzers.sketches import QuantileSketch
+from scripts.bench.synth_artifacts import generate
+
+
+class RollingWindowTests(unittest.TestCase):
+    def _check(self, window: RollingWindow, events, in_window) -> None:
+        for i, (t, value) in enumerate(events):
+            window.push(t, value, "X")
+            expect = [v for tt, v in in_window(i, t)]
+            self.assertEqual(window.n, len(expect))
+            self.assertEqual(window.kinds["X"], len(expect))
+            self.assertAlmostEqual(window.mean, statistics.fmean(expect), places=6)
+            if len(expect) > 1:
+                self.assertAlmostEqual(window.std, statistics.stdev(expect), places=6)
+            self.assertEqual(window.max, max(expect))
+            self.assertEqual(window.min, min(expect))
+            self.assertAlmostEqual(window.positive_rate, sum(v > 0 for v in expect) / len(expect))
+            losses = math.sqrt(sum(min(v, 0.0) ** 2 for v in expect) / len(expect))
+            self.assertAlmostEqual(window.downside_deviation, losses, places=6)
+            ordered = sorted(expect)
+            exact = ordered[int(0.95 * (len(ordered) - 1))]
+            self.assertLessEqual(abs(window.quantile(0.95) - exact), abs(exact) * 0.021 + 1e-9)
+
+    def test_count_and_time_windows_match_brute_force(self) -> None:
+        rng = random.Random(5)
+        events, t = [], 0
+        for _ in range(3000):
+            t += rng.choice((0, 1, 5, 40, 300))
+            events.append((t, round(rng.gauss(2.0, 50.0), 2)))
+        self._check(RollingWindow(size=37, sketch=True), events,
+                    lambda i, now: events[max(0, i - 36):i + 1])
+        self._check(RollingWindow(span_ms=1000, sketch=True), events,
+                    lambda i, now: [e for e in events[:i + 1] if e[0] > now - 1000])
+        overall = RollingWindow(sketch=True)
+        self._check(overall, events, lambda i, now: events[:i + 1])
+        self.assertEqual((len(overall), len(overall.events)), (len(events), 0))
+
+    def test_large_offset_values_keep_their_variance(self) -> None:
+        window = RollingWindow(size=100)
+        for i in range(5000):
+            window.push(i, 1e9 + (i % 7) * 0.001)
+        expect = [1e9 + (i % 7) * 0.001 for i in range(4900, 5000)]
+        self.assertAlmostEqual(window.std, statistics.stdev(expect), places=7)
+
+    def test_backwards_timestamps_are_clamped(self) -> None:
+        window = RollingWindow(span_ms=10)
+        window.push(100, 1.0)
+        window.push(95, 2.0)
+        window.push(111, 3.0)
+        self.assertEqual(window.n, 1)
+        self.assertEqual(window.last_t, 111)
+
+    def test_sketch_remove_restores_quantiles(self) -> None:
+        sketch = QuantileSketch()
+        values = [float(v) for v in range(-50, 200)]
+        for v in values:
+            sketch.add(v)
+        for v in values[:100]:
+            sketch.remove(v)
+        rest = QuantileSketch()
+        rest.add_many(values[100:])
+        self.assertEqual(sketch.count, rest.count)
+        self.assertEqual(sketch.positive, rest.positive)
+        self.assertEqual(sketch.quantile(0.5), rest.quantile(0.5))
+        for v in values[100:]:
+            sketch.remove(v)
+        self.assertEqual((sketch.count, sketch.positive, sketch.negative), (0, {}, {}))
+        self.assertIsNone(sketch.quantile(0.5))
+
+
+class RollingRunTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_run_on_synthetic_artifacts(self) -> None:
+        generate(self.root / "run", fills=600, seed=3)
+        run_dir = self.root / "run"
+        rng = random.Random(9)
+        pnl = [round(rng.gauss(1.0, 20.0), 2) for _ in range(80)]
+        with (run_dir / "closed_trades_fifo_reconstructed.csv").open("w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["close_time", "symbol", "pnl_currency"])
+            # Written newest first; the tool sorts by close time
+            for i in reversed(range(len(pnl))):
+                writer.writerow([f"2025-01-06T00:{i // 60:02d}:{i % 60:02d}Z", "EURUSD", pnl[i]])
+        summary = run(self.root / "out", run_dir / "closed_trades_fifo_reconstructed.csv", run_dir / "orders.csv",
+                      run_dir / "risk_snapshots.csv", trade_window=20, order_window=200, span_minutes=30)
+        out = self.root / "out"
+        for name in ("rolling_trades.csv", "rolling_orders.csv", "rolling_risk.csv", "rolling_summary.json"):
+            self.assertTrue((out / name).exists(), name)
+        self.assertEqual(json.loads((out / "rolling_summary.json").read_text())["span_minutes"], 30)
+
+        overall = summary["trades"]["overall"]
+        self.assertEqual(overall["trades"], len(pnl))
+        self.assertAlmostEqual(overall["pnl_sum"], sum(pnl), places=4)
+        self.assertAlmostEqual(overall["win_rate"], sum(p > 0 for p in pnl) / len(pnl))
+
+        with (out / "rolling_trades.csv").open(newline="") as fh:
+            rows = [r for r in csv.DictReader(fh) if r["window"] == "events:20"]
+        self.assertEqual(len(rows), len(pnl) - 9)
+        self.assertTrue(all(10 <= int(r["trades"]) <= 20 for r in rows))
+        self.assertAlmostEqual(float(rows[-1]["expectancy"]), statistics.fmean(pnl[-20:]), places=6)
+
+        orders = summary["orders"]["overall"]
+        self.assertLessEqual(orders["filled_orders"], orders["requests"])
+        self.assertGreaterEqual(orders["fill_rows"], orders["filled_orders"])
+        self.assertIn("time:30m", summary["orders"]["windows"])
+        self.assertLessEqual(summary["risk"]["overall"]["drawdown_from_peak"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from scripts.analyzers.run_catalog import CATALOG_FILENAME, RunCatalog, lookup_point_values, resolve_latest_run
+
+DAY = 86400.0
+
+
+def _make_run(root: Path, name: str, metadata: dict = None, telemetry_last: str = None,
+              age_s: float = DAY) -> Path:
+    """Create a run whose files were last written ``age_s`` ago (closed unless recent)."""
+    run = root / name
+    run.mkdir(parents=True)
+    if metadata is not None:
+        (run / "run_metadata.json").write_text(json.dumps(metadata), encoding="utf-8")
+    lines = ["timestamp_iso,ticksPerSec"]
+    if telemetry_last:
+        lines.append(f"{telemetry_last},1.0")
+    (run / "telemetry.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    _age(run, age_s)
+    return run
+
+
+def _age(path: Path, age_s: float) -> None:
+    stamp = time.time() - age_s
+    for child in path.iterdir():
+        os.utime(child, (stamp, stamp))
+    os.utime(path, (stamp, stamp))
+
+
+class RunCatalogTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmpdir.name) / "artifacts"
+        self.root.mkdir()
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_latest_uses_mtime_and_lookups_never_write(self) -> None:
+        old = _make_run(self.root, "telemetry_run_20250101_000000", telemetry_last="2025-01-01T05:00:00Z")
+        _make_run(self.root, "telemetry_run_20250301_000000", telemetry_last="2025-03-01T05:00:00Z", age_s=2 * DAY)
+
+        # No catalog: plain scan, and no database is created
+        self.assertEqual(resolve_latest_run(self.root), old)
+        self.assertFalse((self.root / CATALOG_FILENAME).exists())
+
+        with RunCatalog(self.root) as catalog:
+            catalog.refresh()
+        db_bytes = (self.root / CATALOG_FILENAME).read_bytes()
+        self.assertEqual(resolve_latest_run(self.root), old)
+        # A run created after the last refresh is still found, without touching the catalog
+        newer = _make_run(self.root, "telemetry_run_20240101_000000", age_s=60)
+        self.assertEqual(resolve_latest_run(self.root), newer)
+        self.assertEqual((self.root / CATALOG_FILENAME).read_bytes(), db_bytes)
+
+    def test_latest_smoke_prefers_runs_nested_in_telemetry_runs(self) -> None:
+        run = _make_run(self.root, "telemetry_run_20250101_000000")
+        (run / "smoke_20250101_010000").mkdir()
+        (self.root / "smoke_20250601_000000").mkdir()
+        _age(run, DAY)
+
+        self.assertEqual(resolve_latest_run(self.root, kind="smoke"), run / "smoke_20250101_010000")
+        with RunCatalog(self.root) as catalog:
+            catalog.refresh()
+            self.assertEqual(catalog.latest("smoke").path, str(run / "smoke_20250101_010000"))
+        self.assertEqual(resolve_latest_run(self.root, kind="smoke"), run / "smoke_20250101_010000")
+
+    def test_records_metadata_point_values_and_inventory(self) -> None:
+        run = _make_run(
+            self.root,
+            "telemetry_run_20250201_120000",
+            metadata={
+                "run_id": "telemetry_run_20250201_120000",
+                "start_time_iso": "2025-02-01T12:00:00Z",
+                "mode": "paper",
+                "config_snapshot": {"execution": {"pointValuePerLot": 10.0}, "risk": {"LotSizeDefault": 100000}},
+            },
+            telemetry_last="2025-02-02T12:00:00Z",
+        )
+        smoke = run / "smoke_20250201_130000"
+        smoke.mkdir()
+        (smoke / "orders.csv").write_text("phase,timestamp_iso\n", encoding="utf-8")
+        _age(smoke, DAY)
+
+        with RunCatalog(self.root) as catalog:
+            stats = catalog.refresh()
+            record = catalog.get("telemetry_run_20250201_120000")
+            smoke_record = catalog.latest("smoke")
+
+        self.assertEqual(stats["indexed"], 1)
+        self.assertEqual(record.start_time, "2025-02-01T12:00:00Z")
+        self.assertEqual(record.end_time, "2025-02-02T12:00:00Z")
+        self.assertEqual(record.metadata["mode"], "paper")
+        self.assertIn("telemetry.csv", record.files)
+        self.assertAlmostEqual(record.pvl, 10.0)
+        self.assertAlmostEqual(record.pvu, 10.0 / 100000)
+        self.assertEqual(smoke_record.parent_id, record.run_id)
+        self.assertEqual(lookup_point_values(run), (record.pvu, record.pvl))
+
+    def test_refresh_is_incremental_and_query_filters_range(self) -> None:
+        for day in ("01", "02", "03"):
+            _make_run(self.root, f"telemetry_run_202504{day}_000000", telemetry_last=f"2025-04-{day}T10:00:00Z")
+        with RunCatalog(self.root) as catalog:
+            self.assertEqual(catalog.refresh()["indexed"], 3)
+            # Closed runs are not re-indexed; any run still being written is, newest or not
+            self.assertEqual(catalog.refresh()["indexed"], 0)
+            open_run = _make_run(self.root, "telemetry_run_20250301_000000", age_s=0)
+            _age(self.root / "telemetry_run_20250403_000000", -60)  # the open run is not the newest
+            self.assertEqual(catalog.refresh()["indexed"], 1)
+            self.assertIsNone(catalog.get(open_run.name).end_time)
+            self.assertEqual(catalog.refresh()["indexed"], 1)
+            _age(open_run, DAY)
+            self.assertEqual(catalog.refresh()["indexed"], 1)
+            self.assertEqual(catalog.refresh()["indexed"], 0)
+            names = [r.name for r in catalog.query(since="2025-04-02", until="2025-04-03")]
+        self.assertEqual(names, ["telemetry_run_20250402_000000"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.analyzers.runtime_pressure import load_orders, main as pressure_main
+
+
+class RuntimePressureTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmpdir.name)
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_gen2_spikes_flag_runtime_bound_minutes(self) -> None:
+        start = pd.Timestamp("2025-01-01T00:00:00Z")
+        spikes = {5, 12, 20}
+        tel_rows, order_rows = [], []
+        gen2 = 0
+        for minute in range(30):
+            ts = start + pd.Timedelta(minutes=minute)
+            gen2 += 1 if minute in spikes else 0
+            tel_rows.append({
+                "timestamp_iso": ts.isoformat(), "ticksPerSec": 10.0, "signalsLastMinute": 2,
+                "ordersRequestedLastMinute": 2, "ordersFilledLastMinute": 2, "errorsLastMinute": 0,
+                "memoryMB": 100 + minute, "gen0": minute * 3, "gen1": minute, "gen2": gen2,
+            })
+            latency = 400 if minute in spikes else 100
+            for second in (10, 40):
+                order_rows.append({
+                    "phase": "FILL", "timestamp_iso": (ts - pd.Timedelta(seconds=60 - second)).isoformat(),
+                    "latency_ms": latency, "price_requested": 1.1, "price_filled": 1.1001, "side": "BUY",
+                })
+        tel_path = self.tmp_path / "telemetry.csv"
+        orders_path = self.tmp_path / "orders.csv"
+        pd.DataFrame(tel_rows).to_csv(tel_path, index=False)
+        pd.DataFrame(order_rows).to_csv(orders_path, index=False)
+
+        report = pressure_main(str(tel_path), str(orders_path), str(self.tmp_path / "out"), max_lag=2)
+
+        self.assertEqual(report["throughput"]["runtime_bound_minutes"], 3)
+        bound = {pd.Timestamp(t).minute for t in report["runtime_bound_minutes"]}
+        self.assertEqual(bound, spikes)
+        corr = next(c for c in report["correlations"]
+                    if c["driver"] == "gen2_delta" and c["outcome"] == "latency_ms_mean")
+        self.assertGreater(corr["pearson"], 0.9)
+        self.assertEqual(corr["best_lag_min"], 0)
+        minutes = pd.read_csv(self.tmp_path / "out" / "runtime_pressure_minutes.csv")
+        self.assertEqual(len(minutes), 30)
+        self.assertTrue(json.loads((self.tmp_path / "out" / "runtime_pressure_report.json").read_text()))
+
+    def test_slippage_falls_back_per_row(self) -> None:
+        path = self.tmp_path / "orders.csv"
+        pd.DataFrame([
+            {"phase": "FILL", "timestamp_iso": "2025-01-01T00:00:01Z", "slippage_pips": -1.5, "slippage": -0.015,
+             "price_requested": 150.0, "price_filled": 149.985},
+            {"phase": "FILL", "timestamp_iso": "2025-01-01T00:00:02Z", "slippage_pips": None, "slippage": 0.0002,
+             "price_requested": 1.1, "price_filled": 1.1002},
+        ]).to_csv(path, index=False)
+        orders = load_orders(str(path))
+        self.assertEqual(orders["slippage_abs"].iloc[0], 1.5)
+        # A blank pips cell falls back to that row's price-unit value, not to NaN
+        self.assertAlmostEqual(orders["slippage_abs"].iloc[1], 0.0002)
+
+        pd.read_csv(path).drop(columns=["slippage_pips", "slippage"]).to_csv(path, index=False)
+        self.assertAlmostEqual(load_orders(str(path))["slippage_abs"].iloc[0], 0.015)
+
+
+if __name__ == "__main__":
+    unittest.main()
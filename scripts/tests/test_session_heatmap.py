@@ -0,0 +1,104 @@
+import csv
+import tempfile
+import unittest
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from scripts.analyzers.session_heatmap import SessionHeatmap, hist_quantile, hour_of_week, main
+from scripts.bench.synth_artifacts import generate
+
+
+def _how(stamp: str) -> int:
+    dt = datetime.strptime(stamp[:19], "%Y-%m-%dT%H:%M:%S")
+    return dt.weekday() * 24 + dt.hour
+
+
+class SessionHeatmapTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.runs = []
+        for seed in (5, 6):
+            run_dir = self.root / f"run_{seed}"
+            generate(run_dir, fills=400, symbols=2, seed=seed)
+            with (run_dir / "closed_trades_fifo_reconstructed.csv").open("w", newline="") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(["symbol", "close_time", "pnl_currency"])
+                writer.writerow(["EURUSD", "2025-01-10T16:05:00Z", "42"])    # Friday 16h
+                writer.writerow(["EURUSD", "2025-01-10T16:45:00Z", "-8.5"])
+                writer.writerow(["eurusd", "2025-01-12T23:59:59Z", "3"])     # Sunday 23h
+            self.runs.append(run_dir)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _orders(self, run_dir: Path):
+        with (run_dir / "orders.csv").open(newline="") as fh:
+            return list(csv.DictReader(fh))
+
+    def test_counts_match_the_orders_file(self) -> None:
+        heat = SessionHeatmap()
+        self.assertTrue(heat.add_run(self.runs[0]))
+        self.assertFalse(heat.add_run(self.runs[0]))
+        rows = self._orders(self.runs[0])
+        eur = heat.symbols.index("EURUSD")
+        requests = Counter(_how(r["timestamp_iso"]) for r in rows if r["phase"] == "REQUEST" and r["symbol"] == "EURUSD")
+        self.assertEqual({h: int(n) for h, n in enumerate(heat.counts["requests"][eur]) if n}, dict(requests))
+        fills = {r["orderId"] for r in rows if r["phase"] == "FILL"}
+        self.assertEqual(int(heat.counts["fills"].sum()), len(fills))
+        latencies = [float(r["latency_ms"]) for r in rows if r["phase"] == "FILL" and r["latency_ms"]]
+        self.assertEqual(int(heat.hist["latency_ms"].sum()), len(latencies))
+        self.assertAlmostEqual(float(heat.sums["latency_ms"].sum()), sum(latencies), places=6)
+
+        self.assertEqual(int(heat.counts["trades"][eur, 4 * 24 + 16]), 2)
+        self.assertEqual(int(heat.counts["wins"][eur, 6 * 24 + 23]), 1)
+        grid = heat.grid("pnl", "sum", symbol="eurusd")
+        self.assertAlmostEqual(grid[4, 16], 33.5)
+        self.assertTrue(np.isnan(grid[0, 0]))
+        self.assertEqual(heat.grid("wins", "rate")[4, 16], 0.5)
+
+    def test_merge_is_addition_and_survives_a_round_trip(self) -> None:
+        a, b, both = SessionHeatmap(), SessionHeatmap(), SessionHeatmap()
+        a.add_run(self.runs[0])
+        b.add_run(self.runs[1])
+        both.add_run(self.runs[0])
+        both.add_run(self.runs[1])
+        merged = SessionHeatmap.load(a.save(self.root / "a.npz")).merge(SessionHeatmap.load(b.save(self.root / "b.npz")))
+        self.assertEqual(merged.symbols, both.symbols)
+        for name in both.hist:
+            np.testing.assert_array_equal(merged.hist[name], both.hist[name])
+            np.testing.assert_allclose(merged.sums[name], both.sums[name])
+        for name in both.counts:
+            np.testing.assert_array_equal(merged.counts[name], both.counts[name])
+        with self.assertRaises(ValueError):
+            merged.merge(SessionHeatmap.load(self.root / "a.npz"))
+
+    def test_histogram_quantiles_and_hour_of_week(self) -> None:
+        edges = np.array([0.0, 10.0, 20.0, 50.0])
+        hist = np.array([[0, 10, 10, 0], [0, 0, 0, 4], [0, 0, 0, 0]])
+        self.assertEqual(hist_quantile(hist, edges, 0.5)[0], 20.0)
+        self.assertEqual(hist_quantile(hist, edges, 0.25)[0], 15.0)
+        self.assertEqual(hist_quantile(hist, edges, 0.95)[1], 50.0)
+        self.assertTrue(np.isnan(hist_quantile(hist, edges, 0.5)[2]))
+        monday = int(datetime(2025, 1, 6, tzinfo=timezone.utc).timestamp() * 1000)
+        self.assertEqual(hour_of_week(np.array([monday, monday + 3_600_000 * 167 + 1])).tolist(), [0, 167])
+
+    def test_cli_add_merge_render(self) -> None:
+        one, two, out = self.root / "one.npz", self.root / "two.npz", self.root / "heatmaps"
+        self.assertEqual(main(["add", "--store", str(one), "--run-dir", str(self.runs[0])]), 0)
+        self.assertEqual(main(["add", "--store", str(two), "--run-dir", str(self.runs[1])]), 0)
+        self.assertEqual(main(["merge", str(one), str(two), "--out", str(self.root / "all.npz")]), 0)
+        self.assertEqual(main(["render", "--store", str(self.root / "all.npz"), "--out", str(out),
+                               "--symbol", "EURUSD"]), 0)
+        with (out / "heatmap_trades_EURUSD.csv").open(newline="") as fh:
+            grid = {r["weekday"]: r for r in csv.DictReader(fh)}
+        self.assertEqual(len(grid), 7)
+        self.assertEqual(float(grid["Fri"]["16"]), 4.0)
+        self.assertEqual(float(grid["Sun"]["23"]), 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import random
+import unittest
+
+from scripts.analyzers.sketches import QuantileSketch, merge_all
+
+
+class QuantileSketchTests(unittest.TestCase):
+    def test_quantiles_within_relative_accuracy(self) -> None:
+        rng = random.Random(7)
+        values = [rng.lognormvariate(3.0, 1.0) for _ in range(20000)]
+        sketch = QuantileSketch(0.01)
+        for v in values:
+            sketch.add(v)
+        ordered = sorted(values)
+        for q in (0.5, 0.9, 0.99):
+            exact = ordered[int(q * (len(ordered) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q), exact, delta=exact * 0.02)
+
+    def test_merge_equals_single_pass_and_survives_serialization(self) -> None:
+        values = [float(v) for v in range(-500, 1500)]
+        whole = QuantileSketch()
+        whole.add_many(values)
+        parts = []
+        for chunk in (values[:700], values[700:1200], values[1200:]):
+            part = QuantileSketch()
+            for v in chunk:
+                part.add(v)
+            parts.append(QuantileSketch.from_dict(part.to_dict()))
+        merged = merge_all(parts)
+        self.assertEqual(merged.count, whole.count)
+        self.assertEqual(merged.zero_count, 1)
+        for q in (0.1, 0.5, 0.95):
+            self.assertAlmostEqual(merged.quantile(q), whole.quantile(q), places=9)
+        self.assertEqual(merged.quantile(0.0), -500.0)
+        self.assertEqual(merged.quantile(1.0), 1499.0)
+
+    def test_empty_sketch(self) -> None:
+        sketch = QuantileSketch()
+        self.assertIsNone(sketch.quantile(0.5))
+        self.assertIsNone(sketch.mean)
+        self.assertEqual(QuantileSketch.from_dict(sketch.to_dict()).count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import contextlib
+import csv
+import hashlib
+import io
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.bench.run_benchmarks import compare, ensure_dataset, run_suite
+from scripts.bench.synth_artifacts import L1_HEADER, ORDERS_HEADER, generate
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _digest(run_dir: Path) -> dict:
+    return {p.name: hashlib.sha256(p.read_bytes()).hexdigest() for p in sorted(run_dir.iterdir())
+            if p.name != "run_metadata.json"}
+
+
+class SynthArtifactsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_orders_header_matches_logger(self) -> None:
+        source = (REPO_ROOT / "BotG" / "Telemetry" / "OrderLifecycleLogger.cs").read_text(encoding="utf-8")
+        block = re.search(r"HeaderColumns\s*=\s*new\[\]\s*\{(.*?)\};", source, re.S)
+        self.assertIsNotNone(block)
+        self.assertEqual(tuple(re.findall(r'"([^"]+)"', block.group(1))), tuple(ORDERS_HEADER))
+
+    def test_l1_header_matches_logger(self) -> None:
+        source = (REPO_ROOT / "BotG" / "Telemetry" / "Level1SnapshotLogger.cs").read_text(encoding="utf-8")
+        header = re.search(r'AppendAllText\(_filePath, "([^"]+)"', source)
+        self.assertIsNotNone(header)
+        self.assertEqual(tuple(header.group(1).split(",")), tuple(L1_HEADER))
+
+    def test_fill_count_and_determinism(self) -> None:
+        manifest = generate(self.tmp / "a", 500, symbols=2, seed=3)
+        generate(self.tmp / "b", 500, symbols=2, seed=3)
+        self.assertEqual(_digest(self.tmp / "a"), _digest(self.tmp / "b"))
+
+        with (self.tmp / "a" / "orders.csv").open(encoding="utf-8", newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        fills = sum(1 for r in rows if r["phase"] == "FILL")
+        self.assertGreaterEqual(fills, 500)
+        self.assertEqual(manifest["fills"], fills)
+        self.assertEqual({r["symbol"] for r in rows}, set(manifest["symbols"]))
+
+    def test_compare_flags_regressions(self) -> None:
+        base = {"results": [{"entry": "validator", "fills": 1000, "seconds": 1.0, "peak_rss_mb": 50.0}]}
+        current = {"results": [{"entry": "validator", "fills": 1000, "seconds": 1.5, "peak_rss_mb": 52.0}]}
+        regressions = compare(current, base, threshold=0.25)
+        self.assertEqual([(r["metric"], r["change"]) for r in regressions], [("seconds", 0.5)])
+
+    def test_benchmark_leaves_cached_dataset_untouched(self) -> None:
+        run = ensure_dataset(self.tmp / "data", 200, symbols=2, seed=5)
+        listing = {p.name: p.read_bytes() for p in run.iterdir()}
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = run_suite([200], ["reconstruct", "join_l1_fills"], self.tmp / "data", symbols=2, seed=5,
+                               work_dir=self.tmp / "work")
+        self.assertEqual([r["returncode"] for r in report["results"]], [0, 0], report["results"])
+        self.assertEqual({p.name: p.read_bytes() for p in run.iterdir()}, listing)
+        work = self.tmp / "work" / "work_200"
+        self.assertTrue((work / "closed_trades_fifo_reconstructed.csv").exists())
+        self.assertTrue((work / "perf_summary.json").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
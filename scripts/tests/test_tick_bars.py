@@ -0,0 +1,82 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from path_issues.reconstruct_fifo import load_bars
+from scripts.analyzers.tick_bars import (BAR_COLUMNS, build_bars, build_timeframes, load_bars_npz, load_timeframes,
+                                         read_ticks, run, timeframe_minutes)
+
+# Level1SnapshotLogger layout, "o" timestamps; one bad quote and one lower-case symbol
+TICKS_CSV = """timestamp_utc,symbol,bid,ask,spread_pips,source_server
+2025-01-06T10:00:00.1000000Z,EURUSD,1.10000,1.10002,0.2,Demo
+2025-01-06T10:00:00.1000000Z,XAUUSD,2350.10,2350.40,3,Demo
+2025-01-06T10:00:30.0000000Z,EURUSD,1.10010,1.10012,0.2,Demo
+2025-01-06T10:00:59.9990000Z,eurusd,1.09990,1.09993,0.3,Demo
+2025-01-06T10:01:10.0000000Z,EURUSD,0,1.10000,0,Demo
+2025-01-06T10:01:20.0000000Z,EURUSD,1.10005,1.10007,0.2,Demo
+2025-01-06T10:04:59.0000000Z,EURUSD,1.10020,1.10021,0.1,Demo
+2025-01-06T10:05:00.0000000Z,EURUSD,1.10030,1.10032,0.2,Demo
+2025-01-06T10:14:00.0000000Z,XAUUSD,2351.00,2351.20,2,Demo
+"""
+T0 = 1736157600000  # 2025-01-06T10:00:00Z
+
+
+class TickBarsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.l1 = self.tmp / "l1_snapshots.csv"
+        self.l1.write_text(TICKS_CSV, encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_timeframes(self) -> None:
+        self.assertEqual([timeframe_minutes(t) for t in ("M1", "m15", "H1", "D1")], [1, 15, 60, 1440])
+        with self.assertRaises(ValueError):
+            timeframe_minutes("T5")
+        self.assertEqual(load_timeframes(), ["M1", "M5", "M15"])
+        self.assertEqual(load_timeframes(self.tmp / "missing.json"), ["M1", "M5", "M15"])
+
+    def test_m1_bars(self) -> None:
+        ticks = read_ticks(self.l1)
+        self.assertEqual(len(ticks), 8)
+        bars = build_bars(ticks, 1)
+        eur = bars[bars["symbol"] == "EURUSD"].set_index("timestamp_ms")
+        self.assertEqual(list(eur.index), [T0, T0 + 60_000, T0 + 4 * 60_000, T0 + 5 * 60_000])
+        first = eur.loc[T0]
+        self.assertEqual((first["bid_open"], first["bid_high"], first["bid_low"], first["bid_close"]),
+                         (1.1, 1.1001, 1.0999, 1.0999))
+        self.assertEqual((first["ask_high"], first["ticks"]), (1.10012, 3))
+        self.assertAlmostEqual(first["open"], 1.10001)
+        self.assertAlmostEqual(first["low"], 1.099915)
+
+    def test_rollup_matches_direct_build(self) -> None:
+        ticks = read_ticks(self.l1)
+        rolled = build_timeframes(ticks, ["M15", "M1", "M5"])
+        self.assertEqual(list(rolled), ["M1", "M5", "M15"])
+        for name, minutes in (("M5", 5), ("M15", 15)):
+            pd.testing.assert_frame_equal(rolled[name], build_bars(ticks, minutes))
+
+    def test_outputs_feed_reconstruct(self) -> None:
+        out = self.tmp / "bars"
+        manifest = run(self.l1, out, ["M1", "M5"])
+        self.assertEqual(manifest["symbols"], ["EURUSD", "XAUUSD"])
+        self.assertEqual(json.loads((out / "bars_manifest.json").read_text())["ticks"], 8)
+        self.assertTrue((out / "eurusd_m5_bars.csv").exists())
+
+        bars = load_bars(str(out), "EURUSD", T0, T0 + 4 * 60_000)
+        self.assertEqual([b.timestamp for b in bars], [T0, T0 + 60_000, T0 + 4 * 60_000])
+        self.assertEqual(str(bars[0].high), "1.10011")
+
+        npz = load_bars_npz(out / "bars_M1.npz", "xauusd")
+        csv_bars = pd.read_csv(out / "xauusd_bars.csv")
+        self.assertEqual(list(npz.columns), ["symbol", *BAR_COLUMNS])
+        pd.testing.assert_frame_equal(npz.drop(columns="symbol"), csv_bars, check_dtype=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
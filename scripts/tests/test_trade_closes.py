@@ -0,0 +1,62 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.analyzers.trade_closes import TradeClosesIndex, iter_trade_closes, looks_like_trade_closes
+
+
+class TradeClosesReaderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmpdir.name)
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_reads_json_wrapper_and_legacy_text(self) -> None:
+        log = self.root / "trade_closes.log"
+        wrapped = {
+            "timestamp_iso": "2025-01-01T10:00:00.1234567Z",
+            "payload": {"orderId": "ORD-1", "Side": "Sell", "volume": 1000, "realized_pnl_usd": 4.5, "comment": "x" * 64},
+        }
+        log.write_text(
+            "line\n"
+            + json.dumps(wrapped) + "\n"
+            + "2025-01-01T10:01:00Z CLOSED T-7 Buy size=2 pnl=-1.25\n"
+            + "2025-01-01T10:02:00Z SYSTEM heartbeat\n",
+            encoding="utf-8",
+        )
+
+        records = list(iter_trade_closes(log))
+
+        self.assertTrue(looks_like_trade_closes(log))
+        self.assertEqual(len(records), 2)
+        first, second = records
+        self.assertEqual((first.order_id, first.side, first.size, first.pnl), ("ORD-1", "SELL", 1000.0, 4.5))
+        self.assertEqual(first.timestamp_iso, "2025-01-01T10:00:00.1234567Z")
+        self.assertEqual((second.trade_id, second.side, second.size, second.pnl_text), ("T-7", "BUY", 2.0, "-1.25"))
+        self.assertEqual((first.pnl_field, second.pnl_field), ("realized_pnl_usd", "pnl"))
+
+    def test_offset_index_gives_random_access(self) -> None:
+        log = self.root / "trade_closes.log"
+        with log.open("w", encoding="utf-8") as fh:
+            for i in range(200):
+                fh.write(json.dumps({"timestamp_iso": "2025-01-01T00:00:00Z",
+                                     "payload": {"order_id": f"ORD-{i}", "pnl": i}}) + "\n")
+
+        index = TradeClosesIndex.build(log)
+
+        self.assertIn("ORD-150", index)
+        [rec] = index.get("ord-150")
+        self.assertEqual(rec.pnl, 150.0)
+        self.assertEqual(index.get("ORD-999"), [])
+
+    def test_csv_export_is_not_mistaken_for_log(self) -> None:
+        export = self.root / "trade_closes_like.csv"
+        export.write_text("trade_id,close_time,pnl\nT1,2025-01-01T00:00:00Z,1.0\n", encoding="utf-8")
+        self.assertFalse(looks_like_trade_closes(export))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import csv
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from scripts.analyzers.writer_cadence import main, run
+
+T0 = datetime(2025, 1, 6, 9, 0, 0, tzinfo=timezone.utc)
+
+
+def _stamp(ms: float) -> str:
+    return (T0 + timedelta(milliseconds=ms)).strftime("%Y-%m-%dT%H:%M:%S.%f") + "Z"
+
+
+class WriterCadenceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.run_dir = Path(self._tmp.name) / "run"
+        self.run_dir.mkdir()
+        # One snapshot a second for 10 minutes, except a 6 s stall at t=300 s and a late row after t=400 s
+        times = [s * 1000 for s in range(600) if not 300 < s < 306]
+        times.insert(times.index(400_000) + 1, 399_500)
+        self._write("risk_snapshots.csv", ["timestamp_utc", "equity"], [(_stamp(t), 10000) for t in times])
+        self._write("telemetry.csv", ["timestamp_iso", "ticksPerSec"],
+                    [(_stamp(m * 60_000), 10) for m in range(11)])
+        # Three slow fills inside the stall, one slow fill outside it, and fast fills everywhere
+        orders = []
+        for i, (fill_ms, latency) in enumerate([(302_000, 900), (303_500, 400), (305_000, 2500), (100_000, 600)]
+                                                + [(10_000 + 7_000 * k, 40) for k in range(80)]):
+            orders.append(("REQUEST", _stamp(fill_ms - latency), "", f"O{i}"))
+            orders.append(("FILL", _stamp(fill_ms), latency, f"O{i}"))
+        orders.sort(key=lambda r: r[1])
+        self._write("orders.csv", ["phase", "timestamp_iso", "latency_ms", "orderId"], orders)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _write(self, name, header, rows) -> None:
+        with (self.run_dir / name).open("w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    def test_stalls_clock_steps_and_latency_verdict(self) -> None:
+        summary = run(self.run_dir, self.run_dir / "out", chunk_rows=50)
+        risk = summary["files"]["risk_snapshots.csv"]
+        self.assertEqual(risk["expected_interval_ms"], 1000.0)
+        self.assertEqual((risk["stalls"], risk["missed_intervals"]), (1, 5))
+        self.assertEqual((risk["backward_jumps"], risk["max_backward_ms"]), (1, 500.0))
+        self.assertEqual(summary["files"]["telemetry.csv"]["stalls"], 0)
+        self.assertFalse(summary["files"]["orders.csv"]["periodic"])
+        self.assertLess(risk["burstiness"], 0)
+
+        latency = summary["latency"]
+        self.assertEqual((latency["fills"], latency["spikes"], latency["overlapped_spikes"]), (84, 4, 3))
+        # The fast fill at 304 s is in flight during the stall too
+        self.assertEqual((latency["spike_rate_overlapped"], latency["spike_rate_clean"]), (0.75, 1 / 80))
+        self.assertEqual(latency["verdict"], "likely")
+        with (self.run_dir / "out" / "writer_stalls.csv").open(newline="") as fh:
+            stalls = list(csv.DictReader(fh))
+        self.assertEqual(len(stalls), 1)
+        self.assertEqual((stalls[0]["start"], stalls[0]["gap_ms"]), ("2025-01-06T09:05:00.000000Z", "6000.0"))
+        self.assertEqual(stalls[0]["spikes_in_flight"], "3")
+
+    def test_configured_interval_and_chunking(self) -> None:
+        whole = run(self.run_dir, self.run_dir / "whole", chunk_rows=100_000)
+        pieces = run(self.run_dir, self.run_dir / "pieces", chunk_rows=7)
+        self.assertEqual((self.run_dir / "whole" / "writer_stalls.csv").read_text(),
+                         (self.run_dir / "pieces" / "writer_stalls.csv").read_text())
+        rounded = lambda s: json.loads(json.dumps(s["files"]), parse_float=lambda text: round(float(text), 6))
+        self.assertEqual(rounded(whole), rounded(pieces))
+
+        # A 2 s configured cadence turns the 6 s hole into two missed writes; the step back is no stall
+        out = self.run_dir / "cli"
+        self.assertEqual(main(["--run-dir", str(self.run_dir), "--out", str(out),
+                               "--interval", "risk_snapshots.csv=2", "--spike-ms", "5000"]), 0)
+        summary = json.loads((out / "writer_cadence.json").read_text())
+        self.assertEqual(summary["files"]["risk_snapshots.csv"]["missed_intervals"], 2)
+        self.assertEqual(summary["latency"]["verdict"], "ruled_out")
+
+
+if __name__ == "__main__":
+    unittest.main()
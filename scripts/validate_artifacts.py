@@ -13,6 +13,15 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Sequence, Tuple
 
+try:
+    from analyzers.perf import PerfRecorder, add_perf_args
+    from analyzers.prefix_scan import hours_without_rows, scan as prefix_scan
+    from analyzers.result_cache import ResultCache, add_cache_args, code_version, import_closure
+except ImportError:  # imported as scripts.validate_artifacts
+    from scripts.analyzers.perf import PerfRecorder, add_perf_args
+    from scripts.analyzers.prefix_scan import hours_without_rows, scan as prefix_scan
+    from scripts.analyzers.result_cache import ResultCache, add_cache_args, code_version, import_closure
+
 REQUIRED_FILES: Sequence[str] = (
     "orders.csv",
     "telemetry.csv",
@@ -312,9 +321,15 @@ def load_headers(path: Path) -> List[str]:
     return [h.strip() for h in header if h is not None]
 
 
-def validate_artifacts(artifacts_dir: Path, *, strict: bool = False) -> Dict[str, object]:
-    """Validate Gate2 artifacts and produce a result dictionary."""
+def validate_artifacts(artifacts_dir: Path, *, strict: bool = False, phase_scan: bool = False,
+                       perf: Optional[PerfRecorder] = None) -> Dict[str, object]:
+    """Validate Gate2 artifacts and produce a result dictionary.
+
+    ``phase_scan`` adds an informational ``orders_scan`` section (rows per
+    phase/hour); it costs one more pass over orders.csv, so it is off by default.
+    """
     base_path = Path(artifacts_dir)
+    perf = perf or PerfRecorder("validate_artifacts")
     result: Dict[str, object] = {
         "pass": False,
         "reasons": [],
@@ -346,6 +361,7 @@ def validate_artifacts(artifacts_dir: Path, *, strict: bool = False) -> Dict[str
         result["schema_ok"] = False
         return result
 
+    span = perf.begin("schema")
     # Validate orders schema via alias mapping
     orders_header = load_headers(base_path / "orders.csv")
     orders_resolution = resolve_columns(orders_header, ORDERS_ALIAS_MAP)
@@ -374,6 +390,9 @@ def validate_artifacts(artifacts_dir: Path, *, strict: bool = False) -> Dict[str
         if canonical in risk_resolution.mapping
     }
 
+    perf.end(span)
+
+    span = perf.begin("telemetry")
     # Telemetry span hours
     telemetry_path = base_path / "telemetry.csv"
     telemetry_span = compute_span_hours(
@@ -386,9 +405,13 @@ def validate_artifacts(artifacts_dir: Path, *, strict: bool = False) -> Dict[str
     if detect_constant_tps(telemetry_path):
         result["warnings"].append("constant-tps")
 
+    perf.end(span)
+
     # KPI calculations when schema ok
     if orders_resolution.ok:
+        span = perf.begin("orders_kpi")
         orders_stats = analyze_orders(base_path / "orders.csv", orders_resolution.mapping)
+        perf.end(span, rows=orders_stats["request_count"] + orders_stats["fill_count"])
         result["kpi"]["orders"] = orders_stats
         result["kpi"]["requests"] = orders_stats["request_count"]
         result["kpi"]["fills"] = orders_stats["fill_count"]
@@ -404,13 +427,29 @@ def validate_artifacts(artifacts_dir: Path, *, strict: bool = False) -> Dict[str
                 f"orders.fill_rate_percent={orders_stats['fill_rate_percent']} (<99.5)"
             )
 
+        span = perf.begin("orders_enrichment")
         enrichment = evaluate_order_enrichment(base_path / "orders.csv", orders_resolution.mapping)
+        perf.end(span, rows=enrichment["fills"] or 0)
         fills = enrichment["fills"] or 0
         if fills:
             missing_ratio = enrichment["missing_symbol_or_bidask"] / fills  # type: ignore[arg-type]
             if missing_ratio > 0.05:
                 result["warnings"].append("missing-symbol-or-bidask")
 
+        # Rows per phase / per hour from line prefixes (informational, no gate)
+        if phase_scan:
+            span = perf.begin("phase_scan")
+            counts = prefix_scan(base_path / "orders.csv", by_hour=True)
+            perf.end(span, rows=counts.lines)
+            if counts.phase_first:
+                result["orders_scan"] = {
+                    "lines": counts.lines,
+                    "phases": counts.phases,
+                    "other_lines": counts.other_lines,
+                    "rows_per_hour": counts.rows_per_hour,
+                    "hours_without_rows": hours_without_rows(counts.rows_per_hour or {}),
+                }
+
         slippage_samples: List[float] = enrichment["slippage_pips"]  # type: ignore[assignment]
         latency_samples: List[float] = orders_stats.get("latency_samples", [])  # type: ignore[assignment]
         if not latency_samples:
@@ -431,10 +470,12 @@ def validate_artifacts(artifacts_dir: Path, *, strict: bool = False) -> Dict[str
 
     risk_nonzero = {"R_used": False, "drawdown": False}
     if risk_resolution.ok:
+        span = perf.begin("risk")
         risk_path = base_path / "risk_snapshots.csv"
         with risk_path.open("r", encoding="utf-8-sig", newline="") as handle:
             reader = csv.DictReader(handle)
             for row in reader:
+                span.rows = (span.rows or 0) + 1
                 for key in risk_nonzero:
                     resolved = risk_resolution.mapping.get(key)
                     if not resolved:
@@ -446,6 +487,7 @@ def validate_artifacts(artifacts_dir: Path, *, strict: bool = False) -> Dict[str
                                 risk_nonzero[key] = True
                         except ValueError:
                             risk_nonzero[key] = True
+        perf.end(span)
         zero_columns = [col for col, has_nonzero in risk_nonzero.items() if not has_nonzero]
         if zero_columns:
             joined = ", ".join(sorted(zero_columns))
@@ -473,9 +515,27 @@ def main() -> int:
     parser.add_argument("--artifacts", required=True, help="Path to artifacts directory")
     parser.add_argument("--out", help="Optional output file for the validation report")
     parser.add_argument("--strict", action="store_true", help="Treat warnings as failures")
+    parser.add_argument("--phase-scan", action="store_true",
+                        help="Also report orders.csv rows per phase/hour (one extra pass over the file)")
+    add_perf_args(parser)
+    add_cache_args(parser)
     args = parser.parse_args()
 
-    results = validate_artifacts(Path(args.artifacts), strict=args.strict)
+    artifacts = Path(args.artifacts)
+    perf = PerfRecorder("validate_artifacts", args.profile)
+    cache = ResultCache.from_args(args)
+    with perf:
+        results = None
+        if cache is not None:
+            with perf.stage("cache_lookup"):
+                key = cache.key("validate_artifacts", code_version(*import_closure(Path(__file__))),
+                                dict(vars(args), artifacts=artifacts.resolve()),
+                                [artifacts / name for name in REQUIRED_FILES])
+                results = cache.restore(key)
+        if results is None:
+            results = validate_artifacts(artifacts, strict=args.strict, phase_scan=args.phase_scan, perf=perf)
+            if cache is not None:
+                cache.store(key, "validate_artifacts", payload=results)
     output = json.dumps(results, indent=2, ensure_ascii=False)
     print(output)
 
@@ -483,6 +543,10 @@ def main() -> int:
         out_path = Path(args.out)
         out_path.parent.mkdir(parents=True, exist_ok=True)
         out_path.write_text(output, encoding="utf-8")
+    # Without --out/--perf-dir validation stays read-only: nothing is written to the artifacts
+    perf_dir = args.perf_dir or (Path(args.out).parent if args.out else None)
+    if perf_dir:
+        perf.write(Path(perf_dir))
 
     return 0 if results.get("pass") else 1
 